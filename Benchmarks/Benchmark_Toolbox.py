@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the toolbox exporters and comparison routines on synthetic
+models, run against the simulated St7API backend (St7API_Sim.py)
+
+Usage:
+    python Benchmark_Toolbox.py
+        smallest scale, 10k plates and 10 stages
+    python Benchmark_Toolbox.py --plates 10000 100000 --stages 10 100
+    python Benchmark_Toolbox.py --full
+        10k/100k/1M plates x 10/100/500 stages, takes hours
+    python Benchmark_Toolbox.py --only export_shearinputs MaxResult
+    python Benchmark_Toolbox.py --only api_call_unchecked api_call_checked
+        overhead of the St7Error return code checks per API call
+
+Every result is appended to output/benchmark_history.jsonl (or the file
+given with --history) and compared with the median of the previous runs of
+the same benchmark, scale and machine, so a slower hot loop shows up as a
+regression. The output folder is not tracked by git.
+"""
+
+import argparse
+import contextlib
+import ctypes
+import datetime
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BenchFolder = os.path.dirname(os.path.abspath(__file__))
+RepoFolder = os.path.dirname(BenchFolder)
+sys.path.insert(0, RepoFolder)
+sys.path.insert(0, BenchFolder)
+
+# The simulated backend must be installed before the toolbox is imported
+import St7API_Sim
+sys.modules['St7API'] = St7API_Sim
+
+import numpy as np
+import pandas as pd
+import St7Toolbox_JA as St7Tbx
+import ComparisonToolbox as SC
+
+PlateScales = [10000, 100000, 1000000]
+StageScales = [10, 100, 500]
+OutputFolder = os.path.join(BenchFolder, 'output')
+HistoryFile = os.path.join(OutputFolder, 'benchmark_history.jsonl')
+
+# Synthetic design result columns read by the comparison routines
+DesignColumns = ['Plate ID', 'comp_bot', 'comp_top', 'asx_bot', 'asy_bot',
+                 'asx_top', 'asy_top', 'ashear']
+
+
+def model_paths(workdir):
+    """
+    Encoded model, temporary folder and result file names. The exporters
+    write next to the model folder.
+    """
+
+    modelfolder = os.path.join(workdir, 'model')
+    os.makedirs(modelfolder, exist_ok=True)
+    modelname = os.path.join(modelfolder, 'Synthetic.st7')
+
+    return (modelname.encode(), workdir.encode(),
+            modelname.replace('.st7', '.NLA').encode())
+
+
+def plate_exporter(exportFunction):
+    """
+    Benchmark of a plate exporter over every group
+    """
+
+    def setup(workdir, numPlates, numStages):
+        St7API_Sim.build_model(numPlates, numStages)
+        modelname_bt, tempfolder_bt, resultfile_bt = model_paths(workdir)
+        groupID = list(range(1, St7API_Sim.Model['numGroups'] + 1))
+
+        return lambda: exportFunction(modelname_bt, tempfolder_bt,
+                                      resultfile_bt, groupID, numPlates, 0.4)
+
+    return setup
+
+
+def setup_assign_plates_prop(workdir, numPlates, numStages):
+    St7API_Sim.build_model(numPlates, 1)
+    modelname_bt, tempfolder_bt, resultfile_bt = model_paths(workdir)
+    fileOut_bt = modelname_bt.replace(b'.st7', b'_out.st7')
+
+    DF = pd.DataFrame({'Property Name': np.arange(1, numPlates + 1),
+                       'PlateType': 'Plate/Shell',
+                       'Material': 'Isotropic',
+                       'Modulus': 30000.0, 'Poisson Ratio': 0.2,
+                       'Density': 2.5, 'Thermal Expansion': 1e-5,
+                       'Viscous Damping': 0.0, 'Damping Ratio': 0.05,
+                       'Conductivity': 0.0, 'Specific Heat': 0.0,
+                       'Membrane Thickness': 0.4, 'Membrane Bending': 0.4})
+    groupID = list(range(1, St7API_Sim.Model['numGroups'] + 1))
+
+    return lambda: St7Tbx.assign_plates_prop(modelname_bt, tempfolder_bt,
+                                             fileOut_bt, DF, groupID,
+                                             numPlates, False)
+
+
+# Design result files are kept between benchmarks of the same scale
+DesignFiles = {}
+
+
+def design_files(workdir, numPlates, numStages):
+    """
+    Synthetic per stage design results, as produced by the design spreadsheet
+    """
+
+    key = (numPlates, numStages)
+    if key in DesignFiles:
+        return DesignFiles[key]
+
+    rng = np.random.default_rng(0)
+    folder = os.path.join(workdir, 'design_%d_%d' % key)
+    os.makedirs(folder, exist_ok=True)
+
+    all_files = []
+    for stage in range(1, numStages + 1):
+        data = np.empty((numPlates, len(DesignColumns)))
+        data[:, 0] = np.arange(1, numPlates + 1)
+        data[:, 1:3] = rng.uniform(0.0, 30.0, (numPlates, 2))
+        data[:, 3:8] = rng.uniform(0.0, 13000.0, (numPlates, 5))
+        data[rng.random(numPlates) < 0.3, 3:8] = 0.0
+        fname = os.path.join(folder, 'results_%d.csv' % stage)
+        pd.DataFrame(data, columns=DesignColumns).to_csv(fname, index=False)
+        all_files.append(fname)
+
+    DesignFiles[key] = all_files
+
+    return all_files
+
+
+def comparison(compareFunction):
+    """
+    Benchmark of a comparison routine over the per stage design results
+    """
+
+    def setup(workdir, numPlates, numStages):
+        all_files = design_files(workdir, numPlates, numStages)
+        savepath = os.path.join(workdir, 'compare') + os.sep
+        os.makedirs(savepath, exist_ok=True)
+
+        return lambda: compareFunction(savepath, all_files, 'Bench')
+
+    return setup
+
+
+def native_function():
+    """
+    A fresh ctypes function object of the C library, standing in for an
+    St7API function to time the errcheck hook on a real foreign call
+    """
+
+    if sys.platform == 'win32':
+        libc = ctypes.CDLL('msvcrt')
+    else:
+        libc = ctypes.CDLL(None)
+    func = libc.labs
+    func.argtypes = [ctypes.c_long]
+    func.restype = ctypes.c_long
+
+    return func
+
+
+def api_calls(checkMode):
+    """
+    Benchmark of 10 successful foreign calls per plate, unchecked, checked
+    and raising on failure, or checked inside collect_errors()
+    """
+
+    def setup(workdir, numPlates, numStages):
+        func = native_function()
+        if checkMode:
+            func.errcheck = St7Tbx.check_result
+        numCalls = 10 * numPlates
+
+        def run():
+            context = St7Tbx.collect_errors() if checkMode == 'collect' \
+                else contextlib.nullcontext()
+            with context:
+                for ind in range(numCalls):
+                    func(0)
+
+        return run
+
+    return setup
+
+
+# Benchmark name: (setup function, depends on the number of stages)
+Benchmarks = {
+    'export_shearinputs': (plate_exporter(St7Tbx.export_shearinputs), True),
+    'export_cwinputs': (plate_exporter(St7Tbx.export_cwinputs), True),
+    'export_ES_Inputs': (plate_exporter(St7Tbx.export_ES_Inputs), True),
+    'assign_plates_prop': (setup_assign_plates_prop, False),
+    'api_call_unchecked': (api_calls(None), False),
+    'api_call_checked': (api_calls('raise'), False),
+    'api_call_collect': (api_calls('collect'), False),
+    'MaxResult': (comparison(SC.MaxResult), True),
+    'MaxResultStage': (comparison(SC.MaxResultStage), True),
+    'MaxBarSize': (comparison(SC.MaxBarSize), True)}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=RepoFolder,
+                                       stderr=subprocess.DEVNULL
+                                       ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def load_history(historyFile=HistoryFile):
+    if not os.path.exists(historyFile):
+        return []
+
+    with open(historyFile) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def baseline(history, record):
+    """
+    Median time of the previous successful runs of the same benchmark,
+    scale and machine, None if there is none
+    """
+
+    previous = [entry['seconds'] for entry in history
+                if entry['status'] == 'ok'
+                and entry['benchmark'] == record['benchmark']
+                and entry['plates'] == record['plates']
+                and entry['stages'] == record['stages']
+                and entry['machine'] == record['machine']]
+    if not previous:
+        return None
+
+    return float(np.median(previous))
+
+
+def run_benchmark(name, workdir, numPlates, numStages, repeat):
+    """
+    Time a benchmark, best of repeat runs
+
+    Returns
+    -------
+    record : DICT
+        History entry of the run
+    """
+
+    setup, _ = Benchmarks[name]
+    record = {'time': datetime.datetime.now().isoformat(timespec='seconds'),
+              'commit': git_commit(), 'machine': platform.node(),
+              'python': platform.python_version(),
+              'numpy': np.__version__, 'pandas': pd.__version__,
+              'benchmark': name, 'plates': numPlates, 'stages': numStages}
+
+    times = []
+    try:
+        for ind in range(repeat):
+            run = setup(workdir, numPlates, numStages)
+            with contextlib.redirect_stdout(io.StringIO()):
+                t0 = time.perf_counter()
+                run()
+                times.append(time.perf_counter() - t0)
+        record['status'] = 'ok'
+        record['seconds'] = min(times)
+        record['apiCalls'] = sum(St7API_Sim.CallCounts.values())
+    except Exception as error:
+        record['status'] = 'error'
+        record['seconds'] = None
+        record['error'] = '%s: %s' % (type(error).__name__, error)
+
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--plates', type=int, nargs='+',
+                        default=PlateScales[:1])
+    parser.add_argument('--stages', type=int, nargs='+',
+                        default=StageScales[:1])
+    parser.add_argument('--full', action='store_true',
+                        help='every plate and stage scale')
+    parser.add_argument('--only', nargs='+', choices=sorted(Benchmarks),
+                        help='benchmarks to run, default all')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='slowdown ratio reported as a regression')
+    parser.add_argument('--no-save', action='store_true',
+                        help='do not append to the history file')
+    parser.add_argument('--history', default=HistoryFile,
+                        help='history file, default output/%s'
+                        % os.path.basename(HistoryFile))
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args(argv)
+
+    plateScales = PlateScales if args.full else args.plates
+    stageScales = StageScales if args.full else args.stages
+    names = args.only or list(Benchmarks)
+
+    history = load_history(args.history)
+    records = []
+    regressions = []
+    workdir = tempfile.mkdtemp(prefix='St7Bench_')
+    try:
+        for numPlates in plateScales:
+            for name in names:
+                stageDependent = Benchmarks[name][1]
+                for numStages in (stageScales if stageDependent else [None]):
+                    record = run_benchmark(name, workdir, numPlates,
+                                           numStages or 1, args.repeat)
+                    record['stages'] = numStages
+                    records.append(record)
+
+                    label = '%-20s plates %8d stages %5s' % (
+                        name, numPlates, numStages or '-')
+                    if record['status'] != 'ok':
+                        print('%s  ERROR %s' % (label, record['error']))
+                        continue
+
+                    reference = baseline(history, record)
+                    if reference:
+                        ratio = record['seconds'] / reference
+                        flag = ''
+                        if ratio > args.threshold:
+                            flag = '  REGRESSION'
+                            regressions.append(record)
+                        print('%s  %9.3f s  (%.2fx baseline)%s'
+                              % (label, record['seconds'], ratio, flag))
+                    else:
+                        print('%s  %9.3f s' % (label, record['seconds']))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if not args.no_save:
+        historyFolder = os.path.dirname(os.path.abspath(args.history))
+        os.makedirs(historyFolder, exist_ok=True)
+        with open(args.history, 'a') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        print('Results appended to ' + args.history)
+
+    if regressions and args.fail_on_regression:
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
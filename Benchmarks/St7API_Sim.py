@@ -0,0 +1,608 @@
+# -*- coding: utf-8 -*-
+"""
+Simulated St7API backend for benchmarking the toolbox without Strand7
+
+The constants are read from the St7API.py binding, the functions used by the
+toolbox are replaced by Python functions answering from a synthetic model built
+with build_model(). Functions that are not simulated succeed without writing
+anything. Install it before importing the toolbox:
+
+    import sys
+    import St7API_Sim
+    sys.modules['St7API'] = St7API_Sim
+    import St7Toolbox_JA
+"""
+
+import ctypes
+import functools
+import os
+import re
+
+import numpy as np
+
+# Constants of the real binding, everything before the DLL is loaded
+BindingFile = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, 'St7API.py')
+with open(BindingFile) as f:
+    BindingText = f.read()
+exec(BindingText.split('_ST7API = ')[0])
+
+# Argument types of the binding functions, checked by the simulated
+# functions decorated with checked
+ArgTypes = dict(re.findall(r'^(St7\w+)\.argtypes = (\[.*\])$', BindingText,
+                           re.MULTILINE))
+
+c_char = ctypes.c_char
+c_char_p = ctypes.c_char_p
+c_bool = ctypes.c_bool
+c_long = ctypes.c_long
+c_double = ctypes.c_double
+create_string_buffer = ctypes.create_string_buffer
+
+# Synthetic model answered by the simulated functions
+Model = {}
+
+# Number of calls of each simulated function
+CallCounts = {}
+
+# Columns written by the simulated combined plate result queries
+kMaxResultColumnsSim = 11
+
+
+def build_model(numPlates, numStages, numBeams=0, numNodes=None,
+                numGroups=4, seed=0):
+    """
+    Build a synthetic plate model with its staged results
+
+    Parameters
+    ----------
+    numPlates : INTEGER
+        Number of Quad4 plates
+    numStages : INTEGER
+        Number of result cases, every 10th stage is a Reset stage
+    numBeams : INTEGER, optional
+        Number of beams
+        DEFAULT is 0
+    numNodes : INTEGER, optional
+        Number of nodes
+        DEFAULT is None, one node per plate plus a border row
+    numGroups : INTEGER, optional
+        Number of groups, entities are spread evenly
+        DEFAULT is 4
+    seed : INTEGER, optional
+        Random generator seed
+        DEFAULT is 0
+
+    """
+
+    rng = np.random.default_rng(seed)
+    if numNodes is None:
+        numNodes = numPlates + int(np.sqrt(max(numPlates, 1))) + 2
+
+    Model.clear()
+    CallCounts.clear()
+    Model['Totals'] = {tyNODE: numNodes, tyBEAM: numBeams,
+                       tyPLATE: numPlates, tyBRICK: 0}
+    Model['numGroups'] = numGroups
+    Model['GroupIDs'] = np.arange(1, numGroups + 1)
+    Model['Group'] = {
+        tyNODE: rng.integers(1, numGroups + 1, numNodes),
+        tyBEAM: rng.integers(1, numGroups + 1, numBeams),
+        tyPLATE: rng.integers(1, numGroups + 1, numPlates)}
+    Model['PlateProp'] = rng.integers(1, 5, numPlates)
+    Model['PropThickness'] = {1: 0.3, 2: 0.45, 3: 0.6, 4: 0.8}
+    Model['PlateArea'] = rng.uniform(0.5, 1.5, numPlates)
+    Model['NodeXYZ'] = rng.uniform(0.0, 100.0, (numNodes, 3))
+    Model['PlateNodes'] = rng.integers(1, numNodes + 1, (numPlates, 4))
+
+    # Results of each entity, the same values are returned for every case
+    Model['PlateRes'] = np.ascontiguousarray(
+        rng.standard_normal((numPlates, kMaxResultColumnsSim)))
+    Model['BeamRes'] = np.ascontiguousarray(
+        rng.standard_normal((max(numBeams, 1), 12)))
+    Model['NodeRes'] = np.ascontiguousarray(
+        rng.standard_normal((numNodes, 6)))
+    Model['BeamLength'] = rng.uniform(1.0, 5.0, numBeams)
+
+    Model['CaseNames'] = []
+    for stage in range(1, numStages + 1):
+        stagename = 'Reset' if stage % 10 == 0 else 'Excavate'
+        Model['CaseNames'].append('Increment [%d: %s %d] : 1'
+                                  % (stage, stagename, stage))
+
+    # Group g is activated in stage 1 + (g - 1) * numStages // numGroups
+    birth = 1 + np.arange(numGroups) * numStages // numGroups
+    Model['StageGroups'] = (np.arange(1, numStages + 1)[:, None]
+                            >= birth[None, :])
+
+    return Model
+
+
+def count(name):
+    CallCounts[name] = CallCounts.get(name, 0) + 1
+
+
+def checked(func):
+    """
+    Check the number and types of the arguments of a simulated function
+    against the argtypes of the binding, as ctypes does for the DLL
+    """
+
+    argtypes = eval(ArgTypes[func.__name__], dict(vars(ctypes),
+                                                  ctypes=ctypes))
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        if len(args) != len(argtypes):
+            raise TypeError('%s takes %d arguments, %d given'
+                            % (func.__name__, len(argtypes), len(args)))
+        for ind, (argtype, arg) in enumerate(zip(argtypes, args)):
+            try:
+                argtype.from_param(arg)
+            except TypeError as error:
+                raise ctypes.ArgumentError('%s argument %d: %s'
+                                           % (func.__name__, ind + 1, error))
+        return func(*args)
+
+    return wrapper
+
+
+def set_value(target, value):
+    """
+    Write an output argument passed either as a ctypes scalar or an array
+    """
+
+    if hasattr(target, 'value'):
+        target.value = value
+    else:
+        target[0] = value
+
+
+def copy_row(target, source, row, numValues):
+    """
+    Copy numValues doubles of a row of a C contiguous array into a buffer
+    """
+
+    ctypes.memmove(target, source.ctypes.data + row * source.strides[0],
+                   numValues * 8)
+
+
+# Files and model information
+
+def St7Init():
+    return 0
+
+
+def St7Release():
+    return 0
+
+
+def St7OpenFile(uID, FileName, ScratchPath):
+    count('St7OpenFile')
+    return 0
+
+
+def St7CloseFile(uID):
+    return 0
+
+
+def St7SaveFile(uID):
+    return 0
+
+
+def St7SaveFileTo(uID, FileName):
+    count('St7SaveFileTo')
+    return 0
+
+
+def St7GetTitle(uID, TitleType, Title, MaxStringLen):
+    Title.value = b'Synthetic model'
+    return 0
+
+
+def St7GetNumGroups(uID, NumGroups):
+    set_value(NumGroups, Model['numGroups'])
+    return 0
+
+
+def St7GetGroupIDName(uID, GroupID, GroupName, MaxStringLen):
+    GroupName.value = ('Model\\GROUP%d' % GroupID).encode()
+    return 0
+
+
+def St7GetGroupByIndex(uID, GroupIndex, GroupName, MaxStringLen, GroupID):
+    GroupID.value = int(Model['GroupIDs'][GroupIndex - 1])
+    GroupName.value = ('Model\\GROUP%d' % GroupID.value).encode()
+    return 0
+
+
+def St7GetGroupParent(uID, GroupID, ParentID):
+    set_value(ParentID, 0)
+    return 0
+
+
+def St7GetNumStages(uID, NumStages):
+    set_value(NumStages, len(Model['StageGroups']))
+    return 0
+
+
+def St7GetStageGroupState(uID, Stage, GroupID, State):
+    count('St7GetStageGroupState')
+    col = np.flatnonzero(Model['GroupIDs'] == GroupID)
+    if not len(col):
+        return ERR7_GroupIdDoesNotExist
+    set_value(State, bool(Model['StageGroups'][Stage - 1, col[0]]))
+    return 0
+
+
+def St7GetTotal(uID, Entity, Total):
+    set_value(Total, Model['Totals'][Entity])
+    return 0
+
+
+def St7GetElementGroup(uID, Entity, EntityNum, GroupID):
+    count('St7GetElementGroup')
+    GroupID.value = int(Model['Group'][Entity][EntityNum - 1])
+    return 0
+
+
+St7GetEntityGroup = St7GetElementGroup
+
+
+def St7GetElementProperty(uID, Entity, EntityNum, PropNum):
+    count('St7GetElementProperty')
+    PropNum.value = int(Model['PlateProp'][EntityNum - 1])
+    return 0
+
+
+def St7GetPlateThickness(uID, PropNum, Thickness):
+    count('St7GetPlateThickness')
+    thickness = Model['PropThickness'][PropNum]
+    if hasattr(Thickness, 'value'):
+        Thickness.value = thickness
+    else:
+        Thickness[0] = thickness
+        Thickness[1] = thickness
+    return 0
+
+
+def St7GetElementData(uID, Entity, EntityNum, Data):
+    count('St7GetElementData')
+    if Entity == tyBEAM:
+        set_value(Data, float(Model['BeamLength'][EntityNum - 1]))
+    else:
+        set_value(Data, float(Model['PlateArea'][EntityNum - 1]))
+    return 0
+
+
+def St7GetNodeXYZ(uID, NodeNum, XYZ):
+    count('St7GetNodeXYZ')
+    copy_row(XYZ, Model['NodeXYZ'], NodeNum - 1, 3)
+    return 0
+
+
+def St7GetElementCentroid(uID, Entity, EntityNum, FaceEdgeNum, XYZ):
+    count('St7GetElementCentroid')
+    if Entity == tyPLATE:
+        Centroid = Model['NodeXYZ'][Model['PlateNodes'][EntityNum - 1] - 1]
+        XYZ[:] = Centroid.mean(axis=0)
+    else:
+        copy_row(XYZ, Model['NodeXYZ'],
+                 (EntityNum - 1) % len(Model['NodeXYZ']), 3)
+    return 0
+
+
+def St7GetElementConnection(uID, Entity, EntityNum, Connection):
+    count('St7GetElementConnection')
+    Connection[0] = 4
+    for ind in range(4):
+        Connection[ind + 1] = int(Model['PlateNodes'][EntityNum - 1, ind])
+    return 0
+
+
+def St7GetNumElementResultGaussPoints(uID, Entity, EntityNum, NumPoints):
+    set_value(NumPoints, 4)
+    return 0
+
+
+# Property and model edits
+
+def St7GetTotalProperties(uID, PropTotal, PropLastNum):
+    for ind in range(4):
+        PropTotal[ind] = 4
+        PropLastNum[ind] = 4
+    return 0
+
+
+def St7NewPlateProperty(uID, PropNum, PlateType, MaterialType, PropName):
+    count('St7NewPlateProperty')
+    return 0
+
+
+def St7SetPlateIsotropicMaterial(uID, PropNum, Doubles):
+    count('St7SetPlateIsotropicMaterial')
+    return 0
+
+
+def St7SetPlateOrthotropicMaterial(uID, PropNum, Doubles):
+    count('St7SetPlateOrthotropicMaterial')
+    return 0
+
+
+def St7SetPlateThickness(uID, PropNum, Thickness):
+    count('St7SetPlateThickness')
+    return 0
+
+
+def St7SetElementProperty(uID, Entity, EntityNum, PropNum):
+    count('St7SetElementProperty')
+    return 0
+
+
+# Results
+
+def St7OpenResultFile(uID, ResultFile, SpectralName, Combinations,
+                      NumPrimary, NumSecondary):
+    count('St7OpenResultFile')
+    # A user result file written by St7CloseResFile is read back
+    Model['OpenResFile'] = Model.get('ResFiles', {}).get(ResultFile)
+    NumPrimary.value = len(case_names())
+    NumSecondary.value = 0
+    return 0
+
+
+def case_names():
+    if Model.get('OpenResFile') is not None:
+        return Model['OpenResFile']['CaseNames']
+    return Model['CaseNames']
+
+
+def St7CloseResultFile(uID):
+    count('St7CloseResultFile')
+    return 0
+
+
+def St7GetResultCaseName(uID, CaseNum, CaseName, MaxStringLen):
+    if not 1 <= CaseNum <= len(case_names()):
+        return ERR7_ExceededResultCase
+    CaseName.value = case_names()[CaseNum - 1].encode()
+    return 0
+
+
+def St7GetResultCaseConvergence(uID, CaseNum, Converged):
+    set_value(Converged, CaseNum not in Model.get('Unconverged', ()))
+    return 0
+
+
+def St7GetNumEnvelopes(uID, NumLimit, NumComb, NumFactors):
+    set_value(NumLimit, len(Model.setdefault('LimitEnvelopes', [])))
+    set_value(NumComb, 0)
+    set_value(NumFactors, 0)
+    return 0
+
+
+def St7AddLimitEnvelope(uID, EnvelopeType, EnvelopeName):
+    Model.setdefault('LimitEnvelopes', []).append(EnvelopeName.decode())
+    return 0
+
+
+def St7GenerateEnvelopes(uID, NumLimit, NumComb, NumFactors):
+    count('St7GenerateEnvelopes')
+    # Envelope cases answer the same results as the primary cases
+    Model['CaseNames'] += Model.get('LimitEnvelopes', [])
+    return St7GetNumEnvelopes(uID, NumLimit, NumComb, NumFactors)
+
+
+def St7GetPlateResultArray(uID, ResultType, ResultSubType, PlateNum, CaseNum,
+                           SampleLocation, Surface, Layer, NumPoints,
+                           NumColumns, Results):
+    count('St7GetPlateResultArray')
+    if Model.get('OpenResFile') is not None:
+        return read_res_file(tyPLATE, ResultType, PlateNum, CaseNum,
+                             Results, NumPoints, NumColumns)
+    numColumns = kMaxResultColumnsSim if ResultSubType == stPlateCombined \
+        else 6
+    # Quad4 plates, the same values at each of their 4 Gauss points or nodes
+    numPoints = 1 if SampleLocation == AtCentroid else 4
+    NumPoints.value = numPoints
+    NumColumns.value = numColumns
+    for point in range(numPoints):
+        ctypes.memmove(ctypes.addressof(Results) + point * numColumns * 8,
+                       Model['PlateRes'].ctypes.data
+                       + (PlateNum - 1) * Model['PlateRes'].strides[0],
+                       numColumns * 8)
+    return 0
+
+
+def St7GetBeamResultEndPos(uID, ResultType, ResultSubType, BeamNum, CaseNum,
+                           NumColumns, Results):
+    count('St7GetBeamResultEndPos')
+    if Model.get('OpenResFile') is not None:
+        return read_res_file(tyBEAM, ResultType, BeamNum, CaseNum, Results,
+                             None, NumColumns)
+    NumColumns.value = 6
+    copy_row(Results, Model['BeamRes'], BeamNum - 1, 12)
+    return 0
+
+
+def St7GetBeamResultArray(uID, ResultType, ResultSubType, BeamNum, MinStations,
+                          CaseNum, NumStations, NumColumns, BeamPos,
+                          BeamResult):
+    count('St7GetBeamResultArray')
+    # Evenly spaced stations, the end results of the beam offset by the
+    # station index
+    length = float(Model['BeamLength'][BeamNum - 1])
+    numStations = max(MinStations, 2)
+    NumStations.value = numStations
+    NumColumns.value = 6
+    for station in range(numStations):
+        BeamPos[station] = length * station / (numStations - 1)
+        for col in range(6):
+            BeamResult[station * 6 + col] = \
+                Model['BeamRes'][BeamNum - 1, col] + station
+    return 0
+
+
+# User result files
+
+# Values per entity of each user result file quantity
+ResFileSizes = {(tyPLATE, rtPlateStress): kPlateShellResFileStressSize,
+                (tyBEAM, rtBeamForce): kBeamResFileForceSize}
+
+
+@checked
+def St7NewResFile(uID, FileName, SolverType):
+    count('St7NewResFile')
+    Model['NewResFile'] = {'FileName': FileName, 'CaseNames': [],
+                           'Quantities': set(), 'Results': {}}
+    return 0
+
+
+@checked
+def St7SetResFileNumCases(uID, NumCases):
+    Model['NewResFile']['CaseNames'] = [''] * NumCases
+    return 0
+
+
+@checked
+def St7SetResFileCaseName(uID, CaseNum, CaseName):
+    CaseNames = Model['NewResFile']['CaseNames']
+    if not 1 <= CaseNum <= len(CaseNames):
+        return ERR7_ResFileInvalidCase
+    CaseNames[CaseNum - 1] = CaseName.decode()
+    return 0
+
+
+@checked
+def St7SetResFileQuantity(uID, Entity, Quantity, CaseNum):
+    if (Entity, Quantity) not in ResFileSizes:
+        return ERR7_ResFileInvalidQuantity
+    Model['NewResFile']['Quantities'].add((Entity, Quantity, CaseNum))
+    return 0
+
+
+def write_res_file(Entity, Quantity, EntityNum, CaseNum, Results):
+    ResFile = Model.get('NewResFile')
+    if ResFile is None:
+        return ERR7_ResFileNotOpen
+    if (Entity, Quantity, CaseNum) not in ResFile['Quantities']:
+        return ERR7_ResFileQuantityNotExist
+    if not 1 <= EntityNum <= Model['Totals'][Entity]:
+        return ERR7_InvalidEntityNumber
+    ResFile['Results'][Entity, Quantity, EntityNum, CaseNum] = \
+        np.array(Results[:ResFileSizes[Entity, Quantity]])
+    return 0
+
+
+@checked
+def St7SetResFilePlateResult(uID, Quantity, PlateNum, CaseNum, Local,
+                             Results):
+    count('St7SetResFilePlateResult')
+    return write_res_file(tyPLATE, Quantity, PlateNum, CaseNum, Results)
+
+
+@checked
+def St7SetResFileBeamResult(uID, Quantity, BeamNum, CaseNum, Results):
+    count('St7SetResFileBeamResult')
+    return write_res_file(tyBEAM, Quantity, BeamNum, CaseNum, Results)
+
+
+@checked
+def St7CloseResFile(uID):
+    ResFile = Model.pop('NewResFile', None)
+    if ResFile is None:
+        return ERR7_ResFileNotOpen
+    Model.setdefault('ResFiles', {})[ResFile['FileName']] = ResFile
+    return 0
+
+
+def read_res_file(Entity, ResultType, EntityNum, CaseNum, Results, NumPoints,
+                  NumColumns):
+    """
+    Values written in the open user result file, at the centroid of a plate
+    or at both ends of a beam
+    """
+
+    values = Model['OpenResFile']['Results'].get(
+        (Entity, ResultType, EntityNum, CaseNum))
+    if values is None:
+        return ERR7_ResultQuantityNotAvailable
+    NumColumns.value = len(values)
+    if NumPoints is not None:
+        NumPoints.value = 1
+        Results[:len(values)] = values.tolist()
+    else:
+        Results[:2 * len(values)] = values.tolist() * 2
+    return 0
+
+
+# Combined result files
+
+@checked
+def St7SetResultFileCombTargetFileName(uID, FileName):
+    Model['ResultFileComb'] = {'FileName': FileName, 'Files': [],
+                               'Cases': []}
+    return 0
+
+
+@checked
+def St7AddResultFileCombFileName(uID, FileName):
+    Model['ResultFileComb']['Files'].append(FileName)
+    return 0
+
+
+@checked
+def St7AddResultFileCombCase(uID, CaseName):
+    Model['ResultFileComb']['Cases'].append({'CaseName': CaseName.decode(),
+                                             'Data': {}})
+    return 0
+
+
+@checked
+def St7SetResultFileCombCaseData(uID, CombCase, FileNum, CaseNum, Factor):
+    Comb = Model['ResultFileComb']
+    if not 1 <= CombCase <= len(Comb['Cases']):
+        return ERR7_InvalidCombinationCaseNumber
+    if not 1 <= FileNum <= len(Comb['Files']):
+        return ERR7_InvalidCombResFile
+    Comb['Cases'][CombCase - 1]['Data'][FileNum] = (CaseNum, Factor)
+    return 0
+
+
+@checked
+def St7GenerateResultFileComb(uID, CombType):
+    count('St7GenerateResultFileComb')
+    return 0
+
+
+def St7GetNodeResult(uID, ResultType, NodeNum, CaseNum, Results):
+    count('St7GetNodeResult')
+    copy_row(Results, Model['NodeRes'], NodeNum - 1, 6)
+    return 0
+
+
+def St7GetAPIErrorString(ErrorCode, ErrorString, MaxStringLen):
+    ErrorString.value = ('Simulated error %d' % ErrorCode).encode()
+    return 0
+
+
+def St7GetSolverErrorString(ErrorCode, ErrorString, MaxStringLen):
+    return 1
+
+
+def __getattr__(name):
+    """
+    Functions that are not simulated succeed without writing anything
+    """
+
+    if not name.startswith('St7'):
+        raise AttributeError(name)
+
+    def not_simulated(*args):
+        count(name)
+        return 0
+
+    not_simulated.__name__ = name
+    globals()[name] = not_simulated
+
+    return not_simulated
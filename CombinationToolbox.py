@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Linear load combinations of extracted results
+
+A factor matrix (combinations x primary cases) is applied to a result array
+(cases x elements x components) with one matrix product per element chunk,
+so hundreds of combinations are evaluated without the Strand7 API.
+
+Usage:
+    Results, ElementID = stack_stage_tables(Inputs, columns)
+    Factors, comboNames = factor_matrix(Combinations, list(Inputs))
+    Combined = combine(Results, Factors)
+    Max, Min, MaxCombo, MinCombo = combination_envelope(Results, Factors)
+    Designs = DesignToolbox.design_stages(
+        combination_tables(Combined, comboNames, ElementID, columns, Inputs))
+
+Results can also be the arrays of the toolbox exporters, e.g. the NodeRes
+(case, node, dof) array of export_node_results.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Elements per matrix product, bounds the temporary arrays
+kCombinationChunk = 65536
+
+
+def factor_matrix(Combinations, caseNames):
+    """
+    Factor matrix of combinations given by case name
+
+    Parameters
+    ----------
+    Combinations : DICT
+        DICT of case name: factor of each combination name, e.g.
+        {'ULS1': {'Dead': 1.2, 'Live': 1.5}}
+    caseNames : LIST
+        Primary case names in the order of the result array
+
+    Returns
+    -------
+    Factors : ARRAY
+        (combinations, cases) factors
+    comboNames : LIST
+        Combination names in the order of the rows
+
+    """
+
+    caseIndex = {name: ind for ind, name in enumerate(caseNames)}
+    comboNames = list(Combinations)
+    Factors = np.zeros((len(comboNames), len(caseNames)))
+
+    for row, combo in enumerate(comboNames):
+        for case, factor in Combinations[combo].items():
+            if case not in caseIndex:
+                raise KeyError('Combination %s: case %s not in the results'
+                               % (combo, case))
+            Factors[row, caseIndex[case]] = factor
+
+    return Factors, comboNames
+
+
+def read_factor_table(fileName, caseNames):
+    """
+    Factor matrix from a .csv with one row per combination, the combination
+    name in the first column and one column per primary case
+
+    Returns
+    -------
+    Factors, comboNames
+        As factor_matrix
+    """
+
+    DF = pd.read_csv(fileName, index_col=0).fillna(0)
+    Combinations = {combo: {case: factor for case, factor in row.items()
+                            if factor != 0}
+                    for combo, row in DF.iterrows()}
+
+    return factor_matrix(Combinations, caseNames)
+
+
+def stack_stage_tables(Inputs, columns):
+    """
+    Result array of per stage tables, as written by the exporters
+
+    Parameters
+    ----------
+    Inputs : DICT
+        DataFrame of each case, same elements in the same order, element
+        numbers in the first column
+    columns : LIST
+        Result columns to combine
+
+    Returns
+    -------
+    Results : ARRAY
+        (cases, elements, components) float64 array
+    ElementID : ARRAY
+        Element numbers
+
+    """
+
+    tables = list(Inputs.values())
+    ElementID = tables[0].iloc[:, 0].to_numpy()
+    for stage, DF in Inputs.items():
+        if not np.array_equal(DF.iloc[:, 0].to_numpy(), ElementID):
+            raise ValueError('Stage %s does not list the same elements' % stage)
+
+    Results = np.empty((len(tables), len(ElementID), len(columns)))
+    for ind, DF in enumerate(tables):
+        Results[ind] = DF[columns].to_numpy(dtype=np.float64)
+
+    return Results, ElementID
+
+
+def combine(Results, Factors, chunkSize=kCombinationChunk, out=None):
+    """
+    Apply load combination factors to a result array
+
+    Parameters
+    ----------
+    Results : ARRAY
+        (cases, elements, components) results, may be a memory map
+    Factors : ARRAY
+        (combinations, cases) factors
+    chunkSize : INTEGER, optional
+        Elements per matrix product
+        DEFAULT is kCombinationChunk
+    out : ARRAY, optional
+        (combinations, elements, components) array to fill, e.g. a memory
+        map opened with np.lib.format.open_memmap for large models
+        DEFAULT is None, a new array
+
+    Returns
+    -------
+    Combined : ARRAY
+        (combinations, elements, components) combined results
+
+    """
+
+    Factors = np.asarray(Factors, dtype=np.float64)
+    numCases, numElements, numComponents = Results.shape
+    if Factors.shape[1] != numCases:
+        raise ValueError('%d factors per combination for %d cases'
+                         % (Factors.shape[1], numCases))
+
+    if out is None:
+        out = np.empty((Factors.shape[0], numElements, numComponents))
+
+    for start in range(0, numElements, chunkSize):
+        stop = min(start + chunkSize, numElements)
+        block = np.ascontiguousarray(Results[:, start:stop, :],
+                                     dtype=np.float64)
+        out[:, start:stop, :] = (Factors @ block.reshape(numCases, -1)
+                                 ).reshape(Factors.shape[0], stop - start,
+                                           numComponents)
+
+    return out
+
+
+def combination_envelope(Results, Factors, chunkSize=kCombinationChunk):
+    """
+    Maximum and minimum over the combinations, without keeping every
+    combined result
+
+    Parameters
+    ----------
+    Results : ARRAY
+        (cases, elements, components) results
+    Factors : ARRAY
+        (combinations, cases) factors
+    chunkSize : INTEGER, optional
+        Elements per matrix product
+        DEFAULT is kCombinationChunk
+
+    Returns
+    -------
+    Max, Min : ARRAY
+        (elements, components) envelopes
+    MaxCombo, MinCombo : ARRAY
+        (elements, components) row of Factors governing each envelope
+
+    """
+
+    numCases, numElements, numComponents = Results.shape
+    Max = np.empty((numElements, numComponents))
+    Min = np.empty((numElements, numComponents))
+    MaxCombo = np.empty((numElements, numComponents), dtype=np.int32)
+    MinCombo = np.empty((numElements, numComponents), dtype=np.int32)
+
+    # Combinations of one chunk at a time
+    for start in range(0, numElements, chunkSize):
+        stop = min(start + chunkSize, numElements)
+        Combined = combine(Results[:, start:stop, :], Factors,
+                           chunkSize=stop - start)
+        MaxCombo[start:stop] = Combined.argmax(axis=0)
+        MinCombo[start:stop] = Combined.argmin(axis=0)
+        Max[start:stop] = Combined.max(axis=0)
+        Min[start:stop] = Combined.min(axis=0)
+
+    return Max, Min, MaxCombo, MinCombo
+
+
+def combination_tables(Combined, comboNames, ElementID, columns,
+                       Inputs=None):
+    """
+    Per combination tables in the layout of the exporter tables, to pass
+    to DesignToolbox.design_stages
+
+    Parameters
+    ----------
+    Combined : ARRAY
+        (combinations, elements, components) combined results
+    comboNames : LIST
+        Combination names
+    ElementID : ARRAY
+        Element numbers
+    columns : LIST
+        Names of the combined components
+    Inputs : DICT, optional
+        Stage tables combined, their other columns (e.g. plate thickness)
+        are copied from the first stage
+        DEFAULT is None
+
+    Returns
+    -------
+    Tables : DICT
+        DataFrame of each combination
+
+    """
+
+    if Inputs:
+        first = next(iter(Inputs.values()))
+        Base = first.drop(columns=list(columns)).reset_index(drop=True)
+    else:
+        Base = pd.DataFrame({'ElementId': ElementID})
+
+    Tables = {}
+    for ind, combo in enumerate(comboNames):
+        DF = Base.copy()
+        for col, name in enumerate(columns):
+            DF[name] = Combined[ind, :, col]
+        if Inputs:
+            DF = DF[list(first.columns)]
+        Tables[combo] = DF
+
+    return Tables
@@ -256,37 +256,37 @@ def MaxResultStage(savepath, all_files, filename):
         if df1.iloc[i] == 0:
             r1.append(0)
         else:
-            r1.append(comp_bot.iloc[i].idxmax(axis=1))
+            r1.append(comp_bot.iloc[i].idxmax())
         
         if df2.iloc[i] == 0:
             r2.append(0)
         else:
-            r2.append(comp_top.iloc[i].idxmax(axis=1))
+            r2.append(comp_top.iloc[i].idxmax())
             
         if df3.iloc[i] == 0:
             r3.append(0)
         else:
-            r3.append(asx_bot.iloc[i].idxmax(axis=1))
+            r3.append(asx_bot.iloc[i].idxmax())
 
         if df4.iloc[i] == 0:
             r4.append(0)
         else:
-            r4.append(asy_bot.iloc[i].idxmax(axis=1))
+            r4.append(asy_bot.iloc[i].idxmax())
             
         if df5.iloc[i] == 0:
             r5.append(0)
         else:
-            r5.append(asx_top.iloc[i].idxmax(axis=1))
+            r5.append(asx_top.iloc[i].idxmax())
 
         if df6.iloc[i] == 0:
             r6.append(0)
         else:
-            r6.append(asy_top.iloc[i].idxmax(axis=1))     
+            r6.append(asy_top.iloc[i].idxmax())     
             
         if df7.iloc[i] == 0:
             r7.append(0)
         else:
-            r7.append(ashear.iloc[i].idxmax(axis=1))    
+            r7.append(ashear.iloc[i].idxmax())    
     
     res_dict = {'comp_bot':r1, 'comp_top':r2,
                             'asx_bot':r3, 'asy_bot':r4,
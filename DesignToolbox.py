@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+"""
+Reinforcement design of plate elements from the exported forces and moments
+
+The quantities of the design spreadsheet are computed with NumPy for every
+plate and stage in one pass, and written in the layout read by
+ComparisonToolbox: Plate ID, comp_bot, comp_top, asx_bot, asy_bot, asx_top,
+asy_top, ashear.
+
+Usage:
+    Inputs = {stage: pd.read_csv(f) for stage, f in ...}   # shearinputs_*.csv
+    Designs = DesignToolbox.design_stages(Inputs, method='Sandwich', fc=40)
+    all_files = DesignToolbox.save_design(savefolder, Designs, 'results')
+    ComparisonToolbox.MaxResult(savepath, all_files, 'MaxResults')
+
+Units are those of the exporters: forces in MN/m, moments in MN.m/m and
+thickness in m. Reinforcement areas are returned in mm2/m, shear
+reinforcement in mm2/m2 and concrete compression in MPa.
+
+Strand7 plate local axes are used, z along the plate normal given by the
+node order (right hand rule). Strand7 takes a positive Mxx or Myy as
+compressing the z+ (top) face and stretching the z- (bottom) face, so the
+face stresses are N/h - 6M/h2 on top and N/h + 6M/h2 on the bottom, and Mxy
+shears the faces with the same sign. Moments are thus positive when the
+bottom (z-) face is in tension, bottom being the face opposite the normal.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# Default material and design parameters
+DesignParameters = {'fc': 40.0,         # concrete strength (MPa)
+                    'fsy': 500.0,       # main reinforcement yield (MPa)
+                    'fsyf': 500.0,      # shear reinforcement yield (MPa)
+                    'cover': 0.06,      # face to main steel centroid (m)
+                    'phi': 0.8,         # bending and membrane
+                    'phiShear': 0.7,
+                    'kv': 0.10,         # concrete shear coefficient
+                    'theta': 36.0}      # compression strut angle (degrees)
+
+DesignColumns = ['Plate ID', 'comp_bot', 'comp_top', 'asx_bot', 'asy_bot',
+                 'asx_top', 'asy_top', 'ashear']
+
+# Exported columns read by the design, local axes
+InputColumns = {'h': 'Plate Thickness (m)',
+                'Nxx': 'Force (xx) (MN/m)', 'Nyy': 'Force (yy) (MN/m)',
+                'Nxy': 'Force (xy) (MN/m)',
+                'Vxz': 'Force (xz) (MN/m)', 'Vyz': 'Force (yz) (MN/m)',
+                'Mxx': 'Moment (xx) (MN.m/m)', 'Myy': 'Moment (yy) (MN.m/m)',
+                'Mxy': 'Moment (xy) (MN.m/m)'}
+
+
+def get_parameters(params):
+    """
+    Design parameters, the defaults updated with the given ones
+    """
+
+    unknown = set(params) - set(DesignParameters)
+    if unknown:
+        raise ValueError('Unknown design parameter(s): %s'
+                         % ', '.join(sorted(unknown)))
+
+    parameters = dict(DesignParameters)
+    parameters.update(params)
+
+    return parameters
+
+
+def wood_armer_moments(Mxx, Myy, Mxy):
+    """
+    Wood-Armer design moments of each face
+
+    Parameters
+    ----------
+    Mxx, Myy, Mxy : ARRAY
+        Bending and twisting moments
+
+    Returns
+    -------
+    Mx_bot, My_bot, Mx_top, My_top : ARRAY
+        Design moments, bottom positive and top as magnitudes
+
+    """
+
+    Mxx, Myy, Mxy = np.broadcast_arrays(*(np.asarray(M, dtype=np.float64)
+                                          for M in (Mxx, Myy, Mxy)))
+    aMxy = np.abs(Mxy)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Mxy2_Mx = np.abs(Mxy ** 2 / Mxx)
+        Mxy2_My = np.abs(Mxy ** 2 / Myy)
+
+    # Bottom face, sagging moments
+    Mx_bot = Mxx + aMxy
+    My_bot = Myy + aMxy
+    xNeg = Mx_bot < 0
+    yNeg = My_bot < 0
+    Mx_bot = np.where(xNeg, 0.0, np.where(yNeg, Mxx + Mxy2_My, Mx_bot))
+    My_bot = np.where(yNeg, 0.0, np.where(xNeg, Myy + Mxy2_Mx, My_bot))
+
+    # Top face, hogging moments
+    Mx_top = Mxx - aMxy
+    My_top = Myy - aMxy
+    xPos = Mx_top > 0
+    yPos = My_top > 0
+    Mx_top = np.where(xPos, 0.0, np.where(yPos, Mxx - Mxy2_My, Mx_top))
+    My_top = np.where(yPos, 0.0, np.where(xPos, Myy - Mxy2_Mx, My_top))
+
+    return (np.maximum(Mx_bot, 0.0), np.maximum(My_bot, 0.0),
+            np.maximum(-Mx_top, 0.0), np.maximum(-My_top, 0.0))
+
+
+def flexural_steel(M, N, h, d, fc, fsy, phi):
+    """
+    Tension reinforcement of a 1 m wide section, rectangular stress block
+
+    Parameters
+    ----------
+    M : ARRAY
+        Design moment, positive
+    N : ARRAY
+        Axial force, positive in tension
+    h : ARRAY
+        Section thickness
+    d : ARRAY
+        Effective depth
+    fc, fsy, phi : FLOAT
+        Concrete strength, steel yield and strength reduction factor
+
+    Returns
+    -------
+    Ast : ARRAY
+        Reinforcement in mm2/m, inf where the concrete cannot carry the
+        compression
+
+    """
+
+    alpha2 = np.clip(0.85 - 0.0015 * fc, 0.67, 0.85)
+
+    # Moment about the tension steel
+    Ms = np.maximum(M - N * (d - h / 2), 0.0)
+    ratio = 2 * Ms / (phi * alpha2 * fc * d ** 2)
+    with np.errstate(invalid='ignore'):
+        depth = d * (1 - np.sqrt(1 - ratio))
+    C = alpha2 * fc * depth
+
+    Ast = np.maximum(C + N / phi, 0.0) / fsy * 1e6
+
+    return np.where(ratio > 1, np.inf, Ast)
+
+
+def membrane_layer(nx, ny, nxy, t):
+    """
+    Reinforcement forces and concrete compression of a layer under membrane
+    forces, yield conditions of orthogonally reinforced concrete
+
+    Parameters
+    ----------
+    nx, ny, nxy : ARRAY
+        Layer membrane forces, positive in tension
+    t : ARRAY
+        Layer thickness
+
+    Returns
+    -------
+    fx, fy : ARRAY
+        Force to carry by the x and y reinforcement, positive
+    sc : ARRAY
+        Concrete compressive stress, positive
+
+    """
+
+    a = np.abs(nxy)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # x steel not needed, concrete strut steeper than 45 degrees
+        noX = nx + a < 0
+        # y steel not needed
+        noY = ~noX & (ny + a < 0)
+        fx = np.where(noX, 0.0, np.where(noY, nx + a ** 2 / np.abs(ny),
+                                         nx + a))
+        fy = np.where(noY, 0.0, np.where(noX, ny + a ** 2 / np.abs(nx),
+                                         ny + a))
+        fc = np.where(noX, np.abs(nx) + a ** 2 / np.abs(nx),
+                      np.where(noY, np.abs(ny) + a ** 2 / np.abs(ny), 2 * a))
+
+    # No steel needed, principal compression of the concrete alone
+    noSteel = (fx < 0) | (fy < 0)
+    centre = (nx + ny) / 2
+    radius = np.hypot((nx - ny) / 2, nxy)
+    fc = np.where(noSteel, np.maximum(radius - centre, 0.0), fc)
+    fx = np.where(noSteel, 0.0, fx)
+    fy = np.where(noSteel, 0.0, fy)
+
+    return fx, fy, fc / t
+
+
+def shear_steel(Vxz, Vyz, h, d, fc, fsyf, phiShear, kv, theta):
+    """
+    Shear reinforcement for the resultant transverse shear
+
+    Returns
+    -------
+    Asv : ARRAY
+        Shear reinforcement in mm2/m2, 0 where the concrete is sufficient
+
+    """
+
+    v0 = np.hypot(Vxz, Vyz)
+    dv = np.maximum(0.9 * d, 0.72 * h)
+    vuc = kv * np.sqrt(fc) * dv
+    cot = 1 / np.tan(np.radians(theta))
+
+    return np.maximum(v0 / phiShear - vuc, 0.0) / (fsyf * dv * cot) * 1e6
+
+
+def sandwich_design(Nxx, Nyy, Nxy, Mxx, Myy, Mxy, Vxz, Vyz, h, **params):
+    """
+    Sandwich model: the forces and moments are carried by two outer layers
+    of twice the cover, the transverse shear by the core
+
+    Parameters
+    ----------
+    Nxx, Nyy, Nxy, Mxx, Myy, Mxy, Vxz, Vyz : ARRAY
+        Local forces and moments, any shape
+    h : ARRAY
+        Plate thickness
+    **params
+        Overrides of DesignParameters
+
+    Returns
+    -------
+    Design : DICT
+        ARRAY of comp_bot, comp_top, asx_bot, asy_bot, asx_top, asy_top and
+        ashear
+
+    """
+
+    p = get_parameters(params)
+    h = np.asarray(h, dtype=np.float64)
+    t = 2 * p['cover']
+    z = h - t
+    steel = 1e6 / (p['phi'] * p['fsy'])
+
+    Design = {}
+    for face, sign in (('bot', 1.0), ('top', -1.0)):
+        nx = Nxx / 2 + sign * Mxx / z
+        ny = Nyy / 2 + sign * Myy / z
+        nxy = Nxy / 2 + sign * Mxy / z
+        fx, fy, sc = membrane_layer(nx, ny, nxy, t)
+        Design['comp_' + face] = sc
+        Design['asx_' + face] = fx * steel
+        Design['asy_' + face] = fy * steel
+
+    Design['ashear'] = shear_steel(Vxz, Vyz, h, z, p['fc'], p['fsyf'],
+                                   p['phiShear'], p['kv'], p['theta'])
+
+    return Design
+
+
+def wood_armer_design(Nxx, Nyy, Nxy, Mxx, Myy, Mxy, Vxz, Vyz, h, **params):
+    """
+    Wood-Armer design moments with the membrane forces shared equally by
+    both faces, and the extreme fibre compression of the uncracked section
+
+    Parameters and Returns as sandwich_design
+
+    """
+
+    p = get_parameters(params)
+    h = np.asarray(h, dtype=np.float64)
+    d = h - p['cover']
+
+    Mx_bot, My_bot, Mx_top, My_top = wood_armer_moments(Mxx, Myy, Mxy)
+
+    # Wood-Armer membrane forces, tension carried by the steel
+    Nx = Nxx + np.abs(Nxy)
+    Ny = Nyy + np.abs(Nxy)
+
+    Design = {}
+    for face, Mx, My in (('bot', Mx_bot, My_bot), ('top', Mx_top, My_top)):
+        Design['asx_' + face] = flexural_steel(Mx, Nx / 2, h, d, p['fc'],
+                                               p['fsy'], p['phi'])
+        Design['asy_' + face] = flexural_steel(My, Ny / 2, h, d, p['fc'],
+                                               p['fsy'], p['phi'])
+
+    # Elastic stresses of each face, compression positive
+    for face, sign in (('bot', 1.0), ('top', -1.0)):
+        sx = Nxx / h + sign * 6 * Mxx / h ** 2
+        sy = Nyy / h + sign * 6 * Myy / h ** 2
+        sxy = Nxy / h + sign * 6 * Mxy / h ** 2
+        s2 = (sx + sy) / 2 - np.hypot((sx - sy) / 2, sxy)
+        Design['comp_' + face] = np.maximum(-s2, 0.0)
+
+    Design['ashear'] = shear_steel(Vxz, Vyz, h, d, p['fc'], p['fsyf'],
+                                   p['phiShear'], p['kv'], p['theta'])
+
+    return Design
+
+
+DesignMethods = {'Sandwich': sandwich_design,
+                 'WoodArmer': wood_armer_design}
+
+
+def design_stages(Inputs, method='Sandwich', **params):
+    """
+    Design every plate of every stage in one pass
+
+    Parameters
+    ----------
+    Inputs : DICT
+        DataFrame of the local forces and moments of each stage, as written
+        by export_shearinputs
+    method : STRING, optional
+        Sandwich or WoodArmer
+        DEFAULT is 'Sandwich'
+    **params
+        Overrides of DesignParameters
+
+    Returns
+    -------
+    Designs : DICT
+        DataFrame with DesignColumns of each stage
+
+    """
+
+    if not Inputs:
+        return {}
+
+    stages = list(Inputs)
+    sizes = [len(Inputs[stage]) for stage in stages]
+    DF = pd.concat([Inputs[stage] for stage in stages], ignore_index=True)
+
+    missing = [col for col in InputColumns.values() if col not in DF.columns]
+    if missing:
+        raise KeyError('Local force and moment columns missing: %s'
+                       % ', '.join(missing))
+
+    arrays = {key: DF[col].to_numpy(dtype=np.float64)
+              for key, col in InputColumns.items()}
+    Design = DesignMethods[method](**arrays, **params)
+
+    Table = pd.DataFrame({'Plate ID': DF.iloc[:, 0].to_numpy()})
+    for col in DesignColumns[1:]:
+        Table[col] = Design[col]
+
+    Designs = {}
+    start = 0
+    for stage, size in zip(stages, sizes):
+        Designs[stage] = Table.iloc[start:start + size].reset_index(drop=True)
+        start += size
+
+    return Designs
+
+
+def save_design(savefolder, Designs, filename):
+    """
+    Write the design of each stage as savefolder/filename_<n>.csv, n being
+    the stage position, the naming read by the comparison scripts
+
+    Returns
+    -------
+    all_files : LIST
+        File names in stage order
+    """
+
+    all_files = []
+    for ind, stage in enumerate(Designs):
+        fname = os.path.join(savefolder, '%s_%d.csv' % (filename, ind + 1))
+        Designs[stage].to_csv(fname, index=False)
+        all_files.append(fname)
+    print('%d design files saved in %s' % (len(all_files), savefolder))
+
+    return all_files
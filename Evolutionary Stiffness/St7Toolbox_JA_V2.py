@@ -8,6 +8,10 @@ import pandas as pd
 import re
 import numpy as np
 
+# Solver helpers shared with St7Toolbox_JA, one folder up
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from St7Toolbox_JA import set_warm_start
+
 def explain_error(ErrorCode):
     """
     Returns St7API error code in a string
@@ -209,8 +213,53 @@ def assign_plates_results(modelname_bt, tempfolder_bt, fileOut_bt, DF, indexspli
 
     return ret
 
+def changed_plates(DF, previousDF, indexsplitter, tolerance=1e-6):
+    """
+    Plates of a property table whose properties differ from the previous
+    iteration
+
+    Parameters
+    ----------
+    DF : DATAFRAME
+        Plate properties, one row per plate identified by 'Property Name'
+    previousDF : DATAFRAME
+        Plate properties of the previous iteration
+    indexsplitter : INTEGER
+        First column that is not a property
+    tolerance : FLOAT, optional
+        Relative change under which a value is unchanged
+        DEFAULT is 1e-6
+
+    Returns
+    -------
+    changed : ARRAY
+        Boolean of each row of DF, True if the plate is new or changed
+
+    """
+
+    columns = [col for col in DF.columns[:indexsplitter]
+               if col != 'Property Name']
+    numeric = [col for col in columns
+               if pd.api.types.is_numeric_dtype(DF[col])]
+    text = [col for col in columns if col not in numeric]
+
+    previous = previousDF.drop_duplicates('Property Name').set_index(
+        'Property Name').reindex(index=DF['Property Name'], columns=columns)
+
+    new = DF[numeric].to_numpy(dtype=np.float64)
+    old = previous[numeric].to_numpy(dtype=np.float64)
+    changed = (np.abs(new - old) > tolerance * np.abs(old)).any(axis=1)
+    # Plates missing from the previous table
+    changed |= np.isnan(old).any(axis=1)
+    if text:
+        changed |= (DF[text].to_numpy() != previous[text].to_numpy()).any(axis=1)
+
+    return changed
+
 def assign_plates_prop(modelname_bt, tempfolder_bt, fileOut_bt, DF, groupID,
-                       numPlates, solvebool, indexsplitter, iteration_no):
+                       numPlates, solvebool, indexsplitter, iteration_no,
+                       previousDF=None, tolerance=1e-6, initialFile_bt=None,
+                       initialCase=None, saveRestart=False):
     """
     Assign Properties to Plates
 
@@ -236,6 +285,30 @@ def assign_plates_prop(modelname_bt, tempfolder_bt, fileOut_bt, DF, groupID,
         List of integer of the groups to modify
     numPlates : INTEGER
         Number of plates
+    solvebool : BOOLEAN
+        Run the nonlinear static solver on the output model
+    indexsplitter : INTEGER
+        First column of DF assigned as heat sources
+    iteration_no : INTEGER
+        Iteration number, prefix of the heat source load case names. The
+        load cases of a previous iteration are renamed and reused
+    previousDF : DATAFRAME, optional
+        Properties assigned to the input model by the previous iteration.
+        Only the plates whose properties or heat sources changed are then
+        updated.
+        DEFAULT is None, every plate is updated
+    tolerance : FLOAT, optional
+        Relative change under which a property value is unchanged
+        DEFAULT is 1e-6
+    initialFile_bt : BYTE, optional
+        Encoded result file of the previous iteration, case initialCase is
+        the initial condition of the solve, see set_warm_start
+        DEFAULT is None, solve from scratch
+    initialCase : INTEGER, optional
+        DEFAULT is None, the last converged case of initialFile_bt
+    saveRestart : BOOLEAN, optional
+        Save the restart data of the solve
+        DEFAULT is False
 
     Returns
     -------
@@ -256,7 +329,11 @@ def assign_plates_prop(modelname_bt, tempfolder_bt, fileOut_bt, DF, groupID,
     
     
     EsPlates = DF['Property Name']
-    print('%d plates will be assigned new properties' % len(EsPlates))
+    if previousDF is None:
+        changed = np.ones(len(EsPlates), dtype=bool)
+    else:
+        changed = changed_plates(DF, previousDF, indexsplitter, tolerance)
+    print('%d plates will be assigned new properties' % changed.sum())
 
     # Variables to store information
     LongArray4 = ctypes.c_long * 4
@@ -294,6 +371,8 @@ def assign_plates_prop(modelname_bt, tempfolder_bt, fileOut_bt, DF, groupID,
         sys.exit(1)
 
     for ind, ID in enumerate(EsPlates):
+        if not changed[ind]:
+            continue
         
         plateID = int(ID)
         propNum = plateID + numPlates
@@ -359,31 +438,48 @@ def assign_plates_prop(modelname_bt, tempfolder_bt, fileOut_bt, DF, groupID,
     PlateID = DF.iloc[:,0]
     PlateID = pd.to_numeric(PlateID, errors='coerce')
     ResultNames = DF.columns[indexsplitter:]
-    ResultIDs = []
-    ResultNamesIter = []
-    
-    # Add load cases
-    for i in ResultNames:
-        CaseName = 'Iter' + str(iteration_no) + '_' + str(i)
-        ResultNamesIter.append(CaseName)
-        St7API.St7NewLoadCase(1, CaseName.encode())
-        
-    # Get total number of load cases
+
+    # Heat source load cases of a previous iteration, Iter<n>_<result>
+    ExistingCases = {}
     St7API.St7GetNumLoadCase(1, NumLoadCases)
-    # Match load case ID with load case name
     for j in range(1, NumLoadCases.value+1):
         St7API.St7GetLoadCaseName(1, j, LoadCaseName, St7API.kMaxStrLen)
-        if LoadCaseName.value.decode() in ResultNamesIter:
-            ResultIDs.append(j)
+        label = re.match(r'Iter\d+_(.*)$', LoadCaseName.value.decode())
+        if label:
+            ExistingCases[label.group(1)] = j
+
+    # Values written by the previous iteration, per plate
+    if previousDF is not None:
+        previous = previousDF.set_index(previousDF.columns[0])
+        previous.index = pd.to_numeric(previous.index, errors='coerce')
+        previous = previous[~previous.index.duplicated()].reindex(PlateID)
+
+    # The load cases are created once and renamed after the iteration,
+    # only the heat sources that changed are written again
+    for k, resultName in enumerate(ResultNames):
+        CaseName = 'Iter' + str(iteration_no) + '_' + str(resultName)
+        newCase = str(resultName) not in ExistingCases
+        if newCase:
+            St7API.St7NewLoadCase(1, CaseName.encode())
+            St7API.St7GetNumLoadCase(1, NumLoadCases)
+            LoadCaseID = NumLoadCases.value
+        else:
+            LoadCaseID = ExistingCases[str(resultName)]
+            St7API.St7SetLoadCaseName(1, LoadCaseID, CaseName.encode())
+
+        values = DF.iloc[:, k+indexsplitter].to_numpy(dtype=np.float64)
+        if newCase:
+            # New load cases have no heat source to overwrite
+            write = values != 0
+        elif previousDF is not None and resultName in previous.columns:
+            write = values != previous[resultName].to_numpy(dtype=np.float64)
+        else:
+            write = np.ones(len(values), dtype=bool)
 
-    for k in range(len(ResultIDs)):
-        
-        LoadCaseID = ResultIDs[k]
-        print('Assigning ' + str(ResultNames[k]))
-        for ind, platePos in enumerate(PlateID):
-            PlateNum = int(platePos)
-            ResultVal = ctypes.c_double(DF.iloc[ind, k+indexsplitter])
-            
+        print('Assigning %s to %d plates' % (resultName, write.sum()))
+        for ind in np.flatnonzero(write):
+            PlateNum = int(PlateID.iloc[ind])
+            ResultVal = ctypes.c_double(values[ind])
             St7API.St7SetPlateHeatSource1(1, PlateNum, LoadCaseID, ResultVal)
             
     ret = St7API.St7SaveFileTo(1, fileOut_bt)
@@ -406,6 +502,7 @@ def assign_plates_prop(modelname_bt, tempfolder_bt, fileOut_bt, DF, groupID,
         Foldername = os.path.dirname(modelname) + "\\"
         Foldername_bt = Foldername.encode()
         St7API.St7OpenFile(1, fileOut_bt, Foldername_bt)
+        set_warm_start(initialFile_bt, initialCase, saveRestart=saveRestart)
         St7API.St7RunSolver(1, St7API.stNonlinearStaticSolver, St7API.smNormalCloseRun, St7API.btTrue)
         St7API.St7SaveFile(1)
         St7API.St7CloseFile(1)
@@ -1700,7 +1797,8 @@ def export_plate_forceMomentData(modelname_bt, tempfolder_bt, resultfile_bt,
 def export_ES_Inputs(modelname_bt, tempfolder_bt, filename, resultfile_bt,
                                  groupID, numPlates, minthickness, ResultAxis='Local',
                                  ResultLocation='Centroid',
-                                 PlateSurf='Midplane'):
+                                 PlateSurf='Midplane', saveCSV=True,
+                                 returnInputs=False):
     """
     Extract Beam Force information for a combined result file
 
@@ -1727,11 +1825,19 @@ def export_ES_Inputs(modelname_bt, tempfolder_bt, filename, resultfile_bt,
         Plate Surface to extract data
         DEFAULT is 'Midplane
         Midplane, Zplus or Zminus
+    saveCSV : BOOLEAN, optional
+        Write the filename_ES_inp_<stage>.csv files
+        DEFAULT is True
+    returnInputs : BOOLEAN, optional
+        Return the extracted tables instead of the API return code
+        DEFAULT is False
 
     Returns
     -------
     ret : INTEGER
         Return code API
+    Inputs : DICT
+        If returnInputs, DataFrame of each stage keyed by stage number
 
     """
     
@@ -1807,6 +1913,7 @@ def export_ES_Inputs(modelname_bt, tempfolder_bt, filename, resultfile_bt,
                     'Zminus': St7API.psPlateZMinus}
     
     StgNames = []
+    Inputs = {}
 
     for ind, casename in enumerate(CaseName_list):
         print('Start extracting data for case number %d %s' % (ind, casename))
@@ -1937,9 +2044,11 @@ def export_ES_Inputs(modelname_bt, tempfolder_bt, filename, resultfile_bt,
         if (x):
             print('skipped reset stage')
         else:
-            csvOutFile = filename + '_ES_inp_' + stgname.split('_')[1] + '.csv'
-            print('Saved in csv file ' + csvOutFile)
-            DF.to_csv(csvOutFile, index=False)
+            Inputs[stgname.split('_')[1]] = DF
+            if saveCSV:
+                csvOutFile = filename + '_ES_inp_' + stgname.split('_')[1] + '.csv'
+                print('Saved in csv file ' + csvOutFile)
+                DF.to_csv(csvOutFile, index=False)
             
             StgNames.append(stgname+'.csv')
     
@@ -1950,6 +2059,9 @@ def export_ES_Inputs(modelname_bt, tempfolder_bt, filename, resultfile_bt,
     if ret == 0:
         print('Model File closed')
 
+    if returnInputs:
+        return Inputs
+
     return ret
 
 def export_platenodes(modelname_bt, tempfolder_bt, groupID, numNodes, numPlates, minthickness):
@@ -2033,7 +2145,9 @@ def export_platenodes(modelname_bt, tempfolder_bt, groupID, numNodes, numPlates,
 def run_solver(modelname_bt, tempfolder_bt, logfilename_bt, resultfile_bt,
                solverType='NonLinearStatic', runMode='Normal',
                schemeType='Direct Sparse', nodeOrdering='AMD',
-               startNodeNum=1, nonLinGeo=True, nonLinMaterial=True):
+               startNodeNum=1, nonLinGeo=True, nonLinMaterial=True,
+               initialFile_bt=None, initialCase=None, restartFile_bt=None,
+               saveRestart=False, lastRestartStep=False):
     """
     Run Solver function
 
@@ -2091,6 +2205,9 @@ def run_solver(modelname_bt, tempfolder_bt, logfilename_bt, resultfile_bt,
     nonLinMaterial : BOOLEAN, optional
         State of the Nonlinear material option for Nonlinear analyses
         DEFAULT is True.
+    initialFile_bt, initialCase, restartFile_bt, saveRestart, lastRestartStep
+        Warm start options of the nonlinear static solver, see set_warm_start
+        DEFAULT is a solve from scratch without restart data
 
     Returns
     -------
@@ -2174,6 +2291,10 @@ def run_solver(modelname_bt, tempfolder_bt, logfilename_bt, resultfile_bt,
         else:
             print('Non Linear Material set as True')
     
+    if solverType == 'NonLinearStatic':
+        set_warm_start(initialFile_bt, initialCase, restartFile_bt,
+                       saveRestart, lastRestartStep)
+
     St7API.St7SetResultLogFileName(1, logfilename_bt)
     St7API.St7SetResultFileName(1, resultfile_bt)
     
@@ -2190,4 +2311,194 @@ def run_solver(modelname_bt, tempfolder_bt, logfilename_bt, resultfile_bt,
     if ret == 0:
         print('Model File closed')
    
-    return ret
\ No newline at end of file
+    return ret
+
+# Property columns compared between iterations to measure the stiffness change
+StiffnessColumns = ['Modulus', 'Modulus E1', 'Modulus E2', 'Modulus E3',
+                    'Shear Modulus G12', 'Shear Modulus G23',
+                    'Shear Modulus G31', 'Membrane Thickness',
+                    'Membrane Bending']
+
+def iteration_model_name(modelname, iteration_no):
+    """
+    Model name of an iteration, the trailing Iter<n> label of the model name
+    is replaced, otherwise _Iter<n> is appended
+
+    """
+
+    stem, ext = os.path.splitext(modelname)
+    label = re.search(r'Iter\d+$', stem)
+    if label:
+        stem = stem[:label.start()]
+    else:
+        stem = stem + '_'
+
+    return stem + 'Iter' + str(iteration_no) + ext
+
+def stiffness_change(DF, newDF, columns=None):
+    """
+    Largest relative change of the stiffness columns between two property
+    tables of the same plates, matched on 'Property Name'
+
+    Parameters
+    ----------
+    DF : DATAFRAME
+        Plate properties of the previous iteration
+    newDF : DATAFRAME
+        Plate properties of the new iteration
+    columns : LIST, optional
+        Columns compared, a ValueError is raised when none is in both tables
+        DEFAULT is None, the StiffnessColumns of both tables
+
+    Returns
+    -------
+    change : FLOAT
+        Maximum of |new - old| / |old| over the plates and columns, inf when
+        the two tables do not hold the same plates
+
+    """
+
+    if columns is None:
+        columns = StiffnessColumns
+    columns = [col for col in columns
+               if col in DF.columns and col in newDF.columns]
+    if not columns:
+        raise ValueError('No stiffness column to compare in the property '
+                         'tables')
+
+    if len(DF) != len(newDF) or \
+            set(DF['Property Name']) != set(newDF['Property Name']):
+        return np.inf
+
+    previous = DF.drop_duplicates('Property Name').set_index(
+        'Property Name').reindex(index=newDF['Property Name'],
+                                 columns=columns)
+    old = previous.to_numpy(dtype=np.float64)
+    new = newDF[columns].to_numpy(dtype=np.float64)
+
+    scale = np.abs(old)
+    scale[scale == 0] = 1.0
+
+    return float(np.max(np.abs(new - old) / scale, initial=0.0))
+
+def run_ES_iterations(modelname, tempfolder, DF, update_stiffness,
+                      firstIteration=1, maxIterations=10, tolerance=0.01,
+                      indexsplitter=27, GroupsToKeep='ALL', minthickness=0.4,
+                      ResultAxis='Local', saveCSV=False, incremental=True,
+                      warmStart=False, initialCase=None, saveRestart=False,
+                      stiffnessColumns=None):
+    """
+    Evolutionary stiffness loop: assign the plate properties, solve, extract
+    the plate forces and update the stiffness, until the stiffness change is
+    below tolerance or maxIterations are run. The property table and the
+    extracted forces stay in memory between iterations.
+
+    Parameters
+    ----------
+    modelname : STRING
+        Model of the previous iteration
+    tempfolder : STRING
+        Temporary folder location
+    DF : DATAFRAME
+        Plate properties of the first iteration, as read from
+        PlateProperties.csv
+    update_stiffness : FUNCTION
+        update_stiffness(Inputs, DF, iteration_no) returning the plate
+        properties of the next iteration, Inputs being the forces of each
+        stage returned by export_ES_Inputs
+    firstIteration : INTEGER, optional
+        Number of the first iteration
+        DEFAULT is 1
+    maxIterations : INTEGER, optional
+        DEFAULT is 10
+    tolerance : FLOAT, optional
+        Relative stiffness change under which the loop stops
+        DEFAULT is 0.01
+    indexsplitter : INTEGER, optional
+        First column of DF assigned as heat sources
+        DEFAULT is 27
+    GroupsToKeep : LIST, optional
+        List of Parent Groups to extract
+        DEFAULT is 'ALL'
+    minthickness : FLOAT, optional
+        DEFAULT is 0.4
+    ResultAxis : STRING, optional
+        DEFAULT is 'Local'
+    saveCSV : BOOLEAN, optional
+        Also write the _ES_inp_ files of every iteration
+        DEFAULT is False
+    incremental : BOOLEAN, optional
+        After the first iteration, only update the plates whose properties
+        changed, see assign_plates_prop
+        DEFAULT is True
+    warmStart : BOOLEAN, optional
+        Start each solve from case initialCase of the result file of the
+        previous iteration instead of from scratch. The first iteration
+        starts from the result file of modelname when it exists.
+        DEFAULT is False
+    initialCase : INTEGER, optional
+        DEFAULT is None, the last converged case of the previous result file
+    saveRestart : BOOLEAN, optional
+        Save the restart data of every solve
+        DEFAULT is False
+    stiffnessColumns : LIST, optional
+        Property columns measuring the stiffness change, see
+        stiffness_change
+        DEFAULT is None, StiffnessColumns
+
+    Returns
+    -------
+    history : LIST
+        (iteration number, model name, stiffness change) of each iteration
+    DF : DATAFRAME
+        Plate properties of the last iteration
+
+    """
+
+    tempfolder_bt = tempfolder.encode()
+    groupID, entTots = get_model_info(modelname.encode(), tempfolder_bt,
+                                      GroupsToKeep)
+    numPlates = entTots['Plates']
+
+    history = []
+    assignedDF = None
+    initialFile = os.path.splitext(modelname)[0] + '.NLA'
+    for iteration_no in range(firstIteration, firstIteration + maxIterations):
+        fileOut = iteration_model_name(modelname, iteration_no)
+        fileOut_bt = fileOut.encode()
+        print('Iteration %d: %s' % (iteration_no, fileOut))
+
+        initialFile_bt = None
+        if warmStart and os.path.exists(initialFile):
+            initialFile_bt = initialFile.encode()
+        assign_plates_prop(modelname.encode(), tempfolder_bt, fileOut_bt, DF,
+                           groupID, numPlates, True, indexsplitter,
+                           iteration_no, previousDF=assignedDF,
+                           initialFile_bt=initialFile_bt,
+                           initialCase=initialCase, saveRestart=saveRestart)
+        if incremental:
+            assignedDF = DF
+
+        resultfile = os.path.splitext(fileOut)[0] + '.NLA'
+        resultfile_bt = resultfile.encode()
+        Inputs = export_ES_Inputs(fileOut_bt, tempfolder_bt,
+                                  os.path.splitext(fileOut)[0], resultfile_bt,
+                                  groupID, numPlates, minthickness,
+                                  ResultAxis=ResultAxis, saveCSV=saveCSV,
+                                  returnInputs=True)
+
+        newDF = update_stiffness(Inputs, DF, iteration_no)
+        change = stiffness_change(DF, newDF, stiffnessColumns)
+        history.append((iteration_no, fileOut, change))
+        print('Iteration %d stiffness change %.4f' % (iteration_no, change))
+
+        DF = newDF
+        modelname = fileOut
+        initialFile = resultfile
+        if change < tolerance:
+            print('Converged after %d iteration(s)' % len(history))
+            break
+    else:
+        print('Not converged after %d iteration(s)' % maxIterations)
+
+    return history, DF
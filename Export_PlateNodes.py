@@ -62,7 +62,10 @@ groupID, numElem = St7Tbx.get_model_info(modelname_bt, tempfolder_bt,
                                          GroupsToKeep=GroupsToKeep)
 numPlates = numElem['Plates']
 numNodes = numElem['Nodes']
-ret = St7Tbx.export_platenodes(modelname_bt, tempfolder_bt, groupID, numNodes, numPlates, 0.4)
+# Writes <model>_Mesh.npz, legacyCSV also writes <model>_Nodes.csv and
+# <model>_Plates.csv
+Mesh = St7Tbx.export_platenodes(modelname_bt, tempfolder_bt, groupID, numNodes,
+                                numPlates, 0.4, legacyCSV=True)
 
 St7API.St7CloseFile(1)
 St7API.St7CloseResultFile(1)
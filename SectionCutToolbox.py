@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+"""
+Section cut resultants of plate models
+
+The plates crossed by each cutting plane are found from the mesh
+connectivity, the plate force and moment tensors are integrated along the cut
+line and the resultant forces and moments are returned per cut and per stage,
+without exporting per plate tables.
+
+Usage:
+    NodeXYZ, PlateNodes, PlateNum, PlateGroup, GroupNames = \\
+        St7Tbx.export_platenodes(model_bt, temp_bt, groupID, numNodes,
+                                 numPlates, 0.0)
+    PlateNum, Force, Moment, caseNames = St7Tbx.export_plate_tensors(
+        model_bt, temp_bt, result_bt, groupID, numPlates, elements=PlateNum)
+    origins, normals, chainages = alignment_cuts(Alignment, np.arange(0, 500))
+    Cuts = section_cuts(NodeXYZ, PlateNodes, Force, Moment, origins, normals)
+    Cuts['N'][:, 10]    # axial force of cut 10 in every stage
+
+The force and moment arrays are (stage, plate, 6) global tensors XX, YY, ZZ,
+XY, YZ, ZX, in the plate order of PlateNodes. The resultants act on the cut
+face of the part behind the plane, i.e. with the plane normal as outward
+normal.
+"""
+
+import numpy as np
+
+# Cuts whose plane distances are evaluated together
+kCutChunk = 64
+
+# Values per temporary array of the cut search and the stage integration
+kIntegrationChunk = 2 ** 24
+
+
+def alignment_cuts(Alignment, chainages):
+    """
+    Cutting planes normal to a polyline alignment
+
+    Parameters
+    ----------
+    Alignment : ARRAY
+        (points, 3) alignment vertices, e.g. the tunnel axis
+    chainages : ARRAY
+        Distances along the alignment of the cuts
+
+    Returns
+    -------
+    origins : ARRAY
+        (cuts, 3) alignment point of each cut
+    normals : ARRAY
+        (cuts, 3) alignment direction at each cut
+    chainages : ARRAY
+        Chainages of the cuts, clipped to the alignment length
+
+    """
+
+    Alignment = np.asarray(Alignment, dtype=np.float64)
+    Segments = np.diff(Alignment, axis=0)
+    lengths = np.linalg.norm(Segments, axis=1)
+    starts = np.concatenate([[0.0], np.cumsum(lengths)])
+
+    chainages = np.clip(np.asarray(chainages, dtype=np.float64), 0.0,
+                        starts[-1])
+    seg = np.clip(np.searchsorted(starts, chainages, side='right') - 1, 0,
+                  len(Segments) - 1)
+    frac = (chainages - starts[seg]) / lengths[seg]
+
+    origins = Alignment[seg] + frac[:, np.newaxis] * Segments[seg]
+    normals = Segments[seg] / lengths[seg, np.newaxis]
+
+    return origins, normals, chainages
+
+
+def cut_geometry(NodeXYZ, PlateNodes, origins, normals, extent=None,
+                 cutChunk=kCutChunk):
+    """
+    Segments of the cut lines inside each plate crossed by each plane
+
+    Parameters
+    ----------
+    NodeXYZ : ARRAY
+        (node, 3) co-ordinates, row i is node i + 1
+    PlateNodes : ARRAY
+        (plate, 4) corner node numbers, -1 as the 4th node of triangles
+    origins : ARRAY
+        (cuts, 3) point of each plane
+    normals : ARRAY
+        (cuts, 3) normal of each plane
+    extent : FLOAT, optional
+        Only the segments within this distance of the plane origin are kept,
+        e.g. to cut one side of a tunnel ring
+        DEFAULT is None, the whole plane
+    cutChunk : INTEGER, optional
+        Cuts evaluated together, fewer for large meshes so the (plate, 4,
+        cut) corner sides stay under kIntegrationChunk values
+        DEFAULT is kCutChunk
+
+    Returns
+    -------
+    Segments : DICT
+        cut, plate - cut and plate row of each segment, sorted by cut
+        length - segment length
+        midpoint - (segments, 3) segment mid point
+        direction - (segments, 3) unit vector in the plate plane, normal to
+        the segment, on the side of the plane normal
+        plateNormal - (segments, 3) unit plate normal
+        numCuts - number of planes
+
+    """
+
+    NodeXYZ = np.asarray(NodeXYZ, dtype=np.float64)
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+    normals = normals / np.linalg.norm(normals, axis=1)[:, np.newaxis]
+
+    # Triangles repeat their 3rd corner, the extra edge never crosses a plane
+    Corners = np.asarray(PlateNodes, dtype=np.int64).copy()
+    Corners[:, 3] = np.where(Corners[:, 3] < 0, Corners[:, 2], Corners[:, 3])
+    Corners -= 1
+    Edges = np.stack([Corners, np.roll(Corners, -1, axis=1)], axis=-1)
+
+    # Plate normals from the diagonals, right handed on the node order
+    X = NodeXYZ[Corners]
+    PlateNormal = np.cross(X[:, 2] - X[:, 0], X[:, 3] - X[:, 1])
+    norm = np.linalg.norm(PlateNormal, axis=1)[:, np.newaxis]
+    PlateNormal = np.divide(PlateNormal, norm, out=np.zeros_like(PlateNormal),
+                            where=norm > 0)
+
+    cutChunk = max(1, min(cutChunk,
+                          kIntegrationChunk // max(4 * len(Corners), 1)))
+    cutList, plateList = [], []
+    pointList = []
+    for start in range(0, len(origins), cutChunk):
+        stop = min(start + cutChunk, len(origins))
+        # Signed distance of every node to the planes of the chunk
+        dist = NodeXYZ @ normals[start:stop].T - \
+            (origins[start:stop] * normals[start:stop]).sum(axis=1)
+        above = (dist > 0)[Corners]
+        crossed = above.any(axis=1) & ~above.all(axis=1)
+        plates, cuts = np.nonzero(crossed)
+        if not len(plates):
+            continue
+        cuts += start
+
+        # Crossing point of each edge that changes side
+        Da = dist[Edges[plates, :, 0], cuts[:, np.newaxis] - start]
+        Db = dist[Edges[plates, :, 1], cuts[:, np.newaxis] - start]
+        changes = (Da > 0) != (Db > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.where(changes, Da / (Da - Db), 0.0)
+        Xa = NodeXYZ[Edges[plates, :, 0]]
+        Xb = NodeXYZ[Edges[plates, :, 1]]
+        Points = Xa + t[:, :, np.newaxis] * (Xb - Xa)
+
+        # First and last crossing edge, two for a flat convex plate
+        first = changes.argmax(axis=1)
+        last = 3 - changes[:, ::-1].argmax(axis=1)
+        rows = np.arange(len(plates))
+        pointList.append(np.stack([Points[rows, first], Points[rows, last]],
+                                  axis=1))
+        cutList.append(cuts)
+        plateList.append(plates)
+
+    if cutList:
+        cut = np.concatenate(cutList)
+        plate = np.concatenate(plateList)
+        Ends = np.concatenate(pointList)
+    else:
+        cut = np.empty(0, dtype=np.int64)
+        plate = np.empty(0, dtype=np.int64)
+        Ends = np.empty((0, 2, 3))
+
+    midpoint = Ends.mean(axis=1)
+    if extent is not None:
+        keep = np.linalg.norm(midpoint - origins[cut], axis=1) <= extent
+        cut, plate, Ends, midpoint = cut[keep], plate[keep], Ends[keep], \
+            midpoint[keep]
+
+    order = np.argsort(cut, kind='stable')
+    cut, plate, Ends, midpoint = cut[order], plate[order], Ends[order], \
+        midpoint[order]
+
+    Chord = Ends[:, 1] - Ends[:, 0]
+    length = np.linalg.norm(Chord, axis=1)
+    direction = np.cross(PlateNormal[plate], Chord)
+    norm = np.linalg.norm(direction, axis=1)
+    direction = np.divide(direction, norm[:, np.newaxis],
+                          out=np.zeros_like(direction),
+                          where=norm[:, np.newaxis] > 0)
+    direction *= np.where((direction * normals[cut]).sum(axis=1) < 0, -1.0,
+                          1.0)[:, np.newaxis]
+
+    return {'cut': cut, 'plate': plate, 'length': length,
+            'midpoint': midpoint, 'direction': direction,
+            'plateNormal': PlateNormal[plate], 'numCuts': len(origins)}
+
+
+def traction_weights(direction, length):
+    """
+    (segments, 3, 6) matrices of the force on each segment per tensor
+    component XX, YY, ZZ, XY, YZ, ZX
+    """
+
+    mx, my, mz = (direction * length[:, np.newaxis]).T
+    zero = np.zeros_like(mx)
+
+    return np.stack([np.stack([mx, zero, zero, my, zero, mz], axis=1),
+                     np.stack([zero, my, zero, mx, mz, zero], axis=1),
+                     np.stack([zero, zero, mz, zero, my, mx], axis=1)],
+                    axis=1)
+
+
+def moment_weights(Arms, Weights):
+    """
+    (segments, 3, 6) matrices of the moment of the forces of Weights
+    applied at Arms
+    """
+
+    return np.cross(Arms[:, np.newaxis, :],
+                    Weights.transpose(0, 2, 1)).transpose(0, 2, 1)
+
+
+def cut_axes(normals, up=(0.0, 0.0, 1.0)):
+    """
+    Axes of each cut, the plane normal and two in-plane axes, the first
+    one horizontal when up is vertical
+    """
+
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+    normals = normals / np.linalg.norm(normals, axis=1)[:, np.newaxis]
+    Axis1 = np.cross(np.asarray(up, dtype=np.float64), normals)
+    parallel = np.linalg.norm(Axis1, axis=1) < 1e-9
+    Axis1[parallel] = np.cross([1.0, 0.0, 0.0], normals[parallel])
+    Axis1 /= np.linalg.norm(Axis1, axis=1)[:, np.newaxis]
+    Axis2 = np.cross(normals, Axis1)
+
+    return normals, Axis1, Axis2
+
+
+def integrate_cuts(Segments, Force, Moment=None, centres=None,
+                   chunkSize=kIntegrationChunk):
+    """
+    Resultant force and moment of every cut in every stage
+
+    Parameters
+    ----------
+    Segments : DICT
+        See cut_geometry
+    Force : ARRAY
+        (stage, plate, 6) global plate force tensors
+    Moment : ARRAY, optional
+        (stage, plate, 6) global plate moment tensors
+        DEFAULT is None, moments of the forces only
+    centres : ARRAY, optional
+        (cuts, 3) point the moments are taken about
+        DEFAULT is None, the length weighted centre of each cut line
+    chunkSize : INTEGER, optional
+        Values per temporary array, bounds the memory of many stages
+        DEFAULT is kIntegrationChunk
+
+    Returns
+    -------
+    Resultant : ARRAY
+        (stage, cut, 3) global force
+    ResultantMoment : ARRAY
+        (stage, cut, 3) global moment about the centres
+    centres : ARRAY
+        (cuts, 3) moment centres
+
+    """
+
+    cut = Segments['cut']
+    numCuts = Segments['numCuts']
+    numStages = Force.shape[0]
+    length = Segments['length']
+
+    if centres is None:
+        total = np.bincount(cut, weights=length, minlength=numCuts)
+        centres = np.stack([np.bincount(cut, weights=length * col,
+                                        minlength=numCuts)
+                            for col in Segments['midpoint'].T],
+                           axis=1).astype(np.float64)
+        centres = np.divide(centres, total[:, np.newaxis],
+                            out=np.zeros_like(centres),
+                            where=total[:, np.newaxis] > 0)
+    centres = np.asarray(centres, dtype=np.float64)
+
+    # Force and moment about the centre of each segment per tensor
+    # component, one (6, 6) or (6, 12) matrix per segment
+    Weights = traction_weights(Segments['direction'], length)
+    Arms = Segments['midpoint'] - centres[cut]
+    Matrices = [np.concatenate([Weights, moment_weights(Arms, Weights)],
+                               axis=1)]
+    if Moment is not None:
+        Matrices.append(np.concatenate(
+            [np.zeros_like(Weights),
+             moment_weights(Segments['plateNormal'], Weights)], axis=1))
+    Matrices = np.concatenate(Matrices, axis=2).transpose(0, 2, 1)
+
+    # Sums over the segments of each crossed cut
+    cuts, starts = np.unique(cut, return_index=True)
+
+    Resultant = np.zeros((numStages, numCuts, 3))
+    ResultantMoment = np.zeros((numStages, numCuts, 3))
+    if not len(cut):
+        return Resultant, ResultantMoment, centres
+
+    stageChunk = max(1, chunkSize // (len(cut) * Matrices.shape[1]))
+    for start in range(0, numStages, stageChunk):
+        stop = min(start + stageChunk, numStages)
+        Tensors = [np.take(Force[start:stop], Segments['plate'], axis=1)]
+        if Moment is not None:
+            Tensors.append(np.take(Moment[start:stop], Segments['plate'],
+                                   axis=1))
+        Tensor = np.concatenate(Tensors, axis=2)
+        Tensor[np.isnan(Tensor)] = 0.0
+
+        # (segment, stage, 6) contributions, summed per cut
+        Values = np.matmul(Tensor.transpose(1, 0, 2), Matrices)
+        Values = np.add.reduceat(Values, starts, axis=0).transpose(1, 0, 2)
+        Resultant[start:stop, cuts] = Values[:, :, :3]
+        ResultantMoment[start:stop, cuts] = Values[:, :, 3:]
+
+    return Resultant, ResultantMoment, centres
+
+
+def section_cuts(NodeXYZ, PlateNodes, Force, Moment, origins, normals,
+                 extent=None, centres=None, up=(0.0, 0.0, 1.0)):
+    """
+    Resultants of plate forces and moments across cutting planes
+
+    Parameters
+    ----------
+    NodeXYZ : ARRAY
+        (node, 3) co-ordinates, row i is node i + 1
+    PlateNodes : ARRAY
+        (plate, 4) corner node numbers, -1 as the 4th node of triangles
+    Force : ARRAY
+        (stage, plate, 6) global plate force tensors
+    Moment : ARRAY
+        (stage, plate, 6) global plate moment tensors, None to skip the
+        plate moments
+    origins : ARRAY
+        (cuts, 3) point of each plane
+    normals : ARRAY
+        (cuts, 3) normal of each plane
+    extent : FLOAT, optional
+        See cut_geometry
+        DEFAULT is None
+    centres : ARRAY, optional
+        See integrate_cuts
+        DEFAULT is None
+    up : LIST, optional
+        Direction defining the first in-plane axis of the cuts, see cut_axes
+        DEFAULT is (0, 0, 1)
+
+    Returns
+    -------
+    Cuts : DICT
+        N, V1, V2 - (stage, cut) force along the normal and the two
+        in-plane axes
+        T, M1, M2 - (stage, cut) moment about the normal and the two
+        in-plane axes
+        Force, Moment - (stage, cut, 3) global resultants
+        Axes - (cut, 3, 3) normal, axis 1 and axis 2 of each cut
+        centres - (cut, 3) moment centres
+        length - cut line length of each cut
+        numPlates - plates crossed by each cut
+
+    """
+
+    Segments = cut_geometry(NodeXYZ, PlateNodes, origins, normals, extent)
+    Resultant, ResultantMoment, centres = integrate_cuts(
+        Segments, Force, Moment, centres)
+
+    Axes = np.stack(cut_axes(normals, up), axis=1)
+    Local = np.einsum('sck,cak->sca', Resultant, Axes)
+    LocalMoment = np.einsum('sck,cak->sca', ResultantMoment, Axes)
+    numCuts = len(Axes)
+
+    return {'N': Local[:, :, 0], 'V1': Local[:, :, 1], 'V2': Local[:, :, 2],
+            'T': LocalMoment[:, :, 0], 'M1': LocalMoment[:, :, 1],
+            'M2': LocalMoment[:, :, 2], 'Force': Resultant,
+            'Moment': ResultantMoment, 'Axes': Axes, 'centres': centres,
+            'length': np.bincount(Segments['cut'], weights=Segments['length'],
+                                  minlength=numCuts).astype(np.float64),
+            'numPlates': np.bincount(Segments['cut'], minlength=numCuts)}
@@ -0,0 +1,428 @@
+# -*- coding: utf-8 -*-
+"""
+St7Batch.py
+
+Headless runner of the toolbox operations, without file dialogs, so exports,
+property assignment and result comparisons can run on a scheduler.
+
+Usage:
+    python St7Batch.py export-shear Model.st7 --groups "Model\\LINING"
+    python St7Batch.py export-beams Model.st7 --groups "Model\\beam"
+    python St7Batch.py assign-props Model.st7 PlateProperties.csv --out Iter1.st7 --solve
+    python St7Batch.py compare Results/Stages --checks MaxAst MaxAstStage --suffix _RC1
+    python St7Batch.py run jobs.toml
+
+A job file (TOML, or YAML if PyYAML is installed) lists many operations,
+processed in one interpreter with one St7Init:
+
+    [defaults]
+    tempfolder = "C:/Temp"
+    axis = "Local"
+    min_thickness = 0.4
+
+    [[job]]
+    operation = "export-shear"
+    model = "O:/Models/RC1-RA1.st7"
+    groups = ['Model\\LINING']
+
+    [[job]]
+    operation = "export-cw"
+    model = "O:/Models/RC1-RA2.st7"
+
+Each job takes the keys of its subcommand options, a failing job is reported
+and the batch carries on with the next one.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+import traceback
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+def get_temp_folder(tempfolder=None):
+    """
+    Scratch folder required by the Strand7 API, from the job, the TEMP or TMP
+    environment variables, otherwise the system temporary folder
+    """
+
+    for folder in (tempfolder, os.getenv('TEMP'), os.getenv('TMP')):
+        if folder and os.path.isdir(folder):
+            return folder
+
+    return tempfile.gettempdir()
+
+
+def model_files(job):
+    """
+    Encoded model, temporary folder and result file names of a job
+
+    Returns
+    -------
+    modelname_bt : BYTE
+        Encoded Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    resultfile_bt : BYTE
+        Encoded result file name, the model name with a .NLA extension
+        unless the job gives 'result'
+    """
+
+    modelname = os.path.abspath(job['model'])
+    resultfile = job.get('result') or os.path.splitext(modelname)[0] + '.NLA'
+
+    return (modelname.encode(), get_temp_folder(job.get('tempfolder')).encode(),
+            os.path.abspath(resultfile).encode())
+
+
+def output_model(job, suffix):
+    """
+    Encoded name of the model written by a job, 'out' or the model name
+    with a suffix, relative names are next to the model
+    """
+
+    modelname = os.path.abspath(job['model'])
+    fileOut = job.get('out') or os.path.splitext(modelname)[0] + suffix
+    fileOut = os.path.join(os.path.dirname(modelname), fileOut)
+
+    return fileOut.encode()
+
+
+def plate_export(functionName, minthickness):
+    """
+    Operation running one of the plate exporters over the groups of the job
+    """
+
+    def run(job):
+        import St7Toolbox_JA as St7Tbx
+
+        modelname_bt, tempfolder_bt, resultfile_bt = model_files(job)
+        groupID, numElem = St7Tbx.get_model_info(
+            modelname_bt, tempfolder_bt, job.get('groups', 'ALL'))
+
+        return getattr(St7Tbx, functionName)(
+            modelname_bt, tempfolder_bt, resultfile_bt, groupID,
+            numElem['Plates'], job.get('min_thickness', minthickness),
+            ResultAxis=job.get('axis', 'Local'))
+
+    return run
+
+
+def export_beams(job):
+    import St7Toolbox_JA as St7Tbx
+
+    modelname_bt, tempfolder_bt, resultfile_bt = model_files(job)
+    groupID, numElem = St7Tbx.get_model_info(modelname_bt, tempfolder_bt,
+                                             job.get('groups', 'ALL'))
+
+    return St7Tbx.export_beam_shearinputs_mid(
+        modelname_bt, tempfolder_bt, resultfile_bt, groupID, numElem['Beams'],
+        ResultAxis=job.get('axis', 'Local'))
+
+
+def export_platenodes(job):
+    import St7Toolbox_JA as St7Tbx
+
+    modelname_bt, tempfolder_bt, resultfile_bt = model_files(job)
+    groupID, numElem = St7Tbx.get_model_info(modelname_bt, tempfolder_bt,
+                                             job.get('groups', 'ALL'))
+
+    return St7Tbx.export_platenodes(modelname_bt, tempfolder_bt, groupID,
+                                    numElem['Nodes'], numElem['Plates'],
+                                    job.get('min_thickness', 0.4),
+                                    job.get('format', 'npz'),
+                                    legacyCSV=job.get('legacy_csv', True))
+
+
+def add_results(job):
+    import St7Toolbox_JA as St7Tbx
+
+    modelname_bt, tempfolder_bt, resultfile_bt = model_files(job)
+    DF = pd.read_csv(job['results']).fillna(0)
+
+    if job.get('result_file'):
+        PlateNum, Values, CaseNames = St7Tbx.table_result_cases(DF)
+        resultfile = os.path.join(os.path.dirname(modelname_bt.decode()),
+                                  job['result_file'])
+        return St7Tbx.write_result_file(modelname_bt, tempfolder_bt,
+                                        resultfile.encode(), CaseNames,
+                                        PlateNum, Values)
+
+    return St7Tbx.assign_plates_results(modelname_bt, tempfolder_bt,
+                                        output_model(job, '_results.st7'), DF)
+
+
+def assign_props(job):
+    import St7Toolbox_JA as St7Tbx
+
+    modelname_bt, tempfolder_bt, resultfile_bt = model_files(job)
+    groupID, entTots = St7Tbx.get_model_info(modelname_bt, tempfolder_bt,
+                                             job.get('groups', 'ALL'))
+    DF = pd.read_csv(job['properties']).fillna(0)
+
+    return St7Tbx.assign_plates_prop(modelname_bt, tempfolder_bt,
+                                     output_model(job, '_props.st7'), DF,
+                                     groupID, entTots['Plates'],
+                                     job.get('solve', False))
+
+
+def stage_number(fileName):
+    """
+    Stage number of a design result file named <name>_<stage>.csv
+    """
+
+    return int(os.path.basename(fileName).split('.')[0].split('_')[1])
+
+
+def compare(job):
+    import ComparisonToolbox as SC
+
+    folderpath = job['folder']
+    all_files = sorted(glob.glob(os.path.join(folderpath, '*.csv')),
+                       key=stage_number)
+    if not all_files:
+        raise FileNotFoundError('No .csv results in ' + folderpath)
+
+    # Comparisons are saved two levels up from the stage results by default
+    savepath = job.get('savepath') or str(Path(folderpath).resolve().parents[1])
+    savepath = os.path.join(savepath, '')
+
+    for check in job.get('checks', ['MaxResult', 'MaxBarSize']):
+        getattr(SC, check)(savepath, all_files, check + job.get('suffix', ''))
+
+
+# Operation name: (function, needs the Strand7 API)
+Operations = {
+    'export-shear': (plate_export('export_shearinputs', 0.4), True),
+    'export-cw': (plate_export('export_cwinputs', 0.4), True),
+    'export-es': (plate_export('export_ES_Inputs', 0.4), True),
+    'export-sandwich': (plate_export('export_plate_forceMomentData', -1), True),
+    'export-beams': (export_beams, True),
+    'export-platenodes': (export_platenodes, True),
+    'add-results': (add_results, True),
+    'assign-props': (assign_props, True),
+    'compare': (compare, False)}
+
+# Result axes supported by the exporter of each operation, the plate
+# exporters only build their tables for these axes
+OperationAxes = {'export-shear': ['Local'],
+                 'export-cw': ['Local'],
+                 'export-es': ['Local', 'Global'],
+                 'export-sandwich': ['Local', 'Global'],
+                 'export-beams': ['Local', 'Global', 'Principal']}
+
+ComparisonChecks = ['MaxAst', 'MaxAstStage', 'MaxAsv', 'MaxAsvStage',
+                    'MaxResult', 'MaxResultStage', 'MaxBarSize',
+                    'MaxBarSizeStage']
+
+
+def close_files(St7API):
+    """
+    Close whatever a failed job left open on the model slot
+    """
+
+    St7API.St7CloseResultFile(1)
+    St7API.St7CloseFile(1)
+
+
+def run_jobs(jobs):
+    """
+    Run a list of jobs, initialising the Strand7 API once for all of them
+
+    Parameters
+    ----------
+    jobs : LIST
+        DICT of each job, with the 'operation' name and its options
+
+    Returns
+    -------
+    failed : LIST
+        Index and error message of the jobs that failed
+    """
+
+    for ind, job in enumerate(jobs):
+        if job.get('operation') not in Operations:
+            raise ValueError('Job %d: unknown operation %r, expected one of %s'
+                             % (ind + 1, job.get('operation'),
+                                ', '.join(Operations)))
+        axes = OperationAxes.get(job['operation'])
+        if 'axis' in job and axes is not None \
+                and str(job['axis']).capitalize() not in axes:
+            raise ValueError('Job %d: axis %r not supported by %s, expected '
+                             'one of %s' % (ind + 1, job['axis'],
+                                            job['operation'], ', '.join(axes)))
+
+    St7API = None
+    if any(Operations[job['operation']][1] for job in jobs):
+        import St7API
+        St7API.St7Init()
+
+    failed = []
+    try:
+        for ind, job in enumerate(jobs):
+            operation, needsAPI = Operations[job['operation']]
+            label = '%s %s' % (job['operation'],
+                               job.get('model', job.get('folder', '')))
+            print('Job %d/%d: %s' % (ind + 1, len(jobs), label))
+            t0 = time.perf_counter()
+            try:
+                operation(job)
+            except Exception as error:
+                traceback.print_exc()
+                failed.append((ind + 1, '%s: %s' % (label, error)))
+                if needsAPI:
+                    close_files(St7API)
+                continue
+            print('Job %d done in %.1f s' % (ind + 1, time.perf_counter() - t0))
+    finally:
+        if St7API is not None:
+            St7API.St7Release()
+            print('API released')
+
+    print('%d of %d jobs completed' % (len(jobs) - len(failed), len(jobs)))
+    for ind, message in failed:
+        print('Job %d failed: %s' % (ind, message))
+
+    return failed
+
+
+def read_job_file(fileName):
+    """
+    Jobs of a TOML or YAML job file, the [defaults] table is merged into
+    every [[job]]
+    """
+
+    extension = os.path.splitext(fileName)[1].lower()
+    if extension in ('.yaml', '.yml'):
+        if yaml is None:
+            raise ImportError('PyYAML is required to read ' + fileName)
+        with open(fileName) as f:
+            content = yaml.safe_load(f) or {}
+    else:
+        if tomllib is None:
+            raise ImportError('tomli is required to read ' + fileName
+                              + ' before Python 3.11')
+        with open(fileName, 'rb') as f:
+            content = tomllib.load(f)
+
+    defaults = content.get('defaults', {})
+    jobs = []
+    for job in content.get('job', []):
+        merged = dict(defaults)
+        merged.update(job)
+        jobs.append(merged)
+
+    # Relative paths in the job file are relative to the job file
+    folder = os.path.dirname(os.path.abspath(fileName))
+    for job in jobs:
+        for key in ('model', 'result', 'results', 'properties', 'folder',
+                    'savepath'):
+            if job.get(key):
+                job[key] = os.path.join(folder, job[key])
+
+    return jobs
+
+
+def add_model_options(parser, axes=None, minthickness=None):
+    parser.add_argument('model', help='Strand7 model file')
+    parser.add_argument('--groups', nargs='+',
+                        help='group names to keep, default all groups')
+    parser.add_argument('--result', help='result file, default the model '
+                        'name with a .NLA extension')
+    parser.add_argument('--tempfolder', help='Strand7 scratch folder')
+    if axes:
+        parser.add_argument('--axis', default='Local', choices=axes)
+    if minthickness is not None:
+        parser.add_argument('--min-thickness', dest='min_thickness',
+                            type=float, default=minthickness)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='Headless runner of the Strand7 toolbox operations',
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='operation', required=True)
+
+    run = commands.add_parser('run', help='run the jobs of a job file')
+    run.add_argument('jobfile', help='TOML or YAML job file')
+
+    for name, minthickness in (('export-shear', 0.4), ('export-cw', 0.4),
+                               ('export-es', 0.4), ('export-sandwich', -1)):
+        add_model_options(commands.add_parser(name, help='plate exporter'),
+                          OperationAxes[name], minthickness=minthickness)
+
+    add_model_options(commands.add_parser('export-beams',
+                                          help='beam mid-span shear inputs'),
+                      OperationAxes['export-beams'])
+    command = commands.add_parser('export-platenodes',
+                                  help='node co-ordinates and plates')
+    add_model_options(command, minthickness=0.4)
+    command.add_argument('--format', default='npz', choices=['npz', 'none'],
+                         help='<model>_Mesh.npz arrays')
+    command.add_argument('--no-legacy-csv', dest='legacy_csv',
+                         action='store_false',
+                         help='skip <model>_Nodes.csv and <model>_Plates.csv')
+
+    command = commands.add_parser('add-results', help='plate results as '
+                                  'heat sources or in a result file')
+    add_model_options(command)
+    command.add_argument('results', help='.csv of Plate ID and result columns')
+    command.add_argument('--out', help='model written, default '
+                         '<model>_results.st7')
+    command.add_argument('--result-file', dest='result_file',
+                         help='write a user result file instead of heat '
+                         'sources, the model is not modified')
+
+    command = commands.add_parser('assign-props', help='plate properties')
+    add_model_options(command)
+    command.add_argument('properties', help='.csv of plate properties')
+    command.add_argument('--out', help='model written, default '
+                         '<model>_props.st7')
+    command.add_argument('--solve', action='store_true',
+                         help='run the nonlinear static solver on the output')
+
+    command = commands.add_parser('compare', help='design result envelopes')
+    command.add_argument('folder', help='folder of <name>_<stage>.csv files')
+    command.add_argument('--checks', nargs='+', choices=ComparisonChecks,
+                         default=['MaxResult', 'MaxBarSize'])
+    command.add_argument('--suffix', default='')
+    command.add_argument('--savepath', help='default two folders up')
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.operation == 'run':
+        jobs = read_job_file(args.jobfile)
+    else:
+        job = {key: value for key, value in vars(args).items()
+               if value is not None}
+        jobs = [job]
+
+    failed = run_jobs(jobs)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
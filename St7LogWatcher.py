@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+Live monitoring of a running Strand7 solve through its log file
+
+The log is read as it grows, the stage, increment, iteration and convergence
+norm lines update a progress dictionary, and the solver process is terminated
+as soon as a divergence or stagnation rule fires.
+
+Usage:
+    ProcessHandle = ctypes.c_long()
+    St7API.St7RunSolverProcess(1, St7API.stNonlinearStaticSolver,
+                               St7API.smBackgroundRun, St7API.btFalse,
+                               ProcessHandle)
+    Progress = St7LogWatcher.watch_solver(ProcessHandle.value, 'Model.NLL',
+                                          rules={'maxNorm': 1e4},
+                                          numStages=120)
+
+or run_solver(..., watchLog={'maxNorm': 1e4}) in St7Toolbox_JA.
+
+The log line patterns are regular expressions of LogPatterns, they can be
+changed to match the log layout of the Strand7 version in use.
+"""
+
+import ctypes
+import math
+import os
+import re
+import sys
+import time
+
+import St7API
+
+# Regular expressions of the log lines, the first group is the number
+LogPatterns = {
+    'stage': re.compile(r'\bStage\s*:?\s*(\d+)', re.IGNORECASE),
+    'increment': re.compile(r'\bIncrement\s*:?\s*(\d+)', re.IGNORECASE),
+    'iteration': re.compile(r'\bIteration\s*:?\s*(\d+)', re.IGNORECASE),
+    # Values labelled as a norm or residual on the iteration lines, not
+    # the load factor, time or tolerance printed next to them
+    'norm': re.compile(r'\b(?:norm|residual)\w*[^\w\n+.-]*'
+                       r'([-+]?(?:\d+\.?\d*|\.\d+)(?:[Ee][-+]?\d+)?|NaN\b)',
+                       re.IGNORECASE),
+    # Failure messages of the solver, an error label at the start of the
+    # line, not words such as 'error tolerance' in the echoed settings
+    'failure': re.compile(r'^\W*(?:error|fatal)\b\s*[:!-]|'
+                          r'\bnot converged?\b|\bdiverg(?:ed|ing)\b|'
+                          r'\bsolution (?:terminated|aborted)\b',
+                          re.IGNORECASE)}
+
+# Abort rules, None switches a rule off
+DefaultRules = {
+    # Convergence norm above this value
+    'maxNorm': 1e6,
+    # Norm growing over this many consecutive iterations
+    'divergenceIterations': 5,
+    # Iterations in a single increment
+    'maxIterations': 200,
+    # Seconds without a new increment
+    'stagnationSeconds': 3600.0,
+    # Failure lines in a single increment
+    'maxFailures': 20,
+    # Increments solved, e.g. to cap a trial solve
+    'maxIncrements': None}
+
+
+def new_progress(numStages=None):
+    """
+    Progress of a solve, updated by update_progress
+
+    Returns
+    -------
+    Progress : DICT
+        stage, increment, iteration, norm - last values read in the log
+        increments - number of increments started
+        stagesDone - completed stages
+        stageTimes - seconds spent in each completed stage
+        failures - number of failure lines
+        incrementFailures - failure lines of the current increment
+        status - 'running', 'finished' or 'aborted'
+        reason - rule that aborted the solve, or that fired after the
+        solver had already ended
+    """
+
+    now = time.time()
+
+    return {'numStages': numStages, 'startTime': now, 'stage': 0,
+            'stageStart': now, 'increment': 0, 'incrementTime': now,
+            'increments': 0, 'iteration': 0, 'norm': None, 'norms': [],
+            'stagesDone': 0, 'stageTimes': {}, 'failures': 0,
+            'incrementFailures': 0, 'status': 'running', 'reason': None}
+
+
+def update_progress(Progress, line, patterns=LogPatterns):
+    """
+    Update the progress with one line of the solver log
+    """
+
+    now = time.time()
+
+    match = patterns['stage'].search(line)
+    if match and int(match.group(1)) != Progress['stage']:
+        if Progress['stage']:
+            Progress['stageTimes'][Progress['stage']] = \
+                now - Progress['stageStart']
+            Progress['stagesDone'] += 1
+        Progress['stage'] = int(match.group(1))
+        Progress['stageStart'] = now
+
+    match = patterns['increment'].search(line)
+    if match and int(match.group(1)) != Progress['increment']:
+        Progress['increment'] = int(match.group(1))
+        Progress['increments'] += 1
+        Progress['incrementTime'] = now
+        Progress['iteration'] = 0
+        Progress['incrementFailures'] = 0
+        del Progress['norms'][:]
+
+    # Counted after a new increment, a failure line ends its increment
+    if patterns['failure'].search(line):
+        Progress['failures'] += 1
+        Progress['incrementFailures'] += 1
+
+    match = patterns['iteration'].search(line)
+    if match:
+        Progress['iteration'] = int(match.group(1))
+        norms = [float(value) for value in patterns['norm'].findall(line)]
+        if norms:
+            # The largest norm governs the convergence
+            Progress['norm'] = float('nan') if any(map(math.isnan, norms)) \
+                else max(norms)
+            Progress['norms'].append(Progress['norm'])
+
+
+def check_rules(Progress, rules=None):
+    """
+    Abort rule fired by the progress of the solve
+
+    Returns
+    -------
+    reason : STRING
+        Description of the rule, None while the solve is healthy
+    """
+
+    rules = dict(DefaultRules, **(rules or {}))
+    norm = Progress['norm']
+
+    if norm is not None and math.isnan(norm):
+        return 'convergence norm is NaN'
+
+    if rules['maxNorm'] is not None and norm is not None \
+            and norm > rules['maxNorm']:
+        return 'convergence norm %.3g above %.3g' % (norm, rules['maxNorm'])
+
+    count = rules['divergenceIterations']
+    norms = Progress['norms']
+    if count and len(norms) > count \
+            and all(b > a for a, b in zip(norms[-count - 1:-1],
+                                          norms[-count:])):
+        return 'convergence norm growing over %d iterations' % count
+
+    if rules['maxIterations'] and \
+            Progress['iteration'] > rules['maxIterations']:
+        return '%d iterations in increment %d' % (Progress['iteration'],
+                                                  Progress['increment'])
+
+    stalled = time.time() - Progress['incrementTime']
+    if rules['stagnationSeconds'] and stalled > rules['stagnationSeconds']:
+        return 'no new increment for %.0f s' % rules['stagnationSeconds']
+
+    if rules['maxIncrements'] and \
+            Progress['increments'] > rules['maxIncrements']:
+        return '%d increments solved' % rules['maxIncrements']
+
+    if rules['maxFailures'] and \
+            Progress['incrementFailures'] > rules['maxFailures']:
+        return '%d failure lines in increment %d' % (
+            Progress['incrementFailures'], Progress['increment'])
+
+    return None
+
+
+def progress_summary(Progress):
+    """
+    Throughput and remaining time of the solve
+
+    Returns
+    -------
+    summary : DICT
+        elapsed - seconds since the start
+        incrementsPerMinute - increments started per minute
+        stageSeconds - mean duration of the completed stages
+        eta - estimated seconds to the end, None without numStages or
+        completed stages
+    """
+
+    elapsed = time.time() - Progress['startTime']
+    stageTimes = list(Progress['stageTimes'].values())
+    stageSeconds = sum(stageTimes) / len(stageTimes) if stageTimes else None
+
+    eta = None
+    if Progress['numStages'] and stageSeconds is not None:
+        current = time.time() - Progress['stageStart']
+        remaining = Progress['numStages'] - Progress['stagesDone']
+        eta = max(remaining * stageSeconds - current, 0.0)
+
+    return {'elapsed': elapsed,
+            'incrementsPerMinute': 60.0 * Progress['increments'] / elapsed
+            if elapsed > 0 else 0.0,
+            'stageSeconds': stageSeconds, 'eta': eta}
+
+
+def terminate_solver(processHandle):
+    """
+    Terminate the solver process started by St7RunSolverProcess
+    """
+
+    if sys.platform != 'win32':
+        print('Cannot terminate the solver process on ' + sys.platform)
+        return False
+
+    return bool(ctypes.windll.kernel32.TerminateProcess(
+        ctypes.c_void_p(processHandle), 1))
+
+
+def solver_running(processHandle):
+    Running = ctypes.c_bool()
+    St7API.St7CheckSolverRunning(processHandle, Running)
+
+    return Running.value
+
+
+def read_lines(f, pending):
+    """
+    Complete lines appended to the log since the last read, an incomplete
+    last line is kept in pending until its end is written
+    """
+
+    text = pending[0] + f.read()
+    lines = text.split('\n')
+    pending[0] = lines.pop()
+
+    return lines
+
+
+def watch_solver(processHandle, logfile, rules=None, numStages=None,
+                 interval=5.0, callback=None, patterns=LogPatterns):
+    """
+    Follow the log of a running solve until the solver process ends, and
+    terminate it when an abort rule fires
+
+    Parameters
+    ----------
+    processHandle : INTEGER
+        Solver process of St7RunSolverProcess
+    logfile : STRING
+        Solver log file name
+    rules : DICT, optional
+        Abort rules overriding DefaultRules
+        DEFAULT is None, DefaultRules
+    numStages : INTEGER, optional
+        Number of stages solved, for the remaining time estimate
+        DEFAULT is None
+    interval : FLOAT, optional
+        Seconds between two reads of the log
+        DEFAULT is 5.0
+    callback : FUNCTION, optional
+        callback(Progress) called after every read, e.g. to print the
+        progress or extract the completed stages
+        DEFAULT is None
+    patterns : DICT, optional
+        DEFAULT is LogPatterns
+
+    Returns
+    -------
+    Progress : DICT
+        Final progress, see new_progress
+    """
+
+    Progress = new_progress(numStages)
+    pending = ['']
+    f = None
+
+    try:
+        while True:
+            running = solver_running(processHandle)
+
+            if f is None and os.path.exists(logfile):
+                f = open(logfile, errors='replace')
+            # Rules are checked on every line, a divergence followed by a
+            # new increment in the same read is still caught
+            reason = None
+            if f is not None:
+                for line in read_lines(f, pending):
+                    update_progress(Progress, line, patterns)
+                    reason = reason or check_rules(Progress, rules)
+
+            if not running:
+                if pending[0]:
+                    update_progress(Progress, pending[0], patterns)
+                Progress['status'] = 'finished'
+                Progress['reason'] = reason
+                break
+
+            reason = reason or check_rules(Progress, rules)
+            if reason:
+                print('Aborting the solve: ' + reason)
+                terminate_solver(processHandle)
+                Progress['status'] = 'aborted'
+                Progress['reason'] = reason
+                break
+
+            if callback is not None:
+                callback(Progress)
+            time.sleep(interval)
+    finally:
+        if f is not None:
+            f.close()
+
+    if callback is not None:
+        callback(Progress)
+
+    return Progress
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in instrumentation of the Strand7 API calls and toolbox phases
+
+Usage:
+    import St7Profiler
+    St7Profiler.enable()        # enable(traceCalls=1000) for long runs
+    ... run toolbox functions ...
+    St7Profiler.write_report('profile.json')
+    St7Profiler.write_chrome_trace('profile_trace.json')
+    St7Profiler.disable()
+
+When disabled the St7API functions are the original ctypes objects and
+span() returns a shared do-nothing context, so it can stay in production code.
+"""
+
+import json
+import os
+import time
+from array import array
+
+import numpy as np
+import St7API
+
+Enabled = False
+
+# Duration in seconds of every call, per API function name
+CallTimes = {}
+
+# perf_counter start of the first TraceCalls calls, per API function name,
+# entry i is the start of the call timed by CallTimes[name][i]
+CallStarts = {}
+
+# Calls per API function whose start is kept for the trace, None for all
+TraceCalls = None
+
+# Toolbox phases as (name, start, duration, depth), times in seconds
+Spans = []
+
+# Original API functions replaced while enabled
+Originals = {}
+
+# Start of the recording, reference of the trace timestamps
+StartTime = time.perf_counter()
+SpanDepth = 0
+
+
+def wrap_function(name, func):
+    """
+    Returns a wrapper of an API function recording the duration of each call,
+    and the start of the first TraceCalls calls. The wrapper calls the ctypes
+    function itself, so an errcheck hook set before or after enable()
+    (install_error_checks reaches it through __wrapped__) keeps checking the
+    calls.
+    """
+
+    times = CallTimes.setdefault(name, array('d'))
+    starts = CallStarts.setdefault(name, array('d'))
+    limit = TraceCalls
+    perf_counter = time.perf_counter
+
+    def wrapper(*args):
+        t0 = perf_counter()
+        try:
+            return func(*args)
+        finally:
+            # Starts stay a prefix of the durations across enable() calls
+            if len(starts) == len(times) and (limit is None
+                                              or len(starts) < limit):
+                starts.append(t0)
+            times.append(perf_counter() - t0)
+
+    wrapper.__name__ = name
+    wrapper.__wrapped__ = func
+
+    return wrapper
+
+
+def enable(traceCalls=None):
+    """
+    Start recording: every St7API function is replaced by a timed wrapper
+
+    Parameters
+    ----------
+    traceCalls : INTEGER, optional
+        Calls per API function whose start time is kept for
+        write_chrome_trace, the durations of every call are kept for report
+        DEFAULT is None, every call
+    """
+
+    global Enabled, StartTime, TraceCalls
+
+    if Enabled:
+        return
+
+    TraceCalls = traceCalls
+
+    for name in dir(St7API):
+        func = getattr(St7API, name)
+        if name.startswith('St7') and callable(func):
+            Originals[name] = func
+            setattr(St7API, name, wrap_function(name, func))
+
+    StartTime = time.perf_counter()
+    Enabled = True
+
+
+def disable():
+    """
+    Stop recording and put the original St7API functions back.
+    Recorded data is kept until reset() is called.
+    """
+
+    global Enabled
+
+    for name, func in Originals.items():
+        setattr(St7API, name, func)
+    Originals.clear()
+
+    Enabled = False
+
+
+def reset():
+    """
+    Discard the recorded calls and spans
+    """
+
+    global StartTime
+
+    # Emptied in place, the wrappers of an enabled recording keep appending
+    for times in list(CallTimes.values()) + list(CallStarts.values()):
+        del times[:]
+    del Spans[:]
+    StartTime = time.perf_counter()
+
+
+class PhaseSpan():
+    """
+    Context recording the duration of a toolbox phase
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        global SpanDepth
+        self.start = time.perf_counter()
+        SpanDepth += 1
+        return self
+
+    def __exit__(self, *exc):
+        global SpanDepth
+        SpanDepth -= 1
+        Spans.append((self.name, self.start - StartTime,
+                      time.perf_counter() - self.start, SpanDepth))
+        return False
+
+
+class NullSpan():
+    """
+    Do-nothing context used while disabled
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+def span(name):
+    """
+    Context timing a toolbox phase, e.g.
+        with St7Profiler.span('Group scan'):
+            ...
+    """
+
+    if Enabled:
+        return PhaseSpan(name)
+
+    return NULL_SPAN
+
+
+def report():
+    """
+    Summary of the recording
+
+    Returns
+    -------
+    summary : DICT
+        'calls': per API function, number of calls, total, mean, p50, p90,
+        p99 and max durations in seconds, sorted by total time
+        'phases': per phase name, number of spans and total duration
+    """
+
+    calls = {}
+    for name, times in CallTimes.items():
+        if not len(times):
+            continue
+        durations = np.frombuffer(times, dtype=np.float64)
+        p50, p90, p99 = np.percentile(durations, [50, 90, 99])
+        calls[name] = {'count': int(len(durations)),
+                       'total': float(durations.sum()),
+                       'mean': float(durations.mean()),
+                       'p50': float(p50), 'p90': float(p90),
+                       'p99': float(p99),
+                       'max': float(durations.max())}
+    calls = dict(sorted(calls.items(), key=lambda item: -item[1]['total']))
+
+    phases = {}
+    for name, start, duration, depth in Spans:
+        phase = phases.setdefault(name, {'count': 0, 'total': 0.0})
+        phase['count'] += 1
+        phase['total'] += duration
+
+    return {'calls': calls, 'phases': phases}
+
+
+def write_report(fileName):
+    """
+    Write the summary of the recording as JSON
+    """
+
+    with open(fileName, 'w') as f:
+        json.dump(report(), f, indent=2)
+    print('Profile saved in ' + fileName)
+
+    return fileName
+
+
+def write_chrome_trace(fileName):
+    """
+    Write the phase spans and the API calls in the Chrome trace event
+    format, to open in chrome://tracing or Perfetto. Each API call whose
+    start was kept (enable(traceCalls)) is a complete event on its own track
+    below the phases.
+    """
+
+    pid = os.getpid()
+    events = []
+    for name, start, duration, depth in Spans:
+        events.append({'name': name, 'cat': 'phase', 'ph': 'X',
+                       'ts': start * 1e6, 'dur': duration * 1e6,
+                       'pid': pid, 'tid': 1})
+
+    for name, starts in CallStarts.items():
+        durations = CallTimes[name]
+        for start, duration in zip(starts, durations):
+            events.append({'name': name, 'cat': 'api', 'ph': 'X',
+                           'ts': (start - StartTime) * 1e6,
+                           'dur': duration * 1e6, 'pid': pid, 'tid': 2})
+
+    with open(fileName, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    print('Trace saved in ' + fileName)
+
+    return fileName
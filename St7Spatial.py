@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""
+Region based selection of nodes and elements
+
+The centroids of the elements (St7GetElementCentroid) or the node
+co-ordinates (St7GetNodeXYZ) are read once per model, cached next to the
+model and sorted into a uniform grid, so box, sphere, slab and polygon prism
+queries return entity numbers without temporary groups in Strand7.
+
+Usage:
+    Index = St7Spatial.load_index(modelname_bt, tempfolder_bt, St7API.tyPLATE)
+    PlateNum = St7Spatial.query_slab(Index, origin=(0, 0, 0),
+                                     normal=(1, 0, 0), start=120.0, end=180.0)
+    PlateNum = St7Spatial.query_sphere(Index, centre=(150, 20, -30),
+                                       radius=5.0)
+    St7Tbx.export_shearinputs(..., elements=PlateNum)
+
+The returned numbers can be passed as elements= to the toolbox exporters,
+which keep the entities both in their groups and in the region.
+"""
+
+import ctypes
+import os
+
+import numpy as np
+
+import St7API
+
+EntityNames = {St7API.tyNODE: 'Node', St7API.tyBEAM: 'Beam',
+               St7API.tyPLATE: 'Plate', St7API.tyBRICK: 'Brick'}
+
+# Mean number of points per grid cell
+kPointsPerCell = 8
+
+# Indexes of this session, per (model file, modification time, entity type)
+Indexes = {}
+
+
+def read_centroids(entityType):
+    """
+    Entity numbers and centroids of every entity of a type.
+    A model must be open on uID 1.
+
+    Parameters
+    ----------
+    entityType : INTEGER
+        St7API.tyNODE, tyBEAM, tyPLATE or tyBRICK
+
+    Returns
+    -------
+    EntityNum : ARRAY
+        Entity numbers
+    Points : ARRAY
+        (entities, 3) centroids, node co-ordinates for tyNODE
+
+    """
+
+    Total = ctypes.c_long()
+    St7API.St7GetTotal(1, entityType, Total)
+
+    XYZ = (ctypes.c_double * 3)()
+    XYZView = np.ctypeslib.as_array(XYZ)
+    Points = np.empty((Total.value, 3))
+
+    for ind in range(1, Total.value + 1):
+        if entityType == St7API.tyNODE:
+            St7API.St7GetNodeXYZ(1, ind, XYZ)
+        else:
+            St7API.St7GetElementCentroid(1, entityType, ind, 0, XYZ)
+        Points[ind - 1] = XYZView
+
+    return np.arange(1, Total.value + 1, dtype=np.int32), Points
+
+
+def build_index(EntityNum, Points, cellSize=None):
+    """
+    Uniform grid over points
+
+    Parameters
+    ----------
+    EntityNum : ARRAY
+        Entity numbers
+    Points : ARRAY
+        (entities, 3) co-ordinates
+    cellSize : FLOAT, optional
+        Grid cell size
+        DEFAULT is None, about kPointsPerCell points per cell
+
+    Returns
+    -------
+    Index : DICT
+        EntityNum, Points - sorted by grid cell
+        origin, cellSize, shape - grid definition
+        keys, starts, counts - occupied cells and their range of points
+
+    """
+
+    Points = np.asarray(Points, dtype=np.float64).reshape(-1, 3)
+    EntityNum = np.asarray(EntityNum, dtype=np.int32)
+
+    if len(Points):
+        origin = Points.min(axis=0)
+        extent = Points.max(axis=0) - origin
+    else:
+        origin = np.zeros(3)
+        extent = np.zeros(3)
+
+    if cellSize is None:
+        # Cells of the bounding box (flat axes excluded) sized for
+        # kPointsPerCell points each
+        active = extent[extent > 0]
+        numCells = max(len(Points) / kPointsPerCell, 1.0)
+        cellSize = (np.prod(active) / numCells) ** (1.0 / len(active)) \
+            if len(active) else 1.0
+    cellSize = float(cellSize) if cellSize > 0 else 1.0
+
+    shape = np.floor(extent / cellSize).astype(np.int64) + 1
+    cellKeys = cell_keys(np.floor((Points - origin) / cellSize)
+                         .astype(np.int64), shape)
+    order = np.argsort(cellKeys, kind='stable')
+    keys, starts, counts = np.unique(cellKeys[order], return_index=True,
+                                     return_counts=True)
+
+    return {'EntityNum': EntityNum[order], 'Points': Points[order],
+            'origin': origin, 'cellSize': cellSize, 'shape': shape,
+            'keys': keys, 'starts': starts, 'counts': counts}
+
+
+def cell_keys(Cells, shape):
+    return Cells[:, 0] + shape[0] * (Cells[:, 1] + shape[1] * Cells[:, 2])
+
+
+def load_index(modelname_bt, tempfolder_bt, entityType, cellSize=None,
+               cacheFile=True):
+    """
+    Spatial index of a model, read once and reused while the model file is
+    unchanged
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    entityType : INTEGER
+        St7API.tyNODE, tyBEAM, tyPLATE or tyBRICK
+    cellSize : FLOAT, optional
+        Grid cell size, see build_index
+        DEFAULT is None
+    cacheFile : BOOLEAN, optional
+        Keep the centroids in <model>_<Entity>Centroids.npz for the next
+        sessions
+        DEFAULT is True
+
+    Returns
+    -------
+    Index : DICT
+        See build_index
+
+    """
+
+    modelname = os.path.abspath(modelname_bt.decode())
+    mtime = os.path.getmtime(modelname) if os.path.exists(modelname) else 0.0
+    key = (modelname, mtime, entityType, cellSize)
+    if key in Indexes:
+        return Indexes[key]
+
+    cachename = '%s_%sCentroids.npz' % (os.path.splitext(modelname)[0],
+                                         EntityNames[entityType])
+    Cached = None
+    if cacheFile and os.path.exists(cachename):
+        with np.load(cachename) as data:
+            if float(data['mtime']) == mtime:
+                Cached = (data['EntityNum'], data['Points'])
+
+    if Cached is None:
+        ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
+        if ret != 0:
+            raise IOError('Cannot open file ' + modelname)
+        print('Reading %s centroids' % EntityNames[entityType].lower())
+        Cached = read_centroids(entityType)
+        St7API.St7CloseFile(1)
+        if cacheFile:
+            np.savez(cachename, EntityNum=Cached[0], Points=Cached[1],
+                     mtime=mtime)
+
+    Indexes[key] = build_index(Cached[0], Cached[1], cellSize)
+
+    return Indexes[key]
+
+
+def box_candidates(Index, lower, upper):
+    """
+    Position in the index of the points of the grid cells overlapping a box
+    """
+
+    lower = np.asarray(lower, dtype=np.float64)
+    upper = np.asarray(upper, dtype=np.float64)
+    shape = Index['shape']
+    first = np.floor((lower - Index['origin']) / Index['cellSize'])
+    last = np.floor((upper - Index['origin']) / Index['cellSize'])
+    if not len(Index['keys']) or np.any(last < 0) \
+            or np.any(first > shape - 1):
+        return np.empty(0, dtype=np.int64)
+    first = np.clip(first, 0, shape - 1).astype(np.int64)
+    last = np.clip(last, 0, shape - 1).astype(np.int64)
+
+    Ranges = [np.arange(first[axis], last[axis] + 1) for axis in range(3)]
+    Cells = np.stack(np.meshgrid(*Ranges, indexing='ij'), axis=-1)
+    queryKeys = cell_keys(Cells.reshape(-1, 3), shape)
+
+    # Occupied cells only
+    pos = np.minimum(np.searchsorted(Index['keys'], queryKeys),
+                     len(Index['keys']) - 1)
+    pos = pos[Index['keys'][pos] == queryKeys]
+    starts = Index['starts'][pos]
+    counts = Index['counts'][pos]
+
+    # Concatenated ranges starts[i] to starts[i] + counts[i]
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+
+    return offsets + np.arange(counts.sum())
+
+
+def query_box(Index, lower, upper):
+    """
+    Entities with their point in an axis aligned box
+
+    Parameters
+    ----------
+    Index : DICT
+        See build_index
+    lower, upper : LIST
+        Opposite corners (x, y, z) of the box
+
+    Returns
+    -------
+    EntityNum : ARRAY
+        Sorted entity numbers
+
+    """
+
+    cand = box_candidates(Index, lower, upper)
+    Points = Index['Points'][cand]
+    inside = np.all((Points >= lower) & (Points <= upper), axis=1)
+
+    return np.sort(Index['EntityNum'][cand[inside]])
+
+
+def query_sphere(Index, centre, radius):
+    """
+    Entities with their point within a distance of a point
+
+    Parameters
+    ----------
+    Index : DICT
+        See build_index
+    centre : LIST
+        (x, y, z) of the centre
+    radius : FLOAT
+        Distance
+
+    Returns
+    -------
+    EntityNum : ARRAY
+        Sorted entity numbers
+
+    """
+
+    centre = np.asarray(centre, dtype=np.float64)
+    cand = box_candidates(Index, centre - radius, centre + radius)
+    dist2 = ((Index['Points'][cand] - centre) ** 2).sum(axis=1)
+
+    return np.sort(Index['EntityNum'][cand[dist2 <= radius ** 2]])
+
+
+def query_slab(Index, origin, normal, start, end):
+    """
+    Entities with their point between two parallel planes, e.g. a chainage
+    range along a tunnel axis
+
+    Parameters
+    ----------
+    Index : DICT
+        See build_index
+    origin : LIST
+        (x, y, z) of the point of distance 0
+    normal : LIST
+        Direction of the distances, normal to the planes
+    start, end : FLOAT
+        Distances of the two planes from origin along normal
+
+    Returns
+    -------
+    EntityNum : ARRAY
+        Sorted entity numbers
+
+    """
+
+    normal = np.asarray(normal, dtype=np.float64)
+    normal = normal / np.linalg.norm(normal)
+    dist = (Index['Points'] - np.asarray(origin, dtype=np.float64)) @ normal
+    inside = (dist >= min(start, end)) & (dist <= max(start, end))
+
+    return np.sort(Index['EntityNum'][inside])
+
+
+def points_in_polygon(Points, Polygon):
+    """
+    Crossing number test of 2D points against a closed polygon, one
+    vectorised pass per polygon edge
+    """
+
+    x, y = Points[:, 0], Points[:, 1]
+    inside = np.zeros(len(Points), dtype=bool)
+    for (x1, y1), (x2, y2) in zip(Polygon, np.roll(Polygon, -1, axis=0)):
+        crosses = (y1 > y) != (y2 > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xCross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (x < xCross)
+
+    return inside
+
+
+def query_prism(Index, Polygon, lower, upper, axis=2):
+    """
+    Entities with their point in a prism, a polygon extruded along an axis,
+    e.g. a shaft footprint over a depth range
+
+    Parameters
+    ----------
+    Index : DICT
+        See build_index
+    Polygon : ARRAY
+        (vertices, 2) polygon in the plane of the two other axes, in
+        (x, y), (y, z) or (z, x) order for axis 2, 0 or 1
+    lower, upper : FLOAT
+        Extent of the prism along axis
+    axis : INTEGER, optional
+        Extrusion axis, 0 for X, 1 for Y, 2 for Z
+        DEFAULT is 2
+
+    Returns
+    -------
+    EntityNum : ARRAY
+        Sorted entity numbers
+
+    """
+
+    Polygon = np.asarray(Polygon, dtype=np.float64)
+    planeAxes = [(axis + 1) % 3, (axis + 2) % 3]
+
+    boxLower = np.empty(3)
+    boxUpper = np.empty(3)
+    boxLower[planeAxes] = Polygon.min(axis=0)
+    boxUpper[planeAxes] = Polygon.max(axis=0)
+    boxLower[axis] = min(lower, upper)
+    boxUpper[axis] = max(lower, upper)
+
+    cand = box_candidates(Index, boxLower, boxUpper)
+    Points = Index['Points'][cand]
+    inside = (Points[:, axis] >= boxLower[axis]) & \
+        (Points[:, axis] <= boxUpper[axis])
+    inside[inside] = points_in_polygon(Points[inside][:, planeAxes], Polygon)
+
+    return np.sort(Index['EntityNum'][cand[inside]])
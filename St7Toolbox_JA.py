@@ -1,16 +1,129 @@
 # -*- coding: utf-8 -*-
 
 import os
-import sys
 import ctypes
 import St7API
 import pandas as pd
 import re
 import numpy as np
+import St7Profiler
+import St7LogWatcher
+import itertools
+import json
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Upper bounds used to size element result buffers
+# 27 Gauss points for a 20-node brick, 16 columns covers every result subtype
+kMaxResultPoints = 27
+kMaxResultColumns = 16
+
+# Strand7 keywords shared by the plate and brick exporters
+SampleLocations = {'Centroid': St7API.AtCentroid,
+                   'Gauss': St7API.AtGaussPoints,
+                   'Nodesaveragenever': St7API.AtNodesAverageNever,
+                   'Nodesaverageall': St7API.AtNodesAverageAll,
+                   'Nodesaveragesame': St7API.AtNodesAverageSame}
+
+PlateSurfaces = {'Midplane': St7API.psPlateMidPlane,
+                 'Zplus': St7API.psPlateZPlus,
+                 'Zminus': St7API.psPlateZMinus}
+
+# Result buffers reused between calls, keyed by
+# (entity type, sample location, number of points)
+ResultBuffers = {}
+
+# Largest result array returned by St7GetPlateResultArray/St7GetBrickResultArray
+MaxResultSizes = {St7API.tyPLATE: St7API.kMaxPlateResult,
+                  St7API.tyBRICK: St7API.kMaxBrickResult}
+
+# Beam section depth of each beam property, keyed by model file path and
+# modification time
+BeamDepthCache = {}
+
+# Error messages already looked up, keyed by error code
+ErrorStrings = {}
+
+# Opt-in: set to True (or call install_error_checks) so that every API call
+# is checked, open_model_results then installs the checks
+CheckErrors = False
+
+# What checked API calls do on failure, 'raise' or 'collect'
+CheckMode = 'raise'
+CollectedErrors = []
+
+# Functions whose return code is not an error status
+UncheckedFunctions = ('St7GetAPIErrorString', 'St7GetSolverErrorString')
+
+class St7Error(Exception):
+    """
+    Error returned by a Strand7 API call
+
+    Attributes
+    ----------
+    code : INTEGER
+        API or solver error code
+    message : STRING
+        Decoded error message
+    function : STRING
+        Name of the API function that failed, None if unknown
+
+    """
+
+    def __init__(self, code, function=None):
+        self.code = code
+        self.message = get_error_string(code)
+        self.function = function
+        if function:
+            text = '%s failed: %s (%d)' % (function, self.message, code)
+        else:
+            text = '%s (%d)' % (self.message, code)
+        super().__init__(text)
+
+def get_error_string(ErrorCode):
+    """
+    Message of an API or solver error code, looked up once per code
+
+    Parameters
+    ----------
+    ErrorCode : INTEGER
+        Result of API action that is different from 0
+
+    Returns
+    -------
+    message : STRING
+        Error message
+
+    """
+
+    if ErrorCode not in ErrorStrings:
+        ErrorString = ctypes.create_string_buffer(St7API.kMaxStrLen)
+
+        # Attempt to get API error string
+        iErr = St7API.St7GetAPIErrorString(ErrorCode, ErrorString,
+                                           St7API.kMaxStrLen)
+
+        # If that failed, attempt to retrieve a solver error string
+        if iErr:
+            iErr = St7API.St7GetSolverErrorString(ErrorCode, ErrorString,
+                                                  St7API.kMaxStrLen)
+
+        if not iErr:
+            ErrorStrings[ErrorCode] = ErrorString.value.decode(
+                errors='replace')
+        else:
+            ErrorStrings[ErrorCode] = 'An unknown error occured'
+
+    return ErrorStrings[ErrorCode]
 
 def explain_error(ErrorCode):
     """
-    Returns St7API error code in a string
+    Raises the St7API error code as an St7Error
 
     Parameters
     ----------
@@ -19,35 +132,93 @@ def explain_error(ErrorCode):
 
     Raises
     ------
-    Exception
-        If the exception is found in the API list, the explanation is returned
-        Otrherwise unknown error
+    St7Error
+        With the API or solver explanation of the code,
+        otherwise unknown error
+
+    """
+
+    raise St7Error(ErrorCode)
+
+def check_result(result, func, arguments):
+    """
+    ctypes errcheck hook installed by install_error_checks, called by ctypes
+    after every call of a checked API function
+
+    """
+
+    if result:
+        error = St7Error(result, func.__name__)
+        if CheckMode == 'raise':
+            raise error
+        CollectedErrors.append(error)
+
+    return result
+
+def install_error_checks():
+    """
+    Check the return code of every St7API function. A failing call raises
+    St7Error, or is recorded in CollectedErrors inside collect_errors().
+    Opt-in, called by open_model_results when CheckErrors is True. The
+    exporters extract element results inside collect_errors() so one
+    failing element is reported without stopping the extraction.
 
     Returns
     -------
-    ErrorCode : INTEGER
-        Returns the input code
+    numChecked : INTEGER
+        Number of API functions checked
 
     """
 
-    ErrorString = ctypes.create_string_buffer(St7API.kMaxStrLen)
-        
-	# Attempt to get API error string
-    iErr = St7API.St7GetAPIErrorString(ErrorCode, ErrorString,
-                                       St7API.kMaxStrLen)
+    numChecked = 0
+    for name in dir(St7API):
+        # The hook goes on the ctypes function, also under the St7Profiler
+        # wrappers
+        func = getattr(getattr(St7API, name), '__wrapped__',
+                       getattr(St7API, name))
+        # Only the ctypes function objects have an errcheck hook
+        if (name.startswith('St7') and hasattr(func, 'errcheck')
+                and name not in UncheckedFunctions):
+            func.errcheck = check_result
+            numChecked += 1
+
+    return numChecked
+
+def remove_error_checks():
+    """
+    Return to unchecked API calls
+
+    """
 
-	# If that failed, attempt to retrieve a solver error string
-    if iErr:
-        iErr = St7API.St7GetSolverErrorString(ErrorCode, ErrorString,
-                                              St7API.kMaxStrLen)
+    for name in dir(St7API):
+        func = getattr(getattr(St7API, name), '__wrapped__',
+                       getattr(St7API, name))
+        if name.startswith('St7') and getattr(func, 'errcheck', None) \
+                is check_result:
+            del func.errcheck
 
-    if not iErr:
-        raise Exception('%s (%d)' % (ErrorString.value, ErrorCode))
-    else:
-        raise Exception('An unknown error occured (%d)' % ErrorCode)
+class collect_errors():
+    """
+    Context in which failing checked calls are collected instead of raised,
+    for bulk loops where one bad element must not stop the extraction
+
+        with collect_errors() as errors:
+            ...
+        print('%d calls failed' % len(errors))
 
-    return ErrorCode
+    """
+
+    def __enter__(self):
+        global CheckMode, CollectedErrors
+        self.previous = (CheckMode, CollectedErrors)
+        CheckMode = 'collect'
+        CollectedErrors = []
+        return CollectedErrors
 
+    def __exit__(self, *exc):
+        global CheckMode, CollectedErrors
+        CheckMode, CollectedErrors = self.previous
+        return False
 
 def get_model_info(modelname_bt, tempfolder_bt, GroupsToKeep='ALL'):
     """
@@ -75,10 +246,8 @@ def get_model_info(modelname_bt, tempfolder_bt, GroupsToKeep='ALL'):
     # Opening Model
     ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
     if ret != 0:
-        explain_error(ret)
-        St7API.St7Release()
         print('Cannot open file')
-        sys.exit(1)
+        explain_error(ret)
     
     # Create variables to store the info
     # model title, author name, group numbers and names
@@ -133,10 +302,8 @@ def get_model_info(modelname_bt, tempfolder_bt, GroupsToKeep='ALL'):
     for (entTy, entName) in EntTypes:
         ret = St7API.St7GetTotal(1, entTy, nEnt)
         if ret != 0:
-            explain_error(ret)
-            St7API.St7Release()
             print('Cannot get number of ' + entName)
-            sys.exit(1)
+            explain_error(ret)
         else:
             entTots[entName] = nEnt.value
             print('%s %d' %(entName, nEnt.value))
@@ -145,655 +312,472 @@ def get_model_info(modelname_bt, tempfolder_bt, GroupsToKeep='ALL'):
 
     return groupID, entTots
 
-def assign_plates_results(modelname_bt, tempfolder_bt, fileOut_bt, DF):
+def get_sampling_points(entityType, elemNums, ResultLocation='Centroid'):
+    """
+    Number of result sampling points of each element for a sample location.
+    A result file must be open on uID 1.
 
-    print('Start assigning post-processing results to plates as heat source')
-    
-    # Open Model
-    ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
-    if ret != 0:
-        explain_error(ret)
-        St7API.St7Release()
-        print('Cannot open file')
-        sys.exit(1)
-    
-    # Variables to store information
-    NumLoadCases = ctypes.c_long()
-    PlateNum = ctypes.c_long()
-    LoadCaseID = ctypes.c_long()
-    CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
-    LoadCaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
+    Parameters
+    ----------
+    entityType : INTEGER
+        St7API.tyPLATE or St7API.tyBRICK
+    elemNums : LIST
+        Element numbers to sample
+    ResultLocation: STRING, optional
+        Result sampling location
+        DEFAULT is 'Centroid'
+        Centroid, Gauss, NodesAverageNever, NodesAverageAll, NodesAverageSame
 
-    
-    # Get first column of dataframe, containing Plate IDs
-    PlateID = DF.iloc[:,0]
-    PlateID = pd.to_numeric(PlateID, errors='coerce')
-    ResultNames = DF.columns[1:]
-    ResultIDs = []
-    
-    # Add load cases
-    for i in ResultNames:
-        CaseName = i
-        St7API.St7NewLoadCase(1, CaseName.encode())
-        
-    # Get total number of load cases
-    St7API.St7GetNumLoadCase(1, NumLoadCases)
-    # Match load case ID with load case name
-    for j in range(1, NumLoadCases.value+1):
-        St7API.St7GetLoadCaseName(1, j, LoadCaseName, St7API.kMaxStrLen)
-        if LoadCaseName.value.decode() in ResultNames:
-            ResultIDs.append(j)
-    
-    for k in range(len(ResultIDs)):
-        
-        LoadCaseID = ResultIDs[k]
-        print('Assigning ' + str(ResultNames[k]))
-        for ind, platePos in enumerate(PlateID):
-            PlateNum = int(platePos)
-            ResultVal = ctypes.c_double(DF.iloc[ind, k+1])
-            
-            St7API.St7SetPlateHeatSource1(1, PlateNum, LoadCaseID, ResultVal)
-    
-    # Saving the new model
-    ret = St7API.St7SaveFileTo(1, fileOut_bt)
-    if ret != 0:
-        explain_error(ret)
-        St7API.St7CloseFile(1)
-        print('Cannot open file')
-        St7API.St7Release()
-        sys.exit(1)
-    
-    
-    print('Complete')
-    St7API.St7CloseFile(1)
+    Returns
+    -------
+    numPoints : ARRAY
+        Number of sampling points of each element
+    offsets : ARRAY
+        Ragged index, points of element i are offsets[i] to offsets[i+1]
+        in the flattened point list
 
-    return ret
+    """
 
-def assign_plates_prop(modelname_bt, tempfolder_bt, fileOut_bt, DF, groupID,
-                       numPlates, solvebool):
+    location = SampleLocations[ResultLocation.capitalize()]
+    LongArrayConn = ctypes.c_long * (St7API.kMaxElementNode + 1)
+    Connection = LongArrayConn()
+    numGauss = ctypes.c_long()
+
+    numPoints = np.ones(len(elemNums), dtype=np.int32)
+
+    # The node count identifies the element type (Tri3, Quad4, Quad8, Hexa8...)
+    # so the number of Gauss points is only requested once per element type
+    GaussPoints = {}
+    with St7Profiler.span('Sampling points'):
+        if location != St7API.AtCentroid:
+            for ind, elemNum in enumerate(elemNums):
+                St7API.St7GetElementConnection(1, entityType, int(elemNum),
+                                               Connection)
+                nodeCount = Connection[0]
+                if location == St7API.AtGaussPoints:
+                    if nodeCount not in GaussPoints:
+                        St7API.St7GetNumElementResultGaussPoints(
+                            1, entityType, int(elemNum), numGauss)
+                        GaussPoints[nodeCount] = numGauss.value
+                    numPoints[ind] = GaussPoints[nodeCount]
+                else:
+                    numPoints[ind] = nodeCount
+
+    offsets = np.zeros(len(elemNums) + 1, dtype=np.int64)
+    np.cumsum(numPoints, out=offsets[1:])
+
+    return numPoints, offsets
+
+def get_result_buffer(entityType, location, numPoints):
     """
-    Assign Properties to Plates
+    Returns the result buffer for an element type and sample location,
+    created on first use and reused afterwards
 
     Parameters
     ----------
-    modelname_bt : BYTE
-        Encoded Model file name
-    tempfolder_bt : BYTE
-        Encoded Temporary folder location
-    fileOut_bt : BYTE
-        Encoded Output model name
-    DF : DATAFRAME
-        Pandas DataFrame with properties description with columns:
-        'Property Name', 'PlateType', 'Material', 'Modulus E1', 'Modulus E2',
-        'Modulus E3', 'Poisson I12', 'Poisson I23', 'Poisson I31',
-        'Shear Modulus G12', 'Shear Modulus G23', 'Shear Modulus G31',
-        'Thermal Expansion A1', 'Thermal Expansion A2', 'Thermal Expansion A3',
-        'Damping Ratio', 'Density', 'Viscous Damping', 'Specific Heat',
-        'Conductivity K1', 'Conductivity K2', 'Modulus', 'Poisson Ratio',
-        'Thermal Expansion', 'Conductivity', 'Membrane Thickness',
-        'Membrane Bending'
-    groupID : LIST
-        List of integer of the groups to modify
-    numPlates : INTEGER
-        Number of plates
+    entityType : INTEGER
+        St7API.tyPLATE or St7API.tyBRICK
+    location : INTEGER
+        St7API sample location keyword (AtCentroid, AtGaussPoints...)
+    numPoints : INTEGER
+        Number of sampling points of the element type
 
     Returns
     -------
-    ret : INTEGER
-        Return code final API
+    buffer : CTYPES ARRAY
+        Buffer sized for numPoints * kMaxResultColumns doubles, at least
+        kMaxPlateResult or kMaxBrickResult
+    view : ARRAY
+        NumPy view sharing the buffer memory
 
     """
-    
-    print('Start assigning properties to plates')
-    
-    # Open Model
-    ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
-    if ret != 0:
-        explain_error(ret)
-        St7API.St7Release()
-        print('Cannot open file')
-        sys.exit(1)
-    
-    
-    EsPlates = DF['Property Name']
-    print('%d plates will be assigned new properties' % len(EsPlates))
 
-    # Variables to store information
-    LongArray4 = ctypes.c_long * 4
-    DblArray18 = ctypes.c_double * 18
-    DblArray8 = ctypes.c_double * 8
-    DblArray2 =ctypes.c_double *2
-    numProperties = LongArray4()
-    LastProperties = LongArray4()
-    OrthoArray = DblArray18()
-    IsoArray = DblArray8()
-    ThickArray = DblArray2()
-    
-    # Dictionnary of Strand7 key words
-    plateTypeDict = {'2D Plane Stress': St7API.kPlateTypePlaneStress,
-                     '2D Plane Strain': St7API.kPlateTypePlaneStrain,
-                     'Axisymmetric': St7API.kPlateTypeAxisymmetric,
-                     'Plate/Shell': St7API.kPlateTypePlateShell,
-                     'Shear Panel': St7API.kPlateTypeShearPanel,
-                     '3D Membrane': St7API.kPlateTypeMembrane,
-                     'Load Patch': St7API.kPlateTypeLoadPatch}
-    
-    MaterialDict = {'Isotropic': St7API.kMaterialTypeIsotropic,
-                    'Orthotropic': St7API.kMaterialTypeOrthotropic,
-                    'Anisotropic': St7API.kMaterialTypeAnisotropic,
-                    'Laminate': St7API.kMaterialTypeLaminate,
-                    'Rubber': St7API.kMaterialTypeRubber}
-    
-    
-    # Get the number of properties already assigned
-    ret = St7API.St7GetTotalProperties(1, numProperties, LastProperties)
-    if ret != 0:
-        explain_error(ret)
-        St7API.St7Release()
-        print('Cannot retrieve properties')
-        sys.exit(1)
+    key = (entityType, location, int(numPoints))
+    if key not in ResultBuffers:
+        # Never smaller than the API limit of a result array of the element
+        size = max(int(numPoints) * kMaxResultColumns,
+                   MaxResultSizes.get(entityType, 0))
+        DblArrayRes = ctypes.c_double * size
+        buffer = DblArrayRes()
+        ResultBuffers[key] = (buffer, np.ctypeslib.as_array(buffer))
 
-    for ind, ID in enumerate(EsPlates):
-        
-        plateID = int(ID)
-        propNum = plateID + numPlates
-        propName = str(propNum).encode()
-        
-        try:
-            plateType = plateTypeDict[DF.loc[ind, 'PlateType']]
-        except KeyError:
-            print(DF.loc[ind, 'PlateType'] + ' not found in Plate type list')
-        try:
-            MaterialType = MaterialDict[DF.loc[ind, 'Material']]
-        except KeyError:
-            print(DF.loc[ind, 'Material'] + ' not found in material list')
-        
-        St7API.St7NewPlateProperty(1, propNum, plateType, MaterialType, propName)
-            
-        if MaterialType == St7API.kMaterialTypeOrthotropic:
-            OrthoArray[St7API.ipPlateOrthoModulus1] = DF.loc[ind, 'Modulus E1']
-            OrthoArray[St7API.ipPlateOrthoModulus2] = DF.loc[ind, 'Modulus E2']
-            OrthoArray[St7API.ipPlateOrthoModulus3] = DF.loc[ind, 'Modulus E3']
-            OrthoArray[St7API.ipPlateOrthoShear12] = DF.loc[ind, 'Shear Modulus G12']
-            OrthoArray[St7API.ipPlateOrthoShear23] = DF.loc[ind, 'Shear Modulus G23']
-            OrthoArray[St7API.ipPlateOrthoShear31] = DF.loc[ind, 'Shear Modulus G31']
-            OrthoArray[St7API.ipPlateOrthoPoisson12] = DF.loc[ind, 'Poisson I12']
-            OrthoArray[St7API.ipPlateOrthoPoisson23] = DF.loc[ind, 'Poisson I23']
-            OrthoArray[St7API.ipPlateOrthoPoisson31] = DF.loc[ind, 'Poisson I31']
-            OrthoArray[St7API.ipPlateOrthoDensity] = DF.loc[ind, 'Density']
-            OrthoArray[St7API.ipPlateOrthoAlpha1] = DF.loc[ind, 'Thermal Expansion A1']
-            OrthoArray[St7API.ipPlateOrthoAlpha2] = DF.loc[ind, 'Thermal Expansion A2']
-            OrthoArray[St7API.ipPlateOrthoAlpha3] = DF.loc[ind, 'Thermal Expansion A3']
-            OrthoArray[St7API.ipPlateOrthoViscosity] = DF.loc[ind, 'Viscous Damping']
-            OrthoArray[St7API.ipPlateOrthoDampingRatio] = DF.loc[ind, 'Damping Ratio']
-            OrthoArray[St7API.ipPlateOrthoConductivity1] = DF.loc[ind, 'Conductivity K1']
-            OrthoArray[St7API.ipPlateOrthoConductivity2] = DF.loc[ind, 'Conductivity K2']
-            OrthoArray[St7API.ipPlateOrthoSpecificHeat] = DF.loc[ind, 'Specific Heat']
-            St7API.St7SetPlateOrthotropicMaterial(1, propNum, OrthoArray)
-    
-        if MaterialType == St7API.kMaterialTypeIsotropic:
-            IsoArray[St7API.ipPlateIsoModulus] = DF.loc[ind, 'Modulus']
-            IsoArray[St7API.ipPlateIsoPoisson] = DF.loc[ind, 'Poisson Ratio']
-            IsoArray[St7API.ipPlateIsoDensity] = DF.loc[ind, 'Density']
-            IsoArray[St7API.ipPlateIsoAlpha] = DF.loc[ind, 'Thermal Expansion']
-            IsoArray[St7API.ipPlateIsoViscosity] = DF.loc[ind, 'Viscous Damping']
-            IsoArray[St7API.ipPlateIsoDampingRatio] = DF.loc[ind, 'Damping Ratio']
-            IsoArray[St7API.ipPlateIsoConductivity] = DF.loc[ind, 'Conductivity']
-            IsoArray[St7API.ipPlateIsoSpecificHeat] = DF.loc[ind,'Specific Heat']
-            St7API.St7SetPlateIsotropicMaterial(1, propNum, IsoArray)
-    
-        ThickArray[0] = DF.loc[ind, 'Membrane Thickness']
-        ThickArray[1] = DF.loc[ind, 'Membrane Bending']
-        St7API.St7SetPlateThickness(1, propNum, ThickArray)
-        St7API.St7SetElementProperty(1, St7API.tyPLATE, plateID, propNum)
-    
-    ret = St7API.St7SaveFileTo(1, fileOut_bt)
-    
-    # Saving the new model
+    return ResultBuffers[key]
 
-    if ret != 0:
-        explain_error(ret)
-        St7API.St7CloseFile(1)
-        print('Cannot open file')
-        St7API.St7Release()
-        sys.exit(1)
-    
-    print('Plate properties assigned')
-    St7API.St7CloseFile(1)
-    
-    if solvebool == True:
-        # Open new model and solve and save
-        modelname = modelname_bt.decode()
-        Foldername = os.path.dirname(modelname) + "\\"
-        Foldername_bt = Foldername.encode()
-        St7API.St7OpenFile(1, fileOut_bt, Foldername_bt)
-        St7API.St7RunSolver(1, St7API.stNonlinearStaticSolver, St7API.smNormalCloseRun, St7API.btTrue)
-        St7API.St7SaveFile(1)
-        St7API.St7CloseFile(1)
-    
-    return ret
-
-def modify_beam_stiffnessTab(modelname_bt, tempfolder_bt, fileOut_bt, DF,
-                             groupID, numBeams):
+def sample_element_results(entityType, elemNums, caseNum, ResultType,
+                           ResultSubType, ResultLocation='Centroid',
+                           PlateSurf='Midplane', layer=1, numPoints=None):
     """
-    Modify Beam Stiffness Parameters
+    Extract a result type at every sampling point of a list of plates or
+    bricks for one result case. A result file must be open on uID 1.
 
     Parameters
     ----------
-    modelname_bt : BYTE
-        Encoded Input Model file name
-    tempfolder_bt : BYTE
-        Encoded Temporary folder location
-    fileOut_bt : BYTE
-        Encoded Saved Model file name
-    DF : DATAFRAME
-        Pandas Dataframe with new beams parameters, columns name must match:
-        'SA1', 'SA2', 'Area', 'I11', 'I22', 'J', 'Mass'
-    groupID : LIST
-        List of integer of the groups to modify
-    numBeams : INTEGER
-        Total number of Beams
+    entityType : INTEGER
+        St7API.tyPLATE or St7API.tyBRICK
+    elemNums : LIST
+        Element numbers to sample
+    caseNum : INTEGER
+        Result case number
+    ResultType : INTEGER
+        St7API result type, e.g. rtPlateForce or rtBrickStress
+    ResultSubType : INTEGER
+        St7API result sub type, e.g. stPlateLocal or stBrickGlobal
+    ResultLocation: STRING, optional
+        Result sampling location
+        DEFAULT is 'Centroid'
+        Centroid, Gauss, NodesAverageNever, NodesAverageAll, NodesAverageSame
+    PlateSurf : STRING, optional
+        Plate Surface to extract data, ignored for bricks
+        DEFAULT is 'Midplane'
+        Midplane, Zplus or Zminus
+    layer : INTEGER, optional
+        Plate layer, ignored for bricks
+        DEFAULT is 1
+    numPoints : ARRAY, optional
+        Sampling points per element from get_sampling_points, computed when
+        not given. Pass it in when sampling several cases of the same elements
 
     Returns
     -------
-    ret : INTEGER
-        Return code API
+    data : ARRAY
+        Results of shape (elements, points, columns). Elements with fewer
+        points than the largest element, and elements the API failed to
+        return, are padded with NaN
+    offsets : ARRAY
+        Ragged index, points of element i are offsets[i] to offsets[i+1]
+        in the flattened point list
 
     """
 
-    print('Start modifying stiffness parameters for %d beams' % numBeams)
+    if numPoints is None:
+        numPoints, offsets = get_sampling_points(entityType, elemNums,
+                                                 ResultLocation)
+    else:
+        offsets = np.zeros(len(elemNums) + 1, dtype=np.int64)
+        np.cumsum(numPoints, out=offsets[1:])
 
-    # Opening Model
-    ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
-    if ret != 0:
-        explain_error(ret)
-        St7API.St7Release()
-        print('Cannot open file')
-        sys.exit(1)
+    location = SampleLocations[ResultLocation.capitalize()]
+    surface = PlateSurfaces[PlateSurf.capitalize()]
+    maxPoints = int(numPoints.max()) if len(elemNums) else 0
 
-    # Set API storage values
-    DblArray7 = ctypes.c_double * 7
-    BeamSecFactor = DblArray7()
-    GroupBeam = ctypes.c_long()
-    Beam_SectionFactors = ['SA1', 'SA2', 'Area', 'I11', 'I22', 'J', 'Mass']
-    
-    # Select Beams ID
-    BeamNum = []
-    for ind in range(1, numBeams + 1):
-    	St7API.St7GetElementGroup(1, St7API.tyBEAM, ind, GroupBeam)
-    	if GroupBeam.value in groupID:
-    		BeamNum.append(ind)
-    print('%d beams will be modified' % len(BeamNum))
+    numPts = ctypes.c_long()
+    numColumns = ctypes.c_long()
+    data = None
+
+    # With the error checks installed, failing elements are collected and
+    # left as NaN
+    with St7Profiler.span('Result query'), collect_errors() as errors:
+        for ind, elemNum in enumerate(elemNums):
+            buffer, view = get_result_buffer(entityType, location,
+                                             numPoints[ind])
+
+            if entityType == St7API.tyPLATE:
+                ret = St7API.St7GetPlateResultArray(
+                    1, ResultType, ResultSubType, int(elemNum), caseNum,
+                    location, surface, layer, numPts, numColumns, buffer)
+            else:
+                ret = St7API.St7GetBrickResultArray(
+                    1, ResultType, ResultSubType, int(elemNum), caseNum,
+                    location, numPts, numColumns, buffer)
 
-    if len(BeamNum) > len(DF):
-        print('Number of properties not matching number of beams')
-        print('Model has %d beams and the csv contains %d properties'
-              % (len(BeamNum), len(DF)))
-        St7API.St7CloseFile(1)
-        St7API.St7Release()
-        sys.exit(1)
-    if len(DF) > len(BeamNum):
-        print('Number of properties not matching number of beams')
-        print('Model has %d plates and the csv contains %d properties'
-              % (len(BeamNum), len(DF)))
-        print('Only the first %d will be considered' % len(BeamNum))
+            if ret == 0:
+                if data is None:
+                    # The number of columns is only known after the first
+                    # result
+                    data = np.full((len(elemNums), maxPoints,
+                                    numColumns.value), np.nan)
+                nPts = min(numPts.value, numPoints[ind])
+                data[ind, :nPts, :] = view[:nPts * numColumns.value].reshape(
+                    nPts, numColumns.value)
 
-    # Modify Beams
-    for ind, beamPos in enumerate(BeamNum):
-        St7API.St7GetBeamSectionFactor7(1, beamPos, BeamSecFactor)
-        for colname in DF.columns:
-            BeamSecFactor[
-                Beam_SectionFactors.index(colname)] = DF.iloc[
-                    ind, list(DF.columns).index(colname)]
-        St7API.St7SetBeamSectionFactor7(1, beamPos, BeamSecFactor)
-    
-    # Saving Model in the new file
-    ret = St7API.St7SaveFileTo(1, fileOut_bt)
-    if ret != 0:
-        explain_error(ret)
-        St7API.St7CloseFile(1)
-        print('Cannot open file')
-        St7API.St7Release()
-        sys.exit(1)
-    
-    St7API.St7CloseFile(1)
-    
-    print('Done')
+    if errors:
+        print('%d result queries failed: %s' % (len(errors), errors[0]))
 
-    return ret
+    if data is None:
+        data = np.empty((len(elemNums), maxPoints, 0))
 
-def export_beam_shearinputs(modelname_bt, tempfolder_bt, resultfile_bt,
-                          groupID, numBeams, ResultAxis='Local'):
+    return data, offsets
+
+def flatten_samples(data, numPoints):
     """
-    Extract Beam Force information for a combined result file
+    Flatten sampled results to one row per sampling point
 
     Parameters
     ----------
-    modelname_bt : BYTE
-        Encoded Input Model file name
-    tempfolder_bt : BYTE
-        Encoded Temporary folder location
-    resultfile_bt : BYTE
-        Encoded Result file name
-    groupID : LIST
-        List of integer of the groups to modify
-    numBeams : INTEGER
-        Total number of Beams
-    ResultAxis: STRING
-        DEFAULT is 'Local'.
-        Define axis the data is extracted on Local, Global, Principal
+    data : ARRAY
+        Results of shape (elements, points, columns) from
+        sample_element_results
+    numPoints : ARRAY
+        Number of sampling points of each element
 
     Returns
     -------
-    ret : INTEGER
-        Return code API
+    rows : ARRAY
+        Results of shape (total points, columns)
+    elemIndex : ARRAY
+        Position in the element list of each row
 
     """
-    print('Start extract beam results')
 
-    # Open Model
-    ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
-    if ret != 0:
-        explain_error(ret)
-        St7API.St7Release()
-        print('Cannot open file')
-        sys.exit(1)
-        
-    modelname = modelname_bt.decode()
-    Foldername = os.path.dirname(modelname) + "\\"
-    
-    # Open Result file
-    numPrimary = ctypes.c_long()
-    numSecondary = ctypes.c_long()
-    CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
+    mask = np.arange(data.shape[1]) < np.asarray(numPoints)[:, None]
+    elemIndex = np.repeat(np.arange(data.shape[0]), numPoints)
 
-    
-    ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
-    	numPrimary, numSecondary)
-    
-    if ret != 0:
-        explain_error(ret)
-        print('Not able to open result file')
-        St7API.St7CloseFile(1)
-        print('Releasing API')
-        St7API.St7Release()
+    return data[mask], elemIndex
 
-    print('%d primary case(s) found' % numPrimary.value)
+def sample_plate_rows(PlateNum, caseNum, ResultType, ResultSubType, numPoints,
+                      ResultLocation='Centroid', PlateSurf='Midplane'):
+    """
+    Plate results of one case with one row per sampling point, for the
+    exporters writing one table row per point. A result file must be open
+    on uID 1.
 
-    CaseName_list = []
-    for ind in range(1, numPrimary.value + 1):
-        St7API.St7GetResultCaseName(1, ind, CaseName, St7API.kMaxStrLen)
-        CaseName_list.append(CaseName.value.decode())
-        print(CaseName.value.decode())
+    Parameters
+    ----------
+    PlateNum : ARRAY
+        Plate numbers
+    caseNum : INTEGER
+        Result case number
+    ResultType : INTEGER
+        St7API result type, e.g. rtPlateForce
+    ResultSubType : INTEGER
+        St7API result sub type, e.g. stPlateLocal
+    numPoints : ARRAY
+        Sampling points per plate from get_sampling_points
+    ResultLocation: STRING, optional
+        Result sampling location
+        DEFAULT is 'Centroid'
+    PlateSurf : STRING, optional
+        Plate Surface to extract data
+        DEFAULT is 'Midplane'
 
-    # Set API storage values
-    GroupBeam = ctypes.c_long()
-    DblArrayRes = ctypes.c_double * 12
-    BeamRes = DblArrayRes()
-    numColumns = ctypes.c_long()
-    
-    BeamPropID = ctypes.c_long()
-    
-    DblArray = ctypes.c_double * St7API.kNumBeamSectionData
-    PropSectionData = DblArray()
-    PropIntegers = ctypes.c_long()
-    PropBeamMaterial = ctypes.c_double()
-    
-    # Select Beams ID
-    BeamNum = []
-    for ind in range(1, numBeams + 1):
-    	St7API.St7GetElementGroup(1, St7API.tyBEAM, ind, GroupBeam)
-    	if GroupBeam.value in groupID:
-    		BeamNum.append(ind)
-    print('%d beams will be extracted' % len(BeamNum))
+    Returns
+    -------
+    rows : ARRAY
+        Results of shape (total points, kMaxResultColumns), NaN where the
+        API returned no value
+    elemIndex : ARRAY
+        Position in PlateNum of each row
 
-    # dictionnary matching axis to ResultSubType
-    subtype = {'Local': St7API.stBeamLocal,
-               'Principal': St7API.stBeamPrincipal,
-               'Global': St7API.stBeamGlobal}
+    """
 
-    # Get Cases data from model
-    for ind, casename in enumerate(CaseName_list):
-        print('Start extracting data for case number %d %s'
-              % (ind+1, casename))
+    data, offsets = sample_element_results(St7API.tyPLATE, PlateNum, caseNum,
+                                           ResultType, ResultSubType,
+                                           ResultLocation, PlateSurf,
+                                           numPoints=numPoints)
+    values, elemIndex = flatten_samples(data, numPoints)
 
-        # List to store data   
-        BeamId = []
-        BeamEnd = []
-        ShearForce1 = []
-        BendingMoment1 = []
-        ShearForce2 = []
-        BendingMoment2 = []
-        AxialForce = []
-        Torque = []
-        Depth = []
-    
-        for beamPos in BeamNum:
-            St7API.St7GetBeamResultEndPos(1, St7API.rtBeamForce,
-                                          subtype[ResultAxis.capitalize()],
-                                          beamPos, ind+1, numColumns, BeamRes)
-            
-            St7API.St7GetElementProperty(1, St7API.tyBEAM, beamPos, BeamPropID)
-            
-            St7API.St7GetBeamPropertyData(1, BeamPropID.value, PropIntegers, PropSectionData, PropBeamMaterial)
-            
-            for endpos in [1, 2]:
-                # from Strand7 API user manual
-                # Beam Results section page 1073
-                indpos = (endpos - 1) * numColumns.value
-                BeamId.append(beamPos)
-                BeamEnd.append(endpos)
-                ShearForce1.append(BeamRes[indpos + St7API.ipBeamSF1])
-                BendingMoment1.append(BeamRes[indpos + St7API.ipBeamBM1])
-                ShearForce2.append(BeamRes[indpos + St7API.ipBeamSF2])
-                BendingMoment2.append(BeamRes[indpos + St7API.ipBeamBM2])
-                AxialForce.append(BeamRes[indpos + St7API.ipBeamAxialF])
-                Torque.append(BeamRes[indpos + St7API.ipBeamTorque])
-                Depth.append(PropSectionData[St7API.ipD2])
-                
-        # Create a dataframe to store the output data
-        DF = pd.DataFrame(data={'BeamId': BeamId,
-                                'Depth (m)' : Depth,
-                                'Shear Force (MN)': ShearForce2,
-                                'Bending Moment (MN.m)': BendingMoment2,
-                                'Axial Force (MN)': AxialForce,
-                                },
-                          columns=['BeamId', 
-                                   'Depth (m)',
-                                   'Shear Force (MN)',
-                                   'Bending Moment (MN.m)',
-                                   'Axial Force (MN)'])
-                
-        stgname = casename.split("[")[1].split(']')[0]
-        x = re.search('Reset',stgname) 
-        
-        if x:
-            print('skipped reset stage')
-        else:
-            csvOutFile = Foldername + 'shearinput_' + stgname + '.csv'
-            print('Saved in csv file ' + csvOutFile)
-            DF.to_csv(csvOutFile, index=False)
-    
-    ret = St7API.St7CloseResultFile(1)
-    if ret == 0:
-        print('Result File closed')
-    ret = St7API.St7CloseFile(1)
-    if ret == 0:
-        print('Model File closed')
+    rows = np.full((len(values), kMaxResultColumns), np.nan)
+    numColumns = min(values.shape[1], kMaxResultColumns)
+    rows[:, :numColumns] = values[:, :numColumns]
 
-    return ret
+    return rows, elemIndex
 
-def export_beam_shearinputs_mid(modelname_bt, tempfolder_bt, resultfile_bt,
-                          groupID, numBeams, ResultAxis='Local'):
+def get_plate_data(PlateNum):
     """
-    Extract Beam Force information for a combined result file
+    Property, thickness and area of plates. A model must be open on uID 1.
 
     Parameters
     ----------
-    modelname_bt : BYTE
-        Encoded Input Model file name
-    tempfolder_bt : BYTE
-        Encoded Temporary folder location
-    resultfile_bt : BYTE
-        Encoded Result file name
+    PlateNum : LIST
+        Plate numbers
+
+    Returns
+    -------
+    PropertyID : ARRAY
+        Property number of each plate
+    Thickness : ARRAY
+        (plates, 2) membrane and bending thickness
+    Area : ARRAY
+        Area of each plate
+
+    """
+
+    PlatePropID = ctypes.c_long()
+    PlateThickness = (ctypes.c_double * 2)()
+    PlateArea = ctypes.c_double()
+
+    PropertyID = np.zeros(len(PlateNum), dtype=np.int32)
+    Thickness = np.zeros((len(PlateNum), 2))
+    Area = np.zeros(len(PlateNum))
+
+    # Thickness is read once per property
+    PropThickness = {}
+    with St7Profiler.span('Plate data'):
+        for ind, platePos in enumerate(PlateNum):
+            St7API.St7GetElementProperty(1, St7API.tyPLATE, int(platePos),
+                                         PlatePropID)
+            if PlatePropID.value not in PropThickness:
+                St7API.St7GetPlateThickness(1, PlatePropID.value,
+                                            PlateThickness)
+                PropThickness[PlatePropID.value] = tuple(PlateThickness)
+            St7API.St7GetElementData(1, St7API.tyPLATE, int(platePos),
+                                     PlateArea)
+            PropertyID[ind] = PlatePropID.value
+            Thickness[ind] = PropThickness[PlatePropID.value]
+            Area[ind] = PlateArea.value
+
+    return PropertyID, Thickness, Area
+
+def get_group_entities(entityType, numEntities, groupID, elements=None):
+    """
+    Index of the entities belonging to the selected groups.
+    A model must be open on uID 1.
+
+    Parameters
+    ----------
+    entityType : INTEGER
+        St7API.tyNODE, tyBEAM, tyPLATE or tyBRICK
+    numEntities : INTEGER
+        Total number of entities of that type
     groupID : LIST
-        List of integer of the groups to modify
-    numBeams : INTEGER
-        Total number of Beams
-    ResultAxis: STRING
-        DEFAULT is 'Local'.
-        Define axis the data is extracted on Local, Global, Principal
+        List of integer of the groups to keep
+    elements : ARRAY, optional
+        Entity numbers of a region, e.g. of St7Spatial, only these entities
+        are looked up
+        DEFAULT is None, every entity of the model
 
     Returns
     -------
-    ret : INTEGER
-        Return code API
+    entityNums : ARRAY
+        Sorted entity numbers in the selected groups
 
     """
-    print('Start extract beam results')
 
-    # Open Model
-    ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
-    if ret != 0:
-        explain_error(ret)
-        St7API.St7Release()
-        print('Cannot open file')
-        sys.exit(1)
-        
-    modelname = modelname_bt.decode()
-    Foldername = os.path.dirname(modelname) + "\\"
-    
-    # Open Result file
-    numPrimary = ctypes.c_long()
-    numSecondary = ctypes.c_long()
-    CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
+    Group = ctypes.c_long()
+    groupSet = set(groupID)
+    entityNums = []
 
-    
-    ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
-    	numPrimary, numSecondary)
-    
-    if ret != 0:
-        explain_error(ret)
-        print('Not able to open result file')
-        St7API.St7CloseFile(1)
-        print('Releasing API')
-        St7API.St7Release()
+    # Only the entities of the region are looked up, not the whole model
+    if elements is None:
+        candidates = range(1, numEntities + 1)
+    else:
+        candidates = np.unique(np.asarray(elements, dtype=np.int64))
+        candidates = candidates[(candidates >= 1)
+                                & (candidates <= numEntities)].tolist()
+
+    with St7Profiler.span('Group scan'):
+        for ind in candidates:
+            if entityType == St7API.tyNODE:
+                St7API.St7GetEntityGroup(1, entityType, ind, Group)
+            else:
+                St7API.St7GetElementGroup(1, entityType, ind, Group)
+            if Group.value in groupSet:
+                entityNums.append(ind)
 
-    print('%d primary case(s) found' % numPrimary.value)
+    return np.array(entityNums, dtype=np.int32)
 
-    CaseName_list = []
-    for ind in range(1, numPrimary.value + 1):
-        St7API.St7GetResultCaseName(1, ind, CaseName, St7API.kMaxStrLen)
-        CaseName_list.append(CaseName.value.decode())
-        print(CaseName.value.decode())
+def select_elements(entityNums, elements=None):
+    """
+    Entity numbers also in a region selection, e.g. of St7Spatial
+
+    Parameters
+    ----------
+    entityNums : LIST or ARRAY
+        Entity numbers of the selected groups
+    elements : ARRAY, optional
+        Entity numbers of the region
+        DEFAULT is None, every entity is kept
+
+    Returns
+    -------
+    entityNums : LIST or ARRAY
+        Entity numbers in the region, same type as the input
+
+    """
+
+    if elements is None:
+        return entityNums
+    if isinstance(entityNums, np.ndarray):
+        return entityNums[np.isin(entityNums, elements)]
+
+    keep = set(np.asarray(elements).tolist())
+
+    return [num for num in entityNums if num in keep]
+
+def get_beam_depths(modelname, BeamNum):
+    """
+    Section depth (D2) of each beam. Depths are read once per beam property
+    and kept in BeamDepthCache for the model. A model must be open on uID 1.
+
+    Parameters
+    ----------
+    modelname : STRING
+        Model file name, the cache is keyed on its path and modification
+        time
+    BeamNum : LIST
+        Beam numbers
+
+    Returns
+    -------
+    Depth : ARRAY
+        Section depth of each beam
+
+    """
+
+    # An edited and saved model gets a new entry
+    modelname = os.path.abspath(modelname)
+    mtime = os.path.getmtime(modelname) if os.path.exists(modelname) else 0.0
+    PropDepth = BeamDepthCache.setdefault((modelname, mtime), {})
 
-    # Set API storage values
-    GroupBeam = ctypes.c_long()
-    DblArrayRes = ctypes.c_double * 12
-    BeamRes = DblArrayRes()
-    numColumns = ctypes.c_long()
-    
     BeamPropID = ctypes.c_long()
-    
     DblArray = ctypes.c_double * St7API.kNumBeamSectionData
     PropSectionData = DblArray()
     PropIntegers = ctypes.c_long()
     PropBeamMaterial = ctypes.c_double()
-    
-    # Select Beams ID
-    BeamNum = []
-    for ind in range(1, numBeams + 1):
-    	St7API.St7GetElementGroup(1, St7API.tyBEAM, ind, GroupBeam)
-    	if GroupBeam.value in groupID:
-    		BeamNum.append(ind)
-    print('%d beams will be extracted' % len(BeamNum))
 
-    # dictionnary matching axis to ResultSubType
-    subtype = {'Local': St7API.stBeamLocal,
-               'Principal': St7API.stBeamPrincipal,
-               'Global': St7API.stBeamGlobal}
+    Depth = np.zeros(len(BeamNum))
+    for ind, beamPos in enumerate(BeamNum):
+        St7API.St7GetElementProperty(1, St7API.tyBEAM, int(beamPos),
+                                     BeamPropID)
+        if BeamPropID.value not in PropDepth:
+            St7API.St7GetBeamPropertyData(1, BeamPropID.value, PropIntegers,
+                                          PropSectionData, PropBeamMaterial)
+            PropDepth[BeamPropID.value] = PropSectionData[St7API.ipD2]
+        Depth[ind] = PropDepth[BeamPropID.value]
 
-    # Get Cases data from model
-    for ind, casename in enumerate(CaseName_list):
-        print('Start extracting data for case number %d %s'
-              % (ind+1, casename))
+    return Depth
 
-        # List to store data   
-        BeamId = []
-        ShearForce2 = []
-        BendingMoment2 = []
-        AxialForce = []
-        Depth = []
-    
-        for beamPos in BeamNum:
-            
-            St7API.St7GetBeamResultEndPos(1, St7API.rtBeamForce,
-                                          subtype[ResultAxis.capitalize()],
-                                          beamPos, ind+1, numColumns, BeamRes)
-            
-            St7API.St7GetElementProperty(1, St7API.tyBEAM, beamPos, BeamPropID)
-            
-            St7API.St7GetBeamPropertyData(1, BeamPropID.value, PropIntegers, PropSectionData, PropBeamMaterial)
-            
-            BeamId.append(beamPos)
-            
-            Vav = []
-            BMav = []
-            Nav = []
-            Dav = []
-            
-            for endpos in [1, 2]:
-                # from Strand7 API user manual
-                # Beam Results section page 1073
-                indpos = (endpos - 1) * numColumns.value
+def get_stage_name(casename):
+    """
+    Compact stage name used in output file names, e.g.
+    'Increment [Stage 3: Excavate] : 1' gives 'Stage3_Excavate_1'
 
-                Vav.append(BeamRes[indpos + St7API.ipBeamSF2])
-                BMav.append(BeamRes[indpos + St7API.ipBeamBM2])
-                Nav.append(BeamRes[indpos + St7API.ipBeamAxialF])
-                Dav.append(PropSectionData[St7API.ipD2])
-            
-            ShearForce2.append(np.average(Vav))
-            BendingMoment2.append(np.average(BMav))
-            AxialForce.append(np.average(Nav))
-            Depth.append(np.average(Dav))
-        
-        
-        # Create a dataframe to store the output data
-        DF = pd.DataFrame(data={'BeamId': BeamId,
-                                'Depth (m)' : Depth,
-                                'Shear Force (MN)': ShearForce2,
-                                'Bending Moment (MN.m)': BendingMoment2,
-                                'Axial Force (MN)': AxialForce,
-                                },
-                          columns=['BeamId', 
-                                   'Depth (m)',
-                                   'Shear Force (MN)',
-                                   'Bending Moment (MN.m)',
-                                   'Axial Force (MN)'])
-                
-        stgname = casename.split("[")[1].split(']')[0]
-        x = re.search('Reset',stgname) 
-        
-        if x:
-            print('skipped reset stage')
-        else:
-            csvOutFile = Foldername + 'shearinput_' + stgname + '.csv'
-            print('Saved in csv file ' + csvOutFile)
-            DF.to_csv(csvOutFile, index=False)
-    
-    ret = St7API.St7CloseResultFile(1)
-    if ret == 0:
-        print('Result File closed')
-    ret = St7API.St7CloseFile(1)
-    if ret == 0:
-        print('Model File closed')
+    """
 
-    return ret
-    
-def export_beam_forceData(modelname_bt, tempfolder_bt, resultfile_bt,
-                          groupID, numBeams, ResultAxis='Local'):
+    return (casename.replace(' ', '').replace(':', '_')
+            .replace('Increment[', '').replace(']', ''))
+
+def open_model(modelname_bt, tempfolder_bt):
     """
-    Extract Beam Force information for a combined result file
+    Open a model on uID 1. The API error checks are installed first when
+    CheckErrors is True.
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+
+    Raises
+    ------
+    St7Error
+        If the model cannot be opened
+
+    """
+
+    if CheckErrors:
+        install_error_checks()
+
+    ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
+    if ret != 0:
+        print('Cannot open file')
+        explain_error(ret)
+
+def open_model_results(modelname_bt, tempfolder_bt, resultfile_bt):
+    """
+    Open a model and its result file on uID 1. The API error checks are
+    installed first when CheckErrors is True.
 
     Parameters
     ----------
@@ -803,134 +787,43 @@ def export_beam_forceData(modelname_bt, tempfolder_bt, resultfile_bt,
         Encoded Temporary folder location
     resultfile_bt : BYTE
         Encoded Result file name
-    groupID : LIST
-        List of integer of the groups to modify
-    numBeams : INTEGER
-        Total number of Beams
-    ResultAxis: STRING
-        DEFAULT is 'Local'.
-        Define axis the data is extracted on Local, Global, Principal
 
     Returns
     -------
-    ret : INTEGER
-        Return code API
+    CaseName_list : LIST
+        Names of the primary result cases, case number is position + 1
 
     """
-    print('Start extract beam results')
 
-    # Open Model
-    ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
-    if ret != 0:
-        explain_error(ret)
-        St7API.St7Release()
-        print('Cannot open file')
-        sys.exit(1)
-        
-    modelname = modelname_bt.decode()
-    Foldername = os.path.dirname(modelname) + "\\"
-    
-    # Open Result file
-    numPrimary = ctypes.c_long()
-    numSecondary = ctypes.c_long()
-    CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
+    with St7Profiler.span('Open files'):
+        open_model(modelname_bt, tempfolder_bt)
 
-    
-    ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
-    	numPrimary, numSecondary)
-    
-    if ret != 0:
-        explain_error(ret)
-        print('Not able to open result file')
-        St7API.St7CloseFile(1)
-        print('Releasing API')
-        St7API.St7Release()
+        numPrimary = ctypes.c_long()
+        numSecondary = ctypes.c_long()
+        CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
 
-    print('%d primary case(s) found' % numPrimary.value)
+        ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
+                                       numPrimary, numSecondary)
+        if ret != 0:
+            print('Not able to open result file')
+            St7API.St7CloseFile(1)
+            explain_error(ret)
 
-    CaseName_list = []
-    for ind in range(1, numPrimary.value + 1):
-        St7API.St7GetResultCaseName(1, ind, CaseName, St7API.kMaxStrLen)
-        CaseName_list.append(CaseName.value.decode())
-        print(CaseName.value.decode())
+        print('%d primary case(s) found' % numPrimary.value)
 
-    # Set API storage values
-    GroupBeam = ctypes.c_long()
-    DblArrayRes = ctypes.c_double * 12
-    BeamRes = DblArrayRes()
-    numColumns = ctypes.c_long()
-    
-    # Select Beams ID
-    BeamNum = []
-    for ind in range(1, numBeams + 1):
-    	St7API.St7GetElementGroup(1, St7API.tyBEAM, ind, GroupBeam)
-    	if GroupBeam.value in groupID:
-    		BeamNum.append(ind)
-    print('%d beams will be extracted' % len(BeamNum))
+        CaseName_list = []
+        for ind in range(1, numPrimary.value + 1):
+            St7API.St7GetResultCaseName(1, ind, CaseName, St7API.kMaxStrLen)
+            CaseName_list.append(CaseName.value.decode())
 
-    # dictionnary matching axis to ResultSubType
-    subtype = {'Local': St7API.stBeamLocal,
-               'Principal': St7API.stBeamPrincipal,
-               'Global': St7API.stBeamGlobal}
+    return CaseName_list
 
-    # Get Cases data from model
-    for ind, casename in enumerate(CaseName_list):
-        print('Start extracting data for case number %d %s'
-              % (ind+1, casename))
+def close_model_results():
+    """
+    Close the result file and the model opened on uID 1
+
+    """
 
-        # List to store data   
-        BeamId = []
-        BeamEnd = []
-        ShearForce1 = []
-        BendingMoment1 = []
-        ShearForce2 = []
-        BendingMoment2 = []
-        AxialForce = []
-        Torque = []
-    
-        for beamPos in BeamNum:
-            St7API.St7GetBeamResultEndPos(1, St7API.rtBeamForce,
-                                          subtype[ResultAxis.capitalize()],
-                                          beamPos, ind+1, numColumns, BeamRes)
-            for endpos in [1, 2]:
-                # from Strand7 API user manual
-                # Beam Results section page 1073
-                indpos = (endpos - 1) * numColumns.value
-                BeamId.append(beamPos)
-                BeamEnd.append(endpos)
-                ShearForce1.append(BeamRes[indpos + St7API.ipBeamSF1])
-                BendingMoment1.append(BeamRes[indpos + St7API.ipBeamBM1])
-                ShearForce2.append(BeamRes[indpos + St7API.ipBeamSF2])
-                BendingMoment2.append(BeamRes[indpos + St7API.ipBeamBM2])
-                AxialForce.append(BeamRes[indpos + St7API.ipBeamAxialF])
-                Torque.append(BeamRes[indpos + St7API.ipBeamTorque])
-        
-        # Create a dataframe to store the output data
-        DF = pd.DataFrame(data={'BeamId': BeamId,
-                                'End': BeamEnd,
-                                'Shear Force 1 (MN)': ShearForce1,
-                                'Bending Moment 1 (MN.m)': BendingMoment1,
-                                'Shear Force 2 (MN)': ShearForce2,
-                                'Bending Moment 2 (MN.m)': BendingMoment2,
-                                'Axial Force (MN)': AxialForce,
-                                'Torque (MN.m)': Torque
-                                },
-                          columns=['BeamId','End', 'Shear Force 1 (MN)',
-                                   'Bending Moment 1 (MN.m)',
-                                   'Shear Force 2 (MN)',
-                                   'Bending Moment 2 (MN.m)',
-                                   'Axial Force (MN)', 'Torque (MN.m)'])
-                
-        stgname = casename.split("[")[1].split(']')[0]
-        x = re.search('Reset',stgname) 
-        
-        if x:
-            print('skipped reset stage')
-        else:
-            csvOutFile = Foldername + 'beamresults_' + stgname + '.csv'
-            print('Saved in csv file ' + csvOutFile)
-            DF.to_csv(csvOutFile, index=False)
-    
     ret = St7API.St7CloseResultFile(1)
     if ret == 0:
         print('Result File closed')
@@ -940,466 +833,230 @@ def export_beam_forceData(modelname_bt, tempfolder_bt, resultfile_bt,
 
     return ret
 
-def export_shearinputs(modelname_bt, tempfolder_bt, resultfile_bt,
-                                 groupID, numPlates, minthickness, ResultAxis='Local',
-                                 ResultLocation='Centroid',
-                                 PlateSurf='Midplane'):
+def select_cases(CaseName_list, cases=None, skipReset=True):
     """
-    Extract Beam Force information for a combined result file
+    Result case numbers to extract
 
     Parameters
     ----------
-    modelname_bt : BYTE
-        Encoded Input Model file name
-    tempfolder_bt : BYTE
-        Encoded Temporary folder location
-    resultfile_bt : BYTE
-        Encoded Result file name
-    groupID : LIST
-        List of integer of the groups to modify
-    numPlates : INTEGER
-        Total number of Plates
-    ResultAxis: STRING, optional
-        Define axis the data is extracted on Local or Global
-        DEFAULT is 'Local'.
-    ResultLocation: STRING, optional
-        Result sampling location
-        DEFAULT is 'Centroid'
-        Centroid, Gauss, NodeAverageSame, NodeAverageAll, NodeAverageSame
-    PlateSurf : STRING, optional
-        Plate Surface to extract data
-        DEFAULT is 'Midplane
-        Midplane, Zplus or Zminus
+    CaseName_list : LIST
+        Names of the primary result cases
+    cases : LIST, optional
+        Case numbers (1-based) or case names to keep
+        DEFAULT is None, all cases are kept
+    skipReset : BOOLEAN, optional
+        Drop the cases of stages named Reset
+        DEFAULT is True
 
     Returns
     -------
-    ret : INTEGER
-        Return code API
+    caseNums : LIST
+        Selected case numbers
 
     """
-    
-    print('Start extract plate results')
 
-    # Open Model
-    ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
-    if ret != 0:
-        explain_error(ret)
-        St7API.St7Release()
-        print('Cannot open file')
-        sys.exit(1)
+    caseNums = []
+    for ind, casename in enumerate(CaseName_list):
+        if cases is not None and ind + 1 not in cases and casename not in cases:
+            continue
+        if skipReset and re.search('Reset', casename):
+            continue
+        caseNums.append(ind + 1)
 
-    modelname = modelname_bt.decode()
-    Foldername = os.path.dirname(modelname) + "\\"
-    
-    # Open Result file
-    numPrimary = ctypes.c_long()
-    numSecondary = ctypes.c_long()
-    CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
-    
-    ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
-    	numPrimary, numSecondary)
-    
-    if ret != 0:
-        explain_error(ret)
-        print('Not able to open result file')
-        St7API.St7CloseFile(1)
-        print('Releasing API')
-        St7API.St7Release()
+    return caseNums
 
-    print('%d primary case(s) found' % numPrimary.value)
-
-    CaseName_list = []
-    for ind in range(1, numPrimary.value + 1):
-        St7API.St7GetResultCaseName(1, ind, CaseName, St7API.kMaxStrLen)
-        CaseName_list.append(CaseName.value.decode())
-        print(CaseName.value.decode())
-
-    # Set API storage values
-    GroupPlate = ctypes.c_long()
-    DblArrayRes = ctypes.c_double * 6
-    ForceRes = DblArrayRes()
-    MomentRes = DblArrayRes()
-    StressRes = DblArrayRes()
-    DblArrayRes2 = ctypes.c_double * 11
-    CombinedRes = DblArrayRes2()
-    numPoints = ctypes.c_long()
-    numColumns = ctypes.c_long()
-    numPoints2 = ctypes.c_long()
-    numColumns2 = ctypes.c_long()
-    PlateArea = ctypes.c_double()
-    PlateThickness = ctypes.c_double()
-    PlatePropID = ctypes.c_long()
-    
-    # Select Plates ID
-    PlateNum = []
-    
-    for ind in range(1, numPlates+1):
-    	St7API.St7GetElementGroup(1, St7API.tyPLATE, ind, GroupPlate)
-    	if GroupPlate.value in groupID:
-    		PlateNum.append(ind)
-    print('%d plates will be extracted' % len(PlateNum))
-
-    # dictionnary for options
-    subtype = {'Local': St7API.stPlateLocal,
-               'Global': St7API.stPlateGlobal}
-    
-    sampleLocation = {'Centroid': St7API.AtCentroid,
-                      'Gauss': St7API.AtGaussPoints,
-                      'Nodesaveragenever': St7API.AtNodesAverageNever,
-                      'Nodesaverageall': St7API.AtNodesAverageAll,
-                      'Nodesaveragesame': St7API.AtNodesAverageSame}
-    
-    PlateSurface = {'Midplane': St7API.psPlateMidPlane,
-                    'Zplus': St7API.psPlateZPlus,
-                    'Zminus': St7API.psPlateZMinus}
-    
-    StgNames = []
-        
-    for ind, casename in enumerate(CaseName_list):
-        print('Start extracting data for case number %d %s' % (ind, casename))
-    
-        PlateId = []
-        PlateT = []
-        PlateA = []
-        ForceXX = []
-        ForceYY = []
-        ForceXY = []
-        ForceXZ = []
-        ForceYZ = []
-        MomentXX = []
-        MomentYY = []
-        MomentXY = []
-        StressXX = []
-        StressYY = []
-        StressXY = []
-        Angle11xx = []
-        
-        for platePos in PlateNum:
-          
-            # Extract plate thickness
-            St7API.St7GetElementProperty(1, St7API.tyPLATE, platePos, PlatePropID)
-            St7API.St7GetPlateThickness(1, PlatePropID.value, PlateThickness)
-            
-            if PlateThickness.value > minthickness:
-            
-                # Extract plate forces
-                St7API.St7GetPlateResultArray(1, St7API.rtPlateForce,
-                                              subtype[ResultAxis.capitalize()],
-                                              platePos, ind+1,
-                                              sampleLocation[
-                                                      ResultLocation.capitalize()
-                                                      ],
-                                              PlateSurface[PlateSurf.capitalize()],
-                                              1, numPoints, numColumns, ForceRes)
-                # Extract plate moments
-                St7API.St7GetPlateResultArray(1, St7API.rtPlateMoment,
-                                              subtype[ResultAxis.capitalize()],
-                                              platePos, ind+1,
-                                              sampleLocation[
-                                                      ResultLocation.capitalize()
-                                                      ],
-                                              PlateSurface[PlateSurf.capitalize()],
-                                              1, numPoints, numColumns, MomentRes)
-                # Extract plate stresses
-                St7API.St7GetPlateResultArray(1, St7API.rtPlateStress,
-                                              subtype[ResultAxis.capitalize()],
-                                              platePos, ind+1,
-                                              sampleLocation[
-                                                      ResultLocation.capitalize()
-                                                      ],
-                                              PlateSurface[PlateSurf.capitalize()],
-                                              1, numPoints, numColumns, StressRes)
-                # Extract principal axis angle
-                St7API.St7GetPlateResultArray(1, St7API.rtPlateStress,
-                                              St7API.stPlateCombined,
-                                              platePos, ind+1,
-                                              sampleLocation[
-                                                      ResultLocation.capitalize()
-                                                      ],
-                                              PlateSurface[PlateSurf.capitalize()],
-                                              1, numPoints2, numColumns2, CombinedRes) 
-                # Extract plate area
-                St7API.St7GetElementData(1, St7API.tyPLATE,platePos, PlateArea)
-                
-                PlateId.append(platePos)
-                PlateT.append(PlateThickness.value)
-                PlateA.append(PlateArea.value)
-                    
-                for ptpos in range(0, numPoints.value):
-                    
-                    indpos = ptpos * numColumns.value
-                    indpos2 = ptpos * numColumns2.value
-
-                    ForceXX.append(ForceRes[indpos + St7API.ipPlateLocalxx])
-                    ForceYY.append(ForceRes[indpos + St7API.ipPlateLocalyy])
-                    ForceXY.append(ForceRes[indpos + St7API.ipPlateLocalxy])
-                    ForceXZ.append(ForceRes[indpos + St7API.ipPlateLocalxz])
-                    ForceYZ.append(ForceRes[indpos + St7API.ipPlateLocalyz])
-                    MomentXX.append(MomentRes[indpos + St7API.ipPlateLocalxx])
-                    MomentYY.append(MomentRes[indpos + St7API.ipPlateLocalyy])
-                    MomentXY.append(MomentRes[indpos + St7API.ipPlateLocalxy])
-                    StressXX.append(StressRes[indpos + St7API.ipPlateLocalxx])
-                    StressYY.append(StressRes[indpos + St7API.ipPlateLocalyy])
-                    StressXY.append(StressRes[indpos + St7API.ipPlateLocalxy])
-                    Angle11xx.append(CombinedRes[indpos2 + St7API.ipPlateCombPrincipalAngle])
-                    
-
-        # Create a dataframe to store the output data
-        if subtype[ResultAxis.capitalize()] == St7API.stPlateLocal:
-            DF = pd.DataFrame(data={'PlateId': PlateId,
-                                    'Plate Thickness (m)': PlateT,
-                                    'Force (xx) (MN/m)': ForceXX,
-                                    'Force (yy) (MN/m)': ForceYY,
-                                    'Force (xy) (MN/m)': ForceXY,
-                                    'Force (xz) (MN/m)': ForceXZ,
-                                    'Force (yz) (MN/m)': ForceYZ,
-                                    'Moment (xx) (MN.m/m)': MomentXX,
-                                    'Moment (yy) (MN.m/m)': MomentYY,
-                                    'Moment (xy) (MN.m/m)': MomentXY,
-                                    'Stress (xx) (MPa)': StressXX,
-                                    'Stress (yy) (MPa)': StressYY,
-                                    'Stress (xy) (MPa)': StressXY,
-                                    'Angle 11-xx (°)': Angle11xx},
-                columns=['PlateId', 'Plate Thickness (m)', 'Force (xx) (MN/m)', 'Force (yy) (MN/m)',
-                         'Force (xy) (MN/m)', 'Force (xz) (MN/m)',
-                         'Force (yz) (MN/m)', 'Moment (xx) (MN.m/m)',
-                         'Moment (yy) (MN.m/m)', 'Moment (xy) (MN.m/m)',
-                         'Stress (xx) (MPa)', 'Stress (yy) (MPa)', 'Stress (xy) (MPa)', 'Angle 11-xx (°)'])
-
-        
-        stgname = casename.replace(' ', '').replace(':', '_').replace('Increment[', '').replace(']','')
-        stgname = 'shearinputs_' + stgname
-        
-        x = re.search('Reset',stgname) 
-        
-        if (x):
-            print('skipped reset stage')
-        else:
-            csvOutFile = Foldername + stgname + '.csv'
-            print('Saved in csv file ' + csvOutFile)
-            DF.to_csv(csvOutFile, index=False)
-            
-            StgNames.append(stgname+'.csv')
-    
-    ret = St7API.St7CloseResultFile(1)
-    if ret == 0:
-        print('Result File closed')
-    ret = St7API.St7CloseFile(1)
-    if ret == 0:
-        print('Model File closed')
-
-    return ret
-
-def export_cwinputs(modelname_bt, tempfolder_bt, resultfile_bt,
-                                 groupID, numPlates, minthickness, ResultAxis='Local',
-                                 ResultLocation='Centroid'):
+def save_results(fileStem, OutputFormat='csv', DF=None, **arrays):
     """
-    Extract Beam Force information for a combined result file
+    Write extracted results in the requested output format
 
     Parameters
     ----------
-    modelname_bt : BYTE
-        Encoded Input Model file name
-    tempfolder_bt : BYTE
-        Encoded Temporary folder location
-    resultfile_bt : BYTE
-        Encoded Result file name
-    groupID : LIST
-        List of integer of the groups to modify
-    numPlates : INTEGER
-        Total number of Plates
-    ResultAxis: STRING, optional
-        Define axis the data is extracted on Local or Global
-        DEFAULT is 'Local'.
-    ResultLocation: STRING, optional
-        Result sampling location
-        DEFAULT is 'Centroid'
-        Centroid, Gauss, NodeAverageSame, NodeAverageAll, NodeAverageSame
-    PlateSurf : STRING, optional
-        Plate Surface to extract data
-        DEFAULT is 'Midplane
-        Midplane, Zplus or Zminus
+    fileStem : STRING
+        Output file path without extension
+    OutputFormat : STRING, optional
+        DEFAULT is 'csv'
+        csv - DF written to fileStem.csv
+        npz - arrays written to fileStem.npz
+        none - nothing written
+    DF : DATAFRAME, optional
+        Table written by the csv format
+    **arrays : ARRAY
+        Named arrays written by the npz format
 
     Returns
     -------
-    ret : INTEGER
-        Return code API
+    outFile : STRING
+        Written file, None if nothing was written
 
     """
-    
-    print('Start extract plate results')
 
+    with St7Profiler.span('Write output'):
+        OutputFormat = OutputFormat.lower()
+        if OutputFormat == 'csv':
+            outFile = fileStem + '.csv'
+            DF.to_csv(outFile, index=False)
+        elif OutputFormat == 'npz':
+            outFile = fileStem + '.npz'
+            np.savez(outFile, **arrays)
+        elif OutputFormat == 'none':
+            return None
+        else:
+            raise ValueError('Unknown output format %s' % OutputFormat)
+
+    print('Saved in file ' + outFile)
+
+    return outFile
+
+def assign_plates_results(modelname_bt, tempfolder_bt, fileOut_bt, DF):
+
+    print('Start assigning post-processing results to plates as heat source')
+    
     # Open Model
     ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
     if ret != 0:
-        explain_error(ret)
-        St7API.St7Release()
         print('Cannot open file')
-        sys.exit(1)
-
-    modelname = modelname_bt.decode()
-    Foldername = os.path.dirname(modelname) + "\\"
+        explain_error(ret)
     
-    # Open Result file
-    numPrimary = ctypes.c_long()
-    numSecondary = ctypes.c_long()
+    # Variables to store information
+    NumLoadCases = ctypes.c_long()
+    PlateNum = ctypes.c_long()
+    LoadCaseID = ctypes.c_long()
     CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
+    LoadCaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
+
+    
+    # Get first column of dataframe, containing Plate IDs
+    PlateID = DF.iloc[:,0]
+    PlateID = pd.to_numeric(PlateID, errors='coerce')
+    ResultNames = DF.columns[1:]
+    ResultIDs = []
+    
+    # Add load cases
+    for i in ResultNames:
+        CaseName = i
+        St7API.St7NewLoadCase(1, CaseName.encode())
+        
+    # Get total number of load cases
+    St7API.St7GetNumLoadCase(1, NumLoadCases)
+    # Match load case ID with load case name
+    for j in range(1, NumLoadCases.value+1):
+        St7API.St7GetLoadCaseName(1, j, LoadCaseName, St7API.kMaxStrLen)
+        if LoadCaseName.value.decode() in ResultNames:
+            ResultIDs.append(j)
     
-    ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
-    	numPrimary, numSecondary)
+    for k in range(len(ResultIDs)):
+        
+        LoadCaseID = ResultIDs[k]
+        print('Assigning ' + str(ResultNames[k]))
+        for ind, platePos in enumerate(PlateID):
+            PlateNum = int(platePos)
+            ResultVal = ctypes.c_double(DF.iloc[ind, k+1])
+            
+            St7API.St7SetPlateHeatSource1(1, PlateNum, LoadCaseID, ResultVal)
     
+    # Saving the new model
+    ret = St7API.St7SaveFileTo(1, fileOut_bt)
     if ret != 0:
-        explain_error(ret)
-        print('Not able to open result file')
         St7API.St7CloseFile(1)
-        print('Releasing API')
-        St7API.St7Release()
+        print('Cannot open file')
+        explain_error(ret)
+    
+    
+    print('Complete')
+    St7API.St7CloseFile(1)
 
-    print('%d primary case(s) found' % numPrimary.value)
+    return ret
 
-    CaseName_list = []
-    for ind in range(1, numPrimary.value + 1):
-        St7API.St7GetResultCaseName(1, ind, CaseName, St7API.kMaxStrLen)
-        CaseName_list.append(CaseName.value.decode())
-        print(CaseName.value.decode())
+# Result types and value counts of the user result file quantities
+ResFileQuantities = {
+    'plate': (St7API.tyPLATE, St7API.rtPlateStress,
+              St7API.kPlateShellResFileStressSize),
+    'beam': (St7API.tyBEAM, St7API.rtBeamForce,
+             St7API.kBeamResFileForceSize)}
 
-    # Set API storage values
-    GroupPlate = ctypes.c_long()
-    DblArrayRes = ctypes.c_double * 11
-    CombinedRes = DblArrayRes()
-    CombinedResZ = DblArrayRes()
-    CombinedResZn = DblArrayRes()
-    numPoints = ctypes.c_long()
-    numColumns = ctypes.c_long()
+def table_result_cases(DF):
+    """
+    Element numbers and per case values of a post-processing table, in the
+    layout of assign_plates_results
 
-    PlateThickness = ctypes.c_double()
-    PlatePropID = ctypes.c_long()
-    
-    # Select Plates ID
-    PlateNum = []
-    
-    for ind in range(1, numPlates+1):
-    	St7API.St7GetElementGroup(1, St7API.tyPLATE, ind, GroupPlate)
-    	if GroupPlate.value in groupID:
-    		PlateNum.append(ind)
-    print('%d plates will be extracted' % len(PlateNum))
+    Parameters
+    ----------
+    DF : DATAFRAME
+        Element numbers in the first column, one column per quantity
 
-    # dictionnary for options
-    subtype = {'Local': St7API.stPlateLocal,
-               'Global': St7API.stPlateGlobal}
-    
-    sampleLocation = {'Centroid': St7API.AtCentroid,
-                      'Gauss': St7API.AtGaussPoints,
-                      'Nodesaveragenever': St7API.AtNodesAverageNever,
-                      'Nodesaverageall': St7API.AtNodesAverageAll,
-                      'Nodesaveragesame': St7API.AtNodesAverageSame}
-    
-    StgNames = []
-        
-    for ind, casename in enumerate(CaseName_list):
-        print('Start extracting data for case number %d %s' % (ind, casename))
-    
-        PlateId = []
-        
-        r1 = []
-        r2 = []
-        r3 = []
-        r4 = []
-        r5 = []
-        r6 = []
-        r7 = []
-        r8 = []
-        r9 = [] 
-        
-        for platePos in PlateNum:
-          
-            # Extract plate thickness
-            St7API.St7GetElementProperty(1, St7API.tyPLATE, platePos, PlatePropID)
-            St7API.St7GetPlateThickness(1, PlatePropID.value, PlateThickness)
-            
-            if PlateThickness.value > minthickness:
-            
-                # Extract principal axis angle
-                St7API.St7GetPlateResultArray(1, St7API.rtPlateStress,
-                                              St7API.stPlateCombined,
-                                              platePos, ind+1,
-                                              sampleLocation[ResultLocation.capitalize()],
-                                              St7API.psPlateMidPlane,
-                                              1, numPoints, numColumns, CombinedRes) 
-                
-                St7API.St7GetPlateResultArray(1, St7API.rtPlateStress,
-                                              St7API.stPlateCombined,
-                                              platePos, ind+1,
-                                              sampleLocation[ResultLocation.capitalize()],
-                                              St7API.psPlateZPlus,
-                                              1, numPoints, numColumns, CombinedResZ)
-
-                St7API.St7GetPlateResultArray(1, St7API.rtPlateStress,
-                                              St7API.stPlateCombined,
-                                              platePos, ind+1,
-                                              sampleLocation[ResultLocation.capitalize()],
-                                              St7API.psPlateZMinus,
-                                              1, numPoints, numColumns, CombinedResZn)                               
-                
+    Returns
+    -------
+    ElementNum : ARRAY
+        Element numbers
+    Values : ARRAY
+        (cases, elements) values, one case per column
+    CaseNames : LIST
+        Column names
 
-                PlateId.append(platePos)
-                    
-                for ptpos in range(0, numPoints.value):
-                    
-                    indpos = ptpos * numColumns.value
-                    
-                    r1.append(CombinedResZn[indpos + St7API.ipPlateCombPrincipal11])
-                    r2.append(CombinedResZn[indpos + St7API.ipPlateCombPrincipal22])
-                    r3.append(CombinedResZn[indpos + St7API.ipPlateCombPrincipalAngle])
-                    
-                    r4.append(CombinedRes[indpos + St7API.ipPlateCombPrincipal11])
-                    r5.append(CombinedRes[indpos + St7API.ipPlateCombPrincipal22])
-                    r6.append(CombinedRes[indpos + St7API.ipPlateCombPrincipalAngle])
-                    
-                    r7.append(CombinedResZ[indpos + St7API.ipPlateCombPrincipal11])
-                    r8.append(CombinedResZ[indpos + St7API.ipPlateCombPrincipal22])
-                    r9.append(CombinedResZ[indpos + St7API.ipPlateCombPrincipalAngle])
-                    
+    """
 
-        # Create a dataframe to store the output data
-        if subtype[ResultAxis.capitalize()] == St7API.stPlateLocal:
-            DF = pd.DataFrame(data=({'PlateId' : PlateId, 's11(z-)' : r1, 's22(z-)' : r2, 'angle11-xx(z-)' : r3,
-                                     's11(mid)' : r4, 's22(mid)' : r5, 'angle11-xx(mid)' : r6,
-                                     's11(z+)' : r7, 's22(z+)' : r8, 'angle11-xx(z+)' : r9}),
-                              columns=['PlateId','s11(z-)','s22(z-)','angle11-xx(z-)', 
-                                       's11(mid)','s22(mid)','angle11-xx(mid)',
-                                       's11(z+)','s22(z+)','angle11-xx(z+)'])
+    ElementNum = pd.to_numeric(DF.iloc[:, 0], errors='coerce').to_numpy()
+    Values = DF.iloc[:, 1:].to_numpy(dtype=np.float64).T
 
-        stgname = casename.replace(' ', '').replace(':', '_').replace('Increment[', '').replace(']','')
-        stgname = 'cwinputs_' + stgname
-        
-        x = re.search('Reset',stgname) 
-        
-        if (x):
-            print('skipped reset stage')
-        else:
-            csvOutFile = Foldername + stgname + '.csv'
-            print('Saved in csv file ' + csvOutFile)
-            DF.to_csv(csvOutFile, index=False)
-            
-            StgNames.append(stgname+'.csv')
-    
-    ret = St7API.St7CloseResultFile(1)
-    if ret == 0:
-        print('Result File closed')
-    ret = St7API.St7CloseFile(1)
-    if ret == 0:
-        print('Model File closed')
+    return ElementNum.astype(np.int64), Values, [str(name) for name
+                                                  in DF.columns[1:]]
 
-    return ret
+def write_entity_results(entity, ElementNum, Values, slots=None):
+    """
+    Write per element values of every case into the open user result file
 
+    Parameters
+    ----------
+    entity : STRING
+        'plate' or 'beam', see ResFileQuantities
+    ElementNum : ARRAY
+        Element numbers
+    Values : ARRAY
+        (cases, elements) values, or (cases, elements, components)
+    slots : LIST, optional
+        Result file value index of each component, e.g.
+        St7API.ipPlateShellResFileMidPlaneSxx
+        DEFAULT is None, the first components of the quantity
 
-def export_plate_forceMomentData(modelname_bt, tempfolder_bt, resultfile_bt,
-                                 groupID, numPlates, minthickness, ResultAxis='Local',
-                                 ResultLocation='Centroid',
-                                 PlateSurf='Midplane'):
     """
-    Extract Beam Force information for a combined result file
+
+    entityType, resultType, numValues = ResFileQuantities[entity]
+    Values = np.asarray(Values, dtype=np.float64)
+    if Values.ndim == 2:
+        Values = Values[:, :, np.newaxis]
+    if slots is None:
+        slots = list(range(Values.shape[2]))
+    if len(slots) != Values.shape[2] or max(slots) >= numValues:
+        raise ValueError('%d components do not fit the %d %s result values'
+                         % (Values.shape[2], numValues, entity))
+
+    # Values of every element and case laid out once, one row per call
+    Rows = np.zeros(Values.shape[:2] + (numValues,))
+    Rows[:, :, slots] = Values
+
+    Buffer = (ctypes.c_double * numValues)()
+    View = np.ctypeslib.as_array(Buffer)
+
+    for caseInd in range(Rows.shape[0]):
+        St7API.St7SetResFileQuantity(1, entityType, resultType, caseInd + 1)
+        for elemInd, elemNum in enumerate(ElementNum):
+            View[:] = Rows[caseInd, elemInd]
+            if entity == 'plate':
+                ret = St7API.St7SetResFilePlateResult(
+                    1, resultType, int(elemNum), caseInd + 1, True, Buffer)
+            else:
+                ret = St7API.St7SetResFileBeamResult(
+                    1, resultType, int(elemNum), caseInd + 1, Buffer)
+            if ret != 0:
+                explain_error(ret)
+
+def write_result_file(modelname_bt, tempfolder_bt, resfile_bt, CaseNames,
+                      PlateNum=None, PlateValues=None, BeamNum=None,
+                      BeamValues=None, plateSlots=None, beamSlots=None):
+    """
+    Write post-processed per plate and per beam values into a user result
+    file of the model, one result case per quantity or per stage, to contour
+    them in Strand7 without modifying the model
 
     Parameters
     ----------
@@ -1407,260 +1064,251 @@ def export_plate_forceMomentData(modelname_bt, tempfolder_bt, resultfile_bt,
         Encoded Input Model file name
     tempfolder_bt : BYTE
         Encoded Temporary folder location
-    resultfile_bt : BYTE
-        Encoded Result file name
-    groupID : LIST
-        List of integer of the groups to modify
-    numPlates : INTEGER
-        Total number of Plates
-    ResultAxis: STRING, optional
-        Define axis the data is extracted on Local or Global
-        DEFAULT is 'Local'.
-    ResultLocation: STRING, optional
-        Result sampling location
-        DEFAULT is 'Centroid'
-        Centroid, Gauss, NodeAverageSame, NodeAverageAll, NodeAverageSame
-    PlateSurf : STRING, optional
-        Plate Surface to extract data
-        DEFAULT is 'Midplane
-        Midplane, Zplus or Zminus
+    resfile_bt : BYTE
+        Encoded result file name written
+    CaseNames : LIST
+        Result case names
+    PlateNum : ARRAY, optional
+        Plate numbers
+        DEFAULT is None, no plate results
+    PlateValues : ARRAY, optional
+        (cases, plates) values written as plate stress, or
+        (cases, plates, components) with the components in plateSlots
+        DEFAULT is None
+    BeamNum : ARRAY, optional
+        Beam numbers
+        DEFAULT is None, no beam results
+    BeamValues : ARRAY, optional
+        (cases, beams) values written as beam force, or
+        (cases, beams, components) with the components in beamSlots
+        DEFAULT is None
+    plateSlots : LIST, optional
+        ipPlateShellResFile* index of each plate component
+        DEFAULT is None, the first components (Nxx, Nyy...)
+    beamSlots : LIST, optional
+        ipBeamResFile* index of each beam component
+        DEFAULT is None, the first components (SF1, SF2...)
 
     Returns
     -------
     ret : INTEGER
-        Return code API
+        Return code final API
+
+    Usage
+    -----
+    PlateNum, Values, CaseNames = table_result_cases(DF)
+    write_result_file(modelname_bt, tempfolder_bt, b'Design.LSA', CaseNames,
+                      PlateNum, Values)
 
     """
-    
-    print('Start extract plate results')
 
-    # Open Model
+    print('Start writing post-processing results to a result file')
+
     ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
     if ret != 0:
-        explain_error(ret)
-        St7API.St7Release()
         print('Cannot open file')
-        sys.exit(1)
+        explain_error(ret)
 
-    modelname = modelname_bt.decode()
-    Foldername = os.path.dirname(modelname) + "\\"
-    
-    # Open Result file
-    numPrimary = ctypes.c_long()
-    numSecondary = ctypes.c_long()
-    CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
-    
-    ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
-    	numPrimary, numSecondary)
-    
+    ret = St7API.St7NewResFile(1, resfile_bt, St7API.stLinearStaticSolver)
     if ret != 0:
-        explain_error(ret)
-        print('Not able to open result file')
         St7API.St7CloseFile(1)
-        print('Releasing API')
-        St7API.St7Release()
+        explain_error(ret)
 
-    print('%d primary case(s) found' % numPrimary.value)
+    St7API.St7SetResFileNumCases(1, len(CaseNames))
+    for caseInd, casename in enumerate(CaseNames):
+        St7API.St7SetResFileCaseName(1, caseInd + 1, str(casename).encode())
 
-    CaseName_list = []
-    for ind in range(1, numPrimary.value + 1):
-        St7API.St7GetResultCaseName(1, ind, CaseName, St7API.kMaxStrLen)
-        CaseName_list.append(CaseName.value.decode())
-        print(CaseName.value.decode())
+    if PlateValues is not None:
+        print('Writing %d plates' % len(PlateNum))
+        write_entity_results('plate', PlateNum, PlateValues, plateSlots)
+    if BeamValues is not None:
+        print('Writing %d beams' % len(BeamNum))
+        write_entity_results('beam', BeamNum, BeamValues, beamSlots)
 
-    # Set API storage values
-    GroupPlate = ctypes.c_long()
-    DblArrayRes = ctypes.c_double * 6
-    ForceRes = DblArrayRes()
-    MomentRes = DblArrayRes()
-    numPoints = ctypes.c_long()
-    numColumns = ctypes.c_long()
-    PlateArea = ctypes.c_double()
-    PlateThickness = ctypes.c_double()
-    PlatePropID = ctypes.c_long()
+    ret = St7API.St7CloseResFile(1)
+    if ret != 0:
+        explain_error(ret)
+    print('%d cases written in %s' % (len(CaseNames), resfile_bt.decode()))
+
+    St7API.St7CloseFile(1)
+
+    return ret
+
+def assign_plates_prop(modelname_bt, tempfolder_bt, fileOut_bt, DF, groupID,
+                       numPlates, solvebool, initialFile_bt=None,
+                       initialCase=None, saveRestart=False):
+    """
+    Assign Properties to Plates
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    fileOut_bt : BYTE
+        Encoded Output model name
+    DF : DATAFRAME
+        Pandas DataFrame with properties description with columns:
+        'Property Name', 'PlateType', 'Material', 'Modulus E1', 'Modulus E2',
+        'Modulus E3', 'Poisson I12', 'Poisson I23', 'Poisson I31',
+        'Shear Modulus G12', 'Shear Modulus G23', 'Shear Modulus G31',
+        'Thermal Expansion A1', 'Thermal Expansion A2', 'Thermal Expansion A3',
+        'Damping Ratio', 'Density', 'Viscous Damping', 'Specific Heat',
+        'Conductivity K1', 'Conductivity K2', 'Modulus', 'Poisson Ratio',
+        'Thermal Expansion', 'Conductivity', 'Membrane Thickness',
+        'Membrane Bending'
+    groupID : LIST
+        List of integer of the groups to modify
+    numPlates : INTEGER
+        Number of plates
+    solvebool : BOOLEAN
+        Run the nonlinear static solver on the output model
+    initialFile_bt : BYTE, optional
+        Encoded result file of a previous solve, case initialCase is the
+        initial condition of the solve, see set_warm_start
+        DEFAULT is None, solve from scratch
+    initialCase : INTEGER, optional
+        DEFAULT is None, the last converged case of initialFile_bt
+    saveRestart : BOOLEAN, optional
+        Save the restart data of the solve
+        DEFAULT is False
+
+    Returns
+    -------
+    ret : INTEGER
+        Return code final API
+
+    """
     
-    # Select Plates ID
-    PlateNum = []
+    print('Start assigning properties to plates')
     
-    for ind in range(1, numPlates+1):
-    	St7API.St7GetElementGroup(1, St7API.tyPLATE, ind, GroupPlate)
-    	if GroupPlate.value in groupID:
-            PlateNum.append(ind)
-    print('%d plates will be extracted' % len(PlateNum))
+    # Open Model
+    ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
+    if ret != 0:
+        print('Cannot open file')
+        explain_error(ret)
+    
+    
+    EsPlates = DF['Property Name']
+    print('%d plates will be assigned new properties' % len(EsPlates))
 
-    # dictionnary for options
-    subtype = {'Local': St7API.stPlateLocal,
-               'Global': St7API.stPlateGlobal}
+    # Variables to store information
+    LongArray4 = ctypes.c_long * 4
+    DblArray18 = ctypes.c_double * 18
+    DblArray8 = ctypes.c_double * 8
+    DblArray2 =ctypes.c_double *2
+    numProperties = LongArray4()
+    LastProperties = LongArray4()
+    OrthoArray = DblArray18()
+    IsoArray = DblArray8()
+    ThickArray = DblArray2()
     
-    sampleLocation = {'Centroid': St7API.AtCentroid,
-                      'Gauss': St7API.AtGaussPoints,
-                      'Nodesaveragenever': St7API.AtNodesAverageNever,
-                      'Nodesaverageall': St7API.AtNodesAverageAll,
-                      'Nodesaveragesame': St7API.AtNodesAverageSame}
+    # Dictionnary of Strand7 key words
+    plateTypeDict = {'2D Plane Stress': St7API.kPlateTypePlaneStress,
+                     '2D Plane Strain': St7API.kPlateTypePlaneStrain,
+                     'Axisymmetric': St7API.kPlateTypeAxisymmetric,
+                     'Plate/Shell': St7API.kPlateTypePlateShell,
+                     'Shear Panel': St7API.kPlateTypeShearPanel,
+                     '3D Membrane': St7API.kPlateTypeMembrane,
+                     'Load Patch': St7API.kPlateTypeLoadPatch}
     
-    PlateSurface = {'Midplane': St7API.psPlateMidPlane,
-                    'Zplus': St7API.psPlateZPlus,
-                    'Zminus': St7API.psPlateZMinus}
+    MaterialDict = {'Isotropic': St7API.kMaterialTypeIsotropic,
+                    'Orthotropic': St7API.kMaterialTypeOrthotropic,
+                    'Anisotropic': St7API.kMaterialTypeAnisotropic,
+                    'Laminate': St7API.kMaterialTypeLaminate,
+                    'Rubber': St7API.kMaterialTypeRubber}
     
-    StgNames = []
-
-    for ind, casename in enumerate(CaseName_list):
-        print('Start extracting data for case number %d %s' % (ind, casename))
     
-        PlateId = []
-        PlateT = []
-        PlateA = []
-        ForceXX = []
-        ForceYY = []
-        ForceZZ = []
-        ForceXY = []
-        ForceXZ = []
-        ForceYZ = []
-        MomentXX = []
-        MomentYY = []
-        MomentZZ = []
-        MomentXY = []
-        MomentYZ = []
-        MomentZX = []
-        PropertyID = []
-        
-        for platePos in PlateNum:
-            # Extract plate forces
-            St7API.St7GetPlateResultArray(1, St7API.rtPlateForce,
-                                          subtype[ResultAxis.capitalize()],
-                                          platePos, ind+1,
-                                          sampleLocation[
-                                                  ResultLocation.capitalize()
-                                                  ],
-                                          PlateSurface[PlateSurf.capitalize()],
-                                          1, numPoints, numColumns, ForceRes)
-            # Extract plate moments
-            St7API.St7GetPlateResultArray(1, St7API.rtPlateMoment,
-                                          subtype[ResultAxis.capitalize()],
-                                          platePos, ind+1,
-                                          sampleLocation[
-                                                  ResultLocation.capitalize()
-                                                  ],
-                                          PlateSurface[PlateSurf.capitalize()],
-                                          1, numPoints, numColumns, MomentRes)
-            # Extract plate thickness
-            St7API.St7GetElementProperty(1, St7API.tyPLATE, platePos, PlatePropID)
-            St7API.St7GetPlateThickness(1, PlatePropID.value, PlateThickness)
-
-            # Extract plate area
-            St7API.St7GetElementData(1, St7API.tyPLATE,platePos, PlateArea)
-            
-            if PlateThickness.value > minthickness:
-                
-                for ptpos in range(0, numPoints.value):
-                        
-                        indpos = ptpos * numColumns.value
-                        PropertyID.append(PlatePropID.value)
-                        PlateId.append(platePos)
-                        PlateT.append(PlateThickness.value)
-                        PlateA.append(PlateArea.value)
-                        
-                        if subtype[ResultAxis.capitalize()] == St7API.stPlateLocal:
-                            ForceXX.append(ForceRes[indpos + St7API.ipPlateLocalxx])
-                            ForceYY.append(ForceRes[indpos + St7API.ipPlateLocalyy])
-                            ForceXY.append(ForceRes[indpos + St7API.ipPlateLocalxy])
-                            ForceXZ.append(ForceRes[indpos + St7API.ipPlateLocalxz])
-                            ForceYZ.append(ForceRes[indpos + St7API.ipPlateLocalyz])
-                            MomentXX.append(MomentRes[indpos + St7API.ipPlateLocalxx])
-                            MomentYY.append(MomentRes[indpos + St7API.ipPlateLocalyy])
-                            MomentXY.append(MomentRes[indpos + St7API.ipPlateLocalxy])
-                
-                        elif subtype[ResultAxis.capitalize()] == St7API.stPlateGlobal:
-                            ForceXX.append(ForceRes[indpos + St7API.ipPlateGlobalXX])
-                            ForceYY.append(ForceRes[indpos + St7API.ipPlateGlobalYY])
-                            ForceZZ.append(ForceRes[indpos + St7API.ipPlateGlobalZZ])
-                            ForceXY.append(ForceRes[indpos + St7API.ipPlateGlobalXY])
-                            ForceXZ.append(ForceRes[indpos + St7API.ipPlateGlobalZX])
-                            ForceYZ.append(ForceRes[indpos + St7API.ipPlateGlobalYZ])
-                            MomentXX.append(MomentRes[indpos + St7API.ipPlateGlobalXX])
-                            MomentYY.append(MomentRes[indpos + St7API.ipPlateGlobalYY])
-                            MomentZZ.append(MomentRes[indpos + St7API.ipPlateGlobalZZ])
-                            MomentXY.append(MomentRes[indpos + St7API.ipPlateGlobalXY])
-                            MomentYZ.append(MomentRes[indpos + St7API.ipPlateGlobalYZ])
-                            MomentZX.append(MomentRes[indpos + St7API.ipPlateGlobalZX])
+    # Get the number of properties already assigned
+    ret = St7API.St7GetTotalProperties(1, numProperties, LastProperties)
+    if ret != 0:
+        print('Cannot retrieve properties')
+        explain_error(ret)
 
+    for ind, ID in enumerate(EsPlates):
         
-        # Create a dataframe to store the output data
-        if subtype[ResultAxis.capitalize()] == St7API.stPlateLocal:
-            DF = pd.DataFrame(data={'PlateId': PlateId,
-                                    'Plate Thickness (m)': PlateT,
-                                    'Force (xx) (MN/m)': ForceXX,
-                                    'Force (yy) (MN/m)': ForceYY,
-                                    'Force (xy) (MN/m)': ForceXY,
-                                    'Force (xz) (MN/m)': ForceXZ,
-                                    'Force (yz) (MN/m)': ForceYZ,
-                                    'Moment (xx) (MN.m/m)': MomentXX,
-                                    'Moment (yy) (MN.m/m)': MomentYY,
-                                    'Moment (xy) (MN.m/m)': MomentXY,
-                                    'Plate Area (m2)': PlateA,
-                                    'Property ID' : PropertyID
-                                    },
-                columns=['PlateId', 'Plate Thickness (m)', 'Force (xx) (MN/m)', 'Force (yy) (MN/m)',
-                         'Force (xy) (MN/m)', 'Force (xz) (MN/m)',
-                         'Force (yz) (MN/m)', 'Moment (xx) (MN.m/m)',
-                         'Moment (yy) (MN.m/m)', 'Moment (xy) (MN.m/m)', 'Plate Area (m2)', 'Property ID'])
-        
-        elif subtype[ResultAxis.capitalize()] == St7API.stPlateGlobal:
-            DF = pd.DataFrame(data={'PlateId': PlateId,
-                                    'Force (XX) (MN/m)': ForceXX,
-                                    'Force (YY) (MN/m)': ForceYY,
-                                    'Force (ZZ) (MN/m)': ForceZZ,
-                                    'Force (XY) (MN/m)': ForceXY,
-                                    'Force (YZ) (MN/m)': ForceYZ,
-                                    'Force (ZX) (MN/m)': ForceXZ,
-                                    'Moment (XX) (MN.m/m)': MomentXX,
-                                    'Moment (YY) (MN.m/m)': MomentYY,
-                                    'Moment (ZZ) (MN.m/m)': MomentZZ,
-                                    'Moment (XY) (MN.m/m)': MomentXY,
-                                    'Moment (YZ) (MN.m/m)': MomentYZ,
-                                    'Moment (ZX) (MN.m/m)': MomentZX
-                                    },
-                columns=['PlateId', 'Force (XX) (MN/m)', 'Force (YY) (MN/m)',
-                         'Force (ZZ) (MN/m)', 'Force (XY) (MN/m)',
-                         'Force (YZ) (MN/m)', 'Force (ZX) (MN/m)',
-                         'Moment (XX) (MN.m/m)', 'Moment (YY) (MN.m/m)',
-                         'Moment (ZZ) (MN.m/m)', 'Moment (XY) (MN.m/m)',
-                         'Moment (YZ) (MN.m/m)', 'Moment (ZX) (MN.m/m)'])
-        
-        
-        stgname = casename.replace(' ', '').replace(':', '_').replace('Increment[', '').replace(']','')
-        stgname = 'sandwichinputs_' + stgname
+        plateID = int(ID)
+        propNum = plateID + numPlates
+        propName = str(propNum).encode()
         
-        x = re.search('Reset',stgname) 
+        try:
+            plateType = plateTypeDict[DF.loc[ind, 'PlateType']]
+        except KeyError:
+            print(DF.loc[ind, 'PlateType'] + ' not found in Plate type list')
+        try:
+            MaterialType = MaterialDict[DF.loc[ind, 'Material']]
+        except KeyError:
+            print(DF.loc[ind, 'Material'] + ' not found in material list')
         
-    
-        if (x):
-            print('skipped reset stage')
-        else:
-            csvOutFile = Foldername + stgname + '.csv'
-            print('Saved in csv file ' + csvOutFile)
-            DF.to_csv(csvOutFile, index=False)
+        St7API.St7NewPlateProperty(1, propNum, plateType, MaterialType, propName)
             
-            StgNames.append(stgname+'.csv')
+        if MaterialType == St7API.kMaterialTypeOrthotropic:
+            OrthoArray[St7API.ipPlateOrthoModulus1] = DF.loc[ind, 'Modulus E1']
+            OrthoArray[St7API.ipPlateOrthoModulus2] = DF.loc[ind, 'Modulus E2']
+            OrthoArray[St7API.ipPlateOrthoModulus3] = DF.loc[ind, 'Modulus E3']
+            OrthoArray[St7API.ipPlateOrthoShear12] = DF.loc[ind, 'Shear Modulus G12']
+            OrthoArray[St7API.ipPlateOrthoShear23] = DF.loc[ind, 'Shear Modulus G23']
+            OrthoArray[St7API.ipPlateOrthoShear31] = DF.loc[ind, 'Shear Modulus G31']
+            OrthoArray[St7API.ipPlateOrthoPoisson12] = DF.loc[ind, 'Poisson I12']
+            OrthoArray[St7API.ipPlateOrthoPoisson23] = DF.loc[ind, 'Poisson I23']
+            OrthoArray[St7API.ipPlateOrthoPoisson31] = DF.loc[ind, 'Poisson I31']
+            OrthoArray[St7API.ipPlateOrthoDensity] = DF.loc[ind, 'Density']
+            OrthoArray[St7API.ipPlateOrthoAlpha1] = DF.loc[ind, 'Thermal Expansion A1']
+            OrthoArray[St7API.ipPlateOrthoAlpha2] = DF.loc[ind, 'Thermal Expansion A2']
+            OrthoArray[St7API.ipPlateOrthoAlpha3] = DF.loc[ind, 'Thermal Expansion A3']
+            OrthoArray[St7API.ipPlateOrthoViscosity] = DF.loc[ind, 'Viscous Damping']
+            OrthoArray[St7API.ipPlateOrthoDampingRatio] = DF.loc[ind, 'Damping Ratio']
+            OrthoArray[St7API.ipPlateOrthoConductivity1] = DF.loc[ind, 'Conductivity K1']
+            OrthoArray[St7API.ipPlateOrthoConductivity2] = DF.loc[ind, 'Conductivity K2']
+            OrthoArray[St7API.ipPlateOrthoSpecificHeat] = DF.loc[ind, 'Specific Heat']
+            St7API.St7SetPlateOrthotropicMaterial(1, propNum, OrthoArray)
     
-    DF2 = pd.DataFrame(StgNames)
-    DF2.to_csv(Foldername + 'Stage Names.csv', index=False, header=False)
+        if MaterialType == St7API.kMaterialTypeIsotropic:
+            IsoArray[St7API.ipPlateIsoModulus] = DF.loc[ind, 'Modulus']
+            IsoArray[St7API.ipPlateIsoPoisson] = DF.loc[ind, 'Poisson Ratio']
+            IsoArray[St7API.ipPlateIsoDensity] = DF.loc[ind, 'Density']
+            IsoArray[St7API.ipPlateIsoAlpha] = DF.loc[ind, 'Thermal Expansion']
+            IsoArray[St7API.ipPlateIsoViscosity] = DF.loc[ind, 'Viscous Damping']
+            IsoArray[St7API.ipPlateIsoDampingRatio] = DF.loc[ind, 'Damping Ratio']
+            IsoArray[St7API.ipPlateIsoConductivity] = DF.loc[ind, 'Conductivity']
+            IsoArray[St7API.ipPlateIsoSpecificHeat] = DF.loc[ind,'Specific Heat']
+            St7API.St7SetPlateIsotropicMaterial(1, propNum, IsoArray)
     
-    ret = St7API.St7CloseResultFile(1)
-    if ret == 0:
-        print('Result File closed')
-    ret = St7API.St7CloseFile(1)
-    if ret == 0:
-        print('Model File closed')
+        ThickArray[0] = DF.loc[ind, 'Membrane Thickness']
+        ThickArray[1] = DF.loc[ind, 'Membrane Bending']
+        St7API.St7SetPlateThickness(1, propNum, ThickArray)
+        St7API.St7SetElementProperty(1, St7API.tyPLATE, plateID, propNum)
+    
+    ret = St7API.St7SaveFileTo(1, fileOut_bt)
+    
+    # Saving the new model
 
+    if ret != 0:
+        St7API.St7CloseFile(1)
+        print('Cannot open file')
+        explain_error(ret)
+    
+    print('Plate properties assigned')
+    St7API.St7CloseFile(1)
+    
+    if solvebool == True:
+        # Open new model and solve and save
+        modelname = modelname_bt.decode()
+        Foldername = os.path.join(os.path.dirname(modelname), "")
+        Foldername_bt = Foldername.encode()
+        St7API.St7OpenFile(1, fileOut_bt, Foldername_bt)
+        set_warm_start(initialFile_bt, initialCase, saveRestart=saveRestart)
+        St7API.St7RunSolver(1, St7API.stNonlinearStaticSolver, St7API.smNormalCloseRun, St7API.btTrue)
+        St7API.St7SaveFile(1)
+        St7API.St7CloseFile(1)
+    
     return ret
 
-def export_ES_Inputs(modelname_bt, tempfolder_bt, resultfile_bt,
-                                 groupID, numPlates, minthickness, ResultAxis='Local',
-                                 ResultLocation='Centroid',
-                                 PlateSurf='Midplane'):
+def modify_beam_stiffnessTab(modelname_bt, tempfolder_bt, fileOut_bt, DF,
+                             groupID, numBeams):
     """
-    Extract Beam Force information for a combined result file
+    Modify Beam Stiffness Parameters
 
     Parameters
     ----------
@@ -1668,330 +1316,2846 @@ def export_ES_Inputs(modelname_bt, tempfolder_bt, resultfile_bt,
         Encoded Input Model file name
     tempfolder_bt : BYTE
         Encoded Temporary folder location
-    resultfile_bt : BYTE
-        Encoded Result file name
+    fileOut_bt : BYTE
+        Encoded Saved Model file name
+    DF : DATAFRAME
+        Pandas Dataframe with new beams parameters, columns name must match:
+        'SA1', 'SA2', 'Area', 'I11', 'I22', 'J', 'Mass'
     groupID : LIST
         List of integer of the groups to modify
-    numPlates : INTEGER
-        Total number of Plates
-    ResultAxis: STRING, optional
-        Define axis the data is extracted on Local or Global
-        DEFAULT is 'Local'.
-    ResultLocation: STRING, optional
-        Result sampling location
-        DEFAULT is 'Centroid'
-        Centroid, Gauss, NodeAverageSame, NodeAverageAll, NodeAverageSame
-    PlateSurf : STRING, optional
-        Plate Surface to extract data
-        DEFAULT is 'Midplane
-        Midplane, Zplus or Zminus
+    numBeams : INTEGER
+        Total number of Beams
+
+    Returns
+    -------
+    ret : INTEGER
+        Return code API
+
+    """
+
+    print('Start modifying stiffness parameters for %d beams' % numBeams)
+
+    # Opening Model
+    ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
+    if ret != 0:
+        print('Cannot open file')
+        explain_error(ret)
+
+    # Set API storage values
+    DblArray7 = ctypes.c_double * 7
+    BeamSecFactor = DblArray7()
+    GroupBeam = ctypes.c_long()
+    Beam_SectionFactors = ['SA1', 'SA2', 'Area', 'I11', 'I22', 'J', 'Mass']
+    
+    # Select Beams ID
+    BeamNum = []
+    for ind in range(1, numBeams + 1):
+    	St7API.St7GetElementGroup(1, St7API.tyBEAM, ind, GroupBeam)
+    	if GroupBeam.value in groupID:
+    		BeamNum.append(ind)
+    print('%d beams will be modified' % len(BeamNum))
+
+    if len(BeamNum) > len(DF):
+        print('Number of properties not matching number of beams')
+        St7API.St7CloseFile(1)
+        raise ValueError('Model has %d beams and the csv contains %d '
+                         'properties' % (len(BeamNum), len(DF)))
+    if len(DF) > len(BeamNum):
+        print('Number of properties not matching number of beams')
+        print('Model has %d plates and the csv contains %d properties'
+              % (len(BeamNum), len(DF)))
+        print('Only the first %d will be considered' % len(BeamNum))
+
+    # Modify Beams
+    for ind, beamPos in enumerate(BeamNum):
+        St7API.St7GetBeamSectionFactor7(1, beamPos, BeamSecFactor)
+        for colname in DF.columns:
+            BeamSecFactor[
+                Beam_SectionFactors.index(colname)] = DF.iloc[
+                    ind, list(DF.columns).index(colname)]
+        St7API.St7SetBeamSectionFactor7(1, beamPos, BeamSecFactor)
+    
+    # Saving Model in the new file
+    ret = St7API.St7SaveFileTo(1, fileOut_bt)
+    if ret != 0:
+        St7API.St7CloseFile(1)
+        print('Cannot open file')
+        explain_error(ret)
+    
+    St7API.St7CloseFile(1)
+    
+    print('Done')
+
+    return ret
+
+def export_beam_shearinputs(modelname_bt, tempfolder_bt, resultfile_bt,
+                          groupID, numBeams, ResultAxis='Local',
+                          elements=None):
+    """
+    Extract Beam Force information for a combined result file
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    resultfile_bt : BYTE
+        Encoded Result file name
+    groupID : LIST
+        List of integer of the groups to modify
+    numBeams : INTEGER
+        Total number of Beams
+    ResultAxis: STRING
+        DEFAULT is 'Local'.
+        Define axis the data is extracted on Local, Global, Principal
+    elements : ARRAY, optional
+        Element numbers of a region (St7Spatial queries), only the elements
+        both in the groups and in the region are exported
+        DEFAULT is None, every element of the groups
+
+    Returns
+    -------
+    ret : INTEGER
+        Return code API
+
+    """
+    print('Start extract beam results')
+
+    with St7Profiler.span('Open files'):
+        # Open Model
+        ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
+        if ret != 0:
+            print('Cannot open file')
+            explain_error(ret)
+        
+        modelname = modelname_bt.decode()
+        Foldername = os.path.join(os.path.dirname(modelname), "")
+    
+        # Open Result file
+        numPrimary = ctypes.c_long()
+        numSecondary = ctypes.c_long()
+        CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
+
+    
+        ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
+        	numPrimary, numSecondary)
+    
+        if ret != 0:
+            print('Not able to open result file')
+            St7API.St7CloseFile(1)
+            explain_error(ret)
+
+        print('%d primary case(s) found' % numPrimary.value)
+
+        CaseName_list = []
+        for ind in range(1, numPrimary.value + 1):
+            St7API.St7GetResultCaseName(1, ind, CaseName, St7API.kMaxStrLen)
+            CaseName_list.append(CaseName.value.decode())
+            print(CaseName.value.decode())
+
+    # Set API storage values
+    DblArrayRes = ctypes.c_double * 12
+    BeamRes = DblArrayRes()
+    numColumns = ctypes.c_long()
+    
+    BeamPropID = ctypes.c_long()
+    
+    DblArray = ctypes.c_double * St7API.kNumBeamSectionData
+    PropSectionData = DblArray()
+    PropIntegers = ctypes.c_long()
+    PropBeamMaterial = ctypes.c_double()
+    
+    # Select Beams ID
+    BeamNum = get_group_entities(St7API.tyBEAM, numBeams, groupID,
+                                 elements=elements)
+    print('%d beams will be extracted' % len(BeamNum))
+
+    # dictionnary matching axis to ResultSubType
+    subtype = {'Local': St7API.stBeamLocal,
+               'Principal': St7API.stBeamPrincipal,
+               'Global': St7API.stBeamGlobal}
+
+    # Get Cases data from model
+    for ind, casename in enumerate(CaseName_list):
+        print('Start extracting data for case number %d %s'
+              % (ind+1, casename))
+
+        # List to store data   
+        BeamId = []
+        BeamEnd = []
+        ShearForce1 = []
+        BendingMoment1 = []
+        ShearForce2 = []
+        BendingMoment2 = []
+        AxialForce = []
+        Torque = []
+        Depth = []
+    
+        with St7Profiler.span('Result query'):
+            for beamPos in BeamNum:
+                St7API.St7GetBeamResultEndPos(1, St7API.rtBeamForce,
+                                              subtype[ResultAxis.capitalize()],
+                                              int(beamPos), ind+1, numColumns, BeamRes)
+            
+                St7API.St7GetElementProperty(1, St7API.tyBEAM, int(beamPos), BeamPropID)
+            
+                St7API.St7GetBeamPropertyData(1, BeamPropID.value, PropIntegers, PropSectionData, PropBeamMaterial)
+            
+                for endpos in [1, 2]:
+                    # from Strand7 API user manual
+                    # Beam Results section page 1073
+                    indpos = (endpos - 1) * numColumns.value
+                    BeamId.append(beamPos)
+                    BeamEnd.append(endpos)
+                    ShearForce1.append(BeamRes[indpos + St7API.ipBeamSF1])
+                    BendingMoment1.append(BeamRes[indpos + St7API.ipBeamBM1])
+                    ShearForce2.append(BeamRes[indpos + St7API.ipBeamSF2])
+                    BendingMoment2.append(BeamRes[indpos + St7API.ipBeamBM2])
+                    AxialForce.append(BeamRes[indpos + St7API.ipBeamAxialF])
+                    Torque.append(BeamRes[indpos + St7API.ipBeamTorque])
+                    Depth.append(PropSectionData[St7API.ipD2])
+                
+        # Create a dataframe to store the output data
+        DF = pd.DataFrame(data={'BeamId': BeamId,
+                                'Depth (m)' : Depth,
+                                'Shear Force (MN)': ShearForce2,
+                                'Bending Moment (MN.m)': BendingMoment2,
+                                'Axial Force (MN)': AxialForce,
+                                },
+                          columns=['BeamId', 
+                                   'Depth (m)',
+                                   'Shear Force (MN)',
+                                   'Bending Moment (MN.m)',
+                                   'Axial Force (MN)'])
+                
+        stgname = casename.split("[")[1].split(']')[0]
+        x = re.search('Reset',stgname) 
+        
+        if x:
+            print('skipped reset stage')
+        else:
+            csvOutFile = Foldername + 'shearinput_' + stgname + '.csv'
+            print('Saved in csv file ' + csvOutFile)
+            with St7Profiler.span('Write output'):
+                DF.to_csv(csvOutFile, index=False)
+    
+    ret = St7API.St7CloseResultFile(1)
+    if ret == 0:
+        print('Result File closed')
+    ret = St7API.St7CloseFile(1)
+    if ret == 0:
+        print('Model File closed')
+
+    return ret
+
+def export_beam_shearinputs_mid(modelname_bt, tempfolder_bt, resultfile_bt,
+                          groupID, numBeams, ResultAxis='Local',
+                          elements=None):
+    """
+    Extract Beam Force information for a combined result file
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    resultfile_bt : BYTE
+        Encoded Result file name
+    groupID : LIST
+        List of integer of the groups to modify
+    numBeams : INTEGER
+        Total number of Beams
+    ResultAxis: STRING
+        DEFAULT is 'Local'.
+        Define axis the data is extracted on Local, Global, Principal
+    elements : ARRAY, optional
+        Element numbers of a region (St7Spatial queries), only the elements
+        both in the groups and in the region are exported
+        DEFAULT is None, every element of the groups
+
+    Returns
+    -------
+    ret : INTEGER
+        Return code API
+
+    """
+    print('Start extract beam results')
+
+    with St7Profiler.span('Open files'):
+        # Open Model
+        ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
+        if ret != 0:
+            print('Cannot open file')
+            explain_error(ret)
+        
+        modelname = modelname_bt.decode()
+        Foldername = os.path.join(os.path.dirname(modelname), "")
+    
+        # Open Result file
+        numPrimary = ctypes.c_long()
+        numSecondary = ctypes.c_long()
+        CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
+
+    
+        ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
+        	numPrimary, numSecondary)
+    
+        if ret != 0:
+            print('Not able to open result file')
+            St7API.St7CloseFile(1)
+            explain_error(ret)
+
+        print('%d primary case(s) found' % numPrimary.value)
+
+        CaseName_list = []
+        for ind in range(1, numPrimary.value + 1):
+            St7API.St7GetResultCaseName(1, ind, CaseName, St7API.kMaxStrLen)
+            CaseName_list.append(CaseName.value.decode())
+            print(CaseName.value.decode())
+
+    # Set API storage values
+    DblArrayRes = ctypes.c_double * 12
+    BeamRes = DblArrayRes()
+    ResView = np.ctypeslib.as_array(BeamRes)
+    numColumns = ctypes.c_long()
+    
+    # Select Beams ID
+    BeamNum = get_group_entities(St7API.tyBEAM, numBeams, groupID,
+                                 elements=elements)
+    print('%d beams will be extracted' % len(BeamNum))
+
+    # Section depth does not change between cases
+    Depth = get_beam_depths(modelname, BeamNum)
+
+    # dictionnary matching axis to ResultSubType
+    subtype = {'Local': St7API.stBeamLocal,
+               'Principal': St7API.stBeamPrincipal,
+               'Global': St7API.stBeamGlobal}
+
+    # End forces of every beam, shape (beams, end, column)
+    EndRes = np.zeros((len(BeamNum), 2, 6))
+
+    # Get Cases data from model
+    for ind, casename in enumerate(CaseName_list):
+        print('Start extracting data for case number %d %s'
+              % (ind+1, casename))
+
+        with St7Profiler.span('Result query'):
+            for beamInd, beamPos in enumerate(BeamNum):
+                St7API.St7GetBeamResultEndPos(1, St7API.rtBeamForce,
+                                              subtype[ResultAxis.capitalize()],
+                                              int(beamPos), ind+1, numColumns,
+                                              BeamRes)
+                # from Strand7 API user manual
+                # Beam Results section page 1073
+                # End 1 columns are followed by End 2 columns
+                EndRes[beamInd] = ResView[:2 * numColumns.value].reshape(
+                    2, numColumns.value)[:, :6]
+
+        # Mid-span approximated as the average of both ends
+        MidRes = EndRes.mean(axis=1)
+        BeamId = BeamNum
+        ShearForce2 = MidRes[:, St7API.ipBeamSF2]
+        BendingMoment2 = MidRes[:, St7API.ipBeamBM2]
+        AxialForce = MidRes[:, St7API.ipBeamAxialF]
+        
+        # Create a dataframe to store the output data
+        DF = pd.DataFrame(data={'BeamId': BeamId,
+                                'Depth (m)' : Depth,
+                                'Shear Force (MN)': ShearForce2,
+                                'Bending Moment (MN.m)': BendingMoment2,
+                                'Axial Force (MN)': AxialForce,
+                                },
+                          columns=['BeamId', 
+                                   'Depth (m)',
+                                   'Shear Force (MN)',
+                                   'Bending Moment (MN.m)',
+                                   'Axial Force (MN)'])
+                
+        stgname = casename.split("[")[1].split(']')[0]
+        x = re.search('Reset',stgname) 
+        
+        if x:
+            print('skipped reset stage')
+        else:
+            csvOutFile = Foldername + 'shearinput_' + stgname + '.csv'
+            print('Saved in csv file ' + csvOutFile)
+            with St7Profiler.span('Write output'):
+                DF.to_csv(csvOutFile, index=False)
+    
+    ret = St7API.St7CloseResultFile(1)
+    if ret == 0:
+        print('Result File closed')
+    ret = St7API.St7CloseFile(1)
+    if ret == 0:
+        print('Model File closed')
+
+    return ret
+    
+def export_beam_forceData(modelname_bt, tempfolder_bt, resultfile_bt,
+                          groupID, numBeams, ResultAxis='Local',
+                          elements=None):
+    """
+    Extract Beam Force information for a combined result file
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    resultfile_bt : BYTE
+        Encoded Result file name
+    groupID : LIST
+        List of integer of the groups to modify
+    numBeams : INTEGER
+        Total number of Beams
+    ResultAxis: STRING
+        DEFAULT is 'Local'.
+        Define axis the data is extracted on Local, Global, Principal
+    elements : ARRAY, optional
+        Element numbers of a region (St7Spatial queries), only the elements
+        both in the groups and in the region are exported
+        DEFAULT is None, every element of the groups
+
+    Returns
+    -------
+    ret : INTEGER
+        Return code API
+
+    """
+    print('Start extract beam results')
+
+    with St7Profiler.span('Open files'):
+        # Open Model
+        ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
+        if ret != 0:
+            print('Cannot open file')
+            explain_error(ret)
+        
+        modelname = modelname_bt.decode()
+        Foldername = os.path.join(os.path.dirname(modelname), "")
+    
+        # Open Result file
+        numPrimary = ctypes.c_long()
+        numSecondary = ctypes.c_long()
+        CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
+
+    
+        ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
+        	numPrimary, numSecondary)
+    
+        if ret != 0:
+            print('Not able to open result file')
+            St7API.St7CloseFile(1)
+            explain_error(ret)
+
+        print('%d primary case(s) found' % numPrimary.value)
+
+        CaseName_list = []
+        for ind in range(1, numPrimary.value + 1):
+            St7API.St7GetResultCaseName(1, ind, CaseName, St7API.kMaxStrLen)
+            CaseName_list.append(CaseName.value.decode())
+            print(CaseName.value.decode())
+
+    # Set API storage values
+    DblArrayRes = ctypes.c_double * 12
+    BeamRes = DblArrayRes()
+    numColumns = ctypes.c_long()
+    
+    # Select Beams ID
+    BeamNum = get_group_entities(St7API.tyBEAM, numBeams, groupID,
+                                 elements=elements)
+    print('%d beams will be extracted' % len(BeamNum))
+
+    # dictionnary matching axis to ResultSubType
+    subtype = {'Local': St7API.stBeamLocal,
+               'Principal': St7API.stBeamPrincipal,
+               'Global': St7API.stBeamGlobal}
+
+    # Get Cases data from model
+    for ind, casename in enumerate(CaseName_list):
+        print('Start extracting data for case number %d %s'
+              % (ind+1, casename))
+
+        # List to store data   
+        BeamId = []
+        BeamEnd = []
+        ShearForce1 = []
+        BendingMoment1 = []
+        ShearForce2 = []
+        BendingMoment2 = []
+        AxialForce = []
+        Torque = []
+    
+        with St7Profiler.span('Result query'):
+            for beamPos in BeamNum:
+                St7API.St7GetBeamResultEndPos(1, St7API.rtBeamForce,
+                                              subtype[ResultAxis.capitalize()],
+                                              int(beamPos), ind+1, numColumns, BeamRes)
+                for endpos in [1, 2]:
+                    # from Strand7 API user manual
+                    # Beam Results section page 1073
+                    indpos = (endpos - 1) * numColumns.value
+                    BeamId.append(beamPos)
+                    BeamEnd.append(endpos)
+                    ShearForce1.append(BeamRes[indpos + St7API.ipBeamSF1])
+                    BendingMoment1.append(BeamRes[indpos + St7API.ipBeamBM1])
+                    ShearForce2.append(BeamRes[indpos + St7API.ipBeamSF2])
+                    BendingMoment2.append(BeamRes[indpos + St7API.ipBeamBM2])
+                    AxialForce.append(BeamRes[indpos + St7API.ipBeamAxialF])
+                    Torque.append(BeamRes[indpos + St7API.ipBeamTorque])
+        
+        # Create a dataframe to store the output data
+        DF = pd.DataFrame(data={'BeamId': BeamId,
+                                'End': BeamEnd,
+                                'Shear Force 1 (MN)': ShearForce1,
+                                'Bending Moment 1 (MN.m)': BendingMoment1,
+                                'Shear Force 2 (MN)': ShearForce2,
+                                'Bending Moment 2 (MN.m)': BendingMoment2,
+                                'Axial Force (MN)': AxialForce,
+                                'Torque (MN.m)': Torque
+                                },
+                          columns=['BeamId','End', 'Shear Force 1 (MN)',
+                                   'Bending Moment 1 (MN.m)',
+                                   'Shear Force 2 (MN)',
+                                   'Bending Moment 2 (MN.m)',
+                                   'Axial Force (MN)', 'Torque (MN.m)'])
+                
+        stgname = casename.split("[")[1].split(']')[0]
+        x = re.search('Reset',stgname) 
+        
+        if x:
+            print('skipped reset stage')
+        else:
+            csvOutFile = Foldername + 'beamresults_' + stgname + '.csv'
+            print('Saved in csv file ' + csvOutFile)
+            with St7Profiler.span('Write output'):
+                DF.to_csv(csvOutFile, index=False)
+    
+    ret = St7API.St7CloseResultFile(1)
+    if ret == 0:
+        print('Result File closed')
+    ret = St7API.St7CloseFile(1)
+    if ret == 0:
+        print('Model File closed')
+
+    return ret
+
+def export_beam_stations(modelname_bt, tempfolder_bt, resultfile_bt, groupID,
+                         numBeams, ResultAxis='Local', minStations=5,
+                         fractions=None, cases=None, OutputFormat='npz',
+                         elements=None):
+    """
+    Extract Beam Forces at stations along the member length
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    resultfile_bt : BYTE
+        Encoded Result file name
+    groupID : LIST
+        List of integer of the groups to extract
+    numBeams : INTEGER
+        Total number of Beams
+    ResultAxis: STRING, optional
+        DEFAULT is 'Local'.
+        Define axis the data is extracted on Local, Global, Principal
+    minStations : INTEGER, optional
+        Minimum number of stations along each beam, the solver adds stations
+        at point loads and distributed load changes
+        DEFAULT is 5
+    fractions : LIST, optional
+        Sample at these fractions of the beam length instead
+        (St7GetBeamResultArrayPos), e.g. [0, 0.5, 1]
+        DEFAULT is None
+    cases : LIST, optional
+        Case numbers (1-based) or case names to extract
+        DEFAULT is None, all cases except Reset stages
+    OutputFormat : STRING, optional
+        DEFAULT is 'npz', one file per case
+        csv - one file per case, one row per station
+        none - nothing written
+    elements : ARRAY, optional
+        Element numbers of a region (St7Spatial queries), only the elements
+        both in the groups and in the region are exported
+        DEFAULT is None, every element of the groups
+
+    Returns
+    -------
+    Stations : DICT
+        For each case number, a tuple (StationPos, StationRes, offsets)
+        StationPos : positions along the beam of shape (stations,)
+        StationRes : results of shape (stations, columns)
+        offsets : ragged index, stations of beam i are offsets[i] to
+        offsets[i+1]
+    BeamNum : ARRAY
+        Beam numbers
+    BeamLength : ARRAY
+        Beam lengths
+
+    """
+
+    print('Start extract beam station results')
+
+    CaseName_list = open_model_results(modelname_bt, tempfolder_bt,
+                                       resultfile_bt)
+    modelname = modelname_bt.decode()
+    Foldername = os.path.dirname(modelname)
+
+    # dictionnary matching axis to ResultSubType
+    subtype = {'Local': St7API.stBeamLocal,
+               'Principal': St7API.stBeamPrincipal,
+               'Global': St7API.stBeamGlobal}
+
+    if subtype[ResultAxis.capitalize()] == St7API.stBeamGlobal:
+        columns = ['FX (MN)', 'MX (MN.m)', 'FY (MN)', 'MY (MN.m)',
+                   'FZ (MN)', 'MZ (MN.m)']
+    else:
+        columns = ['Shear Force 1 (MN)', 'Bending Moment 1 (MN.m)',
+                   'Shear Force 2 (MN)', 'Bending Moment 2 (MN.m)',
+                   'Axial Force (MN)', 'Torque (MN.m)']
+
+    BeamNum = get_group_entities(St7API.tyBEAM, numBeams, groupID,
+                                 elements=elements)
+    print('%d beams will be extracted' % len(BeamNum))
+
+    caseNums = select_cases(CaseName_list, cases)
+
+    # Beam lengths, used to place fractional stations
+    BeamLength = np.zeros(len(BeamNum))
+    Length = ctypes.c_double()
+    for ind, beamPos in enumerate(BeamNum):
+        St7API.St7GetElementData(1, St7API.tyBEAM, int(beamPos), Length)
+        BeamLength[ind] = Length.value
+
+    # Set API storage values, one pair of buffers for every call
+    DblArrayRes = ctypes.c_double * St7API.kMaxBeamResult
+    BeamPos = DblArrayRes()
+    BeamRes = DblArrayRes()
+    PosView = np.ctypeslib.as_array(BeamPos)
+    ResView = np.ctypeslib.as_array(BeamRes)
+    numStations = ctypes.c_long()
+    numColumns = ctypes.c_long()
+
+    if fractions is not None:
+        fractions = np.clip(np.asarray(fractions, dtype=float), 0.0, 1.0)
+
+    Stations = {}
+    for caseNum in caseNums:
+        casename = CaseName_list[caseNum - 1]
+        print('Start extracting data for case number %d %s'
+              % (caseNum, casename))
+
+        counts = np.zeros(len(BeamNum), dtype=np.int64)
+        PosList = []
+        ResList = []
+
+        with collect_errors() as errors:
+            for ind, beamPos in enumerate(BeamNum):
+                if fractions is None:
+                    ret = St7API.St7GetBeamResultArray(
+                        1, St7API.rtBeamForce,
+                        subtype[ResultAxis.capitalize()],
+                        int(beamPos), minStations, caseNum, numStations,
+                        numColumns, BeamPos, BeamRes)
+                else:
+                    PosView[:len(fractions)] = fractions * BeamLength[ind]
+                    numStations.value = len(fractions)
+                    ret = St7API.St7GetBeamResultArrayPos(
+                        1, St7API.rtBeamForce,
+                        subtype[ResultAxis.capitalize()],
+                        int(beamPos), caseNum, len(fractions), BeamPos,
+                        numColumns, BeamRes)
+
+                if ret != 0:
+                    continue
+
+                nSta = numStations.value
+                nCol = numColumns.value
+                PosList.append(PosView[:nSta].copy())
+                ResList.append(
+                    ResView[:nSta * nCol].reshape(nSta, nCol)[:, :6].copy())
+                counts[ind] = nSta
+
+        if errors:
+            print('%d beams failed: %s' % (len(errors), errors[0]))
+
+        offsets = np.zeros(len(BeamNum) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        if PosList:
+            StationPos = np.concatenate(PosList)
+            StationRes = np.concatenate(ResList)
+        else:
+            StationPos = np.zeros(0)
+            StationRes = np.zeros((0, len(columns)))
+        Stations[caseNum] = (StationPos, StationRes, offsets)
+
+        stgname = get_stage_name(casename)
+        fileStem = os.path.join(Foldername, 'beamstations_' + stgname)
+        if OutputFormat.lower() == 'csv':
+            DF = pd.DataFrame(StationRes, columns=columns)
+            DF.insert(0, 'Position (m)', StationPos)
+            DF.insert(0, 'BeamId', np.repeat(BeamNum, counts))
+            save_results(fileStem, 'csv', DF)
+        else:
+            save_results(fileStem, OutputFormat, BeamNum=BeamNum,
+                         BeamLength=BeamLength, StationPos=StationPos,
+                         StationRes=StationRes, offsets=offsets,
+                         columns=np.array(columns))
+
+    close_model_results()
+
+    return Stations, BeamNum, BeamLength
+
+def beam_station_extremes(StationRes, offsets):
+    """
+    Maximum and minimum of each result column along every beam
+
+    Parameters
+    ----------
+    StationRes : ARRAY
+        Station results of shape (stations, columns)
+    offsets : ARRAY
+        Ragged index from export_beam_stations
+
+    Returns
+    -------
+    Max : ARRAY
+        Largest value along each beam, shape (beams, columns)
+    Min : ARRAY
+        Smallest value along each beam, shape (beams, columns)
+        Beams without stations are NaN
+
+    """
+
+    counts = np.diff(offsets)
+    Max = np.full((len(counts), StationRes.shape[1]), np.nan)
+    Min = np.full((len(counts), StationRes.shape[1]), np.nan)
+
+    # Empty beams are zero length segments, so reducing over the starts of the
+    # non empty beams only covers each beam's own stations
+    nonEmpty = counts > 0
+    starts = offsets[:-1][nonEmpty]
+    if len(starts):
+        Max[nonEmpty] = np.fmax.reduceat(StationRes, starts, axis=0)
+        Min[nonEmpty] = np.fmin.reduceat(StationRes, starts, axis=0)
+
+    return Max, Min
+
+def beam_value_at_fraction(StationPos, StationRes, offsets, BeamLength,
+                           fraction):
+    """
+    Results at a fraction of the length of every beam, interpolated linearly
+    between the two neighbouring stations
+
+    Parameters
+    ----------
+    StationPos : ARRAY
+        Station positions of shape (stations,)
+    StationRes : ARRAY
+        Station results of shape (stations, columns)
+    offsets : ARRAY
+        Ragged index from export_beam_stations
+    BeamLength : ARRAY
+        Length of each beam
+    fraction : FLOAT or ARRAY
+        Fraction of the length, 0 is end 1 and 1 is end 2,
+        one value or one value per beam
+
+    Returns
+    -------
+    Values : ARRAY
+        Results of shape (beams, columns), NaN for beams with less than
+        two stations
+
+    """
+
+    counts = np.diff(offsets)
+    numBeams = len(counts)
+    Values = np.full((numBeams, StationRes.shape[1]), np.nan)
+
+    # Key increasing through the whole ragged array: beam index plus the
+    # station position normalised to [0, 1]
+    beamIndex = np.repeat(np.arange(numBeams), counts)
+    length = BeamLength[beamIndex]
+    normPos = np.divide(StationPos, length, out=np.zeros_like(StationPos),
+                        where=length > 0)
+    key = 2.0 * beamIndex + normPos
+
+    valid = counts >= 2
+    fraction = np.broadcast_to(np.clip(np.asarray(fraction, dtype=float),
+                                       0.0, 1.0), (numBeams,))
+    target = 2.0 * np.arange(numBeams)[valid] + fraction[valid]
+
+    hi = np.searchsorted(key, target, side='left')
+    hi = np.clip(hi, offsets[:-1][valid] + 1, offsets[1:][valid] - 1)
+    lo = hi - 1
+
+    span = key[hi] - key[lo]
+    weight = np.divide(target - key[lo], span, out=np.zeros_like(span),
+                       where=span > 0)
+    Values[valid] = (StationRes[lo]
+                     + weight[:, None] * (StationRes[hi] - StationRes[lo]))
+
+    return Values
+
+def export_shearinputs(modelname_bt, tempfolder_bt, resultfile_bt,
+                                 groupID, numPlates, minthickness, ResultAxis='Local',
+                                 ResultLocation='Centroid',
+                                 PlateSurf='Midplane', saveCSV=True,
+                                 returnInputs=False, elements=None):
+    """
+    Extract Beam Force information for a combined result file
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    resultfile_bt : BYTE
+        Encoded Result file name
+    groupID : LIST
+        List of integer of the groups to modify
+    numPlates : INTEGER
+        Total number of Plates
+    ResultAxis: STRING, optional
+        Define axis the data is extracted on Local or Global
+        DEFAULT is 'Local'.
+    ResultLocation: STRING, optional
+        Result sampling location
+        DEFAULT is 'Centroid'
+        Centroid, Gauss, NodeAverageSame, NodeAverageAll, NodeAverageSame
+    PlateSurf : STRING, optional
+        Plate Surface to extract data
+        DEFAULT is 'Midplane
+        Midplane, Zplus or Zminus
+    saveCSV : BOOLEAN, optional
+        Write the shearinputs_<stage>.csv files
+        DEFAULT is True
+    returnInputs : BOOLEAN, optional
+        Return the extracted tables instead of the API return code, to pass
+        to DesignToolbox.design_stages
+        DEFAULT is False
+    elements : ARRAY, optional
+        Element numbers of a region (St7Spatial queries), only the elements
+        both in the groups and in the region are exported
+        DEFAULT is None, every element of the groups
+
+    Returns
+    -------
+    ret : INTEGER
+        Return code API
+    Inputs : DICT
+        If returnInputs, DataFrame of each stage keyed by stage name
+
+    """
+    
+    print('Start extract plate results')
+
+    with St7Profiler.span('Open files'):
+        # Open Model
+        ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
+        if ret != 0:
+            print('Cannot open file')
+            explain_error(ret)
+
+        modelname = modelname_bt.decode()
+        Foldername = os.path.join(os.path.dirname(modelname), "")
+    
+        # Open Result file
+        numPrimary = ctypes.c_long()
+        numSecondary = ctypes.c_long()
+        CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
+    
+        ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
+        	numPrimary, numSecondary)
+    
+        if ret != 0:
+            print('Not able to open result file')
+            St7API.St7CloseFile(1)
+            explain_error(ret)
+
+        print('%d primary case(s) found' % numPrimary.value)
+
+        CaseName_list = []
+        for ind in range(1, numPrimary.value + 1):
+            St7API.St7GetResultCaseName(1, ind, CaseName, St7API.kMaxStrLen)
+            CaseName_list.append(CaseName.value.decode())
+            print(CaseName.value.decode())
+
+    # Select Plates ID
+    PlateNum = get_group_entities(St7API.tyPLATE, numPlates, groupID,
+                                  elements)
+    print('%d plates will be extracted' % len(PlateNum))
+
+    # Plates thicker than minthickness and their sampling points
+    PropertyID, Thickness, Area = get_plate_data(PlateNum)
+    keep = Thickness[:, 0] > minthickness
+    PlateNum = PlateNum[keep]
+    PropertyID = PropertyID[keep]
+    Thickness = Thickness[keep, 0]
+    Area = Area[keep]
+    numPoints, offsets = get_sampling_points(St7API.tyPLATE, PlateNum,
+                                             ResultLocation)
+
+    # dictionnary for options
+    subtype = {'Local': St7API.stPlateLocal,
+               'Global': St7API.stPlateGlobal}
+    
+    StgNames = []
+    Inputs = {}
+        
+    for ind, casename in enumerate(CaseName_list):
+        print('Start extracting data for case number %d %s' % (ind, casename))
+
+        ForceRes, elemIndex = sample_plate_rows(
+            PlateNum, ind+1, St7API.rtPlateForce,
+            subtype[ResultAxis.capitalize()], numPoints, ResultLocation,
+            PlateSurf)
+        MomentRes, elemIndex = sample_plate_rows(
+            PlateNum, ind+1, St7API.rtPlateMoment,
+            subtype[ResultAxis.capitalize()], numPoints, ResultLocation,
+            PlateSurf)
+        StressRes, elemIndex = sample_plate_rows(
+            PlateNum, ind+1, St7API.rtPlateStress,
+            subtype[ResultAxis.capitalize()], numPoints, ResultLocation,
+            PlateSurf)
+        # Principal axis angle
+        CombinedRes, elemIndex = sample_plate_rows(
+            PlateNum, ind+1, St7API.rtPlateStress, St7API.stPlateCombined,
+            numPoints, ResultLocation, PlateSurf)
+
+        # Create a dataframe to store the output data, one row per sampling
+        # point
+        if subtype[ResultAxis.capitalize()] == St7API.stPlateLocal:
+            DF = pd.DataFrame(data={'PlateId': PlateNum[elemIndex],
+                                    'Plate Thickness (m)': Thickness[elemIndex],
+                                    'Force (xx) (MN/m)': ForceRes[:, St7API.ipPlateLocalxx],
+                                    'Force (yy) (MN/m)': ForceRes[:, St7API.ipPlateLocalyy],
+                                    'Force (xy) (MN/m)': ForceRes[:, St7API.ipPlateLocalxy],
+                                    'Force (xz) (MN/m)': ForceRes[:, St7API.ipPlateLocalxz],
+                                    'Force (yz) (MN/m)': ForceRes[:, St7API.ipPlateLocalyz],
+                                    'Moment (xx) (MN.m/m)': MomentRes[:, St7API.ipPlateLocalxx],
+                                    'Moment (yy) (MN.m/m)': MomentRes[:, St7API.ipPlateLocalyy],
+                                    'Moment (xy) (MN.m/m)': MomentRes[:, St7API.ipPlateLocalxy],
+                                    'Stress (xx) (MPa)': StressRes[:, St7API.ipPlateLocalxx],
+                                    'Stress (yy) (MPa)': StressRes[:, St7API.ipPlateLocalyy],
+                                    'Stress (xy) (MPa)': StressRes[:, St7API.ipPlateLocalxy],
+                                    'Angle 11-xx (°)': CombinedRes[:, St7API.ipPlateCombPrincipalAngle]},
+                columns=['PlateId', 'Plate Thickness (m)', 'Force (xx) (MN/m)', 'Force (yy) (MN/m)',
+                         'Force (xy) (MN/m)', 'Force (xz) (MN/m)',
+                         'Force (yz) (MN/m)', 'Moment (xx) (MN.m/m)',
+                         'Moment (yy) (MN.m/m)', 'Moment (xy) (MN.m/m)',
+                         'Stress (xx) (MPa)', 'Stress (yy) (MPa)', 'Stress (xy) (MPa)', 'Angle 11-xx (°)'])
+
+        
+        stgname = casename.replace(' ', '').replace(':', '_').replace('Increment[', '').replace(']','')
+        stage = stgname
+        stgname = 'shearinputs_' + stgname
+        
+        x = re.search('Reset',stgname) 
+        
+        if (x):
+            print('skipped reset stage')
+        else:
+            Inputs[stage] = DF
+            if saveCSV:
+                csvOutFile = Foldername + stgname + '.csv'
+                print('Saved in csv file ' + csvOutFile)
+                with St7Profiler.span('Write output'):
+                    DF.to_csv(csvOutFile, index=False)
+            
+            StgNames.append(stgname+'.csv')
+    
+    ret = St7API.St7CloseResultFile(1)
+    if ret == 0:
+        print('Result File closed')
+    ret = St7API.St7CloseFile(1)
+    if ret == 0:
+        print('Model File closed')
+
+    if returnInputs:
+        return Inputs
+
+    return ret
+
+def export_cwinputs(modelname_bt, tempfolder_bt, resultfile_bt,
+                                 groupID, numPlates, minthickness, ResultAxis='Local',
+                                 ResultLocation='Centroid', elements=None):
+    """
+    Extract Beam Force information for a combined result file
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    resultfile_bt : BYTE
+        Encoded Result file name
+    groupID : LIST
+        List of integer of the groups to modify
+    numPlates : INTEGER
+        Total number of Plates
+    ResultAxis: STRING, optional
+        Define axis the data is extracted on Local or Global
+        DEFAULT is 'Local'.
+    ResultLocation: STRING, optional
+        Result sampling location
+        DEFAULT is 'Centroid'
+        Centroid, Gauss, NodeAverageSame, NodeAverageAll, NodeAverageSame
+    PlateSurf : STRING, optional
+        Plate Surface to extract data
+        DEFAULT is 'Midplane
+        Midplane, Zplus or Zminus
+    elements : ARRAY, optional
+        Element numbers of a region (St7Spatial queries), only the elements
+        both in the groups and in the region are exported
+        DEFAULT is None, every element of the groups
+
+    Returns
+    -------
+    ret : INTEGER
+        Return code API
+
+    """
+    
+    print('Start extract plate results')
+
+    with St7Profiler.span('Open files'):
+        # Open Model
+        ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
+        if ret != 0:
+            print('Cannot open file')
+            explain_error(ret)
+
+        modelname = modelname_bt.decode()
+        Foldername = os.path.join(os.path.dirname(modelname), "")
+    
+        # Open Result file
+        numPrimary = ctypes.c_long()
+        numSecondary = ctypes.c_long()
+        CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
+    
+        ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
+        	numPrimary, numSecondary)
+    
+        if ret != 0:
+            print('Not able to open result file')
+            St7API.St7CloseFile(1)
+            explain_error(ret)
+
+        print('%d primary case(s) found' % numPrimary.value)
+
+        CaseName_list = []
+        for ind in range(1, numPrimary.value + 1):
+            St7API.St7GetResultCaseName(1, ind, CaseName, St7API.kMaxStrLen)
+            CaseName_list.append(CaseName.value.decode())
+            print(CaseName.value.decode())
+
+    # Select Plates ID
+    PlateNum = get_group_entities(St7API.tyPLATE, numPlates, groupID,
+                                  elements)
+    print('%d plates will be extracted' % len(PlateNum))
+
+    # Plates thicker than minthickness and their sampling points
+    PropertyID, Thickness, Area = get_plate_data(PlateNum)
+    keep = Thickness[:, 0] > minthickness
+    PlateNum = PlateNum[keep]
+    PropertyID = PropertyID[keep]
+    Thickness = Thickness[keep, 0]
+    Area = Area[keep]
+    numPoints, offsets = get_sampling_points(St7API.tyPLATE, PlateNum,
+                                             ResultLocation)
+
+    # dictionnary for options
+    subtype = {'Local': St7API.stPlateLocal,
+               'Global': St7API.stPlateGlobal}
+    
+    StgNames = []
+        
+    for ind, casename in enumerate(CaseName_list):
+        print('Start extracting data for case number %d %s' % (ind, casename))
+
+        # Principal stresses and axis angle on the three surfaces
+        CombinedResZn, elemIndex = sample_plate_rows(
+            PlateNum, ind+1, St7API.rtPlateStress, St7API.stPlateCombined,
+            numPoints, ResultLocation, 'Zminus')
+        CombinedRes, elemIndex = sample_plate_rows(
+            PlateNum, ind+1, St7API.rtPlateStress, St7API.stPlateCombined,
+            numPoints, ResultLocation, 'Midplane')
+        CombinedResZ, elemIndex = sample_plate_rows(
+            PlateNum, ind+1, St7API.rtPlateStress, St7API.stPlateCombined,
+            numPoints, ResultLocation, 'Zplus')
+
+        r1 = CombinedResZn[:, St7API.ipPlateCombPrincipal11]
+        r2 = CombinedResZn[:, St7API.ipPlateCombPrincipal22]
+        r3 = CombinedResZn[:, St7API.ipPlateCombPrincipalAngle]
+        r4 = CombinedRes[:, St7API.ipPlateCombPrincipal11]
+        r5 = CombinedRes[:, St7API.ipPlateCombPrincipal22]
+        r6 = CombinedRes[:, St7API.ipPlateCombPrincipalAngle]
+        r7 = CombinedResZ[:, St7API.ipPlateCombPrincipal11]
+        r8 = CombinedResZ[:, St7API.ipPlateCombPrincipal22]
+        r9 = CombinedResZ[:, St7API.ipPlateCombPrincipalAngle]
+
+        # Create a dataframe to store the output data, one row per sampling
+        # point
+        if subtype[ResultAxis.capitalize()] == St7API.stPlateLocal:
+            DF = pd.DataFrame(data=({'PlateId' : PlateNum[elemIndex], 's11(z-)' : r1, 's22(z-)' : r2, 'angle11-xx(z-)' : r3,
+                                     's11(mid)' : r4, 's22(mid)' : r5, 'angle11-xx(mid)' : r6,
+                                     's11(z+)' : r7, 's22(z+)' : r8, 'angle11-xx(z+)' : r9}),
+                              columns=['PlateId','s11(z-)','s22(z-)','angle11-xx(z-)', 
+                                       's11(mid)','s22(mid)','angle11-xx(mid)',
+                                       's11(z+)','s22(z+)','angle11-xx(z+)'])
+
+        stgname = casename.replace(' ', '').replace(':', '_').replace('Increment[', '').replace(']','')
+        stgname = 'cwinputs_' + stgname
+        
+        x = re.search('Reset',stgname) 
+        
+        if (x):
+            print('skipped reset stage')
+        else:
+            csvOutFile = Foldername + stgname + '.csv'
+            print('Saved in csv file ' + csvOutFile)
+            with St7Profiler.span('Write output'):
+                DF.to_csv(csvOutFile, index=False)
+            
+            StgNames.append(stgname+'.csv')
+    
+    ret = St7API.St7CloseResultFile(1)
+    if ret == 0:
+        print('Result File closed')
+    ret = St7API.St7CloseFile(1)
+    if ret == 0:
+        print('Model File closed')
+
+    return ret
+
+
+def export_plate_forceMomentData(modelname_bt, tempfolder_bt, resultfile_bt,
+                                 groupID, numPlates, minthickness, ResultAxis='Local',
+                                 ResultLocation='Centroid',
+                                 PlateSurf='Midplane', elements=None):
+    """
+    Extract Beam Force information for a combined result file
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    resultfile_bt : BYTE
+        Encoded Result file name
+    groupID : LIST
+        List of integer of the groups to modify
+    numPlates : INTEGER
+        Total number of Plates
+    ResultAxis: STRING, optional
+        Define axis the data is extracted on Local or Global
+        DEFAULT is 'Local'.
+    ResultLocation: STRING, optional
+        Result sampling location
+        DEFAULT is 'Centroid'
+        Centroid, Gauss, NodeAverageSame, NodeAverageAll, NodeAverageSame
+    PlateSurf : STRING, optional
+        Plate Surface to extract data
+        DEFAULT is 'Midplane
+        Midplane, Zplus or Zminus
+    elements : ARRAY, optional
+        Element numbers of a region (St7Spatial queries), only the elements
+        both in the groups and in the region are exported
+        DEFAULT is None, every element of the groups
+
+    Returns
+    -------
+    ret : INTEGER
+        Return code API
+
+    """
+    
+    print('Start extract plate results')
+
+    with St7Profiler.span('Open files'):
+        # Open Model
+        ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
+        if ret != 0:
+            print('Cannot open file')
+            explain_error(ret)
+
+        modelname = modelname_bt.decode()
+        Foldername = os.path.join(os.path.dirname(modelname), "")
+    
+        # Open Result file
+        numPrimary = ctypes.c_long()
+        numSecondary = ctypes.c_long()
+        CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
+    
+        ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
+        	numPrimary, numSecondary)
+    
+        if ret != 0:
+            print('Not able to open result file')
+            St7API.St7CloseFile(1)
+            explain_error(ret)
+
+        print('%d primary case(s) found' % numPrimary.value)
+
+        CaseName_list = []
+        for ind in range(1, numPrimary.value + 1):
+            St7API.St7GetResultCaseName(1, ind, CaseName, St7API.kMaxStrLen)
+            CaseName_list.append(CaseName.value.decode())
+            print(CaseName.value.decode())
+
+    # Select Plates ID
+    PlateNum = get_group_entities(St7API.tyPLATE, numPlates, groupID,
+                                  elements)
+    print('%d plates will be extracted' % len(PlateNum))
+
+    # Plates thicker than minthickness and their sampling points
+    PropertyID, Thickness, Area = get_plate_data(PlateNum)
+    keep = Thickness[:, 0] > minthickness
+    PlateNum = PlateNum[keep]
+    PropertyID = PropertyID[keep]
+    Thickness = Thickness[keep, 0]
+    Area = Area[keep]
+    numPoints, offsets = get_sampling_points(St7API.tyPLATE, PlateNum,
+                                             ResultLocation)
+
+    # dictionnary for options
+    subtype = {'Local': St7API.stPlateLocal,
+               'Global': St7API.stPlateGlobal}
+    
+    StgNames = []
+
+    for ind, casename in enumerate(CaseName_list):
+        print('Start extracting data for case number %d %s' % (ind, casename))
+
+        ForceRes, elemIndex = sample_plate_rows(
+            PlateNum, ind+1, St7API.rtPlateForce,
+            subtype[ResultAxis.capitalize()], numPoints, ResultLocation,
+            PlateSurf)
+        MomentRes, elemIndex = sample_plate_rows(
+            PlateNum, ind+1, St7API.rtPlateMoment,
+            subtype[ResultAxis.capitalize()], numPoints, ResultLocation,
+            PlateSurf)
+        
+        # Create a dataframe to store the output data, one row per sampling
+        # point
+        if subtype[ResultAxis.capitalize()] == St7API.stPlateLocal:
+            DF = pd.DataFrame(data={'PlateId': PlateNum[elemIndex],
+                                    'Plate Thickness (m)': Thickness[elemIndex],
+                                    'Force (xx) (MN/m)': ForceRes[:, St7API.ipPlateLocalxx],
+                                    'Force (yy) (MN/m)': ForceRes[:, St7API.ipPlateLocalyy],
+                                    'Force (xy) (MN/m)': ForceRes[:, St7API.ipPlateLocalxy],
+                                    'Force (xz) (MN/m)': ForceRes[:, St7API.ipPlateLocalxz],
+                                    'Force (yz) (MN/m)': ForceRes[:, St7API.ipPlateLocalyz],
+                                    'Moment (xx) (MN.m/m)': MomentRes[:, St7API.ipPlateLocalxx],
+                                    'Moment (yy) (MN.m/m)': MomentRes[:, St7API.ipPlateLocalyy],
+                                    'Moment (xy) (MN.m/m)': MomentRes[:, St7API.ipPlateLocalxy],
+                                    'Plate Area (m2)': Area[elemIndex],
+                                    'Property ID' : PropertyID[elemIndex]
+                                    },
+                columns=['PlateId', 'Plate Thickness (m)', 'Force (xx) (MN/m)', 'Force (yy) (MN/m)',
+                         'Force (xy) (MN/m)', 'Force (xz) (MN/m)',
+                         'Force (yz) (MN/m)', 'Moment (xx) (MN.m/m)',
+                         'Moment (yy) (MN.m/m)', 'Moment (xy) (MN.m/m)', 'Plate Area (m2)', 'Property ID'])
+        
+        elif subtype[ResultAxis.capitalize()] == St7API.stPlateGlobal:
+            DF = pd.DataFrame(data={'PlateId': PlateNum[elemIndex],
+                                    'Force (XX) (MN/m)': ForceRes[:, St7API.ipPlateGlobalXX],
+                                    'Force (YY) (MN/m)': ForceRes[:, St7API.ipPlateGlobalYY],
+                                    'Force (ZZ) (MN/m)': ForceRes[:, St7API.ipPlateGlobalZZ],
+                                    'Force (XY) (MN/m)': ForceRes[:, St7API.ipPlateGlobalXY],
+                                    'Force (YZ) (MN/m)': ForceRes[:, St7API.ipPlateGlobalYZ],
+                                    'Force (ZX) (MN/m)': ForceRes[:, St7API.ipPlateGlobalZX],
+                                    'Moment (XX) (MN.m/m)': MomentRes[:, St7API.ipPlateGlobalXX],
+                                    'Moment (YY) (MN.m/m)': MomentRes[:, St7API.ipPlateGlobalYY],
+                                    'Moment (ZZ) (MN.m/m)': MomentRes[:, St7API.ipPlateGlobalZZ],
+                                    'Moment (XY) (MN.m/m)': MomentRes[:, St7API.ipPlateGlobalXY],
+                                    'Moment (YZ) (MN.m/m)': MomentRes[:, St7API.ipPlateGlobalYZ],
+                                    'Moment (ZX) (MN.m/m)': MomentRes[:, St7API.ipPlateGlobalZX]
+                                    },
+                columns=['PlateId', 'Force (XX) (MN/m)', 'Force (YY) (MN/m)',
+                         'Force (ZZ) (MN/m)', 'Force (XY) (MN/m)',
+                         'Force (YZ) (MN/m)', 'Force (ZX) (MN/m)',
+                         'Moment (XX) (MN.m/m)', 'Moment (YY) (MN.m/m)',
+                         'Moment (ZZ) (MN.m/m)', 'Moment (XY) (MN.m/m)',
+                         'Moment (YZ) (MN.m/m)', 'Moment (ZX) (MN.m/m)'])
+        
+        
+        stgname = casename.replace(' ', '').replace(':', '_').replace('Increment[', '').replace(']','')
+        stgname = 'sandwichinputs_' + stgname
+        
+        x = re.search('Reset',stgname) 
+        
+    
+        if (x):
+            print('skipped reset stage')
+        else:
+            csvOutFile = Foldername + stgname + '.csv'
+            print('Saved in csv file ' + csvOutFile)
+            with St7Profiler.span('Write output'):
+                DF.to_csv(csvOutFile, index=False)
+            
+            StgNames.append(stgname+'.csv')
+    
+    DF2 = pd.DataFrame(StgNames)
+    DF2.to_csv(Foldername + 'Stage Names.csv', index=False, header=False)
+    
+    ret = St7API.St7CloseResultFile(1)
+    if ret == 0:
+        print('Result File closed')
+    ret = St7API.St7CloseFile(1)
+    if ret == 0:
+        print('Model File closed')
+
+    return ret
+
+def export_ES_Inputs(modelname_bt, tempfolder_bt, resultfile_bt,
+                                 groupID, numPlates, minthickness, ResultAxis='Local',
+                                 ResultLocation='Centroid',
+                                 PlateSurf='Midplane', elements=None):
+    """
+    Extract Beam Force information for a combined result file
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    resultfile_bt : BYTE
+        Encoded Result file name
+    groupID : LIST
+        List of integer of the groups to modify
+    numPlates : INTEGER
+        Total number of Plates
+    ResultAxis: STRING, optional
+        Define axis the data is extracted on Local or Global
+        DEFAULT is 'Local'.
+    ResultLocation: STRING, optional
+        Result sampling location
+        DEFAULT is 'Centroid'
+        Centroid, Gauss, NodeAverageSame, NodeAverageAll, NodeAverageSame
+    PlateSurf : STRING, optional
+        Plate Surface to extract data
+        DEFAULT is 'Midplane
+        Midplane, Zplus or Zminus
+    elements : ARRAY, optional
+        Element numbers of a region (St7Spatial queries), only the elements
+        both in the groups and in the region are exported
+        DEFAULT is None, every element of the groups
+
+    Returns
+    -------
+    ret : INTEGER
+        Return code API
+
+    """
+    
+    print('Start extract plate results')
+
+    with St7Profiler.span('Open files'):
+        # Open Model
+        ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
+        if ret != 0:
+            print('Cannot open file')
+            explain_error(ret)
+
+        modelname = modelname_bt.decode()
+        Foldername = os.path.join(os.path.dirname(modelname), "")
+    
+        # Open Result file
+        numPrimary = ctypes.c_long()
+        numSecondary = ctypes.c_long()
+        CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
+    
+        ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
+        	numPrimary, numSecondary)
+    
+        if ret != 0:
+            print('Not able to open result file')
+            St7API.St7CloseFile(1)
+            explain_error(ret)
+
+        print('%d primary case(s) found' % numPrimary.value)
+
+        CaseName_list = []
+        for ind in range(1, numPrimary.value + 1):
+            St7API.St7GetResultCaseName(1, ind, CaseName, St7API.kMaxStrLen)
+            CaseName_list.append(CaseName.value.decode())
+            print(CaseName.value.decode())
+
+    # Select Plates ID
+    PlateNum = get_group_entities(St7API.tyPLATE, numPlates, groupID,
+                                  elements)
+    print('%d plates will be extracted' % len(PlateNum))
+
+    # Plates thicker than minthickness and their sampling points
+    PropertyID, Thickness, Area = get_plate_data(PlateNum)
+    keep = Thickness[:, 1] > minthickness
+    PlateNum = PlateNum[keep]
+    PropertyID = PropertyID[keep]
+    Thickness = Thickness[keep, 1]
+    Area = Area[keep]
+    numPoints, offsets = get_sampling_points(St7API.tyPLATE, PlateNum,
+                                             ResultLocation)
+
+    # dictionnary for options
+    subtype = {'Local': St7API.stPlateLocal,
+               'Global': St7API.stPlateGlobal}
+    
+    StgNames = []
+
+    for ind, casename in enumerate(CaseName_list):
+        print('Start extracting data for case number %d %s' % (ind, casename))
+
+        ForceRes, elemIndex = sample_plate_rows(
+            PlateNum, ind+1, St7API.rtPlateForce,
+            subtype[ResultAxis.capitalize()], numPoints, ResultLocation,
+            PlateSurf)
+        MomentRes, elemIndex = sample_plate_rows(
+            PlateNum, ind+1, St7API.rtPlateMoment,
+            subtype[ResultAxis.capitalize()], numPoints, ResultLocation,
+            PlateSurf)
+        
+        # Create a dataframe to store the output data, one row per sampling
+        # point
+        if subtype[ResultAxis.capitalize()] == St7API.stPlateLocal:
+            DF = pd.DataFrame(data={'PlateId': PlateNum[elemIndex],
+                                    'Plate Thickness (m)': Thickness[elemIndex],
+                                    'Force (xx) (MN/m)': ForceRes[:, St7API.ipPlateLocalxx],
+                                    'Force (yy) (MN/m)': ForceRes[:, St7API.ipPlateLocalyy],
+                                    'Force (xy) (MN/m)': ForceRes[:, St7API.ipPlateLocalxy],
+                                    'Moment (xx) (MN.m/m)': MomentRes[:, St7API.ipPlateLocalxx],
+                                    'Moment (yy) (MN.m/m)': MomentRes[:, St7API.ipPlateLocalyy],
+                                    'Moment (xy) (MN.m/m)': MomentRes[:, St7API.ipPlateLocalxy],
+                                    'Plate Area (m2)': Area[elemIndex],
+                                    'Property ID' : PropertyID[elemIndex]
+                                    },
+                columns=['PlateId', 'Plate Thickness (m)', 'Force (xx) (MN/m)', 'Force (yy) (MN/m)',
+                         'Force (xy) (MN/m)', 'Moment (xx) (MN.m/m)',
+                         'Moment (yy) (MN.m/m)', 'Moment (xy) (MN.m/m)', 'Plate Area (m2)', 'Property ID'])
+        
+        elif subtype[ResultAxis.capitalize()] == St7API.stPlateGlobal:
+            DF = pd.DataFrame(data={'PlateId': PlateNum[elemIndex],
+                                    'Force (XX) (MN/m)': ForceRes[:, St7API.ipPlateGlobalXX],
+                                    'Force (YY) (MN/m)': ForceRes[:, St7API.ipPlateGlobalYY],
+                                    'Force (ZZ) (MN/m)': ForceRes[:, St7API.ipPlateGlobalZZ],
+                                    'Force (XY) (MN/m)': ForceRes[:, St7API.ipPlateGlobalXY],
+                                    'Force (YZ) (MN/m)': ForceRes[:, St7API.ipPlateGlobalYZ],
+                                    'Force (ZX) (MN/m)': ForceRes[:, St7API.ipPlateGlobalZX],
+                                    'Moment (XX) (MN.m/m)': MomentRes[:, St7API.ipPlateGlobalXX],
+                                    'Moment (YY) (MN.m/m)': MomentRes[:, St7API.ipPlateGlobalYY],
+                                    'Moment (ZZ) (MN.m/m)': MomentRes[:, St7API.ipPlateGlobalZZ],
+                                    'Moment (XY) (MN.m/m)': MomentRes[:, St7API.ipPlateGlobalXY],
+                                    'Moment (YZ) (MN.m/m)': MomentRes[:, St7API.ipPlateGlobalYZ],
+                                    'Moment (ZX) (MN.m/m)': MomentRes[:, St7API.ipPlateGlobalZX]
+                                    },
+                columns=['PlateId', 'Force (XX) (MN/m)', 'Force (YY) (MN/m)',
+                         'Force (ZZ) (MN/m)', 'Force (XY) (MN/m)',
+                         'Force (YZ) (MN/m)', 'Force (ZX) (MN/m)',
+                         'Moment (XX) (MN.m/m)', 'Moment (YY) (MN.m/m)',
+                         'Moment (ZZ) (MN.m/m)', 'Moment (XY) (MN.m/m)',
+                         'Moment (YZ) (MN.m/m)', 'Moment (ZX) (MN.m/m)'])
+        
+        
+        stgname = casename.replace(' ', '').replace(':', '_').replace('Increment[', '').replace(']','')
+        stgname = 'ES_Inputs_' + stgname
+        
+        x = re.search('Reset',stgname) 
+        
+    
+        if (x):
+            print('skipped reset stage')
+        else:
+            csvOutFile = Foldername + stgname + '.csv'
+            print('Saved in csv file ' + csvOutFile)
+            with St7Profiler.span('Write output'):
+                DF.to_csv(csvOutFile, index=False)
+            
+            StgNames.append(stgname+'.csv')
+    
+    ret = St7API.St7CloseResultFile(1)
+    if ret == 0:
+        print('Result File closed')
+    ret = St7API.St7CloseFile(1)
+    if ret == 0:
+        print('Model File closed')
+
+    return ret
+
+def export_platenodes(modelname_bt, tempfolder_bt, groupID, numNodes, numPlates,
+                      minthickness, OutputFormat='npz', legacyCSV=False,
+                      elements=None):
+    """
+    Extract the node co-ordinates and the corner nodes of the plates of the
+    selected groups thicker than minthickness
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    groupID : LIST
+        List of integer of the groups to extract
+    numNodes : INTEGER
+        Total number of Nodes
+    numPlates : INTEGER
+        Total number of Plates
+    minthickness : FLOAT
+        Plates thinner than this are skipped
+    OutputFormat : STRING, optional
+        DEFAULT is 'npz', NodeXYZ, PlateNodes, PlateNum, PlateGroup, GroupID
+        and GroupNames arrays written to <model>_Mesh.npz
+        none - nothing written
+    legacyCSV : BOOLEAN, optional
+        Also write <model>_Nodes.csv and <model>_Plates.csv in the layout of
+        the previous versions
+        DEFAULT is False
+    elements : ARRAY, optional
+        Element numbers of a region (St7Spatial queries), only the elements
+        both in the groups and in the region are exported
+        DEFAULT is None, every element of the groups
+
+    Returns
+    -------
+    NodeXYZ : ARRAY
+        (node, 3) co-ordinates, row i is node i + 1
+    PlateNodes : ARRAY
+        (plate, 4) corner node numbers, -1 as the 4th node of triangles
+    PlateNum : ARRAY
+        Plate numbers along the plate axis
+    PlateGroup : ARRAY
+        Group ID of each plate
+    GroupNames : DICT
+        Group name of each group ID
+
+    """
+
+    print('Start extract node co-ordinates and plate vertices')
+
+    open_model(modelname_bt, tempfolder_bt)
+
+    modelname = modelname_bt.decode()
+    modelstem = os.path.splitext(modelname)[0]
+
+    # Set API storage values
+    XYZType = ctypes.c_double * 3
+    XYZBuffer = XYZType()
+    XYZView = np.ctypeslib.as_array(XYZBuffer)
+    PlateType = ctypes.c_long * 20
+    ConnBuffer = PlateType()
+    ConnView = np.ctypeslib.as_array(ConnBuffer)
+    GroupPlate = ctypes.c_long()
+    # Membrane and bending thickness
+    PlateThickness = (ctypes.c_double * 2)()
+    PlatePropID = ctypes.c_long()
+    groupname = ctypes.create_string_buffer(St7API.kMaxStrLen)
+
+    NodeXYZ = np.empty((numNodes, 3))
+    with St7Profiler.span('Node co-ordinates'):
+        for ind in range(numNodes):
+            St7API.St7GetNodeXYZ(1, ind + 1, XYZBuffer)
+            NodeXYZ[ind] = XYZView
+
+    # Thickness read once per property, group name once per group
+    groupSet = set(groupID)
+    PropThickness = {}
+    GroupNames = {}
+    PlateNodes = np.full((numPlates, 4), -1, dtype=np.int32)
+    PlateNum = np.empty(numPlates, dtype=np.int32)
+    PlateGroup = np.empty(numPlates, dtype=np.int32)
+    count = 0
+
+    with St7Profiler.span('Plate connectivity'):
+        for ind in select_elements(list(range(1, numPlates + 1)), elements):
+            St7API.St7GetElementGroup(1, St7API.tyPLATE, ind, GroupPlate)
+            if GroupPlate.value not in groupSet:
+                continue
+
+            St7API.St7GetElementProperty(1, St7API.tyPLATE, ind, PlatePropID)
+            propNum = PlatePropID.value
+            if propNum not in PropThickness:
+                St7API.St7GetPlateThickness(1, propNum, PlateThickness)
+                PropThickness[propNum] = PlateThickness[0]
+            if PropThickness[propNum] <= minthickness:
+                continue
+
+            St7API.St7GetElementConnection(1, St7API.tyPLATE, ind, ConnBuffer)
+            # Tri3 and Tri6 list their 3 corner nodes first, quads their 4
+            numCorners = 3 if ConnView[0] in (3, 6) else 4
+            PlateNodes[count, :numCorners] = ConnView[1:numCorners + 1]
+            PlateNum[count] = ind
+            PlateGroup[count] = GroupPlate.value
+            if GroupPlate.value not in GroupNames:
+                St7API.St7GetGroupIDName(1, GroupPlate.value, groupname,
+                                         St7API.kMaxStrLen)
+                GroupNames[GroupPlate.value] = groupname.value.decode()
+            count += 1
+
+    PlateNodes = PlateNodes[:count]
+    PlateNum = PlateNum[:count]
+    PlateGroup = PlateGroup[:count]
+
+    print('%d nodes will be extracted' % numNodes)
+    print('%d plates will be extracted' % count)
+
+    groupIDs = sorted(GroupNames)
+    save_results(modelstem + '_Mesh', OutputFormat, NodeXYZ=NodeXYZ,
+                 PlateNodes=PlateNodes, PlateNum=PlateNum,
+                 PlateGroup=PlateGroup,
+                 GroupID=np.array(groupIDs, dtype=np.int32),
+                 GroupNames=np.array([GroupNames[g] for g in groupIDs]))
+
+    if legacyCSV:
+        with St7Profiler.span('Write output'):
+            DF = pd.DataFrame(NodeXYZ)
+            DF.to_csv('{}_Nodes.csv'.format(modelstem), index=False, header=False)
+            DF2 = pd.DataFrame(PlateNodes.astype(object))
+            DF2[3] = DF2[3].where(DF2[3] != -1, " ")
+            DF2[4] = PlateNum
+            DF2[5] = [GroupNames[g] for g in PlateGroup]
+            DF2.to_csv('{}_Plates.csv'.format(modelstem), index=False, header=False)
+
+    ret = St7API.St7CloseFile(1)
+    if ret == 0:
+        print('Model File closed')
+
+    return NodeXYZ, PlateNodes, PlateNum, PlateGroup, GroupNames
+
+def export_node_results(modelname_bt, tempfolder_bt, resultfile_bt, groupID,
+                        numNodes, ResultTypes=('Displacement', 'Reaction'),
+                        cases=None, UCSId=None, OutputFormat='npz',
+                        elements=None):
+    """
+    Extract node displacements, rotations and reactions for all the nodes of
+    the selected groups across the selected result cases
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    resultfile_bt : BYTE
+        Encoded Result file name
+    groupID : LIST
+        List of integer of the groups to extract
+    numNodes : INTEGER
+        Total number of Nodes
+    ResultTypes : LIST, optional
+        DEFAULT is ('Displacement', 'Reaction')
+        Displacement - DX, DY, DZ, RX, RY, RZ
+        Reaction - FX, FY, FZ, MX, MY, MZ
+    cases : LIST, optional
+        Case numbers (1-based) or case names to extract
+        DEFAULT is None, all cases except Reset stages
+    UCSId : INTEGER, optional
+        Results are returned in this UCS when given
+        DEFAULT is None, global axis
+    OutputFormat : STRING, optional
+        DEFAULT is 'npz', a single file holding the whole array
+        csv - one file per case, one row per node
+        none - nothing written
+    elements : ARRAY, optional
+        Element numbers of a region (St7Spatial queries), only the elements
+        both in the groups and in the region are exported
+        DEFAULT is None, every element of the groups
+
+    Returns
+    -------
+    NodeRes : ARRAY
+        Results of shape (case, node, dof)
+    NodeNum : ARRAY
+        Node numbers along the node axis
+    caseNums : LIST
+        Case numbers along the case axis
+    columns : LIST
+        Names along the dof axis
+
+    """
+
+    print('Start extract node results')
+
+    OutputFormat = OutputFormat.lower()
+    if OutputFormat not in ('npz', 'csv', 'none'):
+        raise ValueError('Unknown output format %s' % OutputFormat)
+
+    CaseName_list = open_model_results(modelname_bt, tempfolder_bt,
+                                       resultfile_bt)
+    modelname = modelname_bt.decode()
+    Foldername = os.path.dirname(modelname)
+
+    ResultOptions = {'Displacement': (St7API.rtNodeDisp,
+                                      ['DX', 'DY', 'DZ', 'RX', 'RY', 'RZ']),
+                     'Reaction': (St7API.rtNodeReact,
+                                  ['FX', 'FY', 'FZ', 'MX', 'MY', 'MZ'])}
+
+    NodeNum = get_group_entities(St7API.tyNODE, numNodes, groupID,
+                                 elements=elements)
+    print('%d nodes will be extracted' % len(NodeNum))
+
+    caseNums = select_cases(CaseName_list, cases)
+
+    # Set API storage values
+    DblArrayRes = ctypes.c_double * 6
+    NodeBuffer = DblArrayRes()
+    NodeView = np.ctypeslib.as_array(NodeBuffer)
+
+    columns = []
+    for resName in ResultTypes:
+        columns += ResultOptions[resName.capitalize()][1]
+
+    NodeRes = np.full((len(caseNums), len(NodeNum), len(columns)), np.nan)
+
+    for caseInd, caseNum in enumerate(caseNums):
+        print('Start extracting data for case number %d %s'
+              % (caseNum, CaseName_list[caseNum - 1]))
+
+        for resInd, resName in enumerate(ResultTypes):
+            resultType = ResultOptions[resName.capitalize()][0]
+            block = NodeRes[caseInd, :, resInd * 6:(resInd + 1) * 6]
+
+            for nodeInd, nodePos in enumerate(NodeNum):
+                if UCSId is None:
+                    ret = St7API.St7GetNodeResult(1, resultType, int(nodePos),
+                                                  caseNum, NodeBuffer)
+                else:
+                    ret = St7API.St7GetNodeResultUCS(1, resultType, UCSId,
+                                                     int(nodePos), caseNum,
+                                                     NodeBuffer)
+                if ret == 0:
+                    block[nodeInd] = NodeView
+
+        if OutputFormat == 'csv':
+            DF = pd.DataFrame(NodeRes[caseInd], columns=columns)
+            DF.insert(0, 'NodeId', NodeNum)
+            stgname = get_stage_name(CaseName_list[caseNum - 1])
+            save_results(os.path.join(Foldername, 'noderesults_' + stgname),
+                         'csv', DF)
+
+    if OutputFormat == 'npz':
+        modelstem = os.path.splitext(modelname)[0]
+        save_results(modelstem + '_NodeResults', 'npz', NodeRes=NodeRes,
+                     NodeNum=NodeNum, caseNums=np.array(caseNums),
+                     caseNames=np.array([CaseName_list[c - 1]
+                                         for c in caseNums]),
+                     columns=np.array(columns))
+
+    close_model_results()
+
+    return NodeRes, NodeNum, caseNums, columns
+
+def export_brick_results(modelname_bt, tempfolder_bt, resultfile_bt, groupID,
+                         numBricks, ResultType='Stress', ResultAxis='Global',
+                         ResultLocation='Centroid', cases=None,
+                         OutputFormat='npy', chunkSize=100000, elements=None):
+    """
+    Extract Brick stresses or strains for all the bricks of the selected
+    groups. Results are written case by case in chunks of bricks so the
+    memory used does not grow with the model size.
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    resultfile_bt : BYTE
+        Encoded Result file name
+    groupID : LIST
+        List of integer of the groups to extract
+    numBricks : INTEGER
+        Total number of Bricks
+    ResultType : STRING, optional
+        DEFAULT is 'Stress'
+        Stress or Strain
+    ResultAxis: STRING, optional
+        Define axis the data is extracted on Local, Global or Combined
+        DEFAULT is 'Global'.
+    ResultLocation: STRING, optional
+        Result sampling location
+        DEFAULT is 'Centroid'
+        Centroid, Gauss, NodesAverageNever, NodesAverageAll, NodesAverageSame
+    cases : LIST, optional
+        Case numbers (1-based) or case names to extract
+        DEFAULT is None, all cases except Reset stages
+    OutputFormat : STRING, optional
+        DEFAULT is 'npy', one memory mapped array of shape
+        (bricks, points, columns) per case, NaN padded, plus one
+        _BrickIndex.npz file with the brick numbers and ragged offsets
+        csv - one file per case, one row per sampling point
+        none - results extracted but not written
+    chunkSize : INTEGER, optional
+        Number of bricks extracted before each write
+        DEFAULT is 100000
+    elements : ARRAY, optional
+        Element numbers of a region (St7Spatial queries), only the elements
+        both in the groups and in the region are exported
+        DEFAULT is None, every element of the groups
+
+    Returns
+    -------
+    outFiles : LIST
+        Written files, one per case, empty for the none format
+
+    """
+
+    print('Start extract brick results')
+
+    OutputFormat = OutputFormat.lower()
+    if OutputFormat not in ('npy', 'csv', 'none'):
+        raise ValueError('Unknown output format %s' % OutputFormat)
+
+    CaseName_list = open_model_results(modelname_bt, tempfolder_bt,
+                                       resultfile_bt)
+    modelname = modelname_bt.decode()
+    Foldername = os.path.dirname(modelname)
+    modelstem = os.path.splitext(modelname)[0]
+
+    # dictionnary for options
+    resulttype = {'Stress': St7API.rtBrickStress,
+                  'Strain': St7API.rtBrickStrain}
+
+    subtype = {'Local': St7API.stBrickLocal,
+               'Global': St7API.stBrickGlobal,
+               'Combined': St7API.stBrickCombined}
+
+    if subtype[ResultAxis.capitalize()] == St7API.stBrickLocal:
+        columnNames = ['xx', 'yy', 'zz', 'xy', 'yz', 'zx']
+    elif subtype[ResultAxis.capitalize()] == St7API.stBrickGlobal:
+        columnNames = ['XX', 'YY', 'ZZ', 'XY', 'YZ', 'ZX']
+    else:
+        columnNames = ['11', '22', '33', 'Von Mises', 'Tresca',
+                       'Mohr-Coulomb', 'Drucker-Prager']
+
+    # Output sized from the result type, not from the first chunk which
+    # may have no result at all
+    numCols = len(columnNames)
+
+    BrickNum = get_group_entities(St7API.tyBRICK, numBricks, groupID,
+                                  elements=elements)
+    print('%d bricks will be extracted' % len(BrickNum))
+
+    caseNums = select_cases(CaseName_list, cases)
+
+    numPoints, offsets = get_sampling_points(St7API.tyBRICK, BrickNum,
+                                             ResultLocation)
+    maxPoints = int(numPoints.max()) if len(BrickNum) else 0
+    if OutputFormat == 'npy':
+        save_results(modelstem + '_BrickIndex', 'npz', BrickNum=BrickNum,
+                     numPoints=numPoints, offsets=offsets)
+
+    outFiles = []
+    for caseNum in caseNums:
+        casename = CaseName_list[caseNum - 1]
+        print('Start extracting data for case number %d %s'
+              % (caseNum, casename))
+
+        stgname = get_stage_name(casename)
+        fileStem = os.path.join(Foldername, 'brick' + ResultType.lower()
+                                + '_' + stgname)
+        CaseOut = None
+        if OutputFormat == 'npy':
+            # The whole case is mapped to disk
+            CaseOut = np.lib.format.open_memmap(
+                fileStem + '.npy', mode='w+', dtype=np.float64,
+                shape=(len(BrickNum), maxPoints, numCols))
+            CaseOut[:] = np.nan
+
+        for start in range(0, len(BrickNum), chunkSize):
+            end = min(start + chunkSize, len(BrickNum))
+            data, chunkOffsets = sample_element_results(
+                St7API.tyBRICK, BrickNum[start:end], caseNum,
+                resulttype[ResultType.capitalize()],
+                subtype[ResultAxis.capitalize()], ResultLocation,
+                numPoints=numPoints[start:end])
+            chunk = np.full(data.shape[:2] + (numCols,), np.nan)
+            chunk[:, :, :min(data.shape[2], numCols)] = data[:, :, :numCols]
+
+            if OutputFormat == 'csv':
+                rows, elemIndex = flatten_samples(chunk, numPoints[start:end])
+                columns = ['%s %s' % (ResultType.capitalize(), name)
+                           for name in columnNames]
+                DF = pd.DataFrame(rows, columns=columns)
+                DF.insert(0, 'Point',
+                          np.arange(len(rows)) - chunkOffsets[elemIndex])
+                DF.insert(0, 'BrickId', BrickNum[start:end][elemIndex])
+                DF.to_csv(fileStem + '.csv', index=False,
+                          mode='w' if start == 0 else 'a', header=start == 0)
+            elif OutputFormat == 'npy':
+                CaseOut[start:end, :chunk.shape[1], :] = chunk
+
+        if CaseOut is not None:
+            CaseOut.flush()
+            del CaseOut
+        if OutputFormat != 'none':
+            outFiles.append(fileStem + '.' + OutputFormat)
+            print('Saved in file ' + outFiles[-1])
+
+    close_model_results()
+
+    return outFiles
+
+# Strand7 limit envelope types
+LimitEnvelopeTypes = {'Max': St7API.etLimitEnvelopeMax,
+                      'Min': St7API.etLimitEnvelopeMin,
+                      'Abs': St7API.etLimitEnvelopeAbs}
+
+def generate_limit_envelopes(caseNums, numCases, EnvelopeTypes=('Max', 'Min'),
+                             EnvelopeName='Stages'):
+    """
+    Define limit envelopes over result cases and generate them in the result
+    file open on uID 1, so a single envelope case is extracted instead of
+    every stage
+
+    Parameters
+    ----------
+    caseNums : LIST
+        Result case numbers enveloped
+    numCases : INTEGER
+        Number of result cases of the result file before the generation
+    EnvelopeTypes : LIST, optional
+        DEFAULT is ('Max', 'Min')
+        Max, Min or Abs
+    EnvelopeName : STRING, optional
+        Prefix of the envelope names
+        DEFAULT is 'Stages'
+
+    Returns
+    -------
+    envelopeCases : DICT
+        Result case number of the generated envelope of each type
+
+    """
+
+    numLimit = ctypes.c_long()
+    numComb = ctypes.c_long()
+    numFactors = ctypes.c_long()
+    CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
+
+    ret = St7API.St7GetNumEnvelopes(1, numLimit, numComb, numFactors)
+    if ret != 0:
+        explain_error(ret)
+    firstEnvelope = numLimit.value + 1
+
+    envelopeNames = {}
+    for envInd, envType in enumerate(EnvelopeTypes):
+        envName = '%s %s' % (EnvelopeName, envType.capitalize())
+        ret = St7API.St7AddLimitEnvelope(
+            1, LimitEnvelopeTypes[envType.capitalize()], envName.encode())
+        if ret != 0:
+            explain_error(ret)
+        for caseNum in caseNums:
+            ret = St7API.St7EnableLimitEnvelopeCase(1, firstEnvelope + envInd,
+                                                    int(caseNum))
+            if ret != 0:
+                explain_error(ret)
+        envelopeNames[envName] = envType.capitalize()
+
+    with St7Profiler.span('Generate envelopes'):
+        ret = St7API.St7GenerateEnvelopes(1, numLimit, numComb, numFactors)
+        if ret != 0:
+            explain_error(ret)
+
+    # Generated envelopes are appended to the result cases, found by name
+    envelopeCases = {}
+    caseNum = numCases + 1
+    while len(envelopeCases) < len(envelopeNames):
+        if St7API.St7GetResultCaseName(1, caseNum, CaseName,
+                                       St7API.kMaxStrLen) != 0:
+            break
+        envType = envelopeNames.get(CaseName.value.decode())
+        if envType is not None:
+            envelopeCases[envType] = caseNum
+        caseNum += 1
+
+    missing = set(envelopeNames.values()) - set(envelopeCases)
+    if missing:
+        raise St7Error(St7API.ERR7_InvalidLimitEnvelope,
+                       'St7GenerateEnvelopes')
+
+    print('%d limit envelope(s) generated over %d case(s)'
+          % (len(envelopeCases), len(caseNums)))
+
+    return envelopeCases
+
+def export_plate_envelopes(modelname_bt, tempfolder_bt, resultfile_bt,
+                           groupID, numPlates, ResultTypes=('Force', 'Moment'),
+                           ResultAxis='Local', EnvelopeTypes=('Max', 'Min'),
+                           cases=None, PlateSurf='Midplane',
+                           OutputFormat='csv', elements=None):
+    """
+    Extract the Strand7 limit envelopes of plate results over the selected
+    cases, one case pass per envelope type instead of one per stage
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    resultfile_bt : BYTE
+        Encoded Result file name
+    groupID : LIST
+        List of integer of the groups to extract
+    numPlates : INTEGER
+        Total number of Plates
+    ResultTypes : LIST, optional
+        DEFAULT is ('Force', 'Moment')
+        Force, Moment or Stress
+    ResultAxis : STRING, optional
+        DEFAULT is 'Local'
+        Local or Global
+    EnvelopeTypes : LIST, optional
+        DEFAULT is ('Max', 'Min')
+        Max, Min or Abs
+    cases : LIST, optional
+        Case numbers (1-based) or case names enveloped
+        DEFAULT is None, all cases except Reset stages
+    PlateSurf : STRING, optional
+        DEFAULT is 'Midplane'
+        Midplane, Zplus or Zminus
+    OutputFormat : STRING, optional
+        DEFAULT is 'csv', one PlateEnvelope_<type> file per envelope type
+        npz, csv or none
+    elements : ARRAY, optional
+        Element numbers of a region (St7Spatial queries), only the elements
+        both in the groups and in the region are exported
+        DEFAULT is None, every element of the groups
+
+    Returns
+    -------
+    Envelopes : DICT
+        DataFrame of each envelope type, one row per plate centroid
+
+    """
+
+    print('Start extract plate envelopes')
+
+    CaseName_list = open_model_results(modelname_bt, tempfolder_bt,
+                                       resultfile_bt)
+    modelname = modelname_bt.decode()
+    Foldername = os.path.dirname(modelname)
+
+    ResultOptions = {'Force': (St7API.rtPlateForce, 'Force', 'MN/m'),
+                     'Moment': (St7API.rtPlateMoment, 'Moment', 'MN.m/m'),
+                     'Stress': (St7API.rtPlateStress, 'Stress', 'MPa')}
+    subtype = {'Local': (St7API.stPlateLocal,
+                         ['xx', 'yy', 'zz', 'xy', 'yz', 'zx']),
+               'Global': (St7API.stPlateGlobal,
+                          ['XX', 'YY', 'ZZ', 'XY', 'YZ', 'ZX'])}
+    ResultSubType, components = subtype[ResultAxis.capitalize()]
+
+    PlateNum = get_group_entities(St7API.tyPLATE, numPlates, groupID,
+                                  elements=elements)
+    print('%d plates will be extracted' % len(PlateNum))
+
+    caseNums = select_cases(CaseName_list, cases)
+    envelopeCases = generate_limit_envelopes(caseNums, len(CaseName_list),
+                                             EnvelopeTypes)
+
+    Envelopes = {}
+    for envType, caseNum in envelopeCases.items():
+        DF = pd.DataFrame({'PlateId': PlateNum})
+        for resName in ResultTypes:
+            resultType, label, unit = ResultOptions[resName.capitalize()]
+            data, offsets = sample_element_results(
+                St7API.tyPLATE, PlateNum, caseNum, resultType, ResultSubType,
+                'Centroid', PlateSurf)
+            for col, comp in enumerate(components[:data.shape[2]]):
+                DF['%s (%s) (%s)' % (label, comp, unit)] = data[:, 0, col]
+        Envelopes[envType] = DF
+
+        if OutputFormat.lower() != 'npz':
+            save_results(os.path.join(Foldername, 'PlateEnvelope_' + envType),
+                         OutputFormat, DF)
+
+    if OutputFormat.lower() == 'npz':
+        modelstem = os.path.splitext(modelname)[0]
+        save_results(modelstem + '_PlateEnvelopes', 'npz',
+                     PlateNum=PlateNum, columns=np.array(DF.columns),
+                     caseNames=np.array([CaseName_list[c - 1]
+                                         for c in caseNums]),
+                     **{envType: DF.to_numpy()
+                        for envType, DF in Envelopes.items()})
+
+    close_model_results()
+
+    return Envelopes
+
+def export_plate_tensors(modelname_bt, tempfolder_bt, resultfile_bt, groupID,
+                         numPlates, cases=None, OutputFormat='npz',
+                         elements=None):
+    """
+    Extract the global plate force and moment tensors at the plate centroids
+    of every selected case, as arrays for SectionCutToolbox
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    resultfile_bt : BYTE
+        Encoded Result file name
+    groupID : LIST
+        List of integer of the groups to extract
+    numPlates : INTEGER
+        Total number of Plates
+    cases : LIST, optional
+        Case numbers (1-based) or case names to extract
+        DEFAULT is None, all cases except Reset stages
+    OutputFormat : STRING, optional
+        DEFAULT is 'npz', PlateNum, Force, Moment and caseNames arrays
+        written to <model>_PlateTensors.npz
+        none - nothing written
+    elements : ARRAY, optional
+        Element numbers of a region (St7Spatial queries), only the elements
+        both in the groups and in the region are exported
+        DEFAULT is None, every element of the groups
+
+    Returns
+    -------
+    PlateNum : ARRAY
+        Plate numbers along the plate axis
+    Force : ARRAY
+        (case, plate, 6) plate force components XX, YY, ZZ, XY, YZ, ZX in
+        the global system
+    Moment : ARRAY
+        (case, plate, 6) plate moment components, same layout
+    caseNames : LIST
+        Names of the extracted cases
+
+    """
+
+    print('Start extract plate force and moment tensors')
+
+    CaseName_list = open_model_results(modelname_bt, tempfolder_bt,
+                                       resultfile_bt)
+
+    PlateNum = get_group_entities(St7API.tyPLATE, numPlates, groupID,
+                                  elements=elements)
+    print('%d plates will be extracted' % len(PlateNum))
+
+    caseNums = select_cases(CaseName_list, cases)
+    numPoints = np.ones(len(PlateNum), dtype=np.int32)
+    Force = np.full((len(caseNums), len(PlateNum), 6), np.nan)
+    Moment = np.full((len(caseNums), len(PlateNum), 6), np.nan)
+
+    for ind, caseNum in enumerate(caseNums):
+        print('Case ' + CaseName_list[caseNum - 1])
+        for resultType, Tensor in ((St7API.rtPlateForce, Force),
+                                   (St7API.rtPlateMoment, Moment)):
+            data, offsets = sample_element_results(
+                St7API.tyPLATE, PlateNum, caseNum, resultType,
+                St7API.stPlateGlobal, numPoints=numPoints)
+            numColumns = min(data.shape[2], 6)
+            Tensor[ind, :, :numColumns] = data[:, 0, :numColumns]
+
+    caseNames = [CaseName_list[c - 1] for c in caseNums]
+    modelstem = os.path.splitext(modelname_bt.decode())[0]
+    save_results(modelstem + '_PlateTensors', OutputFormat, PlateNum=PlateNum,
+                 Force=Force, Moment=Moment, caseNames=np.array(caseNames))
+
+    close_model_results()
+
+    return PlateNum, Force, Moment, caseNames
+
+def combine_result_files(modelname_bt, tempfolder_bt, targetfile_bt,
+                         ResultFiles, cases=None):
+    """
+    Gather the cases of several result files of a model into one combined
+    result file, so the exporters scan a single file. Each combined case is
+    one case of one source file with a factor of 1.
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    targetfile_bt : BYTE
+        Encoded combined result file name
+    ResultFiles : LIST
+        Encoded result file names of the model, numbered by their position
+        in the combination, a ValueError is raised for duplicates
+    cases : DICT, optional
+        Case numbers (1-based) or case names to keep of each result file,
+        keyed by position in ResultFiles, see select_cases
+        DEFAULT is None, all cases except Reset stages
+
+    Returns
+    -------
+    caseMap : LIST
+        (result file, case number, combined case name) of each case of the
+        combined result file
+
+    """
+
+    print('Start combining %d result files' % len(ResultFiles))
+
+    fileNames = [os.path.normcase(os.path.abspath(resultfile_bt.decode()))
+                 for resultfile_bt in ResultFiles]
+    if len(set(fileNames)) != len(fileNames):
+        raise ValueError('Result files combined more than once')
+
+    open_model(modelname_bt, tempfolder_bt)
+
+    # Cases of each source file, read one file at a time
+    caseMap = []
+    fileNums = []
+    for fileInd, resultfile_bt in enumerate(ResultFiles):
+        CaseName_list = open_result_cases(resultfile_bt)
+        if CaseName_list is None:
+            St7API.St7CloseFile(1)
+            raise IOError('Cannot open result file ' + resultfile_bt.decode())
+        St7API.St7CloseResultFile(1)
+
+        stem = os.path.splitext(os.path.basename(resultfile_bt.decode()))[0]
+        fileCases = (cases or {}).get(fileInd)
+        for caseNum in select_cases(CaseName_list, fileCases):
+            caseMap.append((resultfile_bt.decode(), caseNum,
+                            '%s: %s' % (stem, CaseName_list[caseNum - 1])))
+            fileNums.append(fileInd + 1)
+
+    try:
+        ret = St7API.St7SetResultFileCombTargetFileName(1, targetfile_bt)
+        if ret != 0:
+            explain_error(ret)
+        for resultfile_bt in ResultFiles:
+            ret = St7API.St7AddResultFileCombFileName(1, resultfile_bt)
+            if ret != 0:
+                explain_error(ret)
+
+        for combCase, (fileNum, (resultfile, caseNum, casename)) in \
+                enumerate(zip(fileNums, caseMap), 1):
+            ret = St7API.St7AddResultFileCombCase(1, casename.encode())
+            if ret != 0:
+                explain_error(ret)
+            # Factor 1 on the case of its file, 0 on the other files
+            for otherNum in range(1, len(ResultFiles) + 1):
+                if otherNum == fileNum:
+                    ret = St7API.St7SetResultFileCombCaseData(
+                        1, combCase, otherNum, caseNum, 1.0)
+                else:
+                    ret = St7API.St7SetResultFileCombCaseData(
+                        1, combCase, otherNum, 1, 0.0)
+                if ret != 0:
+                    explain_error(ret)
+
+        ret = St7API.St7GenerateResultFileComb(1, St7API.rfCombFactors)
+        if ret != 0:
+            explain_error(ret)
+        print('%d cases combined in %s' % (len(caseMap),
+                                           targetfile_bt.decode()))
+    finally:
+        St7API.St7CloseFile(1)
+
+    return caseMap
+
+# Entity results written by the structural solvers
+EntityResultTypes = {'NodeReaction': St7API.srNodeReaction,
+                     'NodeVelocity': St7API.srNodeVelocity,
+                     'NodeAcceleration': St7API.srNodeAcceleration,
+                     'BeamForce': St7API.srBeamForce,
+                     'BeamMNLStress': St7API.srBeamMNLStress,
+                     'BeamStrain': St7API.srBeamStrain,
+                     'PlateStress': St7API.srPlateStress,
+                     'PlateStrain': St7API.srPlateStrain,
+                     'BrickStress': St7API.srBrickStress,
+                     'BrickStrain': St7API.srBrickStrain,
+                     'ElementNodeForce': St7API.srElementNodeForce}
+
+PropertyEntities = {'Beam': St7API.tyBEAM, 'Plate': St7API.tyPLATE,
+                    'Brick': St7API.tyBRICK}
+
+def set_result_output(groups=None, disabledProperties=None,
+                      entityResults=None):
+    """
+    Restrict the results written by the solver for the model open on uID 1,
+    for smaller result files and faster extraction
+
+    Parameters
+    ----------
+    groups : LIST, optional
+        IDs of the groups with results, the other groups are disabled. A
+        ValueError is raised when a group is not in the model
+        DEFAULT is None, groups as set in the model
+    disabledProperties : DICT, optional
+        Property numbers without results of each element type, e.g.
+        {'Plate': [3, 4], 'Beam': [1]}
+        DEFAULT is None
+    entityResults : DICT, optional
+        State of each entity result type of EntityResultTypes, e.g.
+        {'PlateStrain': False, 'ElementNodeForce': False}
+        DEFAULT is None, entity results as set in the model
+
+    Returns
+    -------
+    None.
+
+    """
+
+    if groups is not None:
+        GroupIDs = get_group_ids()
+        groups = set(groups)
+        missing = groups - set(GroupIDs.tolist())
+        if missing:
+            raise ValueError('Result group(s) %s not found in the model'
+                             % ', '.join(str(group)
+                                         for group in sorted(missing)))
+        for group in GroupIDs:
+            if group in groups:
+                ret = St7API.St7EnableResultGroup(1, int(group))
+            else:
+                ret = St7API.St7DisableResultGroup(1, int(group))
+            if ret != 0:
+                explain_error(ret)
+        print('Results written for %d of %d groups'
+              % (len(groups), len(GroupIDs)))
+
+    for entity, propNums in (disabledProperties or {}).items():
+        for propNum in propNums:
+            ret = St7API.St7DisableResultProperty(
+                1, PropertyEntities[entity.capitalize()], int(propNum))
+            if ret != 0:
+                explain_error(ret)
+        print('No results for %d %s properties' % (len(propNums), entity))
+
+    for resName, state in (entityResults or {}).items():
+        ret = St7API.St7SetEntityResult(1, EntityResultTypes[resName],
+                                        St7API.btTrue if state
+                                        else St7API.btFalse)
+        if ret != 0:
+            explain_error(ret)
+        print('%s results %s' % (resName, 'on' if state else 'off'))
+
+def set_warm_start(initialFile_bt=None, initialCase=None, restartFile_bt=None,
+                   saveRestart=False, lastRestartStep=False):
+    """
+    Initial conditions and restart options of the nonlinear static solver.
+    A model must be open on uID 1.
+
+    Parameters
+    ----------
+    initialFile_bt : BYTE, optional
+        Encoded result file of a previous solve, the displacements and
+        stresses of initialCase are the starting point of the solve
+        DEFAULT is None, the solve starts from an unloaded model
+    initialCase : INTEGER, optional
+        Result case of initialFile_bt used as initial conditions
+        DEFAULT is None, the last converged case of initialFile_bt, see
+        get_last_converged_case
+    restartFile_bt : BYTE, optional
+        Encoded restart file saved by a previous solve of the same model,
+        the solve continues from its last saved step
+        DEFAULT is None
+    saveRestart : BOOLEAN, optional
+        Save the restart data of this solve for a later restart
+        DEFAULT is False
+    lastRestartStep : BOOLEAN, optional
+        Only keep the restart data of the last step, smaller restart file
+        DEFAULT is False
+
+    Returns
+    -------
+    None.
+
+    """
+
+    if initialFile_bt is not None:
+        if initialCase is None:
+            initialCase = get_last_converged_case(initialFile_bt)
+        ret = St7API.St7SetNLAInitialFile(1, initialFile_bt, initialCase)
+        if ret != 0:
+            explain_error(ret)
+        print('Initial conditions from case %d of %s'
+              % (initialCase, initialFile_bt.decode()))
+
+    if restartFile_bt is not None:
+        ret = St7API.St7SetStaticRestartFile(1, restartFile_bt)
+        if ret != 0:
+            explain_error(ret)
+        print('Restart from %s' % restartFile_bt.decode())
+
+    if saveRestart:
+        St7API.St7EnableSaveRestart(1)
+        if lastRestartStep:
+            St7API.St7EnableSaveLastRestartStep(1)
+        else:
+            St7API.St7DisableSaveLastRestartStep(1)
+        print('Restart data saved')
+
+# Stage number in a staged nonlinear case name, e.g. 'Increment [3: Excavate]'
+# or 'Increment [Stage 3: Excavate] : 1'
+StageCasePattern = re.compile(r'\[\s*(?:Stage\s*)?(\d+)\s*:')
+
+def get_group_ids():
+    """
+    IDs of the groups of the model open on uID 1, in group index order. The
+    IDs are not 1 to the number of groups once groups were deleted or nested
+
+    Returns
+    -------
+    GroupIDs : ARRAY
+        Group ID of each group index
+
+    """
+
+    numGroups = ctypes.c_long()
+    St7API.St7GetNumGroups(1, numGroups)
+    GroupName = ctypes.create_string_buffer(St7API.kMaxStrLen)
+    GroupID = ctypes.c_long()
+
+    GroupIDs = np.zeros(numGroups.value, dtype=np.int32)
+    for ind in range(1, numGroups.value + 1):
+        ret = St7API.St7GetGroupByIndex(1, ind, GroupName, St7API.kMaxStrLen,
+                                        GroupID)
+        if ret != 0:
+            explain_error(ret)
+        GroupIDs[ind - 1] = GroupID.value
+
+    return GroupIDs
+
+def get_stage_groups():
+    """
+    Group activation of each stage of the model open on uID 1
+
+    Returns
+    -------
+    StageGroups : ARRAY
+        (stage, group) boolean array, True where the group is active in the
+        stage, row i is stage i + 1 and column j is group GroupIDs[j]
+    GroupIDs : ARRAY
+        Group ID of each column, see get_group_ids
+
+    """
+
+    numStages = ctypes.c_long()
+    St7API.St7GetNumStages(1, numStages)
+    GroupIDs = get_group_ids()
+    State = ctypes.c_bool()
+
+    StageGroups = np.zeros((numStages.value, len(GroupIDs)), dtype=bool)
+    for stage in range(1, numStages.value + 1):
+        for col, group in enumerate(GroupIDs):
+            St7API.St7GetStageGroupState(1, stage, int(group), State)
+            StageGroups[stage - 1, col] = State.value
+
+    return StageGroups, GroupIDs
+
+def get_case_stages(CaseName_list):
+    """
+    Stage number of each result case of a staged nonlinear analysis, read
+    from the case names
+
+    Returns
+    -------
+    caseStages : ARRAY
+        Stage of each case, 0 where the name holds no stage number
+
+    """
+
+    caseStages = np.zeros(len(CaseName_list), dtype=np.int32)
+    for ind, casename in enumerate(CaseName_list):
+        match = StageCasePattern.search(casename)
+        if match:
+            caseStages[ind] = int(match.group(1))
+
+    return caseStages
+
+def set_solver_stages(stages):
+    """
+    Solve only the given stages of a staged nonlinear static analysis of the
+    model open on uID 1, the other stages are disabled
+
+    Parameters
+    ----------
+    stages : LIST
+        Stage numbers to solve
+
+    """
+
+    numStages = ctypes.c_long()
+    St7API.St7GetNumStages(1, numStages)
+
+    ret = St7API.St7SetNLAStagedAnalysis(1, True)
+    if ret != 0:
+        explain_error(ret)
+
+    stages = set(stages)
+    for stage in range(1, numStages.value + 1):
+        if stage in stages:
+            St7API.St7EnableNLAStage(1, stage)
+        else:
+            St7API.St7DisableNLAStage(1, stage)
+
+    print('Solving %d of %d stages' % (len(stages), numStages.value))
+
+def plan_staged_solve(modelname_bt, tempfolder_bt, previousResult_bt,
+                      changedGroups=(), changedPlates=()):
+    """
+    Stages to re-solve after a change of the model, from the first stage in
+    which a changed group is active. The earlier stages are kept from the
+    previous result file and the solve starts from the last case of the
+    stage before.
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded changed Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    previousResult_bt : BYTE
+        Encoded result file of the model before the change
+    changedGroups : LIST, optional
+        IDs of the groups whose entities changed, a ValueError is raised
+        when a group is not in the model
+    changedPlates : LIST, optional
+        Numbers of the plates that changed, their groups are added to
+        changedGroups
+
+    Returns
+    -------
+    plan : DICT
+        firstStage - first stage to solve, None when no stage is affected
+        stages - stages to solve
+        initialFile_bt, initialCase - initial conditions of the solve,
+        None for a solve from the first stage
+        previousCases - cases of the previous result file still valid
+
+    """
+
+    print('Start planning the staged solve')
+
+    previousExists = os.path.exists(previousResult_bt.decode())
+    if previousExists:
+        CaseName_list = open_model_results(modelname_bt, tempfolder_bt,
+                                           previousResult_bt)
+    else:
+        ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
+        if ret != 0:
+            print('Cannot open file')
+            explain_error(ret)
+        CaseName_list = []
+
+    StageGroups, GroupIDs = get_stage_groups()
+    numStages = len(StageGroups)
+
+    groups = set(changedGroups)
+    GroupPlate = ctypes.c_long()
+    for plateNum in changedPlates:
+        St7API.St7GetElementGroup(1, St7API.tyPLATE, int(plateNum), GroupPlate)
+        groups.add(GroupPlate.value)
+
+    missing = groups - set(GroupIDs.tolist())
+    if missing:
+        raise ValueError('Changed group(s) %s not found in the model'
+                         % ', '.join(str(group) for group in sorted(missing)))
+
+    # A changed group affects every stage it is active in
+    columns = np.flatnonzero(np.isin(GroupIDs, list(groups)))
+    affected = StageGroups[:, columns].any(axis=1)
+    firstStage = int(np.argmax(affected)) + 1 if affected.any() else None
+
+    caseStages = get_case_stages(CaseName_list)
+    previousCases = [ind + 1 for ind, stage in enumerate(caseStages)
+                     if firstStage is None or 0 < stage < firstStage]
+    initialCase = previousCases[-1] if previousCases and firstStage else None
+
+    if firstStage is not None and initialCase is None:
+        # No result of the earlier stages to start from
+        firstStage = 1
+        previousCases = []
+
+    if previousExists:
+        close_model_results()
+    else:
+        St7API.St7CloseFile(1)
+
+    plan = {'firstStage': firstStage,
+            'stages': list(range(firstStage, numStages + 1))
+            if firstStage else [],
+            'initialFile_bt': previousResult_bt if initialCase else None,
+            'initialCase': initialCase,
+            'previousCases': previousCases}
+
+    if firstStage is None:
+        print('No stage is affected by the change')
+    else:
+        print('Re-solving stages %d to %d of %d'
+              % (firstStage, numStages, numStages))
+
+    return plan
+
+def resolve_changed_stages(modelname_bt, tempfolder_bt, logfilename_bt,
+                           resultfile_bt, previousResult_bt, changedGroups=(),
+                           changedPlates=(), **solverOptions):
+    """
+    Re-solve a staged nonlinear static analysis from the first stage affected
+    by a change, see plan_staged_solve. The new result file holds the cases
+    of the re-solved stages, plan['previousCases'] of previousResult_bt hold
+    the earlier stages.
+
+    Parameters
+    ----------
+    modelname_bt, tempfolder_bt, logfilename_bt, resultfile_bt : BYTE
+        As run_solver
+    previousResult_bt : BYTE
+        Encoded result file of the model before the change
+    changedGroups, changedPlates : LIST, optional
+        As plan_staged_solve
+    **solverOptions
+        Other run_solver options, e.g. runMode
 
     Returns
     -------
     ret : INTEGER
-        Return code API
+        Return code API, 0 when nothing was solved
+    plan : DICT
+        Staged solve plan
 
     """
-    
-    print('Start extract plate results')
 
-    # Open Model
-    ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
-    if ret != 0:
-        explain_error(ret)
-        St7API.St7Release()
-        print('Cannot open file')
-        sys.exit(1)
+    plan = plan_staged_solve(modelname_bt, tempfolder_bt, previousResult_bt,
+                             changedGroups, changedPlates)
+    if plan['firstStage'] is None:
+        return 0, plan
+
+    ret = run_solver(modelname_bt, tempfolder_bt, logfilename_bt,
+                     resultfile_bt, solverType='NonLinearStatic',
+                     initialFile_bt=plan['initialFile_bt'],
+                     initialCase=plan['initialCase'],
+                     stages=plan['stages'], **solverOptions)
+
+    return ret, plan
+
+def print_solver_progress(Progress):
+    """
+    Progress line of a watched solve, see St7LogWatcher
+
+    """
+
+    summary = St7LogWatcher.progress_summary(Progress)
+    line = ('Stage %d increment %d iteration %d, %.1f increments/min'
+            % (Progress['stage'], Progress['increment'],
+               Progress['iteration'], summary['incrementsPerMinute']))
+    if summary['eta'] is not None:
+        line += ', %.0f min to go' % (summary['eta'] / 60)
+    print(line)
+
+def open_result_cases(resultfile_bt):
+    """
+    Open a result file on uID 1 for the model already open there, e.g. the
+    result file being written by a running solver
+
+    Returns
+    -------
+    CaseName_list : LIST
+        Names of the primary result cases, None if the result file cannot be
+        opened yet
+
+    """
 
-    modelname = modelname_bt.decode()
-    Foldername = os.path.dirname(modelname) + "\\"
-    
-    # Open Result file
     numPrimary = ctypes.c_long()
     numSecondary = ctypes.c_long()
     CaseName = ctypes.create_string_buffer(St7API.kMaxStrLen)
-    
-    ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
-    	numPrimary, numSecondary)
-    
-    if ret != 0:
-        explain_error(ret)
-        print('Not able to open result file')
-        St7API.St7CloseFile(1)
-        print('Releasing API')
-        St7API.St7Release()
 
-    print('%d primary case(s) found' % numPrimary.value)
+    try:
+        ret = St7API.St7OpenResultFile(1, resultfile_bt, ''.encode(), True,
+                                       numPrimary, numSecondary)
+    except St7Error:
+        return None
+    if ret != 0:
+        return None
 
     CaseName_list = []
     for ind in range(1, numPrimary.value + 1):
         St7API.St7GetResultCaseName(1, ind, CaseName, St7API.kMaxStrLen)
         CaseName_list.append(CaseName.value.decode())
-        print(CaseName.value.decode())
 
-    # Set API storage values
-    GroupPlate = ctypes.c_long()
-    DblArrayRes = ctypes.c_double * 6
-    ForceRes = DblArrayRes()
-    MomentRes = DblArrayRes()
-    numPoints = ctypes.c_long()
-    numColumns = ctypes.c_long()
-    DblArrayT = ctypes.c_double * 2
-    PlateThickness = DblArrayT()
-    PlateArea = ctypes.c_double()
-    PlatePropID = ctypes.c_long()
-    
-    # Select Plates ID
-    PlateNum = []
-    
-    for ind in range(1, numPlates+1):
-    	St7API.St7GetElementGroup(1, St7API.tyPLATE, ind, GroupPlate)
-    	if GroupPlate.value in groupID:
-            PlateNum.append(ind)
-    print('%d plates will be extracted' % len(PlateNum))
+    return CaseName_list
 
-    # dictionnary for options
-    subtype = {'Local': St7API.stPlateLocal,
-               'Global': St7API.stPlateGlobal}
-    
-    sampleLocation = {'Centroid': St7API.AtCentroid,
-                      'Gauss': St7API.AtGaussPoints,
-                      'Nodesaveragenever': St7API.AtNodesAverageNever,
-                      'Nodesaverageall': St7API.AtNodesAverageAll,
-                      'Nodesaveragesame': St7API.AtNodesAverageSame}
-    
-    PlateSurface = {'Midplane': St7API.psPlateMidPlane,
-                    'Zplus': St7API.psPlateZPlus,
-                    'Zminus': St7API.psPlateZMinus}
-    
-    StgNames = []
+def get_last_converged_case(resultfile_bt):
+    """
+    Last converged primary case of a result file, the state a warm started
+    solve continues from. A model must be open on uID 1.
 
-    for ind, casename in enumerate(CaseName_list):
-        print('Start extracting data for case number %d %s' % (ind, casename))
-    
-        PlateId = []
-        PlateT = []
-        PlateA = []
-        ForceXX = []
-        ForceYY = []
-        ForceZZ = []
-        ForceXY = []
-        ForceXZ = []
-        ForceYZ = []
-        MomentXX = []
-        MomentYY = []
-        MomentZZ = []
-        MomentXY = []
-        MomentYZ = []
-        MomentZX = []
-        PropertyID = []
-        
-        for platePos in PlateNum:
-            # Extract plate forces
-            St7API.St7GetPlateResultArray(1, St7API.rtPlateForce,
-                                          subtype[ResultAxis.capitalize()],
-                                          platePos, ind+1,
-                                          sampleLocation[
-                                                  ResultLocation.capitalize()
-                                                  ],
-                                          PlateSurface[PlateSurf.capitalize()],
-                                          1, numPoints, numColumns, ForceRes)
-            # Extract plate moments
-            St7API.St7GetPlateResultArray(1, St7API.rtPlateMoment,
-                                          subtype[ResultAxis.capitalize()],
-                                          platePos, ind+1,
-                                          sampleLocation[
-                                                  ResultLocation.capitalize()
-                                                  ],
-                                          PlateSurface[PlateSurf.capitalize()],
-                                          1, numPoints, numColumns, MomentRes)
-            # Extract plate thickness
-            St7API.St7GetElementProperty(1, St7API.tyPLATE, platePos, PlatePropID)
-            St7API.St7GetPlateThickness(1, PlatePropID.value, PlateThickness)
-
-            # Extract plate area
-            St7API.St7GetElementData(1, St7API.tyPLATE,platePos, PlateArea)
-            
-            if PlateThickness[1] > minthickness:
-                
-                for ptpos in range(0, numPoints.value):
-                        
-                        indpos = ptpos * numColumns.value
-                        PropertyID.append(PlatePropID.value)
-                        PlateId.append(platePos)
-                        PlateT.append(PlateThickness[1])
-                        PlateA.append(PlateArea.value)
-                        
-                        if subtype[ResultAxis.capitalize()] == St7API.stPlateLocal:
-                            ForceXX.append(ForceRes[indpos + St7API.ipPlateLocalxx])
-                            ForceYY.append(ForceRes[indpos + St7API.ipPlateLocalyy])
-                            ForceXY.append(ForceRes[indpos + St7API.ipPlateLocalxy])
-                            ForceXZ.append(ForceRes[indpos + St7API.ipPlateLocalxz])
-                            ForceYZ.append(ForceRes[indpos + St7API.ipPlateLocalyz])
-                            MomentXX.append(MomentRes[indpos + St7API.ipPlateLocalxx])
-                            MomentYY.append(MomentRes[indpos + St7API.ipPlateLocalyy])
-                            MomentXY.append(MomentRes[indpos + St7API.ipPlateLocalxy])
-                
-                        elif subtype[ResultAxis.capitalize()] == St7API.stPlateGlobal:
-                            ForceXX.append(ForceRes[indpos + St7API.ipPlateGlobalXX])
-                            ForceYY.append(ForceRes[indpos + St7API.ipPlateGlobalYY])
-                            ForceZZ.append(ForceRes[indpos + St7API.ipPlateGlobalZZ])
-                            ForceXY.append(ForceRes[indpos + St7API.ipPlateGlobalXY])
-                            ForceXZ.append(ForceRes[indpos + St7API.ipPlateGlobalZX])
-                            ForceYZ.append(ForceRes[indpos + St7API.ipPlateGlobalYZ])
-                            MomentXX.append(MomentRes[indpos + St7API.ipPlateGlobalXX])
-                            MomentYY.append(MomentRes[indpos + St7API.ipPlateGlobalYY])
-                            MomentZZ.append(MomentRes[indpos + St7API.ipPlateGlobalZZ])
-                            MomentXY.append(MomentRes[indpos + St7API.ipPlateGlobalXY])
-                            MomentYZ.append(MomentRes[indpos + St7API.ipPlateGlobalYZ])
-                            MomentZX.append(MomentRes[indpos + St7API.ipPlateGlobalZX])
+    Parameters
+    ----------
+    resultfile_bt : BYTE
+        Encoded result file name
 
-        
-        # Create a dataframe to store the output data
-        if subtype[ResultAxis.capitalize()] == St7API.stPlateLocal:
-            DF = pd.DataFrame(data={'PlateId': PlateId,
-                                    'Plate Thickness (m)': PlateT,
-                                    'Force (xx) (MN/m)': ForceXX,
-                                    'Force (yy) (MN/m)': ForceYY,
-                                    'Force (xy) (MN/m)': ForceXY,
-                                    'Moment (xx) (MN.m/m)': MomentXX,
-                                    'Moment (yy) (MN.m/m)': MomentYY,
-                                    'Moment (xy) (MN.m/m)': MomentXY,
-                                    'Plate Area (m2)': PlateA,
-                                    'Property ID' : PropertyID
-                                    },
-                columns=['PlateId', 'Plate Thickness (m)', 'Force (xx) (MN/m)', 'Force (yy) (MN/m)',
-                         'Force (xy) (MN/m)', 'Moment (xx) (MN.m/m)',
-                         'Moment (yy) (MN.m/m)', 'Moment (xy) (MN.m/m)', 'Plate Area (m2)', 'Property ID'])
-        
-        elif subtype[ResultAxis.capitalize()] == St7API.stPlateGlobal:
-            DF = pd.DataFrame(data={'PlateId': PlateId,
-                                    'Force (XX) (MN/m)': ForceXX,
-                                    'Force (YY) (MN/m)': ForceYY,
-                                    'Force (ZZ) (MN/m)': ForceZZ,
-                                    'Force (XY) (MN/m)': ForceXY,
-                                    'Force (YZ) (MN/m)': ForceYZ,
-                                    'Force (ZX) (MN/m)': ForceXZ,
-                                    'Moment (XX) (MN.m/m)': MomentXX,
-                                    'Moment (YY) (MN.m/m)': MomentYY,
-                                    'Moment (ZZ) (MN.m/m)': MomentZZ,
-                                    'Moment (XY) (MN.m/m)': MomentXY,
-                                    'Moment (YZ) (MN.m/m)': MomentYZ,
-                                    'Moment (ZX) (MN.m/m)': MomentZX
-                                    },
-                columns=['PlateId', 'Force (XX) (MN/m)', 'Force (YY) (MN/m)',
-                         'Force (ZZ) (MN/m)', 'Force (XY) (MN/m)',
-                         'Force (YZ) (MN/m)', 'Force (ZX) (MN/m)',
-                         'Moment (XX) (MN.m/m)', 'Moment (YY) (MN.m/m)',
-                         'Moment (ZZ) (MN.m/m)', 'Moment (XY) (MN.m/m)',
-                         'Moment (YZ) (MN.m/m)', 'Moment (ZX) (MN.m/m)'])
-        
-        
-        stgname = casename.replace(' ', '').replace(':', '_').replace('Increment[', '').replace(']','')
-        stgname = 'ES_Inputs_' + stgname
-        
-        x = re.search('Reset',stgname) 
-        
-    
-        if (x):
-            print('skipped reset stage')
-        else:
-            csvOutFile = Foldername + stgname + '.csv'
-            print('Saved in csv file ' + csvOutFile)
-            DF.to_csv(csvOutFile, index=False)
-            
-            StgNames.append(stgname+'.csv')
-    
-    ret = St7API.St7CloseResultFile(1)
-    if ret == 0:
-        print('Result File closed')
-    ret = St7API.St7CloseFile(1)
-    if ret == 0:
-        print('Model File closed')
+    Returns
+    -------
+    caseNum : INTEGER
+        Case number, the last case if no case reports convergence
 
-    return ret
+    """
 
-def export_platenodes(modelname_bt, tempfolder_bt, groupID, numNodes, numPlates, minthickness):
-    print('Start extract node co-ordinates and plate vertices')
+    CaseName_list = open_result_cases(resultfile_bt)
+    if CaseName_list is None:
+        raise IOError('Cannot open result file ' + resultfile_bt.decode())
 
-    # Open Model
-    ret = St7API.St7OpenFile(1, modelname_bt, tempfolder_bt)
-    if ret != 0:
-        explain_error(ret)
-        St7API.St7Release()
-        print('Cannot open file')
-        sys.exit(1)
+    Converged = ctypes.c_bool()
+    caseNum = len(CaseName_list)
+    with collect_errors():
+        for ind in range(len(CaseName_list), 0, -1):
+            ret = St7API.St7GetResultCaseConvergence(1, ind, Converged)
+            # Linear results have no convergence flag
+            if ret != 0 or Converged.value:
+                caseNum = ind
+                break
+    St7API.St7CloseResultFile(1)
 
-    modelname = modelname_bt.decode()
+    return caseNum
 
-    # Set API storage values
-    XYZType = ctypes.c_double * 3
-    NodeXYZ = XYZType()
-    PlateType = ctypes.c_long * 20
-    PlateNodes = PlateType()
-    GroupPlate = ctypes.c_long()
-    PlateThickness = ctypes.c_double()
-    PlatePropID = ctypes.c_long()
-    groupname = ctypes.create_string_buffer(St7API.kMaxStrLen)
-    GroupNum = ctypes.c_long()
-    
-    # Select Plates 
-    NodeX = []
-    NodeY = []
-    NodeZ = []
-    N1 = []
-    N2 = []
-    N3 = []
-    N4 = []
-    PlateID = []
-    GroupID = []
-    
-    for ind in range(1, numNodes+1):
-        St7API.St7GetNodeXYZ(1, ind, NodeXYZ)
-        NodeX.append(NodeXYZ[0])
-        NodeY.append(NodeXYZ[1])
-        NodeZ.append(NodeXYZ[2])
-        
-    for ind in range(1, numPlates+1):
-    	
-        St7API.St7GetElementProperty(1, St7API.tyPLATE, ind, PlatePropID)
-        St7API.St7GetPlateThickness(1, PlatePropID.value, PlateThickness)
-        St7API.St7GetElementGroup(1, St7API.tyPLATE, ind, GroupPlate)
-        St7API.St7GetEntityGroup(1, St7API.tyPLATE, ind, GroupNum)
-        St7API.St7GetGroupIDName(1, GroupNum.value, groupname,St7API.kMaxStrLen)
-        
-        if GroupPlate.value in groupID and PlateThickness.value > minthickness:
-            
-            St7API.St7GetElementConnection(1, St7API.tyPLATE, ind, PlateNodes)
-            N1.append(PlateNodes[1])
-            N2.append(PlateNodes[2])
-            N3.append(PlateNodes[3])
-            if PlateNodes[0] == 3:
-                N4.append(" ")
+def stage_streamer(extract, resultfile_bt):
+    """
+    Callback of St7LogWatcher.watch_solver extracting the result cases of
+    each stage as soon as the running solver moves on to the next stage.
+    Without stage lines in the log, every case but the last written one is
+    complete and the result file is read when a new increment starts. The
+    model must be open on uID 1.
+
+    Parameters
+    ----------
+    extract : FUNCTION
+        extract(caseNums, CaseName_list) called with the result file open on
+        uID 1 for the new complete cases, Reset stages excluded, e.g.
+        plate_stage_extractor
+    resultfile_bt : BYTE
+        Encoded Result file name written by the solver
+
+    Returns
+    -------
+    callback : FUNCTION
+        callback(Progress)
+
+    """
+
+    extracted = set()
+    polled = [None]
+
+    def callback(Progress):
+        print_solver_progress(Progress)
+        finished = Progress['status'] == 'finished'
+
+        # The result file is only reopened when a stage, or an increment
+        # without stage lines, was completed since the last read
+        position = ('stage', Progress['stage']) if Progress['stage'] \
+            else ('increment', Progress['increments'])
+        if not finished and position == polled[0]:
+            return
+
+        CaseName_list = open_result_cases(resultfile_bt)
+        if CaseName_list is None:
+            return
+        polled[0] = position
+
+        try:
+            caseStages = get_case_stages(CaseName_list)
+            if finished:
+                complete = range(1, len(CaseName_list) + 1)
+            elif Progress['stage']:
+                complete = [ind + 1 for ind, stage in enumerate(caseStages)
+                            if 0 < stage < Progress['stage']]
             else:
-                N4.append(PlateNodes[4])
-            PlateID.append(ind)
-            GroupID.append(groupname.value.decode())
-            
-            
-    print('%d nodes will be extracted' % len(NodeX))
-    print('%d plates will be extracted' % len(N1))
-    
-    DF = pd.DataFrame(list(zip(NodeX,NodeY,NodeZ)))
-    DF.to_csv('{}_Nodes.csv'.format(os.path.splitext(modelname)[0]), index=False, header=False)
-    DF2 = pd.DataFrame(list(zip(N1,N2,N3,N4,PlateID,GroupID)))
-    DF2.to_csv('{}_Plates.csv'.format(os.path.splitext(modelname)[0]), index=False, header=False)
-    
-    ret = St7API.St7CloseFile(1)
-    if ret == 0:
-        print('Model File closed')
+                complete = range(1, len(CaseName_list))
+
+            newCases = [caseNum for caseNum in complete
+                        if caseNum not in extracted]
+            caseNums = select_cases(CaseName_list, newCases)
+            if caseNums:
+                print('Extracting %d case(s) while the solver runs'
+                      % len(caseNums))
+                extract(caseNums, CaseName_list)
+            extracted.update(newCases)
+        finally:
+            St7API.St7CloseResultFile(1)
+
+    return callback
+
+def plate_stage_extractor(groupID, numPlates, folder,
+                          ResultTypes=('Force', 'Moment'), ResultAxis='Local',
+                          PlateSurf='Midplane'):
+    """
+    Extract function of stage_streamer writing the plate centroid results of
+    each case to <folder>/plateresults_<stage>.npz
 
-    return ret
+    Parameters
+    ----------
+    groupID : LIST
+        List of integer of the groups to extract
+    numPlates : INTEGER
+        Total number of Plates
+    folder : STRING
+        Output folder
+    ResultTypes : LIST, optional
+        DEFAULT is ('Force', 'Moment')
+        Force, Moment or Stress
+    ResultAxis : STRING, optional
+        DEFAULT is 'Local'
+        Local or Global
+    PlateSurf : STRING, optional
+        DEFAULT is 'Midplane'
+        Midplane, Zplus or Zminus
+
+    Returns
+    -------
+    extract : FUNCTION
+        extract(caseNums, CaseName_list)
+
+    """
+
+    ResultOptions = {'Force': St7API.rtPlateForce,
+                     'Moment': St7API.rtPlateMoment,
+                     'Stress': St7API.rtPlateStress}
+    ResultSubType = {'Local': St7API.stPlateLocal,
+                     'Global': St7API.stPlateGlobal}[ResultAxis.capitalize()]
+
+    # Plates of the groups, found on the first call with the model open
+    PlateNum = []
+
+    def extract(caseNums, CaseName_list):
+        if not PlateNum:
+            PlateNum.append(get_group_entities(St7API.tyPLATE, numPlates,
+                                               groupID))
+
+        for caseNum in caseNums:
+            arrays = {}
+            for resName in ResultTypes:
+                data, offsets = sample_element_results(
+                    St7API.tyPLATE, PlateNum[0], caseNum,
+                    ResultOptions[resName.capitalize()], ResultSubType,
+                    'Centroid', PlateSurf)
+                arrays[resName.capitalize()] = data[:, 0, :]
+            stgname = get_stage_name(CaseName_list[caseNum - 1])
+            save_results(os.path.join(folder, 'plateresults_' + stgname),
+                         'npz', PlateNum=PlateNum[0], **arrays)
+
+    return extract
 
 def run_solver(modelname_bt, tempfolder_bt, logfilename_bt, resultfile_bt,
                solverType='NonLinearStatic', runMode='Normal',
-               schemeType='Direct Sparse', nodeOrdering='AMD',
-               startNodeNum=1, nonLinGeo=True, nonLinMaterial=True):
+               schemeType=None, nodeOrdering=None,
+               startNodeNum=1, nonLinGeo=True, nonLinMaterial=True,
+               initialFile_bt=None, initialCase=None, restartFile_bt=None,
+               saveRestart=False, lastRestartStep=False, stages=None,
+               resultOutput=None, solverDefaults=None, useProfile=True,
+               watchLog=None, numStages=None, extractStages=None):
     """
     Run Solver function
 
@@ -2029,13 +4193,15 @@ def run_solver(modelname_bt, tempfolder_bt, logfilename_bt, resultfile_bt,
     schemeType : STRING, optional
         Scheme used for the solution of the linear system arising from the
         Finite Element model
-        DEFAULT is 'Direct Sparse'.
+        DEFAULT is None, the tuned profile of the model family when
+        useProfile, otherwise 'Direct Sparse'.
         Skyline - Skyline, works best with Tree and Geometry ordering
         Direct Sparse - Direct Sparse
         Iterative - Iterative PCG
     nodeOrdering : TYPE, optional
         Node number re-ordering strategy used by the solver
-        DEFAULT is 'AMD'.
+        DEFAULT is None, the tuned profile of the model family when
+        useProfile, otherwise 'AMD'.
         None - no reordering.
         Tree - Tree ordering.
         Geometry - Geometry.
@@ -2049,11 +4215,49 @@ def run_solver(modelname_bt, tempfolder_bt, logfilename_bt, resultfile_bt,
     nonLinMaterial : BOOLEAN, optional
         State of the Nonlinear material option for Nonlinear analyses
         DEFAULT is True.
+    initialFile_bt, initialCase, restartFile_bt, saveRestart, lastRestartStep
+        Warm start options of the nonlinear static solver, see set_warm_start
+        DEFAULT is a solve from scratch without restart data
+    stages : LIST, optional
+        Stages of a staged nonlinear static analysis to solve, the other
+        stages are disabled, see set_solver_stages
+        DEFAULT is None, stages as set in the model
+    resultOutput : DICT, optional
+        Groups, properties and entity results written to the result file,
+        keyword arguments of set_result_output, e.g.
+        {'groups': [2, 3], 'entityResults': {'PlateStrain': False}}
+        DEFAULT is None, results as set in the model
+    solverDefaults : DICT, optional
+        Solver default values by St7API constant name, see
+        set_solver_defaults, e.g. {'spMaxIterationNonlin': 50}
+        DEFAULT is None, the tuned profile values when useProfile
+    useProfile : BOOLEAN, optional
+        Use the profile found by tune_solver for the model family when
+        schemeType, nodeOrdering or solverDefaults are not given
+        DEFAULT is True
+    watchLog : DICT, optional
+        Abort rules of St7LogWatcher, the solver is started as a separate
+        process and its log followed until it ends or a rule fires.
+        True uses St7LogWatcher.DefaultRules
+        DEFAULT is None, wait for the solver without reading the log
+    numStages : INTEGER, optional
+        Number of stages solved, for the remaining time printed while the
+        log is watched
+        DEFAULT is None
+    extractStages : FUNCTION, optional
+        extract(caseNums, CaseName_list) called for the result cases of each
+        stage completed while the solver runs, see stage_streamer and
+        plate_stage_extractor. The log is watched, with watchLog rules when
+        given.
+        DEFAULT is None, no extraction during the solve
 
     Returns
     -------
     ret : INTEGER
         Return code API
+    Progress : DICT
+        Only with watchLog or extractStages, final progress of
+        St7LogWatcher.watch_solver
 
     """
 
@@ -2061,8 +4265,6 @@ def run_solver(modelname_bt, tempfolder_bt, logfilename_bt, resultfile_bt,
     
     if ret != 0:
     	explain_error(ret)
-    	print('Releasing API')
-    	St7API.St7Release()
 
     schemeOptions = {'Skyline': St7API.stSkyline,
                      'Direct Sparse': St7API.stSparse,
@@ -2089,19 +4291,26 @@ def run_solver(modelname_bt, tempfolder_bt, logfilename_bt, resultfile_bt,
                      'LoadInfluence': St7API.stLoadInfluenceSolver,
                      'QuasiStatic': St7API.stQuasiStaticSolver}
     
+    if useProfile and None in (schemeType, nodeOrdering, solverDefaults):
+        profile = get_solver_profile(solverType)
+        if profile:
+            schemeType = schemeType or profile['schemeType']
+            nodeOrdering = nodeOrdering or profile['nodeOrdering']
+            if solverDefaults is None:
+                solverDefaults = profile['solverDefaults']
+
+    schemeType = schemeType or 'Direct Sparse'
+    nodeOrdering = nodeOrdering or 'AMD'
+
     ret = St7API.St7SetSolverScheme(1, schemeOptions[schemeType])
     if ret != 0:
         explain_error(ret)
-        print('Releasing API')
-        St7API.St7Release()
     else:
         print('Scheme Option: %s' % schemeType)
 
     ret = St7API.St7SetSolverSort(1, sortOptions[nodeOrdering])
     if ret != 0:
          explain_error(ret)
-         print('Releasing API')
-         St7API.St7Release()
     else:
         print('Node Sorting Option: %s' % nodeOrdering)
     
@@ -2109,8 +4318,6 @@ def run_solver(modelname_bt, tempfolder_bt, logfilename_bt, resultfile_bt,
         ret = St7API.St7SetSolverTreeStartNumber(1, startNodeNum)
         if ret != 0:
             explain_error(ret)
-            print('Releasing API')
-            St7API.St7Release()
         else:
             print('Starting at node %d' % startNodeNum)
     
@@ -2118,8 +4325,6 @@ def run_solver(modelname_bt, tempfolder_bt, logfilename_bt, resultfile_bt,
         ret = St7API.St7SetSolverNonlinearGeometry(1, St7API.btTrue)
         if ret != 0:
             explain_error(ret)
-            print('Releasing API')
-            St7API.St7Release()
         else:
             print('Non Linear Geometry set as True')
     
@@ -2127,25 +4332,337 @@ def run_solver(modelname_bt, tempfolder_bt, logfilename_bt, resultfile_bt,
         St7API.St7SetSolverNonlinearMaterial(1, St7API.btTrue)
         if ret != 0:
             explain_error(ret)
-            print('Releasing API')
-            St7API.St7Release()
         else:
             print('Non Linear Material set as True')
     
+    if solverType == 'NonLinearStatic':
+        set_warm_start(initialFile_bt, initialCase, restartFile_bt,
+                       saveRestart, lastRestartStep)
+        if stages is not None:
+            set_solver_stages(stages)
+
+    if resultOutput:
+        set_result_output(**resultOutput)
+
+    if solverDefaults:
+        set_solver_defaults(solverDefaults)
+
     St7API.St7SetResultLogFileName(1, logfilename_bt)
     St7API.St7SetResultFileName(1, resultfile_bt)
     
-    ret = St7API.St7RunSolver(1, solverOptions[solverType],
-                              runModeOptions[runMode], St7API.btTrue)
-    if ret != 0:
-        explain_error(ret)
-        print('Releasing API')
-        St7API.St7Release()
+    watched = bool(watchLog or extractStages)
+    if watched:
+        rules = watchLog if isinstance(watchLog, dict) else None
+        callback = print_solver_progress
+        if extractStages is not None:
+            callback = stage_streamer(extractStages, resultfile_bt)
+        ProcessHandle = ctypes.c_long()
+        ret = St7API.St7RunSolverProcess(1, solverOptions[solverType],
+                                         runModeOptions[runMode],
+                                         St7API.btFalse, ProcessHandle)
+        if ret != 0:
+            explain_error(ret)
+        Progress = St7LogWatcher.watch_solver(
+            ProcessHandle.value, logfilename_bt.decode(), rules, numStages,
+            callback=callback)
+        print('Solver %s' % Progress['status'])
     else:
-        print('Solver executed')
+        ret = St7API.St7RunSolver(1, solverOptions[solverType],
+                                  runModeOptions[runMode], St7API.btTrue)
+        if ret != 0:
+            explain_error(ret)
+        else:
+            print('Solver executed')
     
     ret = St7API.St7CloseFile(1)
     if ret == 0:
         print('Model File closed')
-   
-    return ret
\ No newline at end of file
+
+    if watched:
+        return ret, Progress
+
+    return ret
+
+def set_solver_defaults(solverDefaults):
+    """
+    Set solver default values of the model open on uID 1
+
+    Parameters
+    ----------
+    solverDefaults : DICT
+        Value of each solver default by St7API constant name, BOOLEAN values
+        set the logical defaults, INTEGER the integer and FLOAT the double
+        ones, e.g. {'spMaxIterationNonlin': 50, 'spNonlinDispTolerance': 1e-3}
+
+    Returns
+    -------
+    None.
+
+    """
+
+    for name, value in solverDefaults.items():
+        const = getattr(St7API, name)
+        if isinstance(value, bool):
+            ret = St7API.St7SetSolverDefaultsLogical(1, const, value)
+        elif isinstance(value, int):
+            ret = St7API.St7SetSolverDefaultsInteger(1, const, value)
+        else:
+            ret = St7API.St7SetSolverDefaultsDouble(1, const, value)
+        if ret != 0:
+            explain_error(ret)
+        print('Solver default %s set to %s' % (name, value))
+
+# Tuned solver profiles, keyed by model family then solver type
+SolverProfileFile = os.path.join(os.path.expanduser('~'),
+                                 'St7SolverProfiles.json')
+
+# Result file extension of each solver type
+ResultExtensions = {'LinearStatic': '.LSA', 'LinearBuckling': '.LBA',
+                    'NonLinearStatic': '.NLA', 'NaturalFrequency': '.NFA',
+                    'Harmonic': '.HRA', 'Spectral': '.SRA',
+                    'LinearDynamic': '.LTA', 'NonLinearDynamic': '.NTA',
+                    'SteadyHeat': '.HSA', 'TransientHeat': '.HTA',
+                    'LoadInfluence': '.LIA', 'QuasiStatic': '.QSA'}
+
+def get_entity_totals():
+    """
+    Number of 'Nodes', 'Beams', 'Plates', 'Bricks' of the model open on uID 1
+
+    """
+
+    EntTypes = ((St7API.tyNODE, 'Nodes'), (St7API.tyBEAM, 'Beams'),
+                (St7API.tyPLATE, 'Plates'), (St7API.tyBRICK, 'Bricks'))
+
+    nEnt = ctypes.c_long()
+    entTots = {}
+    for (entTy, entName) in EntTypes:
+        St7API.St7GetTotal(1, entTy, nEnt)
+        entTots[entName] = nEnt.value
+
+    return entTots
+
+def model_family(entTots):
+    """
+    Profile key of a model: number of nodes in half decades and fraction of
+    beams, plates and bricks, e.g. 'Nodes1e5.5_Beams0.0_Plates0.9_Bricks0.1'
+
+    """
+
+    numElements = entTots['Beams'] + entTots['Plates'] + entTots['Bricks']
+    size = round(np.log10(max(entTots['Nodes'], 1)) * 2) / 2
+    mix = ['%s%.1f' % (name, entTots[name] / numElements if numElements else 0)
+           for name in ('Beams', 'Plates', 'Bricks')]
+
+    return '_'.join(['Nodes1e%.1f' % size] + mix)
+
+def load_solver_profiles(profileFile=None):
+    """
+    Tuned solver profiles of every model family, empty if none was saved
+
+    """
+
+    profileFile = profileFile or SolverProfileFile
+    if not os.path.exists(profileFile):
+        return {}
+
+    with open(profileFile) as f:
+        return json.load(f)
+
+def get_solver_profile(solverType, profileFile=None):
+    """
+    Tuned profile of the model open on uID 1 for a solver type
+
+    Returns
+    -------
+    profile : DICT
+        schemeType, nodeOrdering and solverDefaults of the fastest trial of
+        tune_solver, None if the model family was not tuned
+
+    """
+
+    family = model_family(get_entity_totals())
+    profile = load_solver_profiles(profileFile).get(family, {}).get(solverType)
+    if profile:
+        print('Solver profile of %s: %s, %s ordering'
+              % (family, profile['schemeType'], profile['nodeOrdering']))
+
+    return profile
+
+def run_with_peak_memory(func, interval=0.2):
+    """
+    Call func while sampling the resident memory of this process and its
+    child processes (the solver)
+
+    Returns
+    -------
+    result
+        Return value of func
+    peakMemory : INTEGER
+        Peak resident memory in bytes, None without psutil
+
+    """
+
+    if psutil is None:
+        return func(), None
+
+    process = psutil.Process()
+    peak = [0]
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            try:
+                memory = process.memory_info().rss
+                for child in process.children(recursive=True):
+                    memory += child.memory_info().rss
+            except psutil.Error:
+                # A child process ended between the two calls
+                memory = 0
+            peak[0] = max(peak[0], memory)
+            done.wait(interval)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        result = func()
+    finally:
+        done.set()
+        sampler.join()
+
+    return result, peak[0]
+
+def tune_solver(modelname_bt, tempfolder_bt, solverType='NonLinearStatic',
+                schemes=('Skyline', 'Direct Sparse', 'Iterative'),
+                orderings=('None', 'Tree', 'Geometry', 'AMD'),
+                defaultsGrid=None, trialStages=(1,), trialIncrements=5,
+                profileFile=None):
+    """
+    Short trial solves of every scheme, node ordering and solver defaults
+    combination. The fastest is saved as the profile of the model family,
+    used by the next run_solver calls on models of the same family.
+
+    Each trial is capped: only trialStages are solved and the log of the
+    solver is watched, the trial is stopped once trialIncrements increments
+    are solved. The trials are compared on the time to reach the cap, a
+    solve ending before it counts as a complete trial.
+
+    Parameters
+    ----------
+    modelname_bt : BYTE
+        Encoded Input Model file name
+    tempfolder_bt : BYTE
+        Encoded Temporary folder location
+    solverType : STRING, optional
+        DEFAULT is 'NonLinearStatic', see run_solver
+    schemes : LIST, optional
+        Schemes tried, see run_solver
+        DEFAULT is every scheme
+    orderings : LIST, optional
+        Node orderings tried, see run_solver
+        DEFAULT is every ordering
+    defaultsGrid : DICT, optional
+        Values tried for solver defaults by St7API constant name, e.g.
+        {'spMaxUpdateInterval': [1, 5]}
+        DEFAULT is None, the model solver defaults
+    trialStages : LIST, optional
+        Stages solved by the trials of a staged nonlinear static analysis
+        DEFAULT is (1,), the first stage
+    trialIncrements : INTEGER, optional
+        Increments solved by each trial of a nonlinear solver, the solver
+        process is then terminated, see St7LogWatcher maxIncrements. None
+        for complete trial solves
+        DEFAULT is 5
+    profileFile : STRING, optional
+        DEFAULT is None, SolverProfileFile
+
+    Returns
+    -------
+    profile : DICT
+        Fastest combination with its time, peak memory and every trial,
+        None if every trial failed
+
+    """
+
+    print('Start tuning the solver')
+
+    modelname = modelname_bt.decode()
+    tempfolder = tempfolder_bt.decode()
+
+    open_model(modelname_bt, tempfolder_bt)
+    family = model_family(get_entity_totals())
+    numStages = ctypes.c_long()
+    St7API.St7GetNumStages(1, numStages)
+    St7API.St7CloseFile(1)
+
+    stages = None
+    if solverType == 'NonLinearStatic' and numStages.value and trialStages:
+        stages = list(trialStages)
+
+    stem = os.path.join(tempfolder, 'St7Tune')
+    resultfile = stem + ResultExtensions[solverType]
+    logfile = stem + '.log'
+
+    # The cap is an abort rule of the log watcher, the other rules keep
+    # their defaults
+    watchLog = {'maxIncrements': trialIncrements}
+
+    defaultsGrid = defaultsGrid or {}
+    defaultNames = list(defaultsGrid)
+    trials = []
+    for scheme, ordering, values in itertools.product(
+            schemes, orderings,
+            itertools.product(*[defaultsGrid[name] for name in defaultNames])):
+        solverDefaults = dict(zip(defaultNames, values))
+        trial = {'schemeType': scheme, 'nodeOrdering': ordering,
+                 'solverDefaults': solverDefaults}
+        print('Trial %s, %s ordering %s' % (scheme, ordering, solverDefaults))
+
+        t0 = time.perf_counter()
+        try:
+            (ret, Progress), peak = run_with_peak_memory(
+                lambda: run_solver(modelname_bt, tempfolder_bt,
+                                   logfile.encode(), resultfile.encode(),
+                                   solverType, 'Background', scheme, ordering,
+                                   stages=stages,
+                                   solverDefaults=solverDefaults,
+                                   useProfile=False, watchLog=watchLog))
+            capped = Progress['status'] == 'aborted' and trialIncrements \
+                and Progress['increments'] > trialIncrements
+            if ret != 0 or (Progress['status'] == 'aborted' and not capped):
+                trial['status'] = 'error'
+                trial['error'] = Progress['reason']
+            else:
+                trial['status'] = 'ok'
+            trial['increments'] = Progress['increments']
+        except St7Error as error:
+            St7API.St7CloseFile(1)
+            peak = None
+            trial['status'] = 'error'
+            trial['error'] = str(error)
+        trial['seconds'] = time.perf_counter() - t0
+        trial['peakMemory'] = peak
+        trials.append(trial)
+
+        for fileName in (resultfile, logfile):
+            if os.path.exists(fileName):
+                os.remove(fileName)
+
+    completed = [trial for trial in trials if trial['status'] == 'ok']
+    if not completed:
+        print('Every trial solve failed, no profile saved')
+        return None
+
+    best = min(completed, key=lambda trial: trial['seconds'])
+    profile = dict(best, solverType=solverType, model=modelname,
+                   trials=trials)
+
+    profiles = load_solver_profiles(profileFile)
+    profiles.setdefault(family, {})[solverType] = profile
+    with open(profileFile or SolverProfileFile, 'w') as f:
+        json.dump(profiles, f, indent=2)
+
+    print('Fastest of %d trials for %s: %s, %s ordering in %.1f s'
+          % (len(trials), family, best['schemeType'], best['nodeOrdering'],
+             best['seconds']))
+
+    return profile
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+The tests run the toolbox against the simulated St7API backend of the
+benchmarks, Strand7 is not needed
+"""
+
+import os
+import sys
+
+RepoFolder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(RepoFolder, 'Benchmarks'), RepoFolder]
+# After the repository, its St7API.py binding is never imported first
+sys.path.append(os.path.join(RepoFolder, 'Evolutionary Stiffness'))
+
+import St7API_Sim
+
+sys.modules['St7API'] = St7API_Sim
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+Options of the headless batch runner
+"""
+
+import pytest
+
+import St7API_Sim
+import St7Batch
+
+
+@pytest.mark.parametrize('operation, axis', [
+    ('export-shear', 'Global'), ('export-cw', 'Principal'),
+    ('export-es', 'Principal')])
+def test_unsupported_axis_option(operation, axis):
+    with pytest.raises(SystemExit):
+        St7Batch.build_parser().parse_args([operation, 'Model.st7',
+                                            '--axis', axis])
+
+
+def test_supported_axis_option():
+    args = St7Batch.build_parser().parse_args(['export-beams', 'Model.st7',
+                                               '--axis', 'Principal'])
+    assert args.axis == 'Principal'
+
+
+def test_job_axis_checked_before_running():
+    St7API_Sim.build_model(4, 2)
+    jobs = [{'operation': 'export-es', 'model': 'A.st7', 'axis': 'global'},
+            {'operation': 'export-shear', 'model': 'B.st7', 'axis': 'Global'}]
+
+    with pytest.raises(ValueError, match='Job 2'):
+        St7Batch.run_jobs(jobs)
+    assert 'St7Init' not in St7API_Sim.CallCounts
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Beam station extraction
+"""
+
+import numpy as np
+
+import St7API_Sim
+import St7Toolbox_JA
+
+
+def test_stations_of_each_beam(tmp_path):
+    Model = St7API_Sim.build_model(10, 2, numBeams=6, numGroups=1)
+    modelname_bt = str(tmp_path / 'model.st7').encode()
+
+    Stations, BeamNum, BeamLength = St7Toolbox_JA.export_beam_stations(
+        modelname_bt, str(tmp_path).encode(), b'model.NLA', [1], 6,
+        minStations=3, OutputFormat='none')
+
+    assert list(BeamNum) == [1, 2, 3, 4, 5, 6]
+    StationPos, StationRes, offsets = Stations[1]
+    assert list(offsets) == [0, 3, 6, 9, 12, 15, 18]
+
+    for ind, beamNum in enumerate(BeamNum):
+        first, last = offsets[ind], offsets[ind + 1]
+        expected = Model['BeamRes'][beamNum - 1, :6] + np.arange(3)[:, None]
+        np.testing.assert_allclose(StationRes[first:last], expected)
+        np.testing.assert_allclose(StationPos[first:last],
+                                   np.linspace(0, BeamLength[ind], 3))
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Cases of several result files gathered in a combined result file
+"""
+
+import pytest
+
+import St7API_Sim
+import St7Toolbox_JA
+
+
+def test_case_mapping(tmp_path):
+    St7API_Sim.build_model(4, 3)
+    ResultFiles = [b'Stage1.NLA', b'Stage2.NLA', b'Stage3.NLA']
+
+    caseMap = St7Toolbox_JA.combine_result_files(
+        str(tmp_path / 'model.st7').encode(), str(tmp_path).encode(),
+        b'Combined.NLA', ResultFiles, cases={0: [2], 2: [1, 3]})
+
+    Comb = St7API_Sim.Model['ResultFileComb']
+    assert Comb['Files'] == ResultFiles
+    assert [case['CaseName'] for case in Comb['Cases']] == \
+        [casename for resultfile, caseNum, casename in caseMap]
+    assert [(resultfile, caseNum) for resultfile, caseNum, _ in caseMap][:3] \
+        == [('Stage1.NLA', 2), ('Stage2.NLA', 1), ('Stage2.NLA', 2)]
+
+    for (resultfile, caseNum, casename), case in zip(caseMap, Comb['Cases']):
+        fileNum = ResultFiles.index(resultfile.encode()) + 1
+        assert case['Data'][fileNum] == (caseNum, 1.0)
+        assert sorted(case['Data']) == [1, 2, 3]
+        assert all(factor == 0.0 for num, (_, factor) in case['Data'].items()
+                   if num != fileNum)
+
+
+def test_duplicate_result_files(tmp_path):
+    St7API_Sim.build_model(4, 3)
+
+    with pytest.raises(ValueError):
+        St7Toolbox_JA.combine_result_files(
+            str(tmp_path / 'model.st7').encode(), str(tmp_path).encode(),
+            b'Combined.NLA', [b'Stage1.NLA', b'Stage2.NLA', b'Stage1.NLA'])
+    assert 'St7OpenFile' not in St7API_Sim.CallCounts
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Reinforcement design checked against hand calculations
+"""
+
+import numpy as np
+import pytest
+
+import DesignToolbox
+
+
+def test_wood_armer_moments():
+    # Mxx, Myy, Mxy and the bottom and top design moments
+    #   10,  4, 2: Mx* = 10 + 2 = 12, My* = 4 + 2 = 6, top Mx* = 8 and
+    #              My* = 2 both positive, no top steel
+    #   10, -5, 2: My* = -3 < 0, bottom Mx* = 10 + 2^2/5 = 10.8 and My* = 0,
+    #              top Mx* = 8 > 0 so top My* = -5 - 2^2/10 = -5.4
+    #   -8,  6, 4: Mx* = -4 < 0, bottom My* = 6 + 4^2/8 = 8 and Mx* = 0,
+    #              top My* = 2 > 0 so top Mx* = -8 - 4^2/6 = -10.667
+    #    0,  0, 3: pure twist, |Mxy| on both faces and directions
+    Mx_bot, My_bot, Mx_top, My_top = DesignToolbox.wood_armer_moments(
+        [10.0, 10.0, -8.0, 0.0], [4.0, -5.0, 6.0, 0.0], [2.0, 2.0, 4.0, 3.0])
+
+    np.testing.assert_allclose(Mx_bot, [12.0, 10.8, 0.0, 3.0])
+    np.testing.assert_allclose(My_bot, [6.0, 0.0, 8.0, 3.0])
+    np.testing.assert_allclose(Mx_top, [0.0, 0.0, 32 / 3, 3.0])
+    np.testing.assert_allclose(My_top, [0.0, 5.4, 0.0, 3.0])
+
+
+def test_membrane_layer():
+    # nx, ny, nxy on a 0.12 m layer
+    #    2,  1, -1.5: both steels, fx = 2 + 1.5, fy = 1 + 1.5, fc = 3
+    #   -4,  1,  2:   nx + |nxy| < 0, no x steel, fy = 1 + 2^2/4 = 2,
+    #                 fc = 4 + 2^2/4 = 5
+    #    1, -4,  2:   no y steel, fx = 1 + 2^2/4 = 2, fc = 5
+    #   -3, -1,  0.5: fy = -1 + 0.5^2/3 < 0, no steel, principal
+    #                 compression 2 + sqrt(1 + 0.25) = 3.1180
+    fx, fy, sc = DesignToolbox.membrane_layer(
+        np.array([2.0, -4.0, 1.0, -3.0]), np.array([1.0, 1.0, -4.0, -1.0]),
+        np.array([-1.5, 2.0, 2.0, 0.5]), 0.12)
+
+    np.testing.assert_allclose(fx, [3.5, 0.0, 2.0, 0.0])
+    np.testing.assert_allclose(fy, [2.5, 2.0, 0.0, 0.0])
+    np.testing.assert_allclose(sc * 0.12, [3.0, 5.0, 5.0, 3.1180340],
+                               rtol=1e-6)
+
+
+def test_flexural_steel():
+    # h = 0.3 m, d = 0.25 m, fc = 40 MPa, fsy = 500 MPa, phi = 0.8
+    # alpha2 = 0.85 - 0.0015 * 40 = 0.79, phi alpha2 fc d^2 = 1.58
+    #   M = 0.2: ratio = 0.4 / 1.58 = 0.25316, depth = 0.25 (1 - 0.86420)
+    #            = 0.033951 m, C = 0.79 * 40 * 0.033951 = 1.07285 MN/m,
+    #            Ast = 1.07285 / 500 = 2145.7 mm2/m
+    #   M = 0.2, N = 0.1: Ms = 0.2 - 0.1 * 0.1 = 0.19, ratio = 0.24051,
+    #            depth = 0.032128 m, C = 1.01523 MN/m,
+    #            Ast = (1.01523 + 0.1 / 0.8) / 500 = 2280.5 mm2/m
+    #   M = 2.0: ratio = 2.53 > 1, section too thin
+    Ast = DesignToolbox.flexural_steel(np.array([0.2, 0.2, 2.0]),
+                                       np.array([0.0, 0.1, 0.0]), 0.3, 0.25,
+                                       40.0, 500.0, 0.8)
+
+    assert Ast[0] == pytest.approx(2145.7, rel=1e-4)
+    assert Ast[1] == pytest.approx(2280.5, rel=1e-4)
+    assert np.isinf(Ast[2])
+
+
+def test_shear_steel():
+    # h = 0.5 m, d = 0.44 m: dv = max(0.396, 0.36) = 0.396 m
+    # vuc = 0.1 * sqrt(40) * 0.396 = 0.25045 MN/m, cot(36) = 1.37638
+    #   v0 = hypot(0.3, 0.4) = 0.5: (0.5 / 0.7 - 0.25045)
+    #        / (500 * 0.396 * 1.37638) = 1702.0 mm2/m2
+    #   v0 = 0.05: concrete sufficient
+    Asv = DesignToolbox.shear_steel(np.array([0.3, 0.03]),
+                                    np.array([0.4, 0.04]), 0.5, 0.44, 40.0,
+                                    500.0, 0.7, 0.1, 36.0)
+
+    assert Asv[0] == pytest.approx(1702.0, rel=1e-4)
+    assert Asv[1] == 0.0
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+API return code checks and their interplay with the profiler wrappers
+"""
+
+import ctypes
+import sys
+
+import pytest
+
+import St7API_Sim
+import St7Profiler
+import St7Toolbox_JA
+
+
+def native_function():
+    """
+    ctypes function of the C library standing in for an St7API function,
+    labs(x) returns a non zero code for x != 0
+    """
+
+    libc = ctypes.CDLL('msvcrt' if sys.platform == 'win32' else None)
+    func = libc.labs
+    func.argtypes = [ctypes.c_long]
+    func.restype = ctypes.c_long
+
+    return func
+
+
+@pytest.fixture
+def native_api():
+    St7API_Sim.St7NativeCall = native_function()
+    yield
+    St7Profiler.disable()
+    St7Toolbox_JA.remove_error_checks()
+    del St7API_Sim.St7NativeCall
+
+
+@pytest.mark.parametrize('profileFirst', [True, False])
+def test_checks_with_profiler(native_api, profileFirst):
+    if profileFirst:
+        St7Profiler.enable()
+        St7Toolbox_JA.install_error_checks()
+    else:
+        St7Toolbox_JA.install_error_checks()
+        St7Profiler.enable()
+
+    assert St7API_Sim.St7NativeCall(0) == 0
+    with pytest.raises(St7Toolbox_JA.St7Error) as error:
+        St7API_Sim.St7NativeCall(-5)
+    assert error.value.code == 5
+    assert error.value.function == 'labs'
+
+    with St7Toolbox_JA.collect_errors() as errors:
+        St7API_Sim.St7NativeCall(3)
+    assert [err.code for err in errors] == [3]
+
+    St7Profiler.disable()
+    with pytest.raises(St7Toolbox_JA.St7Error):
+        St7API_Sim.St7NativeCall(1)
+
+
+def test_opt_in_from_open_model_results(native_api, monkeypatch, tmp_path):
+    St7API_Sim.build_model(4, 1)
+    modelname_bt = str(tmp_path / 'model.st7').encode()
+
+    St7Toolbox_JA.open_model_results(modelname_bt, b'', b'model.NLA')
+    assert St7API_Sim.St7NativeCall(1) == 1
+
+    monkeypatch.setattr(St7Toolbox_JA, 'CheckErrors', True)
+    St7Toolbox_JA.open_model_results(modelname_bt, b'', b'model.NLA')
+    with pytest.raises(St7Toolbox_JA.St7Error):
+        St7API_Sim.St7NativeCall(1)
+
+
+@pytest.mark.parametrize('export', [
+    lambda: St7Toolbox_JA.export_platenodes(b'model.st7', b'', [1], 4, 4,
+                                            0.0, OutputFormat='none'),
+    lambda: St7Toolbox_JA.combine_result_files(b'model.st7', b'',
+                                               b'all.LSA', [b'model.LSA']),
+    lambda: St7Toolbox_JA.tune_solver(b'model.st7', b''),
+])
+def test_open_failure_raises(monkeypatch, export):
+    released = []
+    monkeypatch.setattr(St7API_Sim, 'St7OpenFile', lambda *args: 2)
+    monkeypatch.setattr(St7API_Sim, 'St7Release',
+                        lambda: released.append(True))
+
+    with pytest.raises(St7Toolbox_JA.St7Error) as error:
+        export()
+    assert error.value.code == 2
+    assert not released
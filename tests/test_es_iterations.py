@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Property tables of the evolutionary stiffness iterations
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import St7Toolbox_JA_V2
+
+
+def property_table(names, modulus, thickness=0.5, material='Isotropic'):
+    return pd.DataFrame({'Property Name': names, 'PlateType': 'Plate/Shell',
+                         'Material': material, 'Modulus': modulus,
+                         'Membrane Thickness': thickness,
+                         'HeatSource': 0.0})
+
+
+def test_stiffness_change_matched_by_plate():
+    DF = property_table([1, 2, 3], [100.0, 200.0, 300.0])
+    shuffled = DF.iloc[[2, 0, 1]].reset_index(drop=True)
+    assert St7Toolbox_JA_V2.stiffness_change(DF, shuffled) == 0.0
+
+    newDF = shuffled.copy()
+    newDF.loc[newDF['Property Name'] == 2, 'Modulus'] = 150.0
+    assert St7Toolbox_JA_V2.stiffness_change(DF, newDF) == 0.25
+    assert St7Toolbox_JA_V2.stiffness_change(
+        DF, newDF, columns=['Membrane Thickness']) == 0.0
+
+    assert St7Toolbox_JA_V2.stiffness_change(
+        DF, property_table([1, 2, 4], [100.0, 200.0, 300.0])) == np.inf
+
+
+def test_stiffness_change_without_stiffness_column():
+    DF = property_table([1, 2], [100.0, 200.0])
+
+    with pytest.raises(ValueError):
+        St7Toolbox_JA_V2.stiffness_change(DF, DF, columns=['Density'])
+    with pytest.raises(ValueError):
+        St7Toolbox_JA_V2.stiffness_change(DF[['Property Name']],
+                                          DF[['Property Name']])
+
+
+def test_changed_plates():
+    previousDF = property_table([1, 2, 3], [100.0, 200.0, 300.0])
+    DF = property_table([3, 1, 2, 4], [300.0, 100.0, 200.0 * (1 + 1e-8),
+                                       400.0])
+    DF.loc[1, 'Material'] = 'Orthotropic'
+    DF['HeatSource'] = 5.0
+
+    changed = St7Toolbox_JA_V2.changed_plates(DF, previousDF, 5)
+
+    assert list(changed) == [False, True, False, True]
+
+
+@pytest.mark.parametrize('modelname, expected', [
+    ('Tunnel.st7', 'Tunnel_Iter1.st7'),
+    ('Tunnel_Iter1.st7', 'Tunnel_Iter2.st7'),
+    ('C:/Models/TunnelIter12.st7', 'C:/Models/TunnelIter2.st7')])
+def test_iteration_model_name(modelname, expected):
+    iteration_no = 2 if 'Iter' in modelname else 1
+
+    assert St7Toolbox_JA_V2.iteration_model_name(modelname,
+                                                 iteration_no) == expected
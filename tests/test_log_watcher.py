@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Solver log lines read by the log watcher
+"""
+
+import math
+
+import St7LogWatcher
+
+
+def read_log(lines):
+    Progress = St7LogWatcher.new_progress()
+    for line in lines:
+        St7LogWatcher.update_progress(Progress, line)
+
+    return Progress
+
+
+def test_failure_lines():
+    Progress = read_log([
+        'Relative error tolerance     1.000E-03',
+        'Error estimate: energy norm',
+        'Increment 1  Load factor 1.000E-01',
+        '*** ERROR: Solution did not converge',
+        'Increment 2  Load factor 2.000E-01',
+        'Solution diverging, reducing the load step',
+        'WARNING: solution has not converged in 50 iterations'])
+
+    assert Progress['failures'] == 3
+    assert Progress['incrementFailures'] == 2
+    assert St7LogWatcher.check_rules(Progress, {'maxFailures': 1}) \
+        == '2 failure lines in increment 2'
+    assert St7LogWatcher.check_rules(Progress, {'maxFailures': 2}) is None
+
+
+def test_norm_of_iteration_lines():
+    Progress = read_log([
+        'Norm tolerance 1.000E-04',
+        'Increment 1  Load factor 1.000E+00  Time 3.500E+01',
+        'Iteration 1  Displacement Norm: 2.500E-01  Time 3.600E+01',
+        'Iteration 2  Residual = 4.0E-03  Elapsed 3.7E+01'])
+
+    assert Progress['norms'] == [0.25, 0.004]
+
+    St7LogWatcher.update_progress(Progress,
+                                  'Iteration 3  Force Norm: NaN  Time 1.0E+02')
+    assert math.isnan(Progress['norm'])
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Output formats of the result exporters
+"""
+
+import pytest
+
+import St7API_Sim
+import St7Toolbox_JA
+
+
+def test_unknown_formats_rejected(tmp_path):
+    St7API_Sim.build_model(4, 2)
+    modelname_bt = str(tmp_path / 'model.st7').encode()
+    tempfolder_bt = str(tmp_path).encode()
+
+    with pytest.raises(ValueError):
+        St7Toolbox_JA.export_brick_results(modelname_bt, tempfolder_bt,
+                                           b'model.NLA', [1], 0,
+                                           OutputFormat='npz')
+    with pytest.raises(ValueError):
+        St7Toolbox_JA.export_node_results(modelname_bt, tempfolder_bt,
+                                          b'model.NLA', [1], 4,
+                                          OutputFormat='xlsx')
+    assert 'St7OpenResultFile' not in St7API_Sim.CallCounts
+
+
+def test_none_format_writes_nothing(tmp_path):
+    Model = St7API_Sim.build_model(4, 2)
+    modelname_bt = str(tmp_path / 'model.st7').encode()
+    numNodes = Model['Totals'][St7API_Sim.tyNODE]
+
+    St7Toolbox_JA.export_node_results(modelname_bt, str(tmp_path).encode(),
+                                      b'model.NLA', [1, 2, 3, 4], numNodes,
+                                      OutputFormat='none')
+    outFiles = St7Toolbox_JA.export_brick_results(
+        modelname_bt, str(tmp_path).encode(), b'model.NLA', [1], 0,
+        OutputFormat='none')
+
+    assert outFiles == []
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Recording of the API calls and their Chrome trace
+"""
+
+import ctypes
+import json
+
+import pytest
+
+import St7API_Sim
+import St7Profiler
+
+
+@pytest.fixture
+def profiler():
+    St7Profiler.reset()
+    yield
+    St7Profiler.disable()
+    St7Profiler.reset()
+
+
+def api_events(fileName):
+    with open(fileName) as f:
+        events = json.load(f)['traceEvents']
+
+    return [event for event in events if event['cat'] == 'api']
+
+
+def test_trace_has_every_call(profiler, tmp_path):
+    St7Profiler.enable()
+    with St7Profiler.span('Totals'):
+        for ind in range(3):
+            St7API_Sim.St7GetNumStages(1, ctypes.c_long())
+    St7API_Sim.St7CloseFile(1)
+    St7Profiler.disable()
+
+    events = api_events(St7Profiler.write_chrome_trace(
+        str(tmp_path / 'trace.json')))
+
+    events.sort(key=lambda event: event['ts'])
+    assert [event['name'] for event in events] == \
+        ['St7GetNumStages'] * 3 + ['St7CloseFile']
+    assert all(event['ph'] == 'X' and event['dur'] >= 0 for event in events)
+    assert events[0]['ts'] > 0
+
+
+def test_trace_calls_cap(profiler, tmp_path):
+    St7Profiler.enable(traceCalls=2)
+    for ind in range(5):
+        St7API_Sim.St7CloseFile(1)
+    St7Profiler.disable()
+
+    # Durations of every call are kept for the report
+    assert St7Profiler.report()['calls']['St7CloseFile']['count'] == 5
+    events = api_events(St7Profiler.write_chrome_trace(
+        str(tmp_path / 'trace.json')))
+    assert len(events) == 2
+    assert events[0]['ts'] < events[1]['ts']
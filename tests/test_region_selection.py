@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+Entities of the groups restricted to a region
+"""
+
+import numpy as np
+
+import St7API_Sim
+import St7Toolbox_JA
+
+
+def test_only_region_entities_looked_up():
+    Model = St7API_Sim.build_model(1000, 2)
+    Groups = Model['Group'][St7API_Sim.tyPLATE]
+    region = np.array([900, 5, 17, 17, 400, 2000])
+
+    PlateNum = St7Toolbox_JA.get_group_entities(St7API_Sim.tyPLATE, 1000,
+                                                [1, 2], elements=region)
+
+    expected = [num for num in (5, 17, 400, 900) if Groups[num - 1] <= 2]
+    assert list(PlateNum) == expected
+    assert St7API_Sim.CallCounts['St7GetElementGroup'] == 4
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+User result files written from post-processed values
+"""
+
+import ctypes
+
+import numpy as np
+import pytest
+
+import St7API_Sim
+import St7Toolbox_JA
+
+
+def read_plate_result(plateNum, caseNum):
+    NumPoints = ctypes.c_long()
+    NumColumns = ctypes.c_long()
+    Results = (ctypes.c_double * St7API_Sim.kMaxPlateResult)()
+    ret = St7API_Sim.St7GetPlateResultArray(
+        1, St7API_Sim.rtPlateStress, St7API_Sim.stPlateCombined, plateNum,
+        caseNum, St7API_Sim.AtCentroid, St7API_Sim.psPlateMidPlane, 0,
+        NumPoints, NumColumns, Results)
+    assert ret == 0
+
+    return np.array(Results[:NumColumns.value])
+
+
+def read_beam_result(beamNum, caseNum):
+    NumColumns = ctypes.c_long()
+    Results = (ctypes.c_double * 12)()
+    ret = St7API_Sim.St7GetBeamResultEndPos(
+        1, St7API_Sim.rtBeamForce, St7API_Sim.stBeamLocal, beamNum, caseNum,
+        NumColumns, Results)
+    assert ret == 0
+
+    return np.array(Results[:NumColumns.value])
+
+
+def test_round_trip(tmp_path):
+    St7API_Sim.build_model(5, 2, numBeams=3)
+    modelname_bt = str(tmp_path / 'model.st7').encode()
+    resfile_bt = str(tmp_path / 'Design.LSA').encode()
+
+    PlateNum = np.array([2, 4, 5])
+    PlateValues = np.arange(12, dtype=np.float64).reshape(2, 3, 2)
+    plateSlots = [St7API_Sim.ipPlateShellResFileNyy,
+                  St7API_Sim.ipPlateShellResFileMidPlaneSxx]
+    BeamNum = np.array([1, 3])
+    BeamValues = np.array([[1.5, 2.5], [3.5, 4.5]])
+
+    ret = St7Toolbox_JA.write_result_file(
+        modelname_bt, str(tmp_path).encode(), resfile_bt,
+        ['Utilisation', 'Stage 2'], PlateNum, PlateValues, BeamNum,
+        BeamValues, plateSlots=plateSlots)
+    assert ret == 0
+
+    CaseName_list = St7Toolbox_JA.open_result_cases(resfile_bt)
+    assert CaseName_list == ['Utilisation', 'Stage 2']
+
+    for caseInd in range(2):
+        for plateInd, plateNum in enumerate(PlateNum):
+            Row = read_plate_result(int(plateNum), caseInd + 1)
+            assert len(Row) == St7API_Sim.kPlateShellResFileStressSize
+            np.testing.assert_array_equal(Row[plateSlots],
+                                          PlateValues[caseInd, plateInd])
+            assert not np.delete(Row, plateSlots).any()
+        for beamInd, beamNum in enumerate(BeamNum):
+            Row = read_beam_result(int(beamNum), caseInd + 1)
+            assert Row[St7API_Sim.ipBeamResFileSF1] == \
+                BeamValues[caseInd, beamInd]
+    St7Toolbox_JA.close_model_results()
+
+
+def test_arguments_checked_against_binding():
+    with pytest.raises(ctypes.ArgumentError):
+        St7API_Sim.St7NewResFile(1, 'Design.LSA',
+                                 St7API_Sim.stLinearStaticSolver)
+    with pytest.raises(TypeError):
+        St7API_Sim.St7SetResFileBeamResult(1, St7API_Sim.rtBeamForce, 1,
+                                           (ctypes.c_double * 6)())
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Section cut resultants of plate models
+"""
+
+import numpy as np
+import pytest
+
+import SectionCutToolbox
+
+
+def flat_mesh(length=4, width=2):
+    """
+    Unit quads in the XY plane, x from 0 to length and y from 0 to width,
+    nodes counter-clockwise so the plate normals are +Z
+    """
+
+    x, y = np.meshgrid(np.arange(length + 1.0), np.arange(width + 1.0),
+                       indexing='ij')
+    NodeXYZ = np.stack([x.ravel(), y.ravel(), np.zeros(x.size)], axis=1)
+    node = np.arange(x.size).reshape(x.shape) + 1
+    PlateNodes = np.stack([node[:-1, :-1].ravel(), node[1:, :-1].ravel(),
+                           node[1:, 1:].ravel(), node[:-1, 1:].ravel()],
+                          axis=1)
+
+    return NodeXYZ, PlateNodes
+
+
+@pytest.mark.parametrize('position', [1.5, 2.0])
+def test_uniform_flat_plate(position):
+    # 2.0 is a node line, the cut runs along the plate edges
+    NodeXYZ, PlateNodes = flat_mesh()
+    XX, XY, Mxx = 3.0, -1.5, 0.7
+    Force = np.zeros((2, len(PlateNodes), 6))
+    Force[..., 0] = XX
+    Force[..., 3] = XY
+    Force[1] *= 2.0
+    Moment = np.zeros_like(Force)
+    Moment[..., 0] = Mxx
+
+    Cuts = SectionCutToolbox.section_cuts(
+        NodeXYZ, PlateNodes, Force, Moment, origins=[[position, 0.0, 0.0]],
+        normals=[[1.0, 0.0, 0.0]])
+
+    width = 2.0
+    assert Cuts['numPlates'][0] == 2
+    np.testing.assert_allclose(Cuts['length'], [width])
+    np.testing.assert_allclose(Cuts['N'][:, 0], [XX * width, 2 * XX * width])
+    np.testing.assert_allclose(Cuts['V1'][:, 0],
+                               [XY * width, 2 * XY * width])
+    np.testing.assert_allclose(Cuts['M1'][:, 0], [Mxx * width, Mxx * width])
+    np.testing.assert_allclose(Cuts['V2'], 0.0, atol=1e-12)
+    np.testing.assert_allclose(Cuts['M2'], 0.0, atol=1e-12)
+
+
+def test_cut_chunk_bounded_by_mesh_size(monkeypatch):
+    NodeXYZ, PlateNodes = flat_mesh()
+    monkeypatch.setattr(SectionCutToolbox, 'kIntegrationChunk', 4 * 8 * 3)
+
+    origins = np.stack([np.linspace(0.25, 3.75, 8), np.zeros(8),
+                        np.zeros(8)], axis=1)
+    Segments = SectionCutToolbox.cut_geometry(NodeXYZ, PlateNodes, origins,
+                                              [[1.0, 0.0, 0.0]] * 8)
+
+    assert list(np.bincount(Segments['cut'])) == [2] * 8
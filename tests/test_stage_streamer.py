@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Result cases extracted while the solver runs
+"""
+
+import pytest
+
+import St7API_Sim
+import St7LogWatcher
+import St7Toolbox_JA
+
+
+def test_result_file_read_once_per_increment():
+    St7API_Sim.build_model(4, 3)
+    Extracted = []
+    callback = St7Toolbox_JA.stage_streamer(
+        lambda caseNums, CaseName_list: Extracted.extend(caseNums),
+        b'model.NLA')
+    Progress = St7LogWatcher.new_progress()
+
+    for increments in (1, 1, 1, 2, 2):
+        Progress['increments'] = increments
+        callback(Progress)
+    assert St7API_Sim.CallCounts['St7OpenResultFile'] == 2
+    assert St7API_Sim.CallCounts['St7CloseResultFile'] == 2
+    assert Extracted == [1, 2]
+
+    Progress['status'] = 'finished'
+    callback(Progress)
+    assert Extracted == [1, 2, 3]
+
+
+def test_result_file_closed_when_extract_fails():
+    St7API_Sim.build_model(4, 3)
+
+    def extract(caseNums, CaseName_list):
+        raise RuntimeError('extraction failed')
+
+    callback = St7Toolbox_JA.stage_streamer(extract, b'model.NLA')
+    Progress = St7LogWatcher.new_progress()
+    Progress['stage'] = 2
+
+    with pytest.raises(RuntimeError):
+        callback(Progress)
+    assert St7API_Sim.CallCounts['St7CloseResultFile'] == 1
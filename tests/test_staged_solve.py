@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Groups and stages of staged solves
+"""
+
+import numpy as np
+import pytest
+
+import St7API_Sim
+import St7Toolbox_JA
+
+
+def build_staged_model():
+    # Group IDs left by deleted groups, 4 groups born in stages 1, 3, 5, 7
+    Model = St7API_Sim.build_model(8, 8, numGroups=4)
+    Model['GroupIDs'] = np.array([2, 5, 9, 14])
+    Model['Group'][St7API_Sim.tyPLATE] = np.array([2, 2, 5, 5, 9, 9, 14, 14])
+
+    return Model
+
+
+def test_stage_groups_by_group_id():
+    build_staged_model()
+
+    StageGroups, GroupIDs = St7Toolbox_JA.get_stage_groups()
+
+    assert list(GroupIDs) == [2, 5, 9, 14]
+    assert list(StageGroups.argmax(axis=0) + 1) == [1, 3, 5, 7]
+
+
+def test_plan_from_changed_group(tmp_path):
+    build_staged_model()
+    modelname_bt = str(tmp_path / 'model.st7').encode()
+    tempfolder_bt = str(tmp_path).encode()
+    result_bt = str(tmp_path / 'model.NLA').encode()
+
+    plan = St7Toolbox_JA.plan_staged_solve(modelname_bt, tempfolder_bt,
+                                           result_bt, changedGroups=[9])
+    assert plan['stages'] == [1, 2, 3, 4, 5, 6, 7, 8]
+
+    (tmp_path / 'model.NLA').touch()
+    plan = St7Toolbox_JA.plan_staged_solve(modelname_bt, tempfolder_bt,
+                                           result_bt, changedGroups=[9])
+    assert plan['stages'] == [5, 6, 7, 8]
+    assert plan['initialCase'] == 4
+
+    plan = St7Toolbox_JA.plan_staged_solve(modelname_bt, tempfolder_bt,
+                                           result_bt, changedPlates=[7])
+    assert plan['firstStage'] == 7
+
+    with pytest.raises(ValueError):
+        St7Toolbox_JA.plan_staged_solve(modelname_bt, tempfolder_bt,
+                                        result_bt, changedGroups=[3])
+
+
+def test_result_groups_by_group_id(monkeypatch):
+    build_staged_model()
+    Calls = []
+    for name in ('St7EnableResultGroup', 'St7DisableResultGroup'):
+        monkeypatch.setattr(St7API_Sim, name,
+                            lambda uID, group, name=name:
+                            Calls.append((name, group)) or 0,
+                            raising=False)
+
+    St7Toolbox_JA.set_result_output(groups=[5, 14])
+
+    assert Calls == [('St7DisableResultGroup', 2),
+                     ('St7EnableResultGroup', 5),
+                     ('St7DisableResultGroup', 9),
+                     ('St7EnableResultGroup', 14)]
+
+    with pytest.raises(ValueError):
+        St7Toolbox_JA.set_result_output(groups=[4])
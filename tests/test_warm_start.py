@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+Initial conditions of warm started solves
+"""
+
+import St7API_Sim
+import St7Toolbox_JA
+
+
+def test_last_converged_case():
+    St7API_Sim.build_model(4, 5)
+    assert St7Toolbox_JA.get_last_converged_case(b'model.NLA') == 5
+
+    St7API_Sim.Model['Unconverged'] = {4, 5}
+    assert St7Toolbox_JA.get_last_converged_case(b'model.NLA') == 3
+
+    St7API_Sim.Model['Unconverged'] = {1, 2, 3, 4, 5}
+    assert St7Toolbox_JA.get_last_converged_case(b'model.NLA') == 5
+
+
+def test_warm_start_default_case(monkeypatch):
+    St7API_Sim.build_model(4, 5)
+    St7API_Sim.Model['Unconverged'] = {5}
+    Calls = []
+    monkeypatch.setattr(St7API_Sim, 'St7SetNLAInitialFile',
+                        lambda *args: Calls.append(args) or 0,
+                        raising=False)
+
+    St7Toolbox_JA.set_warm_start(b'model.NLA')
+    St7Toolbox_JA.set_warm_start(b'model.NLA', 2)
+
+    assert Calls == [(1, b'model.NLA', 4), (1, b'model.NLA', 2)]